@@ -175,134 +175,54 @@ def create_app(config_class=None):
         os.makedirs(app.config.get('UPLOAD_FOLDER', 'uploads'), exist_ok=True)
         os.makedirs(app.config.get('EXCEL_TEMPLATES_FOLDER', 'templates/excel'), exist_ok=True)
         
-        # 3. Create database tables (import models to register them)
-        from models import User, Pipeline, disable_metrics_events
-        
-        # 3.1 Add backward-compatible columns required by current models
-        from schema_updates import ensure_sales_activity_columns
-        ensure_sales_activity_columns()
-
-        # 3.2 Add legacy compatibility columns if they do not exist
-        from sqlalchemy import text
-        try:
-            db.session.execute(text('ALTER TABLE users ADD COLUMN dashboard_filters TEXT'))
-            db.session.commit()
-            print("[OK] Added dashboard_filters column")
-        except Exception:
-            db.session.rollback()
-            print("[INFO] dashboard_filters column might already exist")
+        # 3. Check the schema version. DDL, data fixes and default users are applied
+        #    by `flask bitcrm-upgrade`; SCHEMA_AUTO_UPGRADE runs it here when behind
+        #    and seeds the default users into an empty users table.
+        from services.upgrade_service import check_schema_version
+        check_schema_version(app)
 
-        try:
-            db.session.execute(text('ALTER TABLE pipeline ADD COLUMN forecast_base_month DATE'))
-            db.session.commit()
-            print("[OK] Added forecast_base_month column")
-        except Exception:
-            db.session.rollback()
-            print("[INFO] forecast_base_month column might already exist")
-
-        try:
-            db.session.execute(text('ALTER TABLE pipeline ADD COLUMN deposit_date DATE'))
-            db.session.commit()
-            print("[OK] Added deposit_date column")
-        except Exception:
-            db.session.rollback()
-            print("[INFO] deposit_date column might already exist")
-        
-        # 3.3 Create all tables and migrate stored Sales Activity terminology
-        db.create_all()
-        from schema_updates import ensure_sales_activity_statuses, ensure_sales_activity_terminology
-        ensure_sales_activity_terminology()
-        ensure_sales_activity_statuses()
-        
-        # 4. Handle existing users - add default dashboard_filters value
-        users = User.query.all()
-        for user in users:
-            if user.dashboard_filters is None:
-                user.dashboard_filters = '{}'
-        if users:
-            db.session.commit()
-
-        from utils import calculate_pipeline_metrics, get_forecast_base_month
-        current_forecast_month = get_forecast_base_month()
-        stale_pipelines = Pipeline.query.filter(
-            Pipeline.is_deleted.is_(False),
-            (Pipeline.forecast_base_month.is_(None)) |
-            (Pipeline.forecast_base_month != current_forecast_month)
-        ).all()
-        if stale_pipelines:
-            with disable_metrics_events():
-                for pipeline in stale_pipelines:
-                    calculate_pipeline_metrics(pipeline, current_forecast_month)
-                db.session.commit()
-            print(f"[OK] Refreshed rolling forecast for {len(stale_pipelines)} pipelines")
-        
-        # 5. Initialize default users (only if users table is empty)
-        # Use file lock to prevent race condition in gunicorn
-        lock_file_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'instance', '.users_initialized.lock')
-        os.makedirs(os.path.dirname(lock_file_path), exist_ok=True)
-        
-        # Check if already initialized (gunicorn workers)
-        skip_initialization = os.path.exists(lock_file_path)
-        
-        try:
-            # Double-check: see if admin user exists
-            admin_exists = User.query.filter_by(username='Bruce').first() is not None
-            
-            if not skip_initialization and not admin_exists:
-                # First worker - create users
-                open(lock_file_path, 'w').close()  # Create lock file
-                
-                print("[INFO] Creating default users...")
-                admin_users = [
-                    ('Bruce', 'bruce@example.com', 'bitcrm', 'admin'),
-                    ('Admin', 'admin@example.com', 'bitcrm', 'admin'),
-                ]
-                sales_users = [
-                    ('Eric', 'eric@example.com', 'bitcrm', 'sales'),
-                    ('Anthony', 'anthony@example.com', 'bitcrm', 'sales'),
-                    ('Joseph', 'joseph@example.com', 'bitcrm', 'sales'),
-                    ('Romeo', 'romeo@example.com', 'bitcrm', 'sales'),
-                    ('Uly', 'uly@example.com', 'bitcrm', 'sales'),
-                    ('Lancey', 'lancey@example.com', 'bitcrm', 'sales'),
-                    ('Sherwin', 'sherwin@example.com', 'bitcrm', 'sales'),
-                    ('Cean', 'cean@example.com', 'bitcrm', 'sales'),
-                    ('Jeromo', 'jeromo@example.com', 'bitcrm', 'sales'),
-                    ('Jokie', 'jokie@example.com', 'bitcrm', 'sales'),
-                    ('Jam', 'jam@example.com', 'bitcrm', 'sales'),
-                ]
-                marketing_users = [
-                    ('Romeo_m', 'romeo_m@example.com', 'bitcrm', 'marketing'),
-                    ('Lancey_m', 'lancey_m@example.com', 'bitcrm', 'marketing'),
-                ]
-                
-                created = 0
-                for username, email, password, role in admin_users + sales_users + marketing_users:
-                    if not User.query.filter_by(username=username).first():
-                        user = User(username=username, email=email, role=role)
-                        user.set_password(password)
-                        db.session.add(user)
-                        created += 1
-                
-                db.session.commit()
-                print(f"[OK] Created {created} default users")
-            else:
-                print("[OK] Users already exist, skipping creation")
-        except Exception as e:
-            db.session.rollback()
-            # Remove lock file on error so retry can happen
-            try:
-                os.remove(lock_file_path)
-            except:
-                pass
-            print(f"[WARN] User initialization failed: {e}")
+        # 4. Close connections opened above. With `gunicorn --preload` the factory
+        #    runs once in the master; pooled sockets must not be inherited by workers.
+        db.engine.dispose()
     
     # =========================================================================
     # WEEKLY METRICS AUTO-UPDATE via SQLAlchemy Events
     # =========================================================================
     
     from sqlalchemy import event
-    from services.weekly_metrics_service import register_weekly_metrics_hooks
+    from services.weekly_metrics_service import register_weekly_metrics_commands, register_weekly_metrics_hooks
     register_weekly_metrics_hooks(app)
+    register_weekly_metrics_commands(app)
+
+    from services.revenue_ledger_service import register_revenue_ledger_commands, register_revenue_ledger_hooks
+    register_revenue_ledger_hooks(app)
+    register_revenue_ledger_commands(app)
+
+    from services.dashboard_cache_service import register_data_version_hooks
+    register_data_version_hooks(app)
+
+    from services.followup_service import register_followup_commands
+    register_followup_commands(app)
+
+    from services.upgrade_service import register_upgrade_commands
+    register_upgrade_commands(app)
+
+    from services.forecast_rollover_service import register_forecast_rollover_commands
+    register_forecast_rollover_commands(app)
+
+    from services.search_index_service import register_search_index_commands, register_search_index_hooks
+    register_search_index_hooks(app)
+    register_search_index_commands(app)
+
+    from services.pipeline_visibility_service import (
+        register_pipeline_visibility_commands,
+        register_pipeline_visibility_hooks,
+    )
+    register_pipeline_visibility_hooks(app)
+    register_pipeline_visibility_commands(app)
+
+    from services.export_job_service import register_export_job_commands
+    register_export_job_commands(app)
     
     def get_week_start(ref_date=None):
         """获取本周一日期"""
@@ -0,0 +1,204 @@
+"""
+Startup time and memory benchmark for BITCRM workers.
+
+Measures, each in fresh processes against a throwaway SQLite database:
+- factory:  seconds to import the app and run create_app(), RSS afterwards and
+            which heavy libraries (pandas/numpy/openpyxl) got imported
+- excel:    extra seconds/RSS when the first Excel import/export loads pandas
+- gunicorn: total RSS and PSS (proportional set size, i.e. shared pages split
+            between processes) of the master plus workers once they serve requests
+
+Run (Linux; PSS needs /proc/<pid>/smaps_rollup):
+    python benchmark_startup.py --label after --output docs/startup_benchmark.jsonl
+
+Use --app-dir to benchmark another checkout (e.g. a `git worktree` of the
+previous release) with the same settings for a before/after comparison.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+
+
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl')
+
+FACTORY_PROBE = r"""
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+app = create_app()
+elapsed = time.perf_counter() - started
+
+def rss_mb():
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+
+result = {'seconds': elapsed, 'rss_mb': rss_mb(),
+          'heavy_modules': [name for name in %(heavy)r if name in sys.modules]}
+started = time.perf_counter()
+import pandas
+result['excel_seconds'] = time.perf_counter() - started
+result['excel_rss_mb'] = rss_mb() - result['rss_mb']
+print(json.dumps(result))
+"""
+
+
+def _environment(database_path, extra=None):
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': f'sqlite:///{database_path}',
+        'FLASK_CONFIG_CLASS': 'config.DevelopmentConfig',
+        'SCHEMA_AUTO_UPGRADE': 'true',
+        'PYTHONDONTWRITEBYTECODE': '1',
+    })
+    env.update(extra or {})
+    return env
+
+
+def _median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def measure_factory(app_dir, database_path, runs):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', FACTORY_PROBE % {'heavy': HEAVY_MODULES}],
+            cwd=app_dir, env=_environment(database_path), capture_output=True, text=True, check=True,
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        'seconds': round(_median([sample['seconds'] for sample in samples]), 3),
+        'rss_mb': round(_median([sample['rss_mb'] for sample in samples]), 1),
+        'heavy_modules': samples[-1]['heavy_modules'],
+        'excel_seconds': round(_median([sample['excel_seconds'] for sample in samples]), 3),
+        'excel_rss_mb': round(_median([sample['excel_rss_mb'] for sample in samples]), 1),
+    }
+
+
+def _children(pid):
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as stat:
+                fields = stat.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(entry))
+    return children
+
+
+def _memory_kb(pid):
+    values = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as rollup:
+            for line in rollup:
+                key, _, rest = line.partition(':')
+                if key in ('Rss', 'Pss'):
+                    values[key] = int(rest.split()[0])
+    except OSError:
+        pass
+    return values
+
+
+def measure_gunicorn(app_dir, database_path, workers, preload, port):
+    env = _environment(database_path, {
+        'PORT': str(port),
+        'GUNICORN_WORKERS': str(workers),
+        'GUNICORN_PRELOAD': 'true' if preload else 'false',
+    })
+    started = time.perf_counter()
+    master = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'run_app:app'],
+        cwd=app_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.time() + 120
+        ready_seconds = None
+        while time.time() < deadline:
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{port}/login', timeout=2).read()
+                if len(_children(master.pid)) >= workers:
+                    ready_seconds = time.perf_counter() - started
+                    break
+            except OSError:
+                pass
+            time.sleep(0.2)
+        if ready_seconds is None:
+            raise RuntimeError('gunicorn did not become ready')
+
+        # Let every worker handle a request so lazily initialised state is counted
+        for _ in range(workers * 4):
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/login', timeout=5).read()
+        time.sleep(1)
+
+        pids = [master.pid] + _children(master.pid)
+        memory = [_memory_kb(pid) for pid in pids]
+        return {
+            'preload': preload,
+            'workers': workers,
+            'ready_seconds': round(ready_seconds, 2),
+            'rss_mb': round(sum(item.get('Rss', 0) for item in memory) / 1024, 1),
+            'pss_mb': round(sum(item.get('Pss', 0) for item in memory) / 1024, 1),
+        }
+    finally:
+        master.terminate()
+        master.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--label', default='current', help='Name stored with the results, e.g. before/after')
+    parser.add_argument('--app-dir', default=os.path.dirname(os.path.abspath(__file__)))
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters for the factory timing')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--skip-gunicorn', action='store_true')
+    parser.add_argument('--output', help='Append the results as one JSON line to this file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database_path = os.path.join(temp_dir, 'benchmark.db')
+        # First run creates the schema so timings exclude the one-off upgrade
+        measure_factory(args.app_dir, database_path, 1)
+
+        result = {
+            'label': args.label,
+            'recorded_at': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'factory': measure_factory(args.app_dir, database_path, args.runs),
+            'gunicorn': [],
+        }
+        if not args.skip_gunicorn:
+            for preload in (False, True):
+                result['gunicorn'].append(
+                    measure_gunicorn(args.app_dir, database_path, args.workers, preload, args.port)
+                )
+
+    factory = result['factory']
+    print(f"[{result['label']}] create_app: {factory['seconds']}s, RSS {factory['rss_mb']} MB, "
+          f"heavy modules at startup: {', '.join(factory['heavy_modules']) or 'none'}")
+    print(f"[{result['label']}] first Excel use: +{factory['excel_seconds']}s, +{factory['excel_rss_mb']} MB")
+    for run in result['gunicorn']:
+        print(f"[{result['label']}] gunicorn {run['workers']} workers, preload={run['preload']}: "
+              f"ready {run['ready_seconds']}s, RSS {run['rss_mb']} MB, PSS {run['pss_mb']} MB")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'a', encoding='utf-8') as output:
+            output.write(json.dumps(result) + '\n')
+
+
+if __name__ == '__main__':
+    main()
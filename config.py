@@ -51,13 +51,71 @@ class Config:
     # Excel template paths
     EXCEL_TEMPLATES_FOLDER = os.path.join(basedir, 'instance', 'templates')
     
+    # Schema upgrades: `flask bitcrm-upgrade` applies DDL, data fixes and default users.
+    # When enabled, app startup runs the upgrade if the database is behind and, with
+    # SEED_DEFAULT_USERS, creates the default accounts while the users table is empty.
+    SCHEMA_AUTO_UPGRADE = os.environ.get('SCHEMA_AUTO_UPGRADE', 'true').lower() == 'true'
+    SEED_DEFAULT_USERS = os.environ.get('SEED_DEFAULT_USERS', 'true').lower() == 'true'
+
     # Pagination
     PAGE_SIZE = 20
+
+    # Leads / Pipeline lists: keyset pages (per_page is capped at 200). Exact totals
+    # are cached per filter set and data version; turn off to skip counting entirely.
+    LIST_PAGE_SIZE = int(os.environ.get('LIST_PAGE_SIZE') or '100')
+    LIST_EXACT_TOTALS = os.environ.get('LIST_EXACT_TOTALS', 'true').lower() == 'true'
+
+    # Excel exports: rows fetched and written per chunk into a write-only workbook
+    EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE') or '1000')
+
+    # Excel imports: rows inserted per executemany batch (with their pipelines,
+    # support team, revenue ledger and Follow-up History rows)
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE') or '1000')
+
+    # Background exports: with EXPORT_JOBS_ENABLED the export buttons queue a job for
+    # `flask export-worker`, which writes the file to EXPORT_FOLDER; finished files
+    # are kept for EXPORT_RETENTION_HOURS
+    EXPORT_JOBS_ENABLED = os.environ.get('EXPORT_JOBS_ENABLED', 'false').lower() == 'true'
+    EXPORT_FOLDER = os.environ.get('EXPORT_FOLDER') or os.path.join(basedir, 'instance', 'exports')
+    EXPORT_RETENTION_HOURS = float(os.environ.get('EXPORT_RETENTION_HOURS') or '24')
+    EXPORT_WORKER_POLL_SECONDS = float(os.environ.get('EXPORT_WORKER_POLL_SECONDS') or '2')
     
-    # Flask-Caching configuration
-    CACHE_TYPE = 'SimpleCache'
+    # Flask-Caching configuration. The dashboard cache and its refresh lock must be
+    # shared by every gunicorn worker: Redis when CACHE_REDIS_URL / REDIS_URL is set
+    # (needs the `redis` package; required with several hosts), otherwise files under
+    # CACHE_DIR. CACHE_TYPE=SimpleCache keeps a private copy per process (single worker only).
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL') or os.environ.get('REDIS_URL')
+    CACHE_TYPE = os.environ.get('CACHE_TYPE') or ('RedisCache' if CACHE_REDIS_URL else 'FileSystemCache')
+    CACHE_DIR = os.environ.get('CACHE_DIR') or os.path.join(basedir, 'instance', 'cache')
+    CACHE_THRESHOLD = int(os.environ.get('CACHE_THRESHOLD') or '2000')  # FileSystemCache entries
+    CACHE_KEY_PREFIX = os.environ.get('CACHE_KEY_PREFIX') or 'bitcrm:'
     CACHE_DEFAULT_TIMEOUT = 300  # 5 minutes
 
+    # Dashboard cache: entries are keyed by the shared data version; stale entries
+    # are served while one background thread rebuilds them.
+    DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_CACHE_TIMEOUT') or '600')
+    DASHBOARD_CACHE_ASYNC_REFRESH = os.environ.get('DASHBOARD_CACHE_ASYNC_REFRESH', 'true').lower() == 'true'
+
+    # Kanban board: cards loaded per stage column on first render and per scroll fetch
+    KANBAN_PAGE_SIZE = int(os.environ.get('KANBAN_PAGE_SIZE') or '20')
+
+    # Follow-up History: entries shown in list cells and exports (detail views show all)
+    FOLLOWUP_PREVIEW_ENTRIES = int(os.environ.get('FOLLOWUP_PREVIEW_ENTRIES') or '3')
+
+    # Weekly metrics: seconds between the full reconcile passes run by `flask metrics-worker`
+    # (0 disables them; without a worker, bitcrm-metrics-reconcile.timer runs `flask metrics-reconcile`)
+    WEEKLY_METRICS_RECONCILE_INTERVAL = int(os.environ.get('WEEKLY_METRICS_RECONCILE_INTERVAL') or '3600')
+
+    # Weekly metrics refresh mode after commits:
+    #   sync     - apply deltas inside the committing request (default)
+    #   deferred - enqueue owner ids in metrics_jobs for `flask metrics-worker`
+    #   disabled - skip; rely on reconcile / rebuild
+    WEEKLY_METRICS_MODE = os.environ.get('WEEKLY_METRICS_MODE') or 'sync'
+    METRICS_JOB_COALESCE_SECONDS = int(os.environ.get('METRICS_JOB_COALESCE_SECONDS') or '2')
+    METRICS_JOB_BATCH_SIZE = int(os.environ.get('METRICS_JOB_BATCH_SIZE') or '100')
+    METRICS_JOB_MAX_ATTEMPTS = int(os.environ.get('METRICS_JOB_MAX_ATTEMPTS') or '5')
+    METRICS_WORKER_POLL_SECONDS = float(os.environ.get('METRICS_WORKER_POLL_SECONDS') or '2')
+
 
 class DevelopmentConfig(Config):
     """Development configuration."""
@@ -69,6 +127,9 @@ class ProductionConfig(Config):
     """Production configuration."""
     DEBUG = False
     ENV = 'production'
+
+    # Deploys run `flask bitcrm-upgrade` before starting workers
+    SCHEMA_AUTO_UPGRADE = os.environ.get('SCHEMA_AUTO_UPGRADE', 'false').lower() == 'true'
     
     # In production, ensure SECRET_KEY is set via environment
     @staticmethod
@@ -64,6 +64,13 @@ tmp_service="$(mktemp)"
 sed "s|__APP_DIR__|${APP_DIR}|g" "${APP_DIR}/bitcrm.service" > "${tmp_service}"
 install -m 644 "${tmp_service}" "/etc/systemd/system/${SERVICE_NAME}.service"
 rm -f "${tmp_service}"
+for unit in bitcrm-forecast-rollover.service bitcrm-forecast-rollover.timer \
+            bitcrm-metrics-reconcile.service bitcrm-metrics-reconcile.timer; do
+    tmp_unit="$(mktemp)"
+    sed "s|__APP_DIR__|${APP_DIR}|g" "${APP_DIR}/${unit}" > "${tmp_unit}"
+    install -m 644 "${tmp_unit}" "/etc/systemd/system/${unit}"
+    rm -f "${tmp_unit}"
+done
 
 chown -R "${APP_USER}:${APP_USER}" "${APP_DIR}"
 
@@ -71,6 +78,8 @@ echo "[7/7] Starting service..."
 systemctl daemon-reload
 systemctl enable "${SERVICE_NAME}"
 systemctl restart "${SERVICE_NAME}"
+systemctl enable --now bitcrm-forecast-rollover.timer
+systemctl enable --now bitcrm-metrics-reconcile.timer
 
 echo
 echo "BITCRM has been deployed to ${APP_DIR}"
@@ -18,8 +18,8 @@ from sqlalchemy import inspect, text
 
 from app import create_app
 from extensions import db
-from models import Pipeline, disable_metrics_events
-from utils import calculate_pipeline_metrics, get_forecast_base_month
+from services.forecast_rollover_service import rollover_pipeline_forecasts
+from utils import get_forecast_base_month
 
 
 TARGET_COLUMNS = [f"m{i}" for i in range(1, 13)]
@@ -159,17 +159,7 @@ def migrate_sqlite():
 
 
 def refresh_existing_forecasts(reference_date=None):
-    forecast_base_month = get_forecast_base_month(reference_date)
-    pipelines = Pipeline.query.all()
-    if not pipelines:
-        return 0
-
-    with disable_metrics_events():
-        for pipeline in pipelines:
-            calculate_pipeline_metrics(pipeline, forecast_base_month)
-        db.session.commit()
-
-    return len(pipelines)
+    return rollover_pipeline_forecasts(reference_date, only_stale=False)
 
 
 def main():
@@ -8,3 +8,17 @@ graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
 accesslog = '-'
 errorlog = '-'
 capture_output = True
+
+# Import the app once in the master so workers share its pages copy-on-write.
+# Heavy libraries (pandas/openpyxl/numpy) are imported lazily by the Excel and
+# forecast code paths, so they are not part of this shared image.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+
+def post_fork(server, worker):
+    """Give each worker its own connection pool instead of the master's."""
+    from extensions import db
+
+    app = worker.app.wsgi()
+    with app.app_context():
+        db.engine.dispose(close=False)
@@ -12,6 +12,39 @@ from contextlib import contextmanager
 import calendar
 
 
+def active_rows_index(name, *columns, dialect=None):
+    """未删除行（is_deleted = false）上的部分索引。
+
+    条件与查询里的 ``Model.is_deleted.is_(False)`` 在 PostgreSQL 和 SQLite 上
+    渲染出的表达式完全一致，查询规划器才会选用该索引。
+    ``dialect`` 表示只在该数据库上创建（如排序索引的 NULL 位置写法各库不同）。
+    """
+    condition = db.column('is_deleted', db.Boolean).is_(False)
+    index = db.Index(name, *columns, postgresql_where=condition, sqlite_where=condition)
+    if dialect:
+        index.info['dialect'] = dialect
+        index.ddl_if(dialect=dialect)
+    return index
+
+
+def list_order_indexes(name, date_added, *columns):
+    """列表默认排序（``date_added DESC NULLS LAST`` 后接 ``columns`` 升序）的索引。
+
+    与 ``SortKey.order_by()`` 的渲染一一对应：PostgreSQL 直接写 NULLS LAST；
+    SQLite 的索引不支持 NULLS，可空的升序列（如 company）按 ``col IS NULL, col``
+    建索引。两个方向的翻页都可直接（或反向）扫描索引，无需临时排序。
+    """
+    sqlite_columns = []
+    for column in columns:
+        if column.nullable:
+            sqlite_columns.append(column.is_(None))
+        sqlite_columns.append(column)
+    return (
+        active_rows_index(name, date_added.desc().nullslast(), *columns, dialect='postgresql'),
+        active_rows_index(f'{name}_sqlite', date_added.desc(), *sqlite_columns, dialect='sqlite'),
+    )
+
+
 # ============================================================================
 # USER MODEL
 # ============================================================================
@@ -91,9 +124,8 @@ class User(UserMixin, db.Model):
         # Check if user is owner or in support team
         if pipeline.owner_id == self.id:
             return True
-        if self in pipeline.support_team:
-            return True
-        return False
+        from services.pipeline_visibility_service import get_visible_pipeline_ids
+        return pipeline.id in get_visible_pipeline_ids(self.id)
     
     def get_full_name(self):
         """Return user's full name (username for now)."""
@@ -210,18 +242,38 @@ class SalesLead(db.Model):
     owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True, index=True)
     note = db.Column(db.Text, nullable=True)
     follow_up = db.Column(db.Text, nullable=True)
+    # follow_up 摘要，写入历史时同步维护（见 services/followup_service.py）
+    last_followup_at = db.Column(db.DateTime, nullable=True, index=True)
+    followup_count = db.Column(db.Integer, nullable=False, default=0)
 
     # Soft deletion
-    is_deleted = db.Column(db.Boolean, nullable=False, default=False, index=True)
+    # 不单独建索引：未删除行占绝大多数，列表查询走下方的部分索引
+    is_deleted = db.Column(db.Boolean, nullable=False, default=False)
     deleted_at = db.Column(db.DateTime, nullable=True)
     deleted_by_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # 列表/导出的常用过滤与排序（owner + 状态，按添加日期排序）
+    __table_args__ = (
+        active_rows_index('ix_sales_leads_active_owner_status', 'owner_id', 'leads_status'),
+        *list_order_indexes('ix_sales_leads_active_list_order', date_added, name, id),
+    )
     
     # Relationship to Pipeline
     pipeline = db.relationship('Pipeline', backref='sales_lead', uselist=False)
+
+    # Follow-up history entries (see FollowupEntry)
+    followup_entries = db.relationship(
+        'FollowupEntry',
+        primaryjoin="and_(foreign(FollowupEntry.entity_id) == SalesLead.id, "
+                    "FollowupEntry.entity_type == 'sales_lead')",
+        lazy='dynamic',
+        order_by='FollowupEntry.id',
+        overlaps='followup_entries',
+    )
     
     # Valid status options
     STATUS_OPTIONS = [
@@ -339,8 +391,14 @@ class SalesLead(db.Model):
         else:
             return False, f'字段 {field_name} 不允许编辑', None
     
+    @property
+    def followup_history(self):
+        """Full Follow-up History text (unmigrated legacy text first, then entries)."""
+        from services.followup_service import render_followup_history
+        return render_followup_history(self)
+
     def add_followup(self, followup_text=None, todo_text=None, todo_due_date=None):
-        """Append new records using the existing Follow-up History format."""
+        """Append new Follow-up History entries."""
         from sales_activity_service import append_followup_history
         return append_followup_history(self, followup_text, todo_text, todo_due_date)
 
@@ -429,10 +487,14 @@ class Pipeline(db.Model):
     stuckpoint = db.Column(db.Text, nullable=True)
     comments = db.Column(db.Text, nullable=True)
     follow_up = db.Column(db.Text, nullable=True)
+    # follow_up 摘要，写入历史时同步维护（见 services/followup_service.py）
+    last_followup_at = db.Column(db.DateTime, nullable=True, index=True)
+    followup_count = db.Column(db.Integer, nullable=False, default=0)
     forecast_base_month = db.Column(db.Date, nullable=True)
 
     # Soft deletion
-    is_deleted = db.Column(db.Boolean, nullable=False, default=False, index=True)
+    # 不单独建索引：未删除行占绝大多数，列表查询走下方的部分索引
+    is_deleted = db.Column(db.Boolean, nullable=False, default=False)
     deleted_at = db.Column(db.DateTime, nullable=True)
     deleted_by_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     
@@ -454,42 +516,41 @@ class Pipeline(db.Model):
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # 列表/看板/导出的常用过滤与排序（owner + 阶段，按添加日期、公司、名称排序）
+    __table_args__ = (
+        active_rows_index('ix_pipeline_active_owner_stage', 'owner_id', 'stage'),
+        *list_order_indexes('ix_pipeline_active_list_order', date_added, company, name, id),
+    )
+
+    # Follow-up history entries (see FollowupEntry)
+    followup_entries = db.relationship(
+        'FollowupEntry',
+        primaryjoin="and_(foreign(FollowupEntry.entity_id) == Pipeline.id, "
+                    "FollowupEntry.entity_type == 'pipeline')",
+        lazy='dynamic',
+        order_by='FollowupEntry.id',
+        overlaps='followup_entries',
+    )
     
     # Follow-up methods
+    @property
+    def followup_history(self):
+        """Full Follow-up History text (unmigrated legacy text first, then entries)."""
+        from services.followup_service import render_followup_history
+        return render_followup_history(self)
+
     def get_latest_followup_date(self):
-        """Extract the latest follow-up date from follow_up text field.
-        
-        Format: Follow-up, YYYY-MM-DD HH:MM: text
-        
+        """Return the latest follow-up date from the materialized ``last_followup_at``.
+
+        The column is maintained whenever follow-up history is written and is
+        backfilled from legacy text by ``flask followup-backfill``.
+
         Returns: date object or None
         """
-        if not self.follow_up or str(self.follow_up).strip() == '':
+        if not self.last_followup_at:
             return None
-        
-        import re
-        from datetime import datetime
-        
-        lines = self.follow_up.split('\n')
-        
-        # Regex to match "Follow-up, YYYY-MM-DD"
-        # Does not match "To-do" (that's a task, not a follow-up)
-        pattern = re.compile(r'Follow-up,\s+(\d{4}-\d{2}-\d{2})')
-        
-        latest_date = None
-        
-        for line in lines:
-            match = pattern.search(line)
-            if match:
-                date_str = match.group(1)  # YYYY-MM-DD
-                try:
-                    date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
-                    if latest_date is None or date_obj > latest_date:
-                        latest_date = date_obj
-                except ValueError:
-                    # Skip invalid dates
-                    pass
-        
-        return latest_date
+        return self.last_followup_at.date()
     
     def get_followup_days_ago(self):
         """Calculate days since latest follow-up.
@@ -619,15 +680,13 @@ class Pipeline(db.Model):
                      todo_due_date=None, user_id=None, create_task=True):
         """Add follow-up entry."""
         from datetime import datetime
+        from services.followup_service import add_followup_entry
         
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M')
+        now = datetime.now()
         
-        # Append to follow-up field
+        # Append a follow-up history entry
         if followup_text:
-            if self.follow_up:
-                self.follow_up += f"\nFollow-up, {timestamp}: {followup_text}"
-            else:
-                self.follow_up = f"Follow-up, {timestamp}: {followup_text}"
+            add_followup_entry(self, 'followup', followup_text, now)
         
         # Update stuckpoint, allowing explicit clear
         if stuckpoint_text is not None:
@@ -644,12 +703,7 @@ class Pipeline(db.Model):
                     company=self.company
                 )
                 db.session.add(task)
-            todo_timestamp = datetime.now().strftime('%Y-%m-%d')
-            todo_entry = f"To-do, {todo_timestamp}: {todo_text} by {todo_due_date}"
-            if self.follow_up:
-                self.follow_up += f"\n{todo_entry}"
-            else:
-                self.follow_up = todo_entry
+            add_followup_entry(self, 'todo', todo_text, now, due_date=todo_due_date)
     
     def __repr__(self):
         return f'<Pipeline {self.name}>'
@@ -661,10 +715,150 @@ class Pipeline(db.Model):
 
 pipeline_support = db.Table('pipeline_support',
     db.Column('pipeline_id', db.Integer, db.ForeignKey('pipeline.id'), primary_key=True),
-    db.Column('user_id', db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    db.Column('user_id', db.Integer, db.ForeignKey('users.id'), primary_key=True),
+    # 主键以 pipeline_id 开头；按支持人员查找可见 Pipeline 需要反向索引
+    db.Index('ix_pipeline_support_user', 'user_id', 'pipeline_id'),
 )
 
 
+class PipelineVisibility(db.Model):
+    """
+    Pipeline 可见性映射 - 非全局权限用户可见的 Pipeline（owner + 支持团队）
+
+    - 由 services/pipeline_visibility_service.py 在 owner / 支持团队变化的 flush 后按 Pipeline 重算
+    - 派生数据，不设外键；可用 ``flask pipeline-visibility-rebuild`` 全量重建
+    - 主键 (user_id, pipeline_id) 使按用户过滤成为一次索引连接
+    """
+
+    __tablename__ = 'pipeline_visibility'
+
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    pipeline_id = db.Column(db.Integer, primary_key=True, autoincrement=False, index=True)
+
+    def __repr__(self):
+        return f'<PipelineVisibility user={self.user_id} pipeline={self.pipeline_id}>'
+
+
+# ============================================================================
+# FOLLOW-UP HISTORY ENTRIES
+# ============================================================================
+
+class FollowupEntry(db.Model):
+    """
+    Follow-up History 条目 - 取代 SalesLead / Pipeline 上只追加的 follow_up 文本
+
+    - entity_type: 'sales_lead' / 'pipeline'，entity_id 为对应记录 ID
+    - kind: 'followup'（跟进记录）/ 'todo'（下一步）/ 'note'（无法解析的旧文本）
+    - 旧 follow_up 文本由 `flask followup-backfill` 解析迁移（services/followup_service.py）
+    """
+
+    __tablename__ = 'followup_entries'
+
+    KIND_FOLLOWUP = 'followup'
+    KIND_TODO = 'todo'
+    KIND_NOTE = 'note'
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity_type = db.Column(db.String(20), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    kind = db.Column(db.String(20), nullable=False, default=KIND_FOLLOWUP)
+    activity_type = db.Column(db.String(40), nullable=True)
+    entry_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    schedule_start_at = db.Column(db.DateTime, nullable=True)
+    schedule_end_at = db.Column(db.DateTime, nullable=True)
+    due_date = db.Column(db.Date, nullable=True)
+    content = db.Column(db.Text, nullable=False, default='')
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_followup_entries_entity_time', 'entity_type', 'entity_id', 'entry_at'),
+    )
+
+    def to_history_line(self):
+        """Render the entry in the Follow-up History text format."""
+        type_text = f" [{self.activity_type}]" if self.activity_type else ''
+        if self.kind == self.KIND_FOLLOWUP:
+            schedule_text = ''
+            if self.schedule_start_at and self.schedule_end_at:
+                schedule_text = (
+                    f" ({self.schedule_start_at:%Y-%m-%d %H:%M} -> "
+                    f"{self.schedule_end_at:%Y-%m-%d %H:%M})"
+                )
+            return f"Follow-up{type_text}, {self.entry_at:%Y-%m-%d %H:%M}{schedule_text}: {self.content}"
+        if self.kind == self.KIND_TODO:
+            if self.schedule_start_at and self.schedule_end_at:
+                timing_text = (
+                    f" scheduled {self.schedule_start_at:%Y-%m-%d %H:%M} -> "
+                    f"{self.schedule_end_at:%Y-%m-%d %H:%M}"
+                )
+            else:
+                timing_text = f" by {self.due_date:%Y-%m-%d}" if self.due_date else ''
+            return f"To-do{type_text}, {self.entry_at:%Y-%m-%d}: {self.content}{timing_text}"
+        return self.content
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'activity_type': self.activity_type,
+            'entry_at': self.entry_at.isoformat() if self.entry_at else None,
+            'schedule_start_at': self.schedule_start_at.isoformat() if self.schedule_start_at else None,
+            'schedule_end_at': self.schedule_end_at.isoformat() if self.schedule_end_at else None,
+            'due_date': self.due_date.isoformat() if self.due_date else None,
+            'content': self.content,
+            'text': self.to_history_line(),
+        }
+
+    def __repr__(self):
+        return f'<FollowupEntry {self.entity_type}:{self.entity_id} {self.kind}>'
+
+
+# ============================================================================
+# PIPELINE REVENUE LEDGER
+# ============================================================================
+
+class PipelineRevenueMonth(db.Model):
+    """
+    Pipeline 月度收入台账 - 每个 Pipeline 每个确认月份一行
+
+    - 由 calculate_pipeline_metrics 维护（services/revenue_ledger_service.py）
+    - owner_id / stage / product / is_deleted 为冗余键，随 Pipeline 更新同步
+    - 只保留预测基准月前 12 个月至后 36 个月的行，月度 rollover 时前移窗口
+    - 任意期间（季度、半年、财年、滚动 12 个月）的收入 = 按 month_start 范围 SUM(mrc + otc)
+    """
+
+    __tablename__ = 'pipeline_revenue_month'
+
+    id = db.Column(db.Integer, primary_key=True)
+    pipeline_id = db.Column(db.Integer, db.ForeignKey('pipeline.id'), nullable=False, index=True)
+    month_start = db.Column(db.Date, nullable=False)
+    mrc = db.Column(db.Float, nullable=False, default=0.0)  # 当月确认的 MRC（激活当月按天折算）
+    otc = db.Column(db.Float, nullable=False, default=0.0)  # 激活当月确认的 OTC
+
+    owner_id = db.Column(db.Integer, nullable=True)
+    stage = db.Column(db.String(50), nullable=True)
+    product = db.Column(db.String(200), nullable=True)
+    is_deleted = db.Column(db.Boolean, nullable=False, default=False)
+
+    pipeline = db.relationship(
+        'Pipeline',
+        backref=db.backref(
+            'revenue_months',
+            lazy='select',
+            cascade='all, delete-orphan',
+            order_by='PipelineRevenueMonth.month_start',
+        ),
+    )
+
+    __table_args__ = (
+        db.UniqueConstraint('pipeline_id', 'month_start', name='uq_revenue_month_pipeline_month'),
+        db.Index('ix_revenue_month_month_owner', 'month_start', 'owner_id'),
+    )
+
+    def __repr__(self):
+        return f'<PipelineRevenueMonth pipeline={self.pipeline_id} month={self.month_start}>'
+
+
 # ============================================================================
 # TASK MODEL
 # ============================================================================
@@ -704,6 +898,11 @@ class Task(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        active_rows_index('ix_tasks_active_owner_due', 'owner_id', 'due_date'),
+        active_rows_index('ix_tasks_active_due', 'due_date'),
+    )
+
     pipeline = db.relationship('Pipeline', foreign_keys=[pipeline_id], backref='tasks')
     sales_lead = db.relationship('SalesLead', foreign_keys=[sales_lead_id], backref='tasks')
     completed_by = db.relationship('User', foreign_keys=[completed_by_id])
@@ -787,6 +986,10 @@ class SalesActivity(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
+    __table_args__ = (
+        active_rows_index('ix_sales_activities_active_owner_date', 'owner_id', 'activity_date'),
+    )
+
     sales_lead = db.relationship('SalesLead', foreign_keys=[sales_lead_id], backref='sales_activity_records')
     pipeline = db.relationship('Pipeline', foreign_keys=[pipeline_id], backref='sales_activity_records')
     completed_by = db.relationship('User', foreign_keys=[completed_by_id])
@@ -977,6 +1180,13 @@ class ActivityLog(db.Model):
     extra_data = db.Column(db.Text, nullable=True)
     ip_address = db.Column(db.String(50))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # 操作日志页按时间倒序，并按用户/操作类型过滤
+    __table_args__ = (
+        db.Index('ix_activity_logs_created_at', 'created_at'),
+        db.Index('ix_activity_logs_user_created', 'user_id', 'created_at'),
+        db.Index('ix_activity_logs_action_created', 'action_type', 'created_at'),
+    )
     
     # Relationship to User
     user = db.relationship('User', backref='activity_logs')
@@ -1043,21 +1253,23 @@ class WeeklyMetrics(db.Model):
     leads_count = db.Column(db.Integer, default=0)           # Leads 数量（不含 Unqualified）
     qualified_leads_count = db.Column(db.Integer, default=0)  # Qualified Leads 数量
     pipeline_count = db.Column(db.Integer, default=0)        # Pipeline 数量（不含 Deal Lost）
-    tcv = db.Column(db.Integer, default=0)                  # TCV 总和（不含 Deal Lost）
-    current_qtr_revenue = db.Column(db.Integer, default=0)  # 本季度收入
-    next_qtr_revenue = db.Column(db.Integer, default=0)     # 下季度收入
+    # 金额保存未取整的合计，展示时再取整，增量更新与重算结果一致
+    tcv = db.Column(db.Float, default=0)                    # TCV 总和（不含 Deal Lost）
+    customer_count = db.Column(db.Integer, default=0)       # 客户数（Pipeline 去重 company，不含 Deal Lost）
+    current_qtr_revenue = db.Column(db.Float, default=0)    # 本季度收入
+    next_qtr_revenue = db.Column(db.Float, default=0)       # 下季度收入
     
     # 周环比（vs last week）
     leads_vs_last_week = db.Column(db.Integer, default=0)
     qualified_vs_last_week = db.Column(db.Integer, default=0)
     pipeline_vs_last_week = db.Column(db.Integer, default=0)
-    tcv_vs_last_week = db.Column(db.Integer, default=0)
+    tcv_vs_last_week = db.Column(db.Float, default=0)
     
     # 月环比（vs last month）
     leads_vs_last_month = db.Column(db.Integer, default=0)
     qualified_vs_last_month = db.Column(db.Integer, default=0)
     pipeline_vs_last_month = db.Column(db.Integer, default=0)
-    tcv_vs_last_month = db.Column(db.Integer, default=0)
+    tcv_vs_last_month = db.Column(db.Float, default=0)
     
     # 元数据
     updated_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -1070,6 +1282,114 @@ class WeeklyMetrics(db.Model):
         return f'<WeeklyMetrics owner={self.owner_id} week={self.week_start}>'
 
 
+class DataVersion(db.Model):
+    """
+    全局数据版本号 - Pipeline / SalesLead / SalesActivity 每次提交后 +1
+
+    Dashboard 缓存以版本号为键的一部分，多个 gunicorn worker 共享同一版本。
+    """
+
+    __tablename__ = 'data_versions'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<DataVersion {self.name}={self.version}>'
+
+
+class JobLock(db.Model):
+    """
+    周期任务锁 - 保证同一任务同一时间只有一个 worker / 进程在执行
+
+    - locked_at 非空表示正在运行（超过 stale 时间视为已失效，可被抢占）
+    - last_run_key 记录最近完成的周期（如月度滚动为 '2026-03'），同一周期不重复执行
+    """
+
+    __tablename__ = 'job_locks'
+
+    name = db.Column(db.String(50), primary_key=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    locked_by = db.Column(db.String(100), nullable=True)
+    last_run_key = db.Column(db.String(50), nullable=True)
+    last_completed_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<JobLock {self.name} last={self.last_run_key}>'
+
+
+class SchemaVersion(db.Model):
+    """
+    已应用的数据库升级步骤 - 由 `flask bitcrm-upgrade` 写入
+
+    每个版本一行，当前版本 = MAX(version)；应用启动时只比较这个值。
+    """
+
+    __tablename__ = 'schema_versions'
+
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    description = db.Column(db.String(200), nullable=False)
+    applied_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<SchemaVersion {self.version}>'
+
+
+class MetricsJob(db.Model):
+    """
+    Weekly metrics 刷新任务队列（WEEKLY_METRICS_MODE = 'deferred' 时使用）
+
+    - 提交时按 owner 写入一条 pending 任务，与业务数据同一事务提交
+    - `flask metrics-worker` 合并同一 owner 的重复任务后批量重算
+    - owner_id = NULL 表示只需重算全公司汇总
+    """
+
+    __tablename__ = 'metrics_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    owner_id = db.Column(db.Integer, nullable=True, index=True)
+    status = db.Column(db.String(20), nullable=False, default='pending', index=True)  # pending / running / failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    available_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<MetricsJob owner={self.owner_id} status={self.status}>'
+
+
+class ExportJob(db.Model):
+    """
+    后台导出任务（EXPORT_JOBS_ENABLED 时使用）
+
+    - 请求时记录导出类型、格式以及用户当时的筛选条件和可见列（params，JSON）
+    - `flask export-worker` 领取任务，按块写入 EXPORT_FOLDER，并更新 rows_done 供页面轮询进度
+    - 完成或失败的任务在 expires_at 之后连同文件由清理任务删除
+    """
+
+    __tablename__ = 'export_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    kind = db.Column(db.String(30), nullable=False)  # leads / pipeline / activity_logs
+    export_format = db.Column(db.String(10), nullable=False)  # xlsx / csv / parquet
+    params = db.Column(db.Text, nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='pending', index=True)  # pending / running / done / failed
+    rows_done = db.Column(db.Integer, nullable=False, default=0)
+    total_rows = db.Column(db.Integer, nullable=True)
+    file_name = db.Column(db.String(200), nullable=True)  # 下载文件名
+    error = db.Column(db.Text, nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=True, index=True)
+
+    def __repr__(self):
+        return f'<ExportJob {self.id} {self.kind} status={self.status}>'
+
+
 # ============================================================================
 # WEEKLY METRICS HELPERS
 # ============================================================================
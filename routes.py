@@ -2,8 +2,7 @@
 BITCRM Route Definitions
 All Flask routes for the application.
 """
-import pandas as pd
-from flask import Blueprint, abort, render_template, redirect, url_for, flash, request, send_file, jsonify, make_response, session
+from flask import Blueprint, abort, current_app, render_template, redirect, url_for, flash, request, send_file, jsonify, make_response, session
 from flask_login import login_user, logout_user, login_required, current_user
 from flask_babel import gettext as _, get_locale
 from werkzeug.security import generate_password_hash
@@ -11,27 +10,46 @@ from werkzeug.utils import secure_filename
 from sqlalchemy import func, and_, or_, select
 from datetime import datetime, date, timedelta
 from io import BytesIO
-import pandas as pd
 import os
 from urllib.parse import urlparse, urljoin
 
 from extensions import db, cache
-from models import User, SalesLead, Pipeline, Task, ActivityLog, SalesActivity, disable_metrics_events
+from models import User, SalesLead, Pipeline, Task, ActivityLog, SalesActivity, ExportJob
 from services.weekly_metrics_service import (
     get_company_dashboard_summary,
     get_owner_dashboard_summary,
     get_owner_dashboard_metrics,
     refresh_weekly_metrics,
 )
+from services.bulk_import_service import import_leads, import_pipelines
+from services.dashboard_cache_service import get_versioned_payload
+from services.export_job_service import enqueue_export_job, get_export_job_status, get_export_path, register_export_builder
+from services.export_service import (
+    EXPORT_MIMETYPES,
+    MONEY_FORMAT,
+    ExportColumn,
+    ExportPlan,
+    ExportSheet,
+    get_export_format,
+    iter_export_rows,
+    send_export,
+)
+from services.facet_service import FacetSpec, get_cached_facets
+from services.followup_service import get_followup_history_page, get_followup_previews
+from services.forecast_rollover_service import ensure_forecasts_current
+from services.import_service import clean_leads_import, clean_pipeline_import
+from services.kanban_service import build_kanban_board, get_kanban_cards, get_legacy_kanban_data
+from services.list_projection_service import project_list_columns
+from services.pagination_service import SortKey, paginate_keyset
+from services.pipeline_summary_service import get_cached_pipeline_summary, get_pipeline_summary
+from services.pipeline_visibility_service import filter_visible_pipelines
+from services.search_index_service import search_condition
 from utils import (
     allowed_file, validate_date, validate_numeric, validate_integer,
     create_excel_template, export_to_excel, import_from_excel,
-    validate_sales_lead_import, validate_pipeline_import,
-    calculate_pipeline_metrics, get_forecast_base_month, pipeline_forecast_needs_refresh,
-    excel_date_to_str, excel_date_to_date,
+    calculate_pipeline_metrics,
     get_this_week_range, get_previous_week_range,
     calculate_weekly_growth, format_currency,
-    get_quarter_dates, get_next_quarter_dates, calculate_quarter_revenue,
     format_currency_thousands, format_currency_short, format_vs_indicator
 )
 from activity_logger import log_activity, log_lead_import, log_lead_created, log_lead_updated, log_pipeline_created, log_pipeline_stage_changed, log_task_created, log_task_completed, log_task_reopened, log_followup_created, log_account_created, log_lead_deleted, log_lead_exported, log_pipeline_deleted, log_pipeline_exported, log_pipeline_imported, log_task_edited, log_task_deleted, log_task_status_changed, log_password_changed, log_language_changed, log_user_created, log_user_status_changed, log_filter_applied, log_column_visibility_changed, log_login, log_logout
@@ -270,96 +288,125 @@ def _get_visible_columns_for_page(page, available_columns, default_columns):
     return build_visible_columns(available_columns, selected_columns, default_columns)
 
 
+LEADS_TEXT_EXPORT_FIELDS = {
+    'name', 'company', 'industry', 'position', 'email', 'mobile_number',
+    'leads_status', 'source', 'event', 'requirements', 'note',
+}
+PIPELINE_PLAIN_EXPORT_FIELDS = {
+    'company', 'name', 'industry', 'position', 'email', 'mobile_number', 'product',
+    'tcv_usd', 'mrc_usd', 'otc_usd', 'gp', 'contract_term_yrs', 'stage', 'comments', 'stuckpoint',
+}
+
+# Attributes each list/export cell reads (other column keys read the attribute of the same name)
+LEADS_COLUMN_FIELDS = {
+    'name': ('name', 'position'),
+    'owner': ('owner_id',),
+}
+PIPELINE_COLUMN_FIELDS = {
+    'company': ('company', 'last_followup_at', 'date_added', 'created_at'),
+    'owner': ('owner_id',),
+    'est_sign_date': ('est_sign_date', 'stage'),
+    'est_act_date': ('est_act_date', 'stage'),
+    'proposal_sent_date': ('proposal_sent_date', 'stage'),
+}
+
+
+# Export value types: dates and numbers stay typed for Parquet; Excel/CSV show dates as YYYY-MM-DD
+LEADS_EXPORT_COLUMN_TYPES = {
+    'date_added': {'kind': 'date'},
+    'created_at': {'kind': 'date'},
+}
+PIPELINE_EXPORT_COLUMN_TYPES = {
+    'tcv_usd': {'kind': 'number', 'number_format': MONEY_FORMAT},
+    'mrc_usd': {'kind': 'number', 'number_format': MONEY_FORMAT},
+    'otc_usd': {'kind': 'number', 'number_format': MONEY_FORMAT},
+    'gp': {'kind': 'number', 'number_format': MONEY_FORMAT},
+    'contract_term_yrs': {'kind': 'integer'},
+    'gp_margin': {'kind': 'percent', 'text_format': '{:.1%}'},
+    'win_rate': {'kind': 'percent', 'text_format': '{:.0%}'},
+    'est_sign_date': {'kind': 'date'},
+    'est_act_date': {'kind': 'date'},
+    'deposit_date': {'kind': 'date'},
+    'award_date': {'kind': 'date'},
+    'proposal_sent_date': {'kind': 'date'},
+    'date_added': {'kind': 'date'},
+}
+ACTIVITY_LOG_EXPORT_COLUMNS = [
+    ExportColumn('created_at', 'Time', kind='datetime'),
+    ExportColumn('user_name', 'User'),
+    ExportColumn('action_type', 'Action'),
+    ExportColumn('subject_type', 'Subject Type'),
+    ExportColumn('subject_id', 'Subject ID', kind='integer'),
+    ExportColumn('subject_name', 'Subject'),
+    ExportColumn('description', 'Description'),
+    ExportColumn('ip_address', 'IP Address'),
+]
+
+
 def _get_leads_export_value(lead, column_key):
-    date_only_fields = {'date_added', 'created_at'}
-    raw_value = {
-        'name': lead.name,
-        'company': lead.company,
-        'industry': lead.industry,
-        'position': lead.position,
-        'email': lead.email,
-        'mobile_number': lead.mobile_number,
-        'leads_status': lead.leads_status,
-        'source': lead.source,
-        'event': lead.event,
-        'owner': lead.owner.username if lead.owner else '',
-        'requirements': lead.requirements,
-        'note': lead.note,
-    }.get(column_key)
-
-    if column_key in date_only_fields:
-        field_value = getattr(lead, column_key, None)
-        if not field_value:
-            return ''
-        return field_value.strftime('%Y-%m-%d')
-
-    return raw_value or ''
-
-
-def _get_pipeline_export_value(pipeline, column_key):
-    date_fields = {
-        'est_sign_date', 'est_act_date', 'deposit_date',
-        'award_date', 'proposal_sent_date', 'date_added'
-    }
-    raw_value = {
-        'company': pipeline.company,
-        'name': pipeline.name,
-        'industry': pipeline.industry,
-        'position': pipeline.position,
-        'email': pipeline.email,
-        'mobile_number': pipeline.mobile_number,
-        'product': pipeline.product,
-        'tcv_usd': pipeline.tcv_usd,
-        'mrc_usd': pipeline.mrc_usd,
-        'otc_usd': pipeline.otc_usd,
-        'gp': pipeline.gp,
-        'contract_term_yrs': pipeline.contract_term_yrs,
-        'gp_margin': f"{(pipeline.gp_margin or 0) * 100:.1f}%",
-        'owner': pipeline.owner.username if pipeline.owner else '',
-        'stage': pipeline.stage,
-        'win_rate': f"{(pipeline.win_rate or 0) * 100:.0f}%",
-        'follow_up': pipeline.follow_up,
-        'comments': pipeline.comments,
-        'stuckpoint': pipeline.stuckpoint,
-    }.get(column_key)
-
-    if column_key in date_fields:
-        field_value = getattr(pipeline, column_key, None)
-        if not field_value:
-            return ''
-        return field_value.strftime('%Y-%m-%d')
-
-    return raw_value if raw_value is not None else ''
-
-
-def _build_export_dataframe(items, visible_columns, value_getter):
-    columns = [column['label'] for column in visible_columns]
-    data = [
-        {
-            column['label']: value_getter(item, column['key'])
-            for column in visible_columns
-        }
-        for item in items
+    # Only the requested attribute is read, so projected rows never lazy-load other columns
+    if column_key == 'created_at':
+        return lead.created_at.date() if lead.created_at else None
+    if column_key == 'date_added':
+        return lead.date_added
+    if column_key == 'owner':
+        return lead.owner.username if lead.owner else None
+    if column_key in LEADS_TEXT_EXPORT_FIELDS:
+        return getattr(lead, column_key)
+    return None
+
+
+def _get_pipeline_export_value(pipeline, column_key, followup_previews=None):
+    if column_key in ('gp_margin', 'win_rate'):
+        return getattr(pipeline, column_key) or 0
+    if column_key == 'owner':
+        return pipeline.owner.username if pipeline.owner else None
+    if column_key == 'follow_up':
+        return (followup_previews or {}).get(pipeline.id)
+    if column_key in PIPELINE_PLAIN_EXPORT_FIELDS or column_key in PIPELINE_EXPORT_COLUMN_TYPES:
+        return getattr(pipeline, column_key)
+    return None
+
+
+def _get_export_columns(visible_columns, column_types=None):
+    return [
+        ExportColumn(column['key'], column['label'], **(column_types or {}).get(column['key'], {}))
+        for column in visible_columns
     ]
-    return pd.DataFrame(data, columns=columns)
 
 
-def _get_pipeline_access_query():
-    """Build pipeline query scoped to the current user's access."""
-    query = Pipeline.query.filter(Pipeline.is_deleted.is_(False))
-    if not current_user.can_view_all_business_data():
-        supported_pipeline_ids = db.session.query(Pipeline.id).filter(
-            Pipeline.support_team.contains(current_user)
-        ).subquery()
+def _get_export_format():
+    try:
+        return get_export_format(request.args.get('format'))
+    except ValueError as exc:
+        abort(400, description=str(exc))
+
+
+def _get_leads_access_query(user=None):
+    """Build sales lead query scoped to the given (default: current) user's access."""
+    user = user or current_user
+    query = SalesLead.query.filter(SalesLead.is_deleted.is_(False))
+    # Sales can only see their own leads + leads owned by marketing
+    if not user.can_view_all_leads():
+        marketing_ids = db.session.query(User.id).filter(User.role.ilike('marketing'))
         query = query.filter(
-            or_(
-                Pipeline.owner_id == current_user.id,
-                Pipeline.id.in_(supported_pipeline_ids)
+            db.or_(
+                SalesLead.owner_id == user.id,
+                SalesLead.owner_id.in_(marketing_ids.scalar_subquery())
             )
         )
     return query
 
 
+def _get_pipeline_access_query(user=None):
+    """Build pipeline query scoped to the given (default: current) user's access."""
+    user = user or current_user
+    query = Pipeline.query.filter(Pipeline.is_deleted.is_(False))
+    if not user.can_view_all_business_data():
+        query = filter_visible_pipelines(query, user.id)
+    return query
+
+
 def _normalize_multi_filter_values(values, caster=None):
     normalized_values = []
     seen_values = set()
@@ -441,7 +488,6 @@ def _get_pipeline_filter_values(saved_filters):
 
 
 DEFAULT_HIDDEN_PIPELINE_STAGES = ('6b) Deal Lost', '7) Activated')
-WON_PIPELINE_STAGES = ('6a) Deal Won', '7) Activated')
 DEFAULT_HIDDEN_LEAD_STATUSES = ('Qualified', 'Unqualified')
 
 
@@ -481,7 +527,7 @@ def _apply_leads_filters(query, filter_values):
         query = _hide_default_lead_statuses(query)
 
     if filter_values['company_filter']:
-        query = query.filter(SalesLead.company.ilike(f"%{filter_values['company_filter']}%"))
+        query = query.filter(search_condition(SalesLead, filter_values['company_filter']))
 
     if filter_values['status_filters']:
         query = query.filter(SalesLead.leads_status.in_(filter_values['status_filters']))
@@ -495,16 +541,21 @@ def _apply_leads_filters(query, filter_values):
     return query
 
 
-def _apply_leads_sort(query, sort_by, sort_order):
+def _get_leads_sort_keys(sort_by, sort_order):
     sort_column = {
         'date_added': SalesLead.date_added,
         'created_at': SalesLead.created_at,
     }.get(sort_by, SalesLead.date_added)
 
-    if sort_order == 'asc':
-        return query.order_by(sort_column.asc().nullslast(), SalesLead.name.asc())
+    return [
+        SortKey(sort_column, descending=sort_order != 'asc'),
+        SortKey(SalesLead.name),
+        SortKey(SalesLead.id),
+    ]
+
 
-    return query.order_by(sort_column.desc().nullslast(), SalesLead.name.asc())
+def _apply_leads_sort(query, sort_by, sort_order):
+    return query.order_by(*[key.order_by() for key in _get_leads_sort_keys(sort_by, sort_order)])
 
 
 def _apply_pipeline_filters(query, filter_values):
@@ -512,7 +563,7 @@ def _apply_pipeline_filters(query, filter_values):
         query = _hide_default_pipeline_stages(query)
 
     if filter_values['company_filter']:
-        query = query.filter(Pipeline.company.ilike(f"%{filter_values['company_filter']}%"))
+        query = query.filter(search_condition(Pipeline, filter_values['company_filter']))
 
     if filter_values['stage_filters']:
         query = query.filter(Pipeline.stage.in_(filter_values['stage_filters']))
@@ -550,7 +601,7 @@ def _apply_pipeline_filters(query, filter_values):
     return query
 
 
-def _apply_pipeline_sort(query, sort_by, sort_order):
+def _get_pipeline_sort_keys(sort_by, sort_order):
     sort_column = {
         'date_added': Pipeline.date_added,
         'est_sign_date': Pipeline.est_sign_date,
@@ -558,18 +609,26 @@ def _apply_pipeline_sort(query, sort_by, sort_order):
         'tcv_usd': Pipeline.tcv_usd,
     }.get(sort_by, Pipeline.date_added)
 
-    if sort_order == 'asc':
-        return query.order_by(
-            sort_column.asc().nullslast(),
-            Pipeline.company.asc().nullslast(),
-            Pipeline.name.asc()
-        )
+    return [
+        SortKey(sort_column, descending=sort_order != 'asc'),
+        SortKey(Pipeline.company),
+        SortKey(Pipeline.name),
+        SortKey(Pipeline.id),
+    ]
 
-    return query.order_by(
-        sort_column.desc().nullslast(),
-        Pipeline.company.asc().nullslast(),
-        Pipeline.name.asc()
-    )
+
+def _apply_pipeline_sort(query, sort_by, sort_order):
+    return query.order_by(*[key.order_by() for key in _get_pipeline_sort_keys(sort_by, sort_order)])
+
+
+def _paginate_list(query, sort_keys, sort_by, sort_order):
+    """Keyset page for a list view; a stale or foreign cursor falls back to the first page."""
+    signature = f'{sort_by}:{sort_order}'
+    per_page = request.args.get('per_page')
+    try:
+        return paginate_keyset(query, sort_keys, request.args.get('cursor'), per_page, signature)
+    except ValueError:
+        return paginate_keyset(query, sort_keys, None, per_page, signature)
 
 
 def _get_owner_users_from_query(model, query, include_user_ids=None):
@@ -584,6 +643,12 @@ def _get_owner_users_from_query(model, query, include_user_ids=None):
         if owner_id
     }
 
+    return _get_owner_users(owner_ids, include_user_ids)
+
+
+def _get_owner_users(owner_ids, include_user_ids=None):
+    """Return users for the given owner ids plus any currently selected owners."""
+    owner_ids = {owner_id for owner_id in owner_ids if owner_id}
     owner_ids.update(_normalize_multi_filter_values(include_user_ids, caster=int))
 
     if not owner_ids:
@@ -592,6 +657,17 @@ def _get_owner_users_from_query(model, query, include_user_ids=None):
     return User.query.filter(User.id.in_(owner_ids)).order_by(User.username).all()
 
 
+LEAD_FACETS = (
+    FacetSpec('status', SalesLead.leads_status, ('hidden', 'status')),
+    FacetSpec('source', SalesLead.source, ('source',)),
+    FacetSpec('owner', SalesLead.owner_id, ('owner',)),
+)
+PIPELINE_FACETS = (
+    FacetSpec('stage', Pipeline.stage, ('hidden', 'stage')),
+    FacetSpec('owner', Pipeline.owner_id, ('owner',)),
+)
+
+
 @main_bp.route('/')
 @login_required
 def index():
@@ -611,68 +687,36 @@ def clear_filters(page):
         return redirect(url_for('leads.index'))
     return redirect(url_for('main.dashboard'))
 
-@main_bp.route('/dashboard')
-@login_required
-# @cache.cached(timeout=300, query_string=True)  # Disabled for debugging
-def dashboard():
-    """
-    Dashboard with key metrics.
+def _dashboard_cache_scope(user):
+    """Dashboard payloads are shared by all-data roles and per user otherwise."""
+    return 'all' if user.can_view_all_business_data() else f'user:{user.id}'
 
-    Optimized with eager loading and SQL aggregations.
-    """
-    from sqlalchemy.orm import joinedload
 
+def _build_dashboard_payload(user_id):
+    """Compute the dashboard template data for a user without touching the request."""
+    user = db.session.get(User, user_id)
     today = date.today()
     summary_metrics = (
         get_company_dashboard_summary(ref_date=today)
-        if current_user.can_view_all_business_data()
-        else get_owner_dashboard_summary(current_user.id, ref_date=today)
+        if user.can_view_all_business_data()
+        else get_owner_dashboard_summary(user.id, ref_date=today)
     )
-    owner_metrics = get_owner_dashboard_metrics(ref_date=today)
-
-    base_query = _get_pipeline_access_query().options(joinedload(Pipeline.owner))
-
-    all_pipelines = base_query.all()
-    active_pipelines = [p for p in all_pipelines if p.stage != '6b) Deal Lost']
-    deal_lost_pipelines = [p for p in all_pipelines if p.stage == '6b) Deal Lost']
-
-    import re
-    date_pattern = r'(\d{4}-\d{2}-\d{2})'
-
-    pipeline_stages = [{'value': stage, 'label': stage, 'is_lost': False}
-                       for stage in Pipeline.STAGE_OPTIONS if stage != '6b) Deal Lost']
-    pipeline_stages.append({'value': '6b) Deal Lost', 'label': '6b) Deal Lost', 'is_lost': True})
-
-    pipeline_deals = []
-    for pipeline_group, is_lost in ((active_pipelines, False), (deal_lost_pipelines, True)):
-        for pipeline in pipeline_group:
-            latest_followup = None
-            if pipeline.follow_up:
-                dates = re.findall(date_pattern, pipeline.follow_up)
-                if dates:
-                    latest_followup = max(dates)
+    owner_metrics = []
+    for metric in get_owner_dashboard_metrics(ref_date=today):
+        owner = metric.pop('user')
+        metric['user'] = {'id': owner.id, 'username': owner.username, 'email': owner.email, 'role': owner.role}
+        owner_metrics.append(metric)
 
-            pipeline_deals.append({
-                'id': pipeline.id,
-                'company': pipeline.company,
-                'name': pipeline.name,
-                'owner_name': pipeline.owner.username if pipeline.owner else None,
-                'owner_id': pipeline.owner_id,
-                'tcv_usd': pipeline.tcv_usd or 0,
-                'mrc_usd': pipeline.mrc_usd or 0,
-                'win_rate': pipeline.win_rate,
-                'stage': pipeline.stage,
-                'est_sign_date': pipeline.est_sign_date.strftime('%Y-%m-%d') if pipeline.est_sign_date else None,
-                'latest_followup': latest_followup,
-                'level': pipeline.level,
-                'is_lost': is_lost
-            })
+    base_query = _get_pipeline_access_query(user)
+    kanban_board = build_kanban_board(base_query)
 
-    visible_owner_ids = {deal['owner_id'] for deal in pipeline_deals if deal['owner_id']}
+    visible_owner_ids = {
+        owner_id for (owner_id,) in base_query.with_entities(Pipeline.owner_id).distinct() if owner_id
+    }
     users = [metric['user'] for metric in owner_metrics if metric['user_id'] in visible_owner_ids]
     owner_table_metrics = [
         metric for metric in owner_metrics
-        if metric['user'].role != 'marketing' and any([
+        if metric['role'] != 'marketing' and any([
             metric['leads_count'],
             metric['qualified_leads_count'],
             metric['pipeline_count'],
@@ -683,191 +727,32 @@ def dashboard():
         ])
     ]
 
-    return render_template('dashboard.html',
-                          summary_metrics=summary_metrics,
-                          owner_metrics=owner_metrics,
-                          owner_table_metrics=owner_table_metrics,
-                          users=users,
-                          pipeline_stages=pipeline_stages,
-                          pipeline_deals=pipeline_deals,
-                          format_currency=format_currency,
-                          format_currency_thousands=format_currency_thousands,
-                          format_currency_short=format_currency_short,
-                          now=datetime.now(),
-                          get_locale=get_locale)
-    summary_metrics = get_company_dashboard_summary(ref_date=today)
-
-    # =========================================================================
-    # 获取季度日期
-    # =========================================================================
-    current_qtr = get_quarter_dates(today)
-    next_qtr = get_next_quarter_dates(today)
-
-    # =========================================================================
-    # 预加载所有 Pipeline 数据（带 owner 关联）
-    # =========================================================================
-    base_query = Pipeline.query.filter(Pipeline.is_deleted.is_(False)).options(joinedload(Pipeline.owner))
-
-    # 根据权限过滤
-    if not current_user.can_view_all_business_data():
-        # Get the Pipeline IDs that current_user supports
-        supported_pipeline_ids = db.session.query(Pipeline.id).filter(
-            Pipeline.support_team.contains(current_user)
-        ).subquery()
-        base_query = base_query.filter(
-            or_(
-                Pipeline.owner_id == current_user.id,
-                Pipeline.id.in_(supported_pipeline_ids)
-            )
-        )
-
-    all_pipelines = base_query.all()
-
-    # 拆分 active 和 deal_lost
-    active_pipelines = [p for p in all_pipelines if p.stage != '6b) Deal Lost']
-    deal_lost_pipelines = [p for p in all_pipelines if p.stage == '6b) Deal Lost']
-
-    # =========================================================================
-    # 全公司数据（用 Python 聚合，比多次 SQL 查询快）
-    # =========================================================================
-    company_this = {
-        'leads_count': SalesLead.query.filter(SalesLead.is_deleted.is_(False), SalesLead.leads_status != 'Unqualified').count(),
-        'qualified_leads_count': SalesLead.query.filter(SalesLead.is_deleted.is_(False), SalesLead.leads_status == 'Qualified').count(),
-        'pipeline_count': len(active_pipelines),
-        'tcv': sum(p.tcv_usd or 0 for p in active_pipelines),
-        'current_qtr_revenue': calculate_quarter_revenue(active_pipelines, current_qtr[0], current_qtr[1]),
-        'next_qtr_revenue': calculate_quarter_revenue(active_pipelines, next_qtr[0], next_qtr[1])
+    return {
+        'summary_metrics': summary_metrics,
+        'owner_metrics': owner_metrics,
+        'owner_table_metrics': owner_table_metrics,
+        'users': users,
+        'kanban_board': kanban_board,
     }
 
-    # 上周数据（暂时用当前数据作为占位）
-    company_last = {k: 0 for k in company_this}
-
-    # =========================================================================
-    # PER-OWNER BREAKDOWN（优化：避免 Python 循环中的 N+1 查询）
-    # =========================================================================
-    users = User.query.filter_by(is_active=True).all()
 
-    # 预构建 owner_id 到 user 的映射
-    user_map = {u.id: u for u in users}
-
-    # 按 owner_id 分组（数据库层面分组比 Python 循环快）
-    from collections import defaultdict
-    owner_pipeline_map = defaultdict(list)
-    for p in active_pipelines:
-        owner_pipeline_map[p.owner_id].append(p)
-
-    owner_metrics = []
-    for user in users:
-        user_pipelines = owner_pipeline_map.get(user.id, [])
-
-        # 该 owner 的 Leads
-        user_leads_count = SalesLead.query.filter_by(owner_id=user.id, is_deleted=False).filter(
-            SalesLead.leads_status != 'Unqualified'
-        ).count()
-
-        qualified_leads_count = SalesLead.query.filter(
-            SalesLead.is_deleted.is_(False),
-            or_(SalesLead.owner_id == user.id)
-        ).filter(
-            or_(SalesLead.leads_status == 'Qualified')
-        ).count()
-
-        owner_metrics.append({
-            'user': user,
-            'user_id': user.id,
-            'leads_count': user_leads_count,
-            'leads_vs_last_week': 0,
-            'qualified_leads_count': qualified_leads_count,
-            'qualified_vs_last_week': 0,
-            'pipeline_count': len(user_pipelines),
-            'tcv': sum(p.tcv_usd or 0 for p in user_pipelines),
-            'current_qtr_revenue': calculate_quarter_revenue(user_pipelines, current_qtr[0], current_qtr[1]),
-            'next_qtr_revenue': calculate_quarter_revenue(user_pipelines, next_qtr[0], next_qtr[1]),
-            'username': user.username,
-            'role': user.role
-        })
-
-    # 按 TCV 排序
-    owner_metrics.sort(key=lambda x: x['tcv'], reverse=True)
-
-    # =========================================================================
-    # KANBAN BOARD DATA（用预加载的数据，避免 N+1）
-    # =========================================================================
-    import re
-    date_pattern = r'(\d{4}-\d{2}-\d{2})'
-
-    pipeline_stages = [{'value': stage, 'label': stage, 'is_lost': False}
-                       for stage in Pipeline.STAGE_OPTIONS if stage != '6b) Deal Lost']
-    pipeline_stages.append({'value': '6b) Deal Lost', 'label': '6b) Deal Lost', 'is_lost': True})
-
-    pipeline_deals = []
-    # 处理 active pipelines
-    for p in active_pipelines:
-        latest_followup = None
-        if p.follow_up:
-            dates = re.findall(date_pattern, p.follow_up)
-            if dates:
-                latest_followup = max(dates)
-
-        pipeline_deals.append({
-            'id': p.id,
-            'company': p.company,
-            'name': p.name,
-            'owner_name': p.owner.username if p.owner else None,
-            'owner_id': p.owner_id,
-            'tcv_usd': p.tcv_usd or 0,
-            'mrc_usd': p.mrc_usd or 0,
-            'win_rate': p.win_rate,
-            'stage': p.stage,
-            'est_sign_date': p.est_sign_date.strftime('%Y-%m-%d') if p.est_sign_date else None,
-            'latest_followup': latest_followup,
-            'level': p.level,
-            'is_lost': False
-        })
-
-    # 处理 deal lost
-    for p in deal_lost_pipelines:
-        latest_followup = None
-        if p.follow_up:
-            dates = re.findall(date_pattern, p.follow_up)
-            if dates:
-                latest_followup = max(dates)
-
-        pipeline_deals.append({
-            'id': p.id,
-            'company': p.company,
-            'name': p.name,
-            'owner_name': p.owner.username if p.owner else None,
-            'owner_id': p.owner_id,
-            'tcv_usd': p.tcv_usd or 0,
-            'mrc_usd': p.mrc_usd or 0,
-            'win_rate': p.win_rate,
-            'stage': p.stage,
-            'est_sign_date': p.est_sign_date.strftime('%Y-%m-%d') if p.est_sign_date else None,
-            'latest_followup': latest_followup,
-            'level': p.level,
-            'is_lost': True
-        })
+@main_bp.route('/dashboard')
+@login_required
+def dashboard():
+    """
+    Dashboard with key metrics.
 
-    # =========================================================================
-    # RENDER TEMPLATE
-    # =========================================================================
+    Served from the version-stamped dashboard cache; see services/dashboard_cache_service.py.
+    """
+    user_id = current_user.id
+    payload = get_versioned_payload(
+        'dashboard',
+        _dashboard_cache_scope(current_user),
+        lambda: _build_dashboard_payload(user_id),
+    )
 
     return render_template('dashboard.html',
-                          total_leads=company_this.get('leads_count', 0),
-                          vs_last_week_leads=company_this.get('leads_count', 0) - company_last.get('leads_count', 0),
-                          qualified_leads=company_this.get('qualified_leads_count', 0),
-                          vs_last_week_qualified=company_this.get('qualified_leads_count', 0) - company_last.get('qualified_leads_count', 0),
-                          pipeline_count=company_this.get('pipeline_count', 0),
-                          vs_last_week_pipeline=company_this.get('pipeline_count', 0) - company_last.get('pipeline_count', 0),
-                          current_tcv=company_this.get('tcv', 0),
-                          vs_last_week_tcv=company_this.get('tcv', 0) - company_last.get('tcv', 0),
-                          current_quarter_revenue=company_this.get('current_qtr_revenue', 0),
-                          next_quarter_revenue=company_this.get('next_qtr_revenue', 0),
-                          owner_metrics=owner_metrics,
-                          users=users,
-                          pipeline_stages=pipeline_stages,
-                          pipeline_deals=pipeline_deals,
+                          **payload,
                           format_currency=format_currency,
                           format_currency_thousands=format_currency_thousands,
                           format_currency_short=format_currency_short,
@@ -998,33 +883,23 @@ def index():
     sort_order = filter_values['sort_order']
     
     # Build query
-    query = SalesLead.query.filter(SalesLead.is_deleted.is_(False))
-    
-    # Sales can only see their own leads + leads owned by marketing
-    if not current_user.can_view_all_leads():
-        marketing_users = User.query.filter(User.role.ilike('marketing')).all()
-        marketing_ids = [u.id for u in marketing_users]
-        query = query.filter(
-            db.or_(
-                SalesLead.owner_id == current_user.id,
-                SalesLead.owner_id.in_(marketing_ids)
-            )
-        )
-
-    summary_query = query
+    query = _get_leads_access_query()
     if company_filter:
-        summary_query = summary_query.filter(SalesLead.company.ilike(f"%{company_filter}%"))
-    if source_filters:
-        summary_query = summary_query.filter(SalesLead.source.in_(source_filters))
-    if owner_filter_ids:
-        summary_query = summary_query.filter(SalesLead.owner_id.in_(owner_filter_ids))
-
-    summary_counts_raw = dict(
-        summary_query
-        .with_entities(SalesLead.leads_status, func.count(SalesLead.id))
-        .group_by(SalesLead.leads_status)
-        .all()
-    )
+        query = query.filter(search_condition(SalesLead, company_filter))
+
+    # Each facet ignores its own selection; summary cards also ignore the default status hiding
+    lead_filters = {
+        'hidden': None if show_unqualified else SalesLead.leads_status.notin_(DEFAULT_HIDDEN_LEAD_STATUSES),
+        'status': SalesLead.leads_status.in_(status_filters) if status_filters else None,
+        'source': SalesLead.source.in_(source_filters) if source_filters else None,
+        'owner': SalesLead.owner_id.in_(owner_filter_ids) if owner_filter_ids else None,
+    }
+    facets = get_cached_facets('leads_facets', query, lead_filters, LEAD_FACETS, {
+        'scope': 'all' if current_user.can_view_all_leads() else current_user.id,
+        'filters': {key: value for key, value in filter_values.items() if key not in ('sort_by', 'sort_order')},
+    })
+
+    summary_counts_raw = facets['facets']['status']
     summary_total = sum(summary_counts_raw.values())
     leads_summary_cards = [
         {
@@ -1062,42 +937,22 @@ def index():
             }
         )
     
-    filtered_query = query
-    if not show_unqualified:
-        filtered_query = _hide_default_lead_statuses(filtered_query)
-    if company_filter:
-        filtered_query = filtered_query.filter(SalesLead.company.ilike(f"%{company_filter}%"))
-    if status_filters:
-        filtered_query = filtered_query.filter(SalesLead.leads_status.in_(status_filters))
-    if source_filters:
-        filtered_query = filtered_query.filter(SalesLead.source.in_(source_filters))
-
-    owner_options_query = filtered_query
-    if owner_filter_ids:
-        filtered_query = filtered_query.filter(SalesLead.owner_id.in_(owner_filter_ids))
-
-    query = _apply_leads_sort(filtered_query, sort_by, sort_order)
-    
-    # Get total count before pagination
-    total_count = query.count()
-    
-    # Paginate
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 100, type=int)
-    leads = query.paginate(page=page, per_page=per_page, error_out=False)
-    
-    users = _get_owner_users_from_query(
-        SalesLead,
-        owner_options_query,
-        include_user_ids=owner_filter_ids
-    )
-    
+    filtered_query = query.filter(*[condition for condition in lead_filters.values() if condition is not None])
     available_columns, default_columns = _get_leads_column_settings()
     visible_columns, visible_column_keys = _get_visible_columns_for_page(
         'leads',
         available_columns,
         default_columns
     )
+
+    sort_keys = _get_leads_sort_keys(sort_by, sort_order)
+    filtered_query = project_list_columns(
+        filtered_query, SalesLead, visible_column_keys, LEADS_COLUMN_FIELDS,
+        always=['name', 'company', *[key.column.key for key in sort_keys]],
+    )
+    leads = _paginate_list(filtered_query, sort_keys, sort_by, sort_order)
+    total_count = facets['total']
+    users = _get_owner_users(facets['facets']['owner'], include_user_ids=owner_filter_ids)
     
     return render_template('leads/index.html',
                           SalesLead=SalesLead,
@@ -1115,6 +970,8 @@ def index():
                           default_columns=default_columns,
                           visible_columns=visible_columns,
                           visible_column_keys=visible_column_keys,
+                          source_counts=facets['facets']['source'],
+                          owner_counts=facets['facets']['owner'],
                           users=users)
 
 
@@ -1482,73 +1339,49 @@ def import_template():
     )
 
 
+def _build_leads_export(user, filter_values, visible_columns, remote_addr=None, keyset=False):
+    """Export plan for the leads list as ``user`` sees it with ``filter_values`` applied.
+
+    ``keyset`` reads the rows as separate keyset chunks (background jobs).
+    """
+    query = _apply_leads_filters(_get_leads_access_query(user), filter_values)
+    sort_keys = _get_leads_sort_keys(filter_values['sort_by'], filter_values['sort_order'])
+    columns = _get_export_columns(visible_columns, LEADS_EXPORT_COLUMN_TYPES)
+    rows = iter_export_rows(
+        project_list_columns(
+            query.order_by(*[key.order_by() for key in sort_keys]),
+            SalesLead,
+            [column['key'] for column in visible_columns],
+            LEADS_COLUMN_FIELDS,
+            always=[key.column.key for key in sort_keys],
+        ),
+        columns,
+        _get_leads_export_value,
+        sort_keys=sort_keys if keyset else None,
+    )
+    return ExportPlan(
+        ExportSheet('Sales Leads', columns, rows),
+        query,
+        f'sales_leads_export_{date.today()}',
+        # Log the export activity
+        on_complete=lambda count: log_lead_exported(user, count, remote_addr),
+    )
+
+
 @leads_bp.route('/export')
 @login_required
 def export():
-    """Export Sales Leads to Excel."""
+    """Export Sales Leads as Excel, CSV or Parquet (``format`` argument)."""
     if not current_user.can_access_leads():
         flash('You do not have permission to access Sales Leads.', 'danger')
         return redirect(url_for('main.dashboard'))
-    
-    # Get filtered leads
-    query = SalesLead.query.filter(SalesLead.is_deleted.is_(False))
-    
-    # Sales can only see their own leads + leads owned by marketing
-    if not current_user.can_view_all_leads():
-        marketing_users = User.query.filter(User.role.ilike('marketing')).all()
-        marketing_ids = [u.id for u in marketing_users]
-        query = query.filter(
-            db.or_(
-                SalesLead.owner_id == current_user.id,
-                SalesLead.owner_id.in_(marketing_ids)
-            )
-        )
-    
-    saved_filters = session.get('leads_filters', {})
-    filter_values = _get_leads_filter_values(saved_filters)
-
-    show_unqualified = filter_values['show_unqualified']
-    company_filter = filter_values['company_filter']
-    status_filters = filter_values['status_filters']
-    source_filters = filter_values['source_filters']
-    owner_filter_ids = filter_values['owner_filter_ids']
-    sort_by = filter_values['sort_by']
-    sort_order = filter_values['sort_order']
-
-    if not show_unqualified:
-        query = _hide_default_lead_statuses(query)
-    if company_filter:
-        query = query.filter(SalesLead.company.ilike(f"%{company_filter}%"))
-    if status_filters:
-        query = query.filter(SalesLead.leads_status.in_(status_filters))
-    if source_filters:
-        query = query.filter(SalesLead.source.in_(source_filters))
-    if owner_filter_ids:
-        query = query.filter(SalesLead.owner_id.in_(owner_filter_ids))
-
-    query = _apply_leads_sort(query, sort_by, sort_order)
-
-    leads = query.all()
+    export_format = _get_export_format()
 
+    filter_values = _get_leads_filter_values(session.get('leads_filters', {}))
     available_columns, default_columns = _get_leads_column_settings()
-    visible_columns, _ = _get_visible_columns_for_page('leads', available_columns, default_columns)
-    df = _build_export_dataframe(leads, visible_columns, _get_leads_export_value)
-    
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Sales Leads')
-    
-    output.seek(0)
-    
-    # Log the export activity
-    log_lead_exported(current_user, len(leads), request.remote_addr)
-    
-    return send_file(
-        output,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=f'sales_leads_export_{date.today()}.xlsx'
-    )
+    visible_columns, _visible_column_keys = _get_visible_columns_for_page('leads', available_columns, default_columns)
+    plan = _build_leads_export(current_user, filter_values, visible_columns, request.remote_addr)
+    return send_export(export_format, plan.sheet, plan.download_stem, plan.on_complete)
 
 
 @leads_bp.route('/import', methods=['POST'])
@@ -1571,80 +1404,7 @@ def import_data():
     
     try:
         df = import_from_excel(file)
-        
-        # Validate each row
-        all_errors = []
-        valid_rows = []
-        
-        for idx, row in df.iterrows():
-            # Convert row to dict with proper keys
-            row_dict = row.to_dict()
-            # Normalize keys (remove spaces, periods, parentheses, lowercase, dedupe underscores)
-            normalized = {}
-            for k, v in row_dict.items():
-                k2 = k.strip().replace(' ', '_').replace('.', '_').replace('-', '_').replace('(', '').replace(')', '').lower()
-                # Remove duplicate underscores
-                while '__' in k2:
-                    k2 = k2.replace('__', '_')
-                normalized[k2] = v
-            row_dict = normalized
-            
-            # Clean all values - comprehensive type handling
-            cleaned_row = {}
-            for key, val in row_dict.items():
-                if val is None:
-                    cleaned_row[key] = None
-                elif isinstance(val, float):
-                    if val != val or str(val).lower() == 'nan':
-                        cleaned_row[key] = None
-                    else:
-                        # Check if this looks like an Excel date (numeric around 40000-50000)
-                        # 包括 date_added, date 等常见日期字段
-                        if key.endswith('_date') or key == 'date_added' or key == 'added':
-                            if 40000 < val < 60000:
-                                cleaned_row[key] = excel_date_to_str(val)
-                            else:
-                                cleaned_row[key] = val
-                        else:
-                            cleaned_row[key] = val
-                elif isinstance(val, int):
-                    # Check if this looks like an Excel date (numeric around 40000-50000)
-                    if key.endswith('_date') or key == 'date_added' or key == 'added':
-                        if 40000 < val < 60000:
-                            cleaned_row[key] = excel_date_to_date(val)
-                        else:
-                            cleaned_row[key] = val
-                    else:
-                        cleaned_row[key] = val
-                elif hasattr(val, 'strftime'):  # pandas Timestamp/datetime (but not NaT)
-                    if pd.isna(val):
-                        cleaned_row[key] = None
-                    else:
-                        cleaned_row[key] = val.date()  # Convert to date object
-                elif isinstance(val, str):
-                    val_clean = val.strip()
-                    if val_clean.lower() == 'nan' or val_clean == '':
-                        cleaned_row[key] = None
-                    elif key.endswith('_date') or key == 'date_added' or key == 'added':
-                        # This is a date string - try multiple formats including YYYY-MM-DD
-                        from utils import validate_date
-                        parsed_date = validate_date(val_clean)
-                        if parsed_date:
-                            cleaned_row[key] = parsed_date
-                        else:
-                            # Still keep the original string as fallback
-                            cleaned_row[key] = val_clean
-                    else:
-                        cleaned_row[key] = val_clean
-                else:
-                    cleaned_row[key] = val
-            
-            errors = validate_sales_lead_import(cleaned_row)
-            
-            if errors:
-                all_errors.append(f"Row {idx + 1}: {', '.join(errors)}")
-            else:
-                valid_rows.append(cleaned_row)
+        valid_rows, all_errors = clean_leads_import(df)
         
         if all_errors:
             flash(f"Import errors found:\n" + "\n".join(all_errors[:10]), 'danger')
@@ -1652,39 +1412,7 @@ def import_data():
                 flash(f"...and {len(all_errors) - 10} more errors", 'info')
             return redirect(url_for('leads.index'))
         
-        # Import valid rows
-        imported_count = 0
-        imported_owner_ids = set()
-        with disable_metrics_events():
-            for row in valid_rows:
-                # Find owner by username
-                owner = None
-                if row.get('owner'):
-                    owner = User.query.filter_by(username=row.get('owner')).first()
-
-                lead = SalesLead(
-                    name=row.get('name') or None,
-                    company=row.get('company') or None,
-                    industry=row.get('industry') or None,
-                    position=row.get('position') or None,
-                    email=row.get('email') or None,
-                    mobile_number=row.get('mobile_number') or None,
-                    requirements=row.get('requirements') or None,
-                    leads_status=row.get('leads_status', 'Waiting to be Contacted'),
-                    source=row.get('source') or None,
-                    event=row.get('event') or None,
-                    date_added=row.get('date_added') or date.today(),
-                    owner_id=owner.id if owner else current_user.id,
-                    note=row.get('note') or None
-                )
-
-                db.session.add(lead)
-                _ensure_qualified_lead_pipeline(lead)
-                if lead.owner_id:
-                    imported_owner_ids.add(lead.owner_id)
-                imported_count += 1
-            
-            db.session.commit()
+        imported_count = import_leads(valid_rows, current_user.id)
         
         # Log the import activity
         if imported_count > 0:
@@ -1756,16 +1484,8 @@ def index():
     
     # Build base query
     query = _get_pipeline_access_query()
-
-    base_filtered_query = query
-    if not show_lost:
-        base_filtered_query = _hide_default_pipeline_stages(base_filtered_query)
     if company_filter:
-        base_filtered_query = base_filtered_query.filter(Pipeline.company.ilike(f"%{company_filter}%"))
-    if stage_filters:
-        base_filtered_query = base_filtered_query.filter(Pipeline.stage.in_(stage_filters))
-    if level_filter:
-        base_filtered_query = base_filtered_query.filter(func.lower(Pipeline.level) == func.lower(level_filter))
+        query = query.filter(search_condition(Pipeline, company_filter))
 
     quarter_ranges = _build_quarter_ranges()
     sign_date_conditions = []
@@ -1776,8 +1496,6 @@ def index():
                 Pipeline.est_sign_date >= est_sign_date_from,
                 Pipeline.est_sign_date <= est_sign_date_to
             ))
-    if sign_date_conditions:
-        base_filtered_query = base_filtered_query.filter(or_(*sign_date_conditions))
 
     activate_date_conditions = []
     for quarter in est_activate_quarters:
@@ -1787,45 +1505,55 @@ def index():
                 Pipeline.est_act_date >= est_activate_date_from,
                 Pipeline.est_act_date <= est_activate_date_to
             ))
-    if activate_date_conditions:
-        base_filtered_query = base_filtered_query.filter(or_(*activate_date_conditions))
 
-    owner_options_query = base_filtered_query
-    if owner_filter_ids:
-        base_filtered_query = base_filtered_query.filter(Pipeline.owner_id.in_(owner_filter_ids))
+    pipeline_filters = {
+        'hidden': None if show_lost else Pipeline.stage.notin_(DEFAULT_HIDDEN_PIPELINE_STAGES),
+        'stage': Pipeline.stage.in_(stage_filters) if stage_filters else None,
+        'level': func.lower(Pipeline.level) == func.lower(level_filter) if level_filter else None,
+        'est_sign_quarter': or_(*sign_date_conditions) if sign_date_conditions else None,
+        'est_activate_quarter': or_(*activate_date_conditions) if activate_date_conditions else None,
+        'owner': Pipeline.owner_id.in_(owner_filter_ids) if owner_filter_ids else None,
+    }
+    list_scope = {
+        'scope': 'all' if current_user.can_view_all_business_data() else current_user.id,
+        'filters': {key: value for key, value in filter_values.items() if key not in ('sort_by', 'sort_order')},
+    }
+    facets = get_cached_facets('pipeline_facets', query, pipeline_filters, PIPELINE_FACETS, list_scope)
 
-    query = _apply_pipeline_sort(base_filtered_query, sort_by, sort_order)
-    
-    # Get total count
-    total_count = query.count()
-    
-    # Calculate total TCV
-    total_tcv = sum(p.tcv_usd for p in query.all())
-    
-    # Paginate
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 100, type=int)
-    pipelines = query.paginate(page=page, per_page=per_page, error_out=False)
-    won_deals_count = sum(1 for pipeline in pipelines.items if pipeline.stage in WON_PIPELINE_STAGES)
-    
-    users = _get_owner_users_from_query(
-        Pipeline,
-        owner_options_query,
-        include_user_ids=owner_filter_ids
+    base_filtered_query = query.filter(
+        *[condition for condition in pipeline_filters.values() if condition is not None]
     )
-    
     available_columns, default_columns = _get_pipeline_column_settings()
     visible_columns, visible_column_keys = _get_visible_columns_for_page(
         'pipeline',
         available_columns,
         default_columns
     )
+
+    sort_keys = _get_pipeline_sort_keys(sort_by, sort_order)
+    pipelines = _paginate_list(
+        project_list_columns(
+            base_filtered_query, Pipeline, visible_column_keys, PIPELINE_COLUMN_FIELDS,
+            always=['company', *[key.column.key for key in sort_keys]],
+        ),
+        sort_keys, sort_by, sort_order,
+    )
+    # Header figures cover every filtered row, not just this page
+    summary = get_cached_pipeline_summary('pipeline_list', base_filtered_query, list_scope)
+    total_count = facets['total']
+    
+    users = _get_owner_users(facets['facets']['owner'], include_user_ids=owner_filter_ids)
+    followup_previews = (
+        get_followup_previews(pipelines.items) if 'follow_up' in visible_column_keys else {}
+    )
     
     return render_template('pipeline/index.html',
                           pipelines=pipelines,
+                          followup_previews=followup_previews,
                           total_count=total_count,
-                          total_tcv=total_tcv,
-                          won_deals_count=won_deals_count,
+                          summary=summary,
+                          stage_counts=facets['facets']['stage'],
+                          owner_counts=facets['facets']['owner'],
                           users=users,
                           show_lost=show_lost,
                           company_filter=company_filter,
@@ -1848,56 +1576,28 @@ def index():
 # PIPELINE API
 # ============================================================================
 
+def _get_kanban_owner_filter():
+    """Owner ids from ``owner_id`` (repeatable) or the legacy single ``owner`` argument."""
+    values = request.args.getlist('owner_id') or request.args.getlist('owner')
+    return _normalize_multi_filter_values(values, int)
+
+
 @pipeline_bp.route('/api/kanban-data')
 @login_required
 def kanban_data():
-    """Get Kanban board data as JSON."""
-    owner_filter = request.args.get('owner', None)
-    
-    # Build query
-    query = Pipeline.query.filter(Pipeline.is_deleted.is_(False))
-    
-    # Filter by access permissions
-    if not current_user.can_view_all_business_data():
-        # Get the Pipeline IDs that current_user supports
-        supported_pipeline_ids = db.session.query(Pipeline.id).filter(
-            Pipeline.support_team.contains(current_user)
-        ).subquery()
-        query = query.filter(
-            or_(
-                Pipeline.owner_id == current_user.id,
-                Pipeline.id.in_(supported_pipeline_ids)
-            )
-        )
-    
-    # Apply owner filter
-    if owner_filter:
-        query = query.filter(Pipeline.owner_id == int(owner_filter))
-    
-    # Get all pipelines (no pagination for Kanban)
-    pipelines = query.order_by(Pipeline.date_added.desc()).all()
-    
-    # Group by stage
-    stages = ['1) Prospecting', '2) Lead Qualified', '3) Demo/Meeting', 
-              '4) Proposal Submitted', '5) Negotiation', '6a) Deal Won', '6b) Deal Lost', '7) Activated']
-    
-    kanban_data = {}
-    for stage in stages:
-        stage_pipelines = [p for p in pipelines if p.stage == stage]
-        kanban_data[stage] = [{
-            'id': p.id,
-            'company': p.company or '',
-            'name': p.name or '',
-            'product': p.product or '',
-            'tcv_usd': p.tcv_usd or 0,
-            'owner': p.owner.username if p.owner else '',
-            'level': p.level or '',
-            'win_rate': p.win_rate or 0,
-            'est_sign_date': p.est_sign_date.strftime('%Y-%m-%d') if p.est_sign_date else None,
-            'date_added': p.date_added.strftime('%Y-%m-%d') if p.date_added else None,
-        } for p in stage_pipelines]
-    
-    return jsonify({'success': True, 'data': kanban_data})
+    """Get Kanban board data as JSON.
+
+    Returns the per-stage count/TCV/MRC aggregates in ``stages`` with the
+    first ``limit`` cards of each column. ``?legacy=1`` instead returns the
+    pre-pagination ``{stage: [cards]}`` payload in ``data`` (every card,
+    original fields and ordering) for clients that still need it.
+    """
+    owner_ids = _get_kanban_owner_filter()
+    base_query = _get_pipeline_access_query()
+    if request.args.get('legacy', 'false').lower() in ('1', 'true'):
+        return jsonify({'success': True, 'data': get_legacy_kanban_data(base_query, owner_ids=owner_ids)})
+    board = build_kanban_board(base_query, limit=request.args.get('limit'), owner_ids=owner_ids)
+    return jsonify({'success': True, 'stages': board['stages'], 'page_size': board['page_size']})
 
 
 @pipeline_bp.route('/api/update-stage', methods=['POST'])
@@ -2031,7 +1731,6 @@ def edit(pipeline_id):
                 'company': pipeline.company,
                 'stage': pipeline.stage,
                 'owner_id': pipeline.owner_id,
-                'follow_up': pipeline.follow_up,
                 'stuckpoint': pipeline.stuckpoint,
             }
             pipeline.name = request.form.get('name')
@@ -2058,7 +1757,6 @@ def edit(pipeline_id):
             
             pipeline.level = request.form.get('level')
             pipeline.comments = request.form.get('comments')
-            pipeline.follow_up = request.form.get('follow_up')
             pipeline.stuckpoint = request.form.get('stuckpoint')
             pipeline.owner_id = request.form.get('owner_id')
             
@@ -2078,7 +1776,6 @@ def edit(pipeline_id):
                 'company': pipeline.company,
                 'stage': pipeline.stage,
                 'owner_id': pipeline.owner_id,
-                'follow_up': pipeline.follow_up,
                 'stuckpoint': pipeline.stuckpoint,
             }
             db.session.commit()
@@ -2277,104 +1974,81 @@ def import_template():
     )
 
 
-@pipeline_bp.route('/export')
-@login_required
-def export():
-    """Export Pipeline to Excel."""
-    # Get saved filters from session
-    saved_filters = session.get('pipeline_filters', {})
-    
-    filter_values = _get_pipeline_filter_values(saved_filters)
-    show_lost = filter_values['show_lost']
-    company_filter = filter_values['company_filter']
-    stage_filters = filter_values['stage_filters']
-    level_filter = filter_values['level_filter']
-    owner_filter_ids = filter_values['owner_filter_ids']
-    est_sign_quarters = filter_values['est_sign_quarters']
-    est_activate_quarters = filter_values['est_activate_quarters']
-    sort_by = filter_values['sort_by']
-    sort_order = filter_values['sort_order']
-    
-    # Get filtered pipelines
-    query = _get_pipeline_access_query()
-    if not show_lost:
-        query = _hide_default_pipeline_stages(query)
-    if company_filter:
-        query = query.filter(Pipeline.company.ilike(f"%{company_filter}%"))
-    if stage_filters:
-        query = query.filter(Pipeline.stage.in_(stage_filters))
-    if level_filter:
-        query = query.filter(func.lower(Pipeline.level) == func.lower(level_filter))
-    if owner_filter_ids:
-        query = query.filter(Pipeline.owner_id.in_(owner_filter_ids))
+def _build_pipeline_export(user, filter_values, visible_columns, export_format, remote_addr=None, keyset=False):
+    """Export plan for the pipeline list as ``user`` sees it with ``filter_values`` applied.
 
-    quarter_ranges = _build_quarter_ranges()
-    sign_date_conditions = []
-    for quarter in est_sign_quarters:
-        if quarter in quarter_ranges:
-            est_sign_date_from, est_sign_date_to = quarter_ranges[quarter]
-            sign_date_conditions.append(and_(
-                Pipeline.est_sign_date >= est_sign_date_from,
-                Pipeline.est_sign_date <= est_sign_date_to
-            ))
-    if sign_date_conditions:
-        query = query.filter(or_(*sign_date_conditions))
+    Workbooks get a Summary sheet; ``keyset`` reads the rows as separate
+    keyset chunks (background jobs).
+    """
+    query = _apply_pipeline_filters(_get_pipeline_access_query(user), filter_values)
+    sort_keys = _get_pipeline_sort_keys(filter_values['sort_by'], filter_values['sort_order'])
+
+    # Normally done by the scheduled `flask forecast-rollover`; covers the gap until it runs
+    ensure_forecasts_current()
+
+    visible_column_keys = [column['key'] for column in visible_columns]
+    columns = _get_export_columns(visible_columns, PIPELINE_EXPORT_COLUMN_TYPES)
+    followup_previews = {}
+
+    def load_followup_previews(chunk):
+        followup_previews.clear()
+        followup_previews.update(get_followup_previews(chunk))
+
+    rows = iter_export_rows(
+        project_list_columns(
+            query.order_by(*[key.order_by() for key in sort_keys]),
+            Pipeline,
+            visible_column_keys,
+            PIPELINE_COLUMN_FIELDS,
+            always=[key.column.key for key in sort_keys],
+        ),
+        columns,
+        lambda pipeline, column_key: _get_pipeline_export_value(pipeline, column_key, followup_previews),
+        prepare_chunk=load_followup_previews if 'follow_up' in visible_column_keys else None,
+        sort_keys=sort_keys if keyset else None,
+    )
 
-    activate_date_conditions = []
-    for quarter in est_activate_quarters:
-        if quarter in quarter_ranges:
-            est_activate_date_from, est_activate_date_to = quarter_ranges[quarter]
-            activate_date_conditions.append(and_(
-                Pipeline.est_act_date >= est_activate_date_from,
-                Pipeline.est_act_date <= est_activate_date_to
-            ))
-    if activate_date_conditions:
-        query = query.filter(or_(*activate_date_conditions))
+    extra_sheets = []
+    if export_format == 'xlsx':
+        summary = get_pipeline_summary(query)
+        summary_columns = [
+            ExportColumn('stage', 'Stage'),
+            ExportColumn('count', 'Count'),
+            ExportColumn('tcv_usd', 'TCV (USD)', MONEY_FORMAT),
+            ExportColumn('mrc_usd', 'MRC (USD)', MONEY_FORMAT),
+            ExportColumn('gp', 'GP', MONEY_FORMAT),
+        ]
+        summary_rows = [
+            [stage, totals['count'], totals['tcv_usd'], totals['mrc_usd'], totals['gp']]
+            for stage, totals in sorted(summary['stages'].items(), key=lambda item: item[0] or '')
+        ] + [
+            ['Total', summary['count'], summary['tcv_usd'], summary['mrc_usd'], summary['gp']],
+            ['Won', summary['won_count']],
+            ['Active', summary['active_count']],
+        ]
+        extra_sheets.append(ExportSheet('Summary', summary_columns, summary_rows))
 
-    query = _apply_pipeline_sort(query, sort_by, sort_order)
-    
-    # Eagerly load relationships to avoid lazy loading issues
-    pipelines = query.options(db.joinedload(Pipeline.owner), db.joinedload(Pipeline.support_team)).all()
-    forecast_base_month = get_forecast_base_month()
+    return ExportPlan(
+        ExportSheet('Pipeline', columns, rows),
+        query,
+        f'pipeline_export_{date.today()}',
+        extra_sheets,
+        # Log the export activity
+        on_complete=lambda count: log_pipeline_exported(user, count, remote_addr),
+    )
 
-    stale_pipelines = [pipeline for pipeline in pipelines if pipeline_forecast_needs_refresh(pipeline, forecast_base_month)]
-    if stale_pipelines:
-        stale_owner_ids = {pipeline.owner_id for pipeline in stale_pipelines if pipeline.owner_id}
-        with disable_metrics_events():
-            for pipeline in stale_pipelines:
-                calculate_pipeline_metrics(pipeline, forecast_base_month)
-            db.session.commit()
-        if stale_owner_ids:
-            refresh_weekly_metrics(owner_ids=stale_owner_ids)
-    
-    available_columns, default_columns = _get_pipeline_column_settings()
-    visible_columns, _ = _get_visible_columns_for_page('pipeline', available_columns, default_columns)
-    df = _build_export_dataframe(pipelines, visible_columns, _get_pipeline_export_value)
-    
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Pipeline')
-        worksheet = writer.sheets['Pipeline']
-        header_to_key = {column['label']: column['key'] for column in visible_columns}
-        numeric_keys = {'tcv_usd', 'mrc_usd', 'otc_usd', 'gp'}
 
-        for column_cells in worksheet.iter_cols(1, worksheet.max_column):
-            header = column_cells[0].value
-            if header_to_key.get(header) in numeric_keys:
-                for cell in column_cells[1:]:
-                    cell.number_format = '#,##0.0000'
-    
-    output.seek(0)
-    
-    # Log the export activity
-    log_pipeline_exported(current_user, len(pipelines), request.remote_addr)
-    
-    return send_file(
-        output,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=f'pipeline_export_{date.today()}.xlsx'
-    )
+@pipeline_bp.route('/export')
+@login_required
+def export():
+    """Export Pipeline as Excel, CSV or Parquet (``format`` argument)."""
+    export_format = _get_export_format()
+
+    filter_values = _get_pipeline_filter_values(session.get('pipeline_filters', {}))
+    available_columns, default_columns = _get_pipeline_column_settings()
+    visible_columns, _visible_column_keys = _get_visible_columns_for_page('pipeline', available_columns, default_columns)
+    plan = _build_pipeline_export(current_user, filter_values, visible_columns, export_format, request.remote_addr)
+    return send_export(export_format, plan.sheet, plan.download_stem, plan.on_complete, plan.extra_sheets)
 
 
 @pipeline_bp.route('/import', methods=['POST'])
@@ -2394,103 +2068,7 @@ def import_data():
     
     try:
         df = import_from_excel(file)
-        
-        # Validate each row
-        all_errors = []
-        valid_rows = []
-        
-        # Field type definitions
-        numeric_fields = ['tcv_usd', 'mrc_usd', 'otc_usd', 'gp_margin', 'win_rate', 'gp', 
-                         'm1', 'm2', 'm3', 'm4', 'm5', 'm6', 'm7', 'm8', 'm9', 'm10', 'm11', 'm12']
-        integer_fields = ['contract_term_yrs', 'id', 'owner_id', 'sales_lead_id']
-        date_fields = ['est_sign_date', 'est_act_date', 'deposit_date', 'award_date', 'proposal_sent_date', 'date_added']
-        
-        for idx, row in df.iterrows():
-            row_dict = row.to_dict()
-            
-            # Normalize keys (remove spaces, periods, parentheses, lowercase, dedupe underscores)
-            normalized = {}
-            for k, v in row_dict.items():
-                k2 = k.strip().replace(' ', '_').replace('.', '_').replace('-', '_').replace('(', '').replace(')', '').lower()
-                # Remove duplicate underscores
-                while '__' in k2:
-                    k2 = k2.replace('__', '_')
-                normalized[k2] = v
-            row_dict = normalized
-            
-            # Clean all values - comprehensive type handling
-            cleaned_row = {}
-            for key, val in row_dict.items():
-                if val is None:
-                    cleaned_row[key] = None
-                elif isinstance(val, float):
-                    if val != val or str(val).lower() == 'nan':  # NaN
-                        cleaned_row[key] = 0 if key in numeric_fields else None
-                    else:
-                        # Check if this looks like an Excel date (numeric around 40000-50000)
-                        if key.endswith('_date') or key == 'date_added' or key == 'added':
-                            if 40000 < val < 60000:
-                                cleaned_row[key] = excel_date_to_date(val)
-                            else:
-                                cleaned_row[key] = round(val, 4) if key in numeric_fields else val
-                        else:
-                            cleaned_row[key] = round(val, 4) if key in numeric_fields else val
-                elif isinstance(val, int):
-                    # Check if this looks like an Excel date (numeric around 40000-50000)
-                    if key.endswith('_date') or key == 'date_added' or key == 'added':
-                        if 40000 < val < 60000:
-                            cleaned_row[key] = excel_date_to_date(val)
-                        else:
-                            cleaned_row[key] = val
-                    else:
-                        cleaned_row[key] = val
-                elif hasattr(val, 'strftime'):  # pandas Timestamp/datetime (but not NaT)
-                    if pd.isna(val):
-                        cleaned_row[key] = None
-                    else:
-                        cleaned_row[key] = val.date()  # Convert to date object
-                elif isinstance(val, str):
-                    val_clean = val.strip()
-                    if val_clean.lower() == 'nan' or val_clean == '':
-                        cleaned_row[key] = 0 if key in numeric_fields else None
-                    elif key.endswith('_date') or key == 'date_added' or key == 'added':
-                        # This is a date string - use validate_date for all formats
-                        date_val = validate_date(val_clean)
-                        if date_val:
-                            cleaned_row[key] = date_val
-                        else:
-                            cleaned_row[key] = None
-                    elif key in numeric_fields:
-                        try:
-                            cleaned_row[key] = round(float(val_clean), 4)
-                        except:
-                            cleaned_row[key] = 0
-                    else:
-                        cleaned_row[key] = val_clean if val_clean else None
-                else:
-                    cleaned_row[key] = val
-            
-            errors = validate_pipeline_import(cleaned_row)
-            
-            if errors:
-                all_errors.append(f"Row {idx + 1}: {', '.join(errors)}")
-            else:
-                # Normalize stage values to correct case
-                stage = cleaned_row.get('stage')
-                if stage:
-                    stage_normalize_map = {
-                        '1) prospecting': '1) Prospecting',
-                        '2) lead qualified': '2) Lead Qualified',
-                        '2) lead qualification': '2) Lead Qualified',
-                        '3) demo/meeting': '3) Demo/Meeting',
-                        '4) proposal submitted': '4) Proposal Submitted',
-                        '5) negotiation': '5) Negotiation',
-                        '6a) deal won': '6a) Deal Won',
-                        '6b) deal lost': '6b) Deal Lost',
-                    }
-                    stage_lower = stage.lower().strip()
-                    cleaned_row['stage'] = stage_normalize_map.get(stage_lower, stage)
-                valid_rows.append(cleaned_row)
+        valid_rows, all_errors = clean_pipeline_import(df)
         
         if all_errors:
             flash(f"Import errors found:\n" + "\n".join(all_errors[:10]), 'danger')
@@ -2498,71 +2076,9 @@ def import_data():
                 flash(f"...and {len(all_errors) - 10} more errors", 'info')
             return redirect(url_for('pipeline.index'))
         
-        # Import valid rows
-        imported_count = 0
-        for row_num, row in enumerate(valid_rows):
-            try:
-                # Find owner by username
-                owner = None
-                if row.get('owner'):
-                    owner = User.query.filter_by(username=row.get('owner')).first()
-                
-                # Handle support team
-                support_users = []
-                if row.get('support'):
-                    support_names = str(row.get('support')).split('/')
-                    for name in support_names:
-                        user = User.query.filter_by(username=name.strip()).first()
-                        if user:
-                            support_users.append(user)
-                
-                # Ensure name is not empty - use company or generate placeholder
-                pipeline_name = row.get('name')
-                if not pipeline_name or str(pipeline_name).strip() == '':
-                    pipeline_name = row.get('company') or f'Pipeline-{row_num + 1}'
-                
-                pipeline = Pipeline(
-                    name=pipeline_name,
-                    company=row.get('company'),
-                    industry=row.get('industry'),
-                    position=row.get('position'),
-                    email=row.get('email'),
-                    mobile_number=row.get('mobile_number'),
-                    product=row.get('product'),
-                    sales_lead_id=row.get('sales_lead_id'),
-                    mrc_usd=row.get('mrc_usd', 0),
-                    otc_usd=row.get('otc_usd', 0),
-                    contract_term_yrs=row.get('contract_term_yrs', 1),
-                    gp_margin=row.get('gp_margin', 0),
-                    est_sign_date=row.get('est_sign_date'),
-                    est_act_date=row.get('est_act_date'),
-                    deposit_date=row.get('deposit_date'),
-                    award_date=row.get('award_date'),
-                    proposal_sent_date=row.get('proposal_sent_date'),
-                    win_rate=row.get('win_rate', 0),
-                    stage=row.get('stage', '1) Prospecting'),
-                    level=row.get('level', 'Stretch'),
-                    comments=row.get('comments'),
-                    stuckpoint=row.get('stuckpoint'),
-                    follow_up=row.get('follow_up'),
-                    owner_id=owner.id if owner else current_user.id,
-                    date_added=date.today()
-                )
-                
-                # Calculate TCV
-                calculate_pipeline_metrics(pipeline)
-                
-                # Add support users
-                for user in support_users:
-                    pipeline.support_team.append(user)
-                
-                db.session.add(pipeline)
-                imported_count += 1
-                
-            except Exception as e:
-                flash(f"Error importing row {row_num + 1}: {str(e)}", 'danger')
-        
-        db.session.commit()
+        imported_count, row_errors = import_pipelines(valid_rows, current_user.id)
+        for message in row_errors:
+            flash(message, 'danger')
         
         # Log the import activity
         if imported_count > 0:
@@ -2571,6 +2087,7 @@ def import_data():
         flash(f'Successfully imported {imported_count} Pipeline entries!', 'success')
         
     except Exception as e:
+        db.session.rollback()
         flash(f'Error importing file: {str(e)}', 'danger')
     
     return redirect(url_for('pipeline.index'))
@@ -2951,19 +2468,22 @@ def reset_password(user_id):
 # LOGIN LOGS (Admin only)
 # ============================================================================
 
-@admin_bp.route('/login-logs')
-@login_required
-def login_logs():
-    """View the immutable login and operation archive (admin only)."""
-    if not current_user.is_admin():
-        flash('Admin access required.', 'danger')
-        return redirect(url_for('main.dashboard'))
+ACTIVITY_LOG_FILTER_ARGS = ('action', 'user', 'q', 'start_date', 'end_date')
+
 
-    action_filter = request.args.get('action', '').strip()
-    user_filter = request.args.get('user', '').strip()
-    keyword = request.args.get('q', '').strip()
-    start_date = request.args.get('start_date', '').strip()
-    end_date = request.args.get('end_date', '').strip()
+def _get_activity_log_filters(args):
+    """The archive page's filter arguments (``action``, ``user``, ``q``, dates) from ``args``."""
+    return {key: (args.get(key) or '').strip() for key in ACTIVITY_LOG_FILTER_ARGS}
+
+
+def _get_activity_log_query(filters=None):
+    """Activity log query filtered by the archive page's filters (default: the request arguments)."""
+    filters = filters if filters is not None else _get_activity_log_filters(request.args)
+    action_filter = filters.get('action', '')
+    user_filter = filters.get('user', '')
+    keyword = filters.get('q', '')
+    start_date = filters.get('start_date', '')
+    end_date = filters.get('end_date', '')
 
     query = ActivityLog.query
     if action_filter:
@@ -2982,11 +2502,68 @@ def login_logs():
         query = query.filter(ActivityLog.created_at >= start_date)
     if end_date:
         query = query.filter(ActivityLog.created_at <= f'{end_date} 23:59:59')
+    return query
 
-    logs = query.order_by(ActivityLog.created_at.desc()).limit(1000).all()
+
+@admin_bp.route('/login-logs')
+@login_required
+def login_logs():
+    """View the immutable login and operation archive (admin only)."""
+    if not current_user.is_admin():
+        flash('Admin access required.', 'danger')
+        return redirect(url_for('main.dashboard'))
+
+    logs = _get_activity_log_query().order_by(ActivityLog.created_at.desc()).limit(1000).all()
     return render_template('admin/login_logs.html', logs=logs)
 
 
+def _build_activity_log_export(user, filters, export_format, remote_addr=None, keyset=False):
+    """Export plan for every activity log row matching the archive ``filters``."""
+    columns = ACTIVITY_LOG_EXPORT_COLUMNS
+    query = _get_activity_log_query(filters)
+    sort_keys = [SortKey(ActivityLog.created_at, descending=True), SortKey(ActivityLog.id, descending=True)]
+    rows = iter_export_rows(
+        query
+        .options(db.load_only(*[getattr(ActivityLog, column.key) for column in columns]))
+        .order_by(ActivityLog.created_at.desc(), ActivityLog.id.desc()),
+        columns,
+        lambda log, column_key: getattr(log, column_key),
+        sort_keys=sort_keys if keyset else None,
+    )
+
+    def log_export(count):
+        log_activity(
+            user=user,
+            action_type='Activity Logs - Exported',
+            subject_type='activity_log',
+            subject_name=f'{count} log entries exported',
+            description=f'Exported {count} activity log entries as {export_format}',
+            ip_address=remote_addr,
+        )
+
+    return ExportPlan(
+        ExportSheet('Activity Logs', columns, rows),
+        query,
+        f'activity_logs_{date.today()}',
+        on_complete=log_export,
+    )
+
+
+@admin_bp.route('/login-logs/export')
+@login_required
+def export_login_logs():
+    """Export every activity log row matching the archive filters (``format`` argument, admin only)."""
+    if not current_user.is_admin():
+        flash('Admin access required.', 'danger')
+        return redirect(url_for('main.dashboard'))
+    export_format = _get_export_format()
+
+    plan = _build_activity_log_export(
+        current_user, _get_activity_log_filters(request.args), export_format, request.remote_addr
+    )
+    return send_export(export_format, plan.sheet, plan.download_stem, plan.on_complete)
+
+
 # ============================================================================
 # COLUMN PREFERENCES API
 # ============================================================================
@@ -3275,78 +2852,61 @@ def toggle_task_status(task_id):
 @api_bp.route('/dashboard/pipeline-kanban', methods=['GET'])
 @login_required
 def get_pipeline_kanban_data():
-    """Get pipeline data for the Kanban board visualization."""
-    
-    # Get filter parameters
+    """Get pipeline data for the Kanban board visualization.
+
+    Without ``stage`` returns every column with its aggregates and first page
+    of cards. With ``stage`` (and the ``cursor`` from a previous page) returns
+    the next page of cards for that column only.
+    """
     show_lost = request.args.get('show_lost', 'false') == 'true'
-    
-    # Build base query
-    query = Pipeline.query.filter(Pipeline.is_deleted.is_(False))
-    
-    # Filter by access permissions
-    if not current_user.can_view_all_business_data():
-        # Get the Pipeline IDs that current_user supports
-        supported_pipeline_ids = db.session.query(Pipeline.id).filter(
-            Pipeline.support_team.contains(current_user)
-        ).subquery()
-        query = query.filter(
-            or_(
-                Pipeline.owner_id == current_user.id,
-                Pipeline.id.in_(supported_pipeline_ids)
+    owner_ids = _get_kanban_owner_filter()
+
+    base_query = _get_pipeline_access_query()
+    stage = request.args.get('stage')
+    if stage:
+        if stage not in Pipeline.STAGE_OPTIONS:
+            return jsonify({'error': 'Invalid stage'}), 400
+        try:
+            page = get_kanban_cards(
+                base_query,
+                stage,
+                cursor=request.args.get('cursor'),
+                limit=request.args.get('limit'),
+                owner_ids=owner_ids,
             )
-        )
-    
-    # Filter by lost status
-    if not show_lost:
-        query = query.filter(Pipeline.stage != '6b) Deal Lost')
-    
-    # Get all active deals
-    pipelines = query.order_by(Pipeline.date_added.desc()).all()
-    
-    # Define pipeline stages for kanban board
-    stages = [
-        {'value': 'Prospecting', 'label': '1) Prospecting'},
-        {'value': 'Qualification', 'label': '2) Qualification'},
-        {'value': 'Needs Analysis', 'label': '3) Needs Analysis'},
-        {'value': 'Value Proposition', 'label': '4) Value Proposition'},
-        {'value': 'Proposal', 'label': '5) Proposal'},
-        {'value': 'Negotiation', 'label': '6) Negotiation'},
-        {'value': '6a) Deal Won', 'label': '6a) Deal Won'},
-        {'value': '7) Activated', 'label': '7) Activated'},
-    ]
-    
-    # Serialize deals data
-    deals_data = []
-    for p in pipelines:
-        # Get latest follow-up date
-        latest_followup = None
-        if p.follow_up:
-            # Parse follow-up dates from the text
-            import re
-            date_pattern = r'(\d{4}-\d{2}-\d{2})'
-            dates = re.findall(date_pattern, p.follow_up)
-            if dates:
-                latest_followup = max(dates)
-        
-        deal = {
-            'id': p.id,
-            'company': p.company,
-            'name': p.name,
-            'owner_name': p.owner.username if p.owner else None,
-            'tcv_usd': p.tcv_usd,
-            'mrc_usd': p.mrc_usd,
-            'win_rate': p.win_rate,
-            'stage': p.stage,
-            'est_sign_date': p.est_sign_date.strftime('%Y-%m-%d') if p.est_sign_date else None,
-            'latest_followup': latest_followup,
-            'level': p.level
-        }
-        deals_data.append(deal)
-    
-    return jsonify({
-        'stages': stages,
-        'deals': deals_data
-    })
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        return jsonify(page)
+
+    board = build_kanban_board(
+        base_query,
+        limit=request.args.get('limit'),
+        owner_ids=owner_ids,
+        include_lost=show_lost,
+    )
+    return jsonify(board)
+
+@api_bp.route('/followups/<entity_type>/<int:entity_id>', methods=['GET'])
+@login_required
+def get_followup_history(entity_type, entity_id):
+    """Get one page of a Lead's or Pipeline's Follow-up History, newest first."""
+    if entity_type == 'sales_lead':
+        if not current_user.can_access_leads():
+            return jsonify({'error': 'Permission denied'}), 403
+        SalesLead.query.filter_by(id=entity_id, is_deleted=False).first_or_404()
+    elif entity_type == 'pipeline':
+        pipeline = Pipeline.query.filter_by(id=entity_id, is_deleted=False).first_or_404()
+        if not current_user.can_access_pipeline(pipeline):
+            return jsonify({'error': 'Permission denied'}), 403
+    else:
+        return jsonify({'error': 'Invalid entity type'}), 400
+
+    return jsonify(get_followup_history_page(
+        entity_type,
+        entity_id,
+        page=request.args.get('page', 1, type=int),
+        per_page=request.args.get('per_page', type=int),
+    ))
 
 @api_bp.route('/dashboard/owner-metrics', methods=['GET'])
 @login_required
@@ -3367,90 +2927,6 @@ def get_owner_metrics_data():
             'next_qtr_revenue': metric['next_qtr_revenue']
         })
     return jsonify({'metrics': metrics})
-    
-    # Get all active users
-    users = User.query.filter_by(is_active=True).all()
-    
-    # Build base pipeline query
-    base_pipeline_query = Pipeline.query.filter(Pipeline.is_deleted.is_(False))
-    if not current_user.is_admin():
-        # Get the Pipeline IDs that current_user supports
-        supported_pipeline_ids = db.session.query(Pipeline.id).filter(
-            Pipeline.support_team.contains(current_user)
-        ).subquery()
-        base_pipeline_query = base_pipeline_query.filter(
-            or_(
-                Pipeline.owner_id == current_user.id,
-                Pipeline.id.in_(supported_pipeline_ids)
-            )
-        )
-    
-    # Get quarter dates
-    today = date.today()
-    current_qtr = get_quarter_dates(today)
-    next_qtr = get_next_quarter_dates(today)
-    
-    # Get metrics for each user
-    metrics = []
-    for user in users:
-        # Count leads for this user (exclude Unqualified)
-        leads_count = SalesLead.query.filter_by(owner_id=user.id, is_deleted=False).filter(
-            SalesLead.leads_status != 'Unqualified'
-        ).count()
-        
-        # Qualified leads (include 转入 Pipeline的) - owner of lead OR owner of pipeline
-        api_user_pipeline_lead_ids = db.session.query(Pipeline.sales_lead_id).filter(
-            Pipeline.owner_id == user.id,
-            Pipeline.sales_lead_id.isnot(None)
-        ).subquery()
-        
-        qualified_leads_count = SalesLead.query.filter(
-            SalesLead.is_deleted.is_(False),
-            or_(
-                SalesLead.owner_id == user.id,
-                SalesLead.id.in_(api_user_pipeline_lead_ids)
-            )
-        ).filter(
-            or_(
-                SalesLead.leads_status == 'Qualified',
-                SalesLead.id.in_(api_user_pipeline_lead_ids)
-            )
-        ).count()
-        
-        # Count pipeline deals for this user (exclude Deal Lost)
-        pipeline_deals = base_pipeline_query.filter(
-            Pipeline.owner_id == user.id
-        ).filter(
-            Pipeline.stage.notin_(['6b) Deal Lost'])
-        ).all()
-        pipeline_count = len(pipeline_deals)
-        tcv = sum(p.tcv_usd for p in pipeline_deals)
-        
-        # Count customers (companies in pipeline)
-        customer_count = len(set(p.company for p in pipeline_deals if p.company))
-        
-        # Calculate quarter revenue
-        current_qtr_revenue = calculate_quarter_revenue(
-            pipeline_deals, current_qtr[0], current_qtr[1]
-        )
-        next_qtr_revenue = calculate_quarter_revenue(
-            pipeline_deals, next_qtr[0], next_qtr[1]
-        )
-        
-        metrics.append({
-            'user_id': user.id,
-            'username': user.username,
-            'role': user.role,
-            'leads_count': leads_count,
-            'qualified_leads_count': qualified_leads_count,
-            'pipeline_count': pipeline_count,
-            'customer_count': customer_count,
-            'tcv': tcv,
-            'current_qtr_revenue': current_qtr_revenue,
-            'next_qtr_revenue': next_qtr_revenue
-        })
-    
-    return jsonify({'metrics': metrics})
 
 
 # ============================================================================
@@ -3495,6 +2971,93 @@ def set_dashboard_filters():
         return jsonify({'error': str(e)}), 500
 
 
+# ============================================================================
+# BACKGROUND EXPORTS API
+# ============================================================================
+
+register_export_builder('leads', lambda user, params, export_format: _build_leads_export(
+    user, params['filters'], params['columns'], params.get('remote_addr'), keyset=True,
+))
+register_export_builder('pipeline', lambda user, params, export_format: _build_pipeline_export(
+    user, params['filters'], params['columns'], export_format, params.get('remote_addr'), keyset=True,
+))
+register_export_builder('activity_logs', lambda user, params, export_format: _build_activity_log_export(
+    user, params['filters'], export_format, params.get('remote_addr'), keyset=True,
+))
+
+
+def _get_export_job_columns(visible_columns):
+    return [{'key': column['key'], 'label': column['label']} for column in visible_columns]
+
+
+def _get_own_export_job(job_id):
+    return ExportJob.query.filter_by(id=job_id, user_id=current_user.id).first_or_404()
+
+
+def _export_job_payload(job):
+    payload = get_export_job_status(job)
+    payload['status_url'] = url_for('api.export_job_status', job_id=job.id)
+    payload['download_url'] = url_for('api.download_export_job', job_id=job.id) if job.status == 'done' else None
+    return payload
+
+
+@api_bp.route('/exports', methods=['POST'])
+@login_required
+def create_export_job():
+    """Queue a background export (``kind``: leads / pipeline / activity_logs) of the list as currently filtered.
+
+    Takes the same query arguments as the matching inline export link.
+    """
+    if not current_app.config.get('EXPORT_JOBS_ENABLED', False):
+        abort(404)
+    try:
+        export_format = get_export_format(request.args.get('format'))
+    except ValueError as exc:
+        return jsonify({'success': False, 'error': str(exc)}), 400
+
+    kind = request.args.get('kind', '')
+    params = {'remote_addr': request.remote_addr}
+    if kind == 'leads':
+        if not current_user.can_access_leads():
+            return jsonify({'success': False, 'error': 'Permission denied'}), 403
+        available_columns, default_columns = _get_leads_column_settings()
+        visible_columns, _visible_column_keys = _get_visible_columns_for_page('leads', available_columns, default_columns)
+        params['filters'] = _get_leads_filter_values(session.get('leads_filters', {}))
+        params['columns'] = _get_export_job_columns(visible_columns)
+    elif kind == 'pipeline':
+        available_columns, default_columns = _get_pipeline_column_settings()
+        visible_columns, _visible_column_keys = _get_visible_columns_for_page('pipeline', available_columns, default_columns)
+        params['filters'] = _get_pipeline_filter_values(session.get('pipeline_filters', {}))
+        params['columns'] = _get_export_job_columns(visible_columns)
+    elif kind == 'activity_logs':
+        if not current_user.is_admin():
+            return jsonify({'success': False, 'error': 'Permission denied'}), 403
+        params['filters'] = _get_activity_log_filters(request.args)
+    else:
+        return jsonify({'success': False, 'error': f'Unsupported export: {kind}'}), 400
+
+    job = enqueue_export_job(current_user, kind, export_format, params)
+    return jsonify({'success': True, 'job': _export_job_payload(job)}), 202
+
+
+@api_bp.route('/exports/<int:job_id>', methods=['GET'])
+@login_required
+def export_job_status(job_id):
+    """Progress of one of the current user's background exports."""
+    return jsonify({'success': True, 'job': _export_job_payload(_get_own_export_job(job_id))})
+
+
+@api_bp.route('/exports/<int:job_id>/download', methods=['GET'])
+@login_required
+def download_export_job(job_id):
+    """Download a finished background export."""
+    job = _get_own_export_job(job_id)
+    path = get_export_path(job)
+    if job.status != 'done' or not os.path.isfile(path):
+        abort(404)
+    return send_file(path, mimetype=EXPORT_MIMETYPES[job.export_format], as_attachment=True, download_name=job.file_name)
+
+
 # ============================================================================
 # HTTP CACHE HEADERS (moved to app.py)
 # ============================================================================
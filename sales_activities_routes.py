@@ -8,7 +8,7 @@ from sqlalchemy import and_, or_
 
 from activity_logger import log_activity
 from extensions import db
-from models import Pipeline, SalesActivity, SalesLead, Task, User, pipeline_support
+from models import Pipeline, SalesActivity, SalesLead, Task, User
 from sales_activity_service import (
     _entity_context,
     append_followup_history,
@@ -18,6 +18,8 @@ from sales_activity_service import (
     resolve_new_activity_owner_id,
     soft_delete,
 )
+from services.pipeline_visibility_service import filter_visible_pipelines
+from services.search_index_service import apply_ranked_search
 from utils import calculate_pipeline_metrics, validate_date
 
 sales_activities_bp = Blueprint('sales_activities', __name__)
@@ -315,14 +317,13 @@ def index():
 def source_search():
     source_type = SalesActivity.normalize_source_type(request.args.get('source_type'))
     keyword = request.args.get('q', '').strip()
-    like = f'%{keyword}%'
     results = []
     if source_type == 'Sales Leads':
         query = SalesLead.query.filter(SalesLead.is_deleted.is_(False))
         if not current_user.can_view_all_leads():
             query = query.filter(SalesLead.owner_id == current_user.id)
         if keyword:
-            query = query.filter(or_(SalesLead.company.ilike(like), SalesLead.name.ilike(like)))
+            query = apply_ranked_search(query, SalesLead, keyword, ('company', 'name'))
         for lead in query.order_by(SalesLead.company, SalesLead.name).limit(30):
             results.append({
                 'id': lead.id, 'company': lead.company or lead.name, 'contact': lead.name,
@@ -333,10 +334,9 @@ def source_search():
     elif source_type == 'Pipeline':
         query = Pipeline.query.filter(Pipeline.is_deleted.is_(False))
         if not current_user.can_view_all_business_data():
-            supported_ids = db.session.query(pipeline_support.c.pipeline_id).filter(pipeline_support.c.user_id == current_user.id)
-            query = query.filter(or_(Pipeline.owner_id == current_user.id, Pipeline.id.in_(supported_ids)))
+            query = filter_visible_pipelines(query, current_user.id)
         if keyword:
-            query = query.filter(or_(Pipeline.company.ilike(like), Pipeline.name.ilike(like)))
+            query = apply_ranked_search(query, Pipeline, keyword, ('company', 'name'))
         for pipeline in query.order_by(Pipeline.company, Pipeline.name).limit(30):
             results.append({
                 'id': pipeline.id, 'company': pipeline.company or pipeline.name, 'contact': pipeline.name,
@@ -348,7 +348,7 @@ def source_search():
         query = Pipeline.query.filter(
             Pipeline.is_deleted.is_(False), Pipeline.stage.in_(['6a) Deal Won', '7) Activated']))
         if keyword:
-            query = query.filter(or_(Pipeline.company.ilike(like), Pipeline.name.ilike(like)))
+            query = apply_ranked_search(query, Pipeline, keyword, ('company', 'name'))
         seen = set()
         for pipeline in query.order_by(Pipeline.company).limit(30):
             company = pipeline.company or pipeline.name
@@ -359,7 +359,7 @@ def source_search():
     elif source_type == SalesActivity.SOURCE_EVENT:
         query = SalesLead.query.filter(SalesLead.is_deleted.is_(False), SalesLead.event.isnot(None))
         if keyword:
-            query = query.filter(or_(SalesLead.event.ilike(like), SalesLead.company.ilike(like)))
+            query = apply_ranked_search(query, SalesLead, keyword, ('event', 'company'))
         for lead in query.order_by(SalesLead.event).limit(30):
             results.append({'id': None, 'company': lead.company or lead.event, 'contact': lead.name, 'position': lead.position or '', 'contact_information': lead.email or lead.mobile_number or '', 'owner': lead.owner.username if lead.owner else '', 'status': lead.event})
     return jsonify({'items': results})
@@ -15,6 +15,7 @@ from models import (
     SalesLead,
     Task,
 )
+from services.followup_service import add_followup_entry
 
 
 def _serialize_value(value):
@@ -56,37 +57,23 @@ def append_followup_history(
     followup_start_at=None, followup_end_at=None,
     todo_start_at=None, todo_end_at=None,
 ):
-    """Append new typed entries without parsing or changing historical text."""
+    """Append new typed Follow-up History entries; returns their rendered lines."""
     timestamp = timestamp or datetime.utcnow()
     entries = []
     if followup_text:
-        type_text = f" [{followup_activity_type}]" if followup_activity_type else ''
-        schedule_text = ''
-        if followup_start_at and followup_end_at:
-            schedule_text = (
-                f" ({followup_start_at:%Y-%m-%d %H:%M} -> "
-                f"{followup_end_at:%Y-%m-%d %H:%M})"
-            )
-        entries.append(
-            f"Follow-up{type_text}, {timestamp.strftime('%Y-%m-%d %H:%M')}"
-            f"{schedule_text}: {followup_text}"
-        )
+        entries.append(add_followup_entry(
+            entity, 'followup', followup_text, timestamp,
+            activity_type=followup_activity_type,
+            schedule_start_at=followup_start_at, schedule_end_at=followup_end_at,
+        ))
     if todo_text:
-        type_text = f" [{todo_activity_type}]" if todo_activity_type else ''
-        if todo_start_at and todo_end_at:
-            timing_text = f" scheduled {todo_start_at:%Y-%m-%d %H:%M} -> {todo_end_at:%Y-%m-%d %H:%M}"
-        else:
-            due_text = todo_due_date.strftime('%Y-%m-%d') if isinstance(todo_due_date, date) else str(todo_due_date or '')
-            timing_text = f" by {due_text}" if due_text else ''
-        entries.append(
-            f"To-do{type_text}, {timestamp.strftime('%Y-%m-%d')}: "
-            f"{todo_text}{timing_text}"
-        )
-    if not entries:
-        return []
-    existing = getattr(entity, 'follow_up', None) or ''
-    setattr(entity, 'follow_up', '\n'.join([part for part in [existing, *entries] if part]))
-    return entries
+        entries.append(add_followup_entry(
+            entity, 'todo', todo_text, timestamp,
+            activity_type=todo_activity_type,
+            schedule_start_at=todo_start_at, schedule_end_at=todo_end_at,
+            due_date=todo_due_date,
+        ))
+    return [entry.to_history_line() for entry in entries]
 
 
 def _entity_context(source_type, sales_lead_id=None, pipeline_id=None, company=None):
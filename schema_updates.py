@@ -7,11 +7,20 @@ from extensions import db
 COLUMN_UPDATES = {
     'sales_leads': {
         'follow_up': 'TEXT',
+        'last_followup_at': 'TIMESTAMP NULL',
+        'followup_count': 'INTEGER NOT NULL DEFAULT 0',
         'is_deleted': 'BOOLEAN NOT NULL DEFAULT FALSE',
         'deleted_at': 'TIMESTAMP NULL',
         'deleted_by_id': 'INTEGER NULL',
     },
+    'users': {
+        'dashboard_filters': 'TEXT',
+    },
     'pipeline': {
+        'forecast_base_month': 'DATE',
+        'deposit_date': 'DATE',
+        'last_followup_at': 'TIMESTAMP NULL',
+        'followup_count': 'INTEGER NOT NULL DEFAULT 0',
         'is_deleted': 'BOOLEAN NOT NULL DEFAULT FALSE',
         'deleted_at': 'TIMESTAMP NULL',
         'deleted_by_id': 'INTEGER NULL',
@@ -38,6 +47,16 @@ COLUMN_UPDATES = {
         'new_values': 'TEXT NULL',
         'extra_data': 'TEXT NULL',
     },
+    'weekly_metrics': {
+        'customer_count': 'INTEGER DEFAULT 0',
+    },
+}
+
+# Indexes declared with ``index=True`` on columns added above; create_all only
+# creates them for new tables. Names follow SQLAlchemy's ``ix_<table>_<column>``.
+INDEX_UPDATES = {
+    'sales_leads': ('last_followup_at',),
+    'pipeline': ('last_followup_at',),
 }
 
 
@@ -140,6 +159,50 @@ def ensure_sales_activity_columns():
             db.session.commit()
             existing.add(column_name)
 
+    for table_name, column_names in INDEX_UPDATES.items():
+        if table_name not in tables:
+            continue
+        for column_name in column_names:
+            db.session.execute(text(
+                f'CREATE INDEX IF NOT EXISTS "ix_{table_name}_{column_name}" '
+                f'ON "{table_name}" ("{column_name}")'
+            ))
+        db.session.commit()
+
+
+def existing_index_names(inspector, table_name):
+    """Index names on ``table_name``, including the expression indexes SQLite reflection skips."""
+    if db.engine.dialect.name == 'sqlite':
+        with db.engine.connect() as connection:
+            rows = connection.exec_driver_sql(f'PRAGMA index_list("{table_name}")').all()
+        return {row[1] for row in rows}
+    return {index['name'] for index in inspector.get_indexes(table_name)}
+
+
+def ensure_model_indexes():
+    """Create indexes declared on the models that existing tables do not have yet.
+
+    ``create_all`` skips tables that already exist, so composite and partial
+    indexes added to ``__table_args__`` reach existing databases only through
+    here. Indexes declared for another database (``info['dialect']``) are
+    skipped. Returns the names of the indexes created.
+    """
+    inspector = inspect(db.engine)
+    tables = set(inspector.get_table_names())
+    dialect = db.engine.dialect.name
+    created = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        for index in sorted(table.indexes, key=lambda item: item.name):
+            if index.info.get('dialect', dialect) != dialect:
+                continue
+            if index.name in existing_index_names(inspector, table.name):
+                continue
+            index.create(db.engine)
+            created.append(index.name)
+    return created
+
 
 def ensure_sales_activity_terminology():
     """Migrate stored activity names and generated descriptions to current terms."""
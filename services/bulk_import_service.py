@@ -0,0 +1,293 @@
+"""Batched inserts for the Sales Leads and Pipeline Excel imports.
+
+The import routes used to look up the owner (and every support name) with one
+query per row, ``db.session.add`` each record and flush twice per Qualified
+lead to create its pipeline. Here the usernames of the whole sheet are
+resolved with one query and the cleaned rows are written ``IMPORT_BATCH_SIZE``
+at a time:
+
+- records are still built as (transient) model instances, so the constructors,
+  ``convert_to_pipeline`` and ``calculate_pipeline_metrics`` apply as before;
+  their column values are inserted with an ORM bulk ``INSERT ... RETURNING``
+  that returns the new ids in row order (batched on PostgreSQL; SQLAlchemy
+  falls back to one statement per row on SQLite, which cannot order them)
+- the pipelines of Qualified leads, ``pipeline_support`` rows, revenue ledger
+  months and Follow-up History entries are inserted with the same batch
+- bulk inserts skip the ORM flush hooks, so the search index and pipeline
+  visibility rows are refreshed per batch; after the single commit the data
+  version is bumped and weekly metrics are refreshed once for the affected
+  owners (or queued, in ``deferred`` mode)
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Iterable
+
+from flask import current_app
+from sqlalchemy import insert, inspect as sa_inspect
+
+from extensions import db
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Usernames per ``IN (...)`` lookup
+LOOKUP_CHUNK_SIZE = 500
+
+QUALIFIED_STATUS = "Qualified"
+
+
+def _get_models():
+    from models import FollowupEntry, Pipeline, PipelineRevenueMonth, SalesLead, User, pipeline_support
+
+    return FollowupEntry, Pipeline, PipelineRevenueMonth, SalesLead, User, pipeline_support
+
+
+def get_batch_size() -> int:
+    return max(1, int(current_app.config.get("IMPORT_BATCH_SIZE") or DEFAULT_BATCH_SIZE))
+
+
+def _batches(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def split_support_names(value) -> list[str]:
+    """``"Amy / Bob"`` -> ``["Amy", "Bob"]``."""
+    if not value:
+        return []
+    return [name.strip() for name in str(value).split("/") if name.strip()]
+
+
+def load_user_ids(usernames: Iterable[str | None]) -> dict[str, int]:
+    """Map the existing ones of ``usernames`` to user ids (one query per 500 names)."""
+    User = _get_models()[4]
+    names = sorted({name for name in usernames if name})
+    user_ids = {}
+    for chunk in _batches(names, LOOKUP_CHUNK_SIZE):
+        user_ids.update(db.session.query(User.username, User.id).filter(User.username.in_(chunk)).all())
+    return user_ids
+
+
+def _insert_values(obj) -> dict:
+    """Column values of a transient instance; columns left unset or ``None`` take their Python default.
+
+    Every row of a batch gets the same keys, so the batch is a single executemany.
+    """
+    state = sa_inspect(obj)
+    values = {}
+    for prop in state.mapper.column_attrs:
+        column = prop.columns[0]
+        if column.primary_key:
+            continue
+        value = state.dict.get(prop.key)
+        if value is None and column.default is not None:
+            value = column.default.arg(None) if column.default.is_callable else column.default.arg
+        values[prop.key] = value
+    return values
+
+
+def _insert(model, rows: list[dict]) -> list[int]:
+    """Insert ``rows`` (values from :func:`_insert_values`) and return their new ids in order."""
+    if not rows:
+        return []
+    statement = insert(model).returning(model.id, sort_by_parameter_order=True)
+    return list(db.session.scalars(statement, rows, execution_options={"render_nulls": True}))
+
+
+def _index_batch(lead_ids: Iterable[int] = (), pipeline_ids: Iterable[int] = ()) -> None:
+    """What the after-insert / after-flush hooks do for ORM inserts."""
+    from services.pipeline_visibility_service import refresh_pipeline_visibility
+    from services.search_index_service import index_records
+
+    _, Pipeline, _, SalesLead, _, _ = _get_models()
+    index_records(SalesLead, lead_ids)
+    index_records(Pipeline, pipeline_ids)
+    refresh_pipeline_visibility(pipeline_ids)
+
+
+def _commit_import(owner_ids: set) -> None:
+    """Commit, bump the data version and refresh (or queue) weekly metrics once for ``owner_ids``."""
+    from services.dashboard_cache_service import bump_data_version
+    from services.metrics_job_service import enqueue_metrics_jobs
+    from services.weekly_metrics_service import get_weekly_metrics_mode, refresh_weekly_metrics
+
+    mode = get_weekly_metrics_mode()
+    if mode == "deferred" and owner_ids:
+        enqueue_metrics_jobs(db.session, sorted(owner_ids))
+    db.session.commit()
+    bump_data_version()
+    if mode == "sync" and owner_ids:
+        try:
+            refresh_weekly_metrics(owner_ids=owner_ids)
+        except Exception as exc:
+            current_app.logger.warning("Failed to refresh weekly metrics after import for %s: %s", sorted(owner_ids), exc)
+
+
+def _build_lead(row: dict, owner_id: int):
+    SalesLead = _get_models()[3]
+    return SalesLead(
+        name=row.get("name") or None,
+        company=row.get("company") or None,
+        industry=row.get("industry") or None,
+        position=row.get("position") or None,
+        email=row.get("email") or None,
+        mobile_number=row.get("mobile_number") or None,
+        requirements=row.get("requirements") or None,
+        leads_status=row.get("leads_status", "Waiting to be Contacted"),
+        source=row.get("source") or None,
+        event=row.get("event") or None,
+        date_added=row.get("date_added") or date.today(),
+        owner_id=owner_id,
+        note=row.get("note") or None,
+    )
+
+
+def import_leads(rows: list[dict], default_owner_id: int) -> int:
+    """Insert cleaned Sales Leads rows plus a pipeline per Qualified lead; return the number of leads.
+
+    Rows whose ``owner`` is not a username are assigned to ``default_owner_id``.
+    """
+    from models import disable_metrics_events
+
+    _, Pipeline, _, SalesLead, _, _ = _get_models()
+    user_ids = load_user_ids(row.get("owner") for row in rows)
+    owner_ids = set()
+    count = 0
+    with disable_metrics_events():
+        for batch in _batches(rows, get_batch_size()):
+            leads = [_build_lead(row, user_ids.get(row.get("owner")) or default_owner_id) for row in batch]
+            lead_rows = [_insert_values(lead) for lead in leads]
+            lead_ids = _insert(SalesLead, lead_rows)
+
+            pipelines = []
+            for lead, lead_row, lead_id in zip(leads, lead_rows, lead_ids):
+                if lead_row["leads_status"] == QUALIFIED_STATUS:
+                    lead.id = lead_id
+                    pipelines.append(lead.convert_to_pipeline())
+            pipeline_ids = _insert(Pipeline, [_insert_values(pipeline) for pipeline in pipelines])
+
+            _index_batch(lead_ids, pipeline_ids)
+            owner_ids.update(lead_row["owner_id"] for lead_row in lead_rows)
+            count += len(lead_ids)
+        if count:
+            _commit_import(owner_ids)
+    return count
+
+
+def _build_pipeline(row: dict, row_num: int, owner_id: int):
+    Pipeline = _get_models()[1]
+    # Ensure name is not empty - use company or generate placeholder
+    pipeline_name = row.get("name")
+    if not pipeline_name or str(pipeline_name).strip() == "":
+        pipeline_name = row.get("company") or f"Pipeline-{row_num + 1}"
+
+    return Pipeline(
+        name=pipeline_name,
+        company=row.get("company"),
+        industry=row.get("industry"),
+        position=row.get("position"),
+        email=row.get("email"),
+        mobile_number=row.get("mobile_number"),
+        product=row.get("product"),
+        sales_lead_id=row.get("sales_lead_id"),
+        mrc_usd=row.get("mrc_usd", 0),
+        otc_usd=row.get("otc_usd", 0),
+        contract_term_yrs=row.get("contract_term_yrs", 1),
+        gp_margin=row.get("gp_margin", 0),
+        est_sign_date=row.get("est_sign_date"),
+        est_act_date=row.get("est_act_date"),
+        deposit_date=row.get("deposit_date"),
+        award_date=row.get("award_date"),
+        proposal_sent_date=row.get("proposal_sent_date"),
+        win_rate=row.get("win_rate", 0),
+        stage=row.get("stage", "1) Prospecting"),
+        level=row.get("level", "Stretch"),
+        comments=row.get("comments"),
+        stuckpoint=row.get("stuckpoint"),
+        owner_id=owner_id,
+        date_added=date.today(),
+    )
+
+
+def _followup_values(pipeline, text: str | None) -> list[dict]:
+    """Entries parsed from the sheet's Follow-up History; the pipeline's summary is updated as for ORM appends."""
+    from services.followup_service import followup_entry_values, parse_followup_history, record_followup
+
+    FollowupEntry = _get_models()[0]
+    entries = [
+        followup_entry_values(**entry)
+        for entry in parse_followup_history(text, default_at=datetime.now())
+    ]
+    for values in entries:
+        if values["kind"] == FollowupEntry.KIND_FOLLOWUP:
+            record_followup(pipeline, values["entry_at"])
+    return entries
+
+
+def import_pipelines(rows: list[dict], default_owner_id: int) -> tuple[int, list[str]]:
+    """Insert cleaned Pipeline rows with their support team, revenue ledger and Follow-up History.
+
+    Returns ``(pipelines imported, "Error importing row n: ..." messages)`` for
+    rows that could not be built; rows whose ``owner`` is not a username are
+    assigned to ``default_owner_id``.
+    """
+    from models import disable_metrics_events
+    from services.revenue_ledger_service import LEDGER_KEY_COLUMNS
+    from utils import calculate_pipeline_metrics
+
+    FollowupEntry, Pipeline, PipelineRevenueMonth, _, _, pipeline_support = _get_models()
+    support_names = {row_num: split_support_names(row.get("support")) for row_num, row in enumerate(rows)}
+    user_ids = load_user_ids(
+        [row.get("owner") for row in rows] + [name for names in support_names.values() for name in names]
+    )
+
+    errors = []
+    owner_ids = set()
+    count = 0
+    with disable_metrics_events():
+        for batch in _batches(list(enumerate(rows)), get_batch_size()):
+            built = []
+            for row_num, row in batch:
+                try:
+                    pipeline = _build_pipeline(row, row_num, user_ids.get(row.get("owner")) or default_owner_id)
+                    entries = _followup_values(pipeline, row.get("follow_up"))
+                    calculate_pipeline_metrics(pipeline)
+                except Exception as e:
+                    errors.append(f"Error importing row {row_num + 1}: {str(e)}")
+                    continue
+                support_ids = {user_ids[name] for name in support_names[row_num] if name in user_ids}
+                built.append((pipeline, entries, support_ids))
+
+            pipeline_rows = [_insert_values(pipeline) for pipeline, _, _ in built]
+            pipeline_ids = _insert(Pipeline, pipeline_rows)
+
+            support_rows, ledger_rows, entry_rows = [], [], []
+            now = datetime.utcnow()
+            for (pipeline, entries, support_ids), pipeline_row, pipeline_id in zip(built, pipeline_rows, pipeline_ids):
+                support_rows.extend({"pipeline_id": pipeline_id, "user_id": user_id} for user_id in sorted(support_ids))
+                keys = {column: pipeline_row[column] for column in LEDGER_KEY_COLUMNS}
+                keys["is_deleted"] = bool(keys["is_deleted"])
+                ledger_rows.extend(
+                    {"pipeline_id": pipeline_id, "month_start": month.month_start, "mrc": month.mrc, "otc": month.otc, **keys}
+                    for month in pipeline.revenue_months
+                )
+                entry_rows.extend(
+                    {**values, "entity_type": "pipeline", "entity_id": pipeline_id, "created_at": now}
+                    for values in entries
+                )
+            for table, values in (
+                (pipeline_support, support_rows),
+                (PipelineRevenueMonth.__table__, ledger_rows),
+                (FollowupEntry.__table__, entry_rows),
+            ):
+                if values:
+                    db.session.execute(table.insert(), values)
+
+            _index_batch(pipeline_ids=pipeline_ids)
+            owner_ids.update(pipeline_row["owner_id"] for pipeline_row in pipeline_rows)
+            count += len(pipeline_ids)
+        if count:
+            _commit_import(owner_ids)
+    return count, errors
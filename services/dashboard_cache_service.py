@@ -0,0 +1,152 @@
+"""Version-stamped response cache with stale-while-revalidate refreshes."""
+
+from __future__ import annotations
+
+import threading
+from datetime import date, datetime
+from typing import Callable
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from extensions import cache, db
+
+
+DATA_VERSION_NAME = "business_data"
+
+# Commits touching these models change what dashboards show.
+VERSIONED_MODELS = {"Pipeline", "SalesLead", "SalesActivity"}
+
+DEFAULT_CACHE_TIMEOUT = 600
+REFRESH_LOCK_SECONDS = 120
+
+
+def _get_version_model():
+    from models import DataVersion
+
+    return DataVersion
+
+
+def get_data_version() -> int:
+    """Return the shared business data version (0 before the first write)."""
+    DataVersion = _get_version_model()
+    version = db.session.query(DataVersion.version).filter_by(name=DATA_VERSION_NAME).scalar()
+    return int(version or 0)
+
+
+def bump_data_version() -> None:
+    """Increment the shared data version in its own short transaction."""
+    table = _get_version_model().__table__
+    values = {"version": table.c.version + 1, "updated_at": datetime.utcnow()}
+    with db.engine.begin() as connection:
+        result = connection.execute(table.update().where(table.c.name == DATA_VERSION_NAME).values(**values))
+        if result.rowcount:
+            return
+        try:
+            with connection.begin_nested():
+                connection.execute(table.insert().values(name=DATA_VERSION_NAME, version=1, updated_at=datetime.utcnow()))
+        except IntegrityError:
+            connection.execute(table.update().where(table.c.name == DATA_VERSION_NAME).values(**values))
+
+
+def _mark_versioned_changes(session, flush_context, instances):
+    if session.info.get("data_version_dirty"):
+        return
+    for collection in (session.new, session.dirty, session.deleted):
+        if any(obj.__class__.__name__ in VERSIONED_MODELS for obj in collection):
+            session.info["data_version_dirty"] = True
+            return
+
+
+def _bump_after_commit(session):
+    if not session.info.pop("data_version_dirty", False):
+        return
+    try:
+        bump_data_version()
+    except Exception as exc:
+        current_app.logger.warning("Failed to bump data version: %s", exc)
+
+
+def _clear_after_rollback(session):
+    session.info.pop("data_version_dirty", None)
+
+
+def register_data_version_hooks(app) -> None:
+    # Registered after the weekly metrics hooks so snapshots are updated before readers see the new version.
+    if not event.contains(db.session, "before_flush", _mark_versioned_changes):
+        event.listen(db.session, "before_flush", _mark_versioned_changes)
+        event.listen(db.session, "after_commit", _bump_after_commit)
+        event.listen(db.session, "after_rollback", _clear_after_rollback)
+
+
+def _cache_key(namespace: str, scope: str) -> str:
+    # The date is part of the key so week/quarter rollovers never serve yesterday's figures.
+    return f"versioned:{namespace}:{scope}:{date.today().isoformat()}"
+
+
+def _store(key: str, version: int, payload) -> None:
+    timeout = current_app.config.get("DASHBOARD_CACHE_TIMEOUT", DEFAULT_CACHE_TIMEOUT)
+    cache.set(key, {"version": version, "payload": payload}, timeout=timeout)
+
+
+def _acquire_refresh_lock(lock_key: str) -> bool:
+    if cache.add(lock_key, True, timeout=REFRESH_LOCK_SECONDS):
+        return True
+    # FileSystemCache.add only checks that the file exists, so a lock left behind by a
+    # killed worker would never expire; drop it once its timeout has passed.
+    if cache.get(lock_key) is None:
+        cache.delete(lock_key)
+        return cache.add(lock_key, True, timeout=REFRESH_LOCK_SECONDS)
+    return False
+
+
+def _refresh_in_background(app, key: str, builder: Callable[[], object]) -> threading.Thread | None:
+    lock_key = f"{key}:refreshing"
+    if not _acquire_refresh_lock(lock_key):
+        return None
+
+    def run():
+        with app.app_context():
+            try:
+                version = get_data_version()
+                _store(key, version, builder())
+            except Exception as exc:
+                app.logger.warning("Background refresh of %s failed: %s", key, exc)
+            finally:
+                cache.delete(lock_key)
+
+    thread = threading.Thread(target=run, name=f"refresh-{key}", daemon=True)
+    thread.start()
+    return thread
+
+
+def get_versioned_payload(
+    namespace: str,
+    scope: str,
+    builder: Callable[[], object],
+    async_refresh: bool | None = None,
+):
+    """Return ``builder()``'s payload for ``scope``, cached against the data version.
+
+    A missing entry is built inline. A stale entry (older data version) is
+    returned as-is while a single background thread rebuilds it; with
+    ``DASHBOARD_CACHE_ASYNC_REFRESH`` (or ``async_refresh=False``) off it is
+    rebuilt inline instead. ``builder`` must only rely on an app context, not
+    on the request.
+    """
+    key = _cache_key(namespace, scope)
+    version = get_data_version()
+    entry = cache.get(key)
+    if entry is not None and entry.get("version") == version:
+        return entry["payload"]
+
+    if async_refresh is None:
+        async_refresh = current_app.config.get("DASHBOARD_CACHE_ASYNC_REFRESH", True)
+    if entry is not None and async_refresh:
+        _refresh_in_background(current_app._get_current_object(), key, builder)
+        return entry["payload"]
+
+    payload = builder()
+    _store(key, version, payload)
+    return payload
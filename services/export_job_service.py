@@ -0,0 +1,281 @@
+"""Background exports processed by ``flask export-worker``.
+
+Inline exports hold a sync web worker (120 s timeout) for as long as the
+forecast refresh, the query and the file writing take. With
+``EXPORT_JOBS_ENABLED`` the export buttons call :func:`enqueue_export_job`
+instead, which stores the user's filters and visible columns. A worker claims
+the job, builds the same export plan as the inline route (one builder per
+kind, see :func:`register_export_builder`), writes the file to
+``EXPORT_FOLDER`` in keyset chunks and records ``rows_done`` after every
+chunk for the page to poll. Any number of workers can run side by side; each
+job is claimed by exactly one of them.
+
+Jobs and their files are deleted ``EXPORT_RETENTION_HOURS`` after they finish
+(or were queued, if no worker ever picked them up).
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Callable
+
+import click
+from flask import current_app
+
+from extensions import db
+from services.export_service import EXPORT_FORMATS, ExportPlan, get_chunk_size, write_export_file
+
+
+DEFAULT_POLL_SECONDS = 2.0
+DEFAULT_RETENTION_HOURS = 24
+CLEANUP_INTERVAL_SECONDS = 3600
+
+# A running job that has not reported progress for this long is handed out again.
+STALE_LOCK_SECONDS = 600
+
+# kind -> builder(user, params, export_format) returning an ExportPlan read in keyset chunks
+_builders: dict[str, Callable[[object, dict, str], ExportPlan]] = {}
+
+
+def _get_job_model():
+    from models import ExportJob
+
+    return ExportJob
+
+
+def register_export_builder(kind: str, builder: Callable[[object, dict, str], ExportPlan]) -> None:
+    """Make ``kind`` exportable in the background with ``builder``."""
+    _builders[kind] = builder
+
+
+def get_export_folder() -> str:
+    return current_app.config.get("EXPORT_FOLDER") or os.path.join(current_app.instance_path, "exports")
+
+
+def get_export_path(job) -> str:
+    """Where the worker writes ``job``'s file (the download name is ``job.file_name``)."""
+    return os.path.join(get_export_folder(), f"{job.id}.{job.export_format}")
+
+
+def _get_expiry(now: datetime) -> datetime:
+    hours = current_app.config.get("EXPORT_RETENTION_HOURS", DEFAULT_RETENTION_HOURS)
+    return now + timedelta(hours=hours)
+
+
+def enqueue_export_job(user, kind: str, export_format: str, params: dict):
+    """Queue an export of ``kind`` for ``user``; ``params`` is what the builder needs (JSON-serializable)."""
+    if kind not in _builders:
+        raise ValueError(f"Unsupported export: {kind}")
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    ExportJob = _get_job_model()
+    now = datetime.utcnow()
+    job = ExportJob(
+        user_id=user.id,
+        kind=kind,
+        export_format=export_format,
+        params=json.dumps(params, default=str),
+        status="pending",
+        created_at=now,
+        expires_at=_get_expiry(now),
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def get_export_job_status(job) -> dict:
+    """Progress of ``job`` as reported to the polling page."""
+    percent = None
+    if job.status == "done":
+        percent = 100
+    elif job.total_rows:
+        percent = min(99, int(job.rows_done * 100 / job.total_rows))
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "format": job.export_format,
+        "status": job.status,
+        "rows_done": job.rows_done,
+        "total_rows": job.total_rows,
+        "percent": percent,
+        "file_name": job.file_name,
+        "error": job.error,
+    }
+
+
+def _claim_job():
+    """Mark the oldest due job as running and return it (``None`` when the queue is empty)."""
+    ExportJob = _get_job_model()
+    now = datetime.utcnow()
+    due = db.or_(
+        ExportJob.status == "pending",
+        db.and_(
+            ExportJob.status == "running",
+            ExportJob.locked_at <= now - timedelta(seconds=STALE_LOCK_SECONDS),
+        ),
+    )
+    while True:
+        job_id = db.session.query(ExportJob.id).filter(due).order_by(ExportJob.id.asc()).limit(1).scalar()
+        if job_id is None:
+            return None
+        claimed = db.session.query(ExportJob).filter(ExportJob.id == job_id, due).update(
+            {"status": "running", "locked_at": now, "rows_done": 0},
+            synchronize_session=False,
+        )
+        db.session.commit()
+        if claimed:
+            return db.session.get(ExportJob, job_id)
+
+
+def _record_progress(job_id: int, **values) -> None:
+    """Store progress for ``job_id``; it also refreshes the lock so the job is not reclaimed."""
+    ExportJob = _get_job_model()
+    values["locked_at"] = datetime.utcnow()
+    db.session.query(ExportJob).filter(ExportJob.id == job_id).update(values, synchronize_session=False)
+    db.session.commit()
+
+
+def _track_progress(job_id: int, rows, every: int):
+    count = 0
+    for values in rows:
+        yield values
+        count += 1
+        # Chunks are read as separate keyset queries, so this commits between them
+        if count % every == 0:
+            _record_progress(job_id, rows_done=count)
+
+
+def _remove_file(path: str) -> bool:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def run_export_job(job) -> bool:
+    """Write ``job``'s file and mark it done (or failed); return whether it succeeded."""
+    from models import User
+
+    job_id = job.id
+    path = get_export_path(job)
+    partial_path = f"{path}.part"
+    try:
+        builder = _builders.get(job.kind)
+        if builder is None:
+            raise ValueError(f"Unsupported export: {job.kind}")
+        user = db.session.get(User, job.user_id)
+        if user is None or not user.is_active:
+            raise ValueError("The requesting user is no longer active")
+
+        export_format = job.export_format
+        plan = builder(user, json.loads(job.params or "{}"), export_format)
+        _record_progress(job_id, total_rows=plan.query.order_by(None).count())
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        rows = _track_progress(job_id, plan.sheet.rows, get_chunk_size())
+        with open(partial_path, "wb") as fileobj:
+            count = write_export_file(fileobj, export_format, plan.sheet._replace(rows=rows), plan.extra_sheets)
+        os.replace(partial_path, path)
+    except Exception as exc:
+        db.session.rollback()
+        _remove_file(partial_path)
+        now = datetime.utcnow()
+        _record_progress(
+            job_id, status="failed", error=str(exc)[:2000], finished_at=now, expires_at=_get_expiry(now)
+        )
+        current_app.logger.warning("Export job %s failed: %s", job_id, exc)
+        return False
+
+    now = datetime.utcnow()
+    _record_progress(
+        job_id,
+        status="done",
+        rows_done=count,
+        file_name=f"{plan.download_stem}.{export_format}",
+        finished_at=now,
+        expires_at=_get_expiry(now),
+    )
+    if plan.on_complete:
+        plan.on_complete(count)
+    return True
+
+
+def process_export_jobs(limit: int | None = None) -> dict:
+    """Run due jobs until the queue is empty (or ``limit`` jobs ran); return job and failure counts."""
+    jobs = failed = 0
+    while limit is None or jobs < limit:
+        job = _claim_job()
+        if job is None:
+            break
+        jobs += 1
+        if not run_export_job(job):
+            failed += 1
+    return {"jobs": jobs, "failed": failed}
+
+
+def cleanup_export_jobs(now: datetime | None = None) -> dict:
+    """Delete expired jobs with their files, plus files no job refers to; return both counts."""
+    ExportJob = _get_job_model()
+    now = now or datetime.utcnow()
+
+    expired = ExportJob.query.filter(ExportJob.status != "running", ExportJob.expires_at <= now).all()
+    for job in expired:
+        _remove_file(get_export_path(job))
+        db.session.delete(job)
+    db.session.commit()
+
+    folder = get_export_folder()
+    removed_files = 0
+    if os.path.isdir(folder):
+        job_ids = {str(job_id) for (job_id,) in db.session.query(ExportJob.id).all()}
+        # Leave files younger than the lock timeout alone: their job may have just been created
+        cutoff = time.time() - STALE_LOCK_SECONDS
+        for name in os.listdir(folder):
+            path = os.path.join(folder, name)
+            if name.split(".", 1)[0] in job_ids or not os.path.isfile(path) or os.path.getmtime(path) > cutoff:
+                continue
+            removed_files += _remove_file(path)
+    return {"jobs": len(expired), "files": removed_files}
+
+
+def run_export_worker(once: bool = False, poll_seconds: float | None = None) -> None:
+    """Process jobs until interrupted, cleaning up expired ones hourly; with ``once`` drain the queue and stop."""
+    poll_seconds = poll_seconds or current_app.config.get("EXPORT_WORKER_POLL_SECONDS", DEFAULT_POLL_SECONDS)
+    last_cleanup = None
+    while True:
+        if last_cleanup is None or time.monotonic() - last_cleanup >= CLEANUP_INTERVAL_SECONDS:
+            removed = cleanup_export_jobs()
+            if removed["jobs"] or removed["files"]:
+                print(f"[OK] Removed {removed['jobs']} expired export jobs and {removed['files']} stray files")
+            last_cleanup = time.monotonic()
+
+        result = process_export_jobs(limit=1)
+        if result["jobs"]:
+            print(f"[OK] Processed {result['jobs']} export jobs ({result['failed']} failed)")
+            continue
+        if once:
+            return
+        time.sleep(poll_seconds)
+
+
+def register_export_job_commands(app):
+    @app.cli.command("export-worker")
+    @click.option("--once", is_flag=True, help="Run the queued jobs and exit.")
+    @click.option("--poll", type=float, default=None, help="Seconds to sleep when the queue is empty.")
+    def export_worker_command(once, poll):
+        """Generate queued background exports."""
+        try:
+            run_export_worker(once=once, poll_seconds=poll)
+        except KeyboardInterrupt:
+            print("[OK] Export worker stopped")
+
+    @app.cli.command("export-cleanup")
+    def export_cleanup_command():
+        """Delete expired export jobs and their files."""
+        removed = cleanup_export_jobs()
+        print(f"[OK] Removed {removed['jobs']} expired export jobs and {removed['files']} stray files")
@@ -0,0 +1,339 @@
+"""Streaming exports (Excel, CSV and Parquet).
+
+Exports used to ``query.all()`` every row, build a pandas DataFrame, write it
+through ``pd.ExcelWriter`` into a ``BytesIO`` and then walk every cell again
+for number formats, so peak memory was several times the dataset.
+
+Here rows are fetched ``EXPORT_CHUNK_SIZE`` at a time (``yield_per``),
+converted to values and appended to an openpyxl write-only workbook, which
+spools each sheet to disk as it goes; number formats are set per column as
+the cells are written. The finished ``.xlsx`` (a zip archive, so it only
+becomes valid once complete) lives in a temporary file and is sent to the
+client in blocks, so memory stays flat however many rows are exported.
+
+The same rows feed the other formats: CSV is generated line by line straight
+into the response, Parquet is written in record batches of one chunk each
+with typed columns (dates, numbers, percentages as ratios) by ``pyarrow``, a
+required dependency pinned in ``requirements.txt``; it is imported only when a
+Parquet export runs so it stays off the startup path.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import tempfile
+from datetime import date, datetime
+from typing import Callable, Iterable, Iterator, NamedTuple, Sequence
+
+from flask import Response, current_app, send_file, stream_with_context
+
+
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_MIMETYPE = "text/csv; charset=utf-8"
+PARQUET_MIMETYPE = "application/vnd.apache.parquet"
+EXPORT_FORMATS = ("xlsx", "csv", "parquet")
+DEFAULT_CHUNK_SIZE = 1000
+MONEY_FORMAT = "#,##0.0000"
+
+
+class ExportColumn(NamedTuple):
+    key: str
+    label: str
+    number_format: str | None = None
+    # text | number | integer | date | datetime | percent (a ratio, shown with ``text_format``)
+    kind: str = "text"
+    text_format: str | None = None
+
+
+def get_export_format(value: str | None) -> str:
+    """Normalize a ``format`` request argument (default ``xlsx``); ``ValueError`` if unsupported."""
+    export_format = (value or "xlsx").strip().lower()
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {value}")
+    return export_format
+
+
+def format_cell_text(column: ExportColumn, value):
+    """Spreadsheet/CSV form of a typed value: ISO dates, formatted percentages, others unchanged."""
+    if value is None:
+        return None
+    if column.kind == "date" and isinstance(value, (date, datetime)):
+        return value.strftime("%Y-%m-%d")
+    if column.kind == "datetime" and isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if column.kind == "percent":
+        return (column.text_format or "{:.0%}").format(value or 0)
+    return value
+
+
+class ExportSheet(NamedTuple):
+    title: str
+    columns: Sequence[ExportColumn]
+    rows: Iterable[Sequence]
+
+
+class ExportPlan(NamedTuple):
+    """One export, ready to be sent inline or written by a background job.
+
+    ``query`` is the filtered query behind ``sheet`` (jobs count it to report
+    progress); ``extra_sheets`` only go into workbooks; ``on_complete``
+    receives the exported row count.
+    """
+
+    sheet: ExportSheet
+    query: object
+    download_stem: str
+    extra_sheets: Sequence[ExportSheet] = ()
+    on_complete: Callable[[int], None] | None = None
+
+
+def get_chunk_size(chunk_size: int | None = None) -> int:
+    return max(1, chunk_size or current_app.config.get("EXPORT_CHUNK_SIZE", DEFAULT_CHUNK_SIZE))
+
+
+def iter_query_chunks(query, chunk_size: int | None = None) -> Iterator[list]:
+    """Yield ``query`` results as lists of at most ``chunk_size`` rows, fetched with ``yield_per``."""
+    chunk_size = get_chunk_size(chunk_size)
+    chunk = []
+    for item in query.yield_per(chunk_size):
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_export_rows(
+    query,
+    columns: Sequence[ExportColumn],
+    value_getter: Callable[[object, str], object],
+    prepare_chunk: Callable[[list], None] | None = None,
+    chunk_size: int | None = None,
+    sort_keys: Sequence | None = None,
+) -> Iterator[list]:
+    """Yield one list of cell values per row of ``query``.
+
+    ``prepare_chunk`` runs before each chunk's rows are converted, e.g. to
+    batch-load data the value getter needs for those rows. Rows are read
+    through one ``yield_per`` cursor, or with ``sort_keys`` (ending in a unique
+    key) as separate keyset queries per chunk, so nothing stays open between
+    chunks (background jobs commit their progress in between).
+    """
+    if sort_keys:
+        from services.pagination_service import iter_keyset_chunks
+
+        chunks = iter_keyset_chunks(query, sort_keys, get_chunk_size(chunk_size))
+    else:
+        chunks = iter_query_chunks(query, chunk_size)
+    for chunk in chunks:
+        if prepare_chunk:
+            prepare_chunk(chunk)
+        for item in chunk:
+            yield [value_getter(item, column.key) for column in columns]
+
+
+def write_xlsx(fileobj, sheets: Iterable[ExportSheet]) -> dict:
+    """Write ``sheets`` to ``fileobj`` with a write-only workbook; return ``{title: data row count}``."""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    workbook = Workbook(write_only=True)
+    header_font = Font(bold=True)
+    counts = {}
+    for sheet in sheets:
+        worksheet = workbook.create_sheet(sheet.title)
+        header = []
+        for column in sheet.columns:
+            cell = WriteOnlyCell(worksheet, value=column.label)
+            cell.font = header_font
+            header.append(cell)
+        worksheet.append(header)
+
+        count = 0
+        for values in sheet.rows:
+            row = []
+            for column, value in zip(sheet.columns, values):
+                value = format_cell_text(column, value)
+                value = None if value == "" else value
+                if column.number_format and value is not None:
+                    cell = WriteOnlyCell(worksheet, value=value)
+                    cell.number_format = column.number_format
+                    value = cell
+                row.append(value)
+            worksheet.append(row)
+            count += 1
+        counts[sheet.title] = count
+    workbook.save(fileobj)
+    return counts
+
+
+def build_xlsx_file(sheets: Iterable[ExportSheet]):
+    """Write ``sheets`` to a temporary file; return ``(file rewound to the start, row counts)``."""
+    fileobj = tempfile.TemporaryFile()
+    try:
+        counts = write_xlsx(fileobj, sheets)
+    except Exception:
+        fileobj.close()
+        raise
+    fileobj.seek(0)
+    return fileobj, counts
+
+
+def send_xlsx_file(fileobj, download_name: str):
+    """Stream a finished workbook file as an attachment; the file is closed with the response."""
+    return send_file(fileobj, mimetype=XLSX_MIMETYPE, as_attachment=True, download_name=download_name)
+
+
+def iter_csv_text(columns: Sequence[ExportColumn], rows: Iterable[Sequence]) -> Iterator[str]:
+    """Yield the CSV header (with a UTF-8 BOM so Excel detects the encoding), then one line per row."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.label for column in columns])
+    yield "\ufeff" + buffer.getvalue()
+    for values in rows:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow([format_cell_text(column, value) for column, value in zip(columns, values)])
+        yield buffer.getvalue()
+
+
+def write_csv(fileobj, columns: Sequence[ExportColumn], rows: Iterable[Sequence]) -> int:
+    """Write ``rows`` as UTF-8 CSV to a binary ``fileobj``; return the row count."""
+    count = -1
+    for text in iter_csv_text(columns, rows):
+        fileobj.write(text.encode("utf-8"))
+        count += 1
+    return count
+
+
+def stream_csv_response(
+    columns: Sequence[ExportColumn],
+    rows: Iterable[Sequence],
+    download_name: str,
+    on_complete: Callable[[int], None] | None = None,
+):
+    """Send ``rows`` as CSV generated line by line while the query is still being read.
+
+    ``on_complete`` receives the row count once the last row has been sent.
+    """
+    def generate():
+        count = -1
+        for text in iter_csv_text(columns, rows):
+            count += 1
+            yield text
+        if on_complete:
+            on_complete(count)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=CSV_MIMETYPE,
+        headers={"Content-Disposition": f'attachment; filename="{download_name}"'},
+    )
+
+
+def _arrow_type(pa, column: ExportColumn):
+    return {
+        "number": pa.float64(),
+        "percent": pa.float64(),
+        "integer": pa.int64(),
+        "date": pa.date32(),
+        "datetime": pa.timestamp("us"),
+    }.get(column.kind, pa.string())
+
+
+def _arrow_value(column: ExportColumn, value):
+    if value is None or value == "":
+        return None
+    if column.kind == "date" and isinstance(value, datetime):
+        return value.date()
+    if column.kind in ("number", "percent"):
+        return float(value)
+    if column.kind == "integer":
+        return int(value)
+    if column.kind == "text" and not isinstance(value, str):
+        return str(value)
+    return value
+
+
+def write_parquet(fileobj, columns: Sequence[ExportColumn], rows: Iterable[Sequence], chunk_size: int | None = None) -> int:
+    """Write ``rows`` to ``fileobj`` as Parquet, one record batch per chunk; return the row count."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    chunk_size = get_chunk_size(chunk_size)
+    schema = pa.schema([pa.field(column.label, _arrow_type(pa, column)) for column in columns])
+    count = 0
+    with pq.ParquetWriter(fileobj, schema) as writer:
+        batch = [[] for _ in columns]
+
+        def flush():
+            arrays = [pa.array(values, type=field.type) for values, field in zip(batch, schema)]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            for values in batch:
+                values.clear()
+
+        for values in rows:
+            for index, (column, value) in enumerate(zip(columns, values)):
+                batch[index].append(_arrow_value(column, value))
+            count += 1
+            if count % chunk_size == 0:
+                flush()
+        if count % chunk_size or not count:
+            flush()
+    return count
+
+
+def build_parquet_file(columns: Sequence[ExportColumn], rows: Iterable[Sequence]):
+    """Write ``rows`` as Parquet to a temporary file; return ``(file rewound to the start, row count)``."""
+    fileobj = tempfile.TemporaryFile()
+    try:
+        count = write_parquet(fileobj, columns, rows)
+    except Exception:
+        fileobj.close()
+        raise
+    fileobj.seek(0)
+    return fileobj, count
+
+
+def send_parquet_file(fileobj, download_name: str):
+    """Stream a finished Parquet file as an attachment; the file is closed with the response."""
+    return send_file(fileobj, mimetype=PARQUET_MIMETYPE, as_attachment=True, download_name=download_name)
+
+
+def send_export(
+    export_format: str,
+    sheet: ExportSheet,
+    download_stem: str,
+    on_complete: Callable[[int], None] | None = None,
+    extra_sheets: Sequence[ExportSheet] = (),
+):
+    """Send ``sheet`` as ``xlsx``, ``csv`` or ``parquet`` (``extra_sheets`` only go into workbooks).
+
+    ``on_complete`` receives the exported row count (for CSV, once streaming ends).
+    """
+    if export_format == "csv":
+        return stream_csv_response(sheet.columns, sheet.rows, f"{download_stem}.csv", on_complete)
+    if export_format == "parquet":
+        output, count = build_parquet_file(sheet.columns, sheet.rows)
+        if on_complete:
+            on_complete(count)
+        return send_parquet_file(output, f"{download_stem}.parquet")
+    output, counts = build_xlsx_file([sheet, *extra_sheets])
+    if on_complete:
+        on_complete(counts[sheet.title])
+    return send_xlsx_file(output, f"{download_stem}.xlsx")
+
+
+EXPORT_MIMETYPES = {"xlsx": XLSX_MIMETYPE, "csv": CSV_MIMETYPE, "parquet": PARQUET_MIMETYPE}
+
+
+def write_export_file(fileobj, export_format: str, sheet: ExportSheet, extra_sheets: Sequence[ExportSheet] = ()) -> int:
+    """Write ``sheet`` in ``export_format`` to a binary ``fileobj``; return its row count."""
+    if export_format == "csv":
+        return write_csv(fileobj, sheet.columns, sheet.rows)
+    if export_format == "parquet":
+        return write_parquet(fileobj, sheet.columns, sheet.rows)
+    return write_xlsx(fileobj, [sheet, *extra_sheets])[sheet.title]
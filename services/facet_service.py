@@ -0,0 +1,111 @@
+"""Filter facet counts for list pages, computed in one grouped statement.
+
+A facet (status, source, owner, stage, ...) is counted over the rows matching
+every active filter except its own, so each option shows how many rows
+selecting it would give. The page total applies all filters.
+
+- PostgreSQL: ``GROUP BY GROUPING SETS ((facet1), (facet2), ..., ())`` with a
+  ``count(*) FILTER (WHERE ...)`` per facet
+- other databases (SQLite): ``UNION ALL`` of one ``GROUP BY`` per facet plus
+  the total, still a single statement
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Mapping, NamedTuple, Sequence
+
+from sqlalchemy import and_, func, literal, null, tuple_, union_all
+
+from extensions import db
+
+
+TOTAL_FACET = "_total"
+
+
+class FacetSpec(NamedTuple):
+    key: str
+    column: object
+    # Names of the filters ignored when counting this facet (normally its own selection)
+    excluded_filters: tuple = ()
+
+
+def _conditions(filters: Mapping[str, object], excluded: Sequence[str] = ()) -> list:
+    return [condition for name, condition in filters.items() if condition is not None and name not in excluded]
+
+
+def _count(conditions: list):
+    return func.count().filter(and_(*conditions)) if conditions else func.count()
+
+
+def _compute_grouping_sets(query, filters, facets) -> dict:
+    columns = [facet.column for facet in facets]
+    statement = query.order_by(None).with_entities(
+        *columns,
+        *[func.grouping(column) for column in columns],
+        *[_count(_conditions(filters, facet.excluded_filters)) for facet in facets],
+        _count(_conditions(filters)),
+    ).group_by(func.grouping_sets(*[tuple_(column) for column in columns], tuple_()))
+
+    size = len(facets)
+    result = {"total": 0, "facets": {facet.key: {} for facet in facets}}
+    for row in statement.all():
+        values, groupings, counts, total = row[:size], row[size:2 * size], row[2 * size:3 * size], row[-1]
+        grouped = [index for index, flag in enumerate(groupings) if flag == 0]
+        if not grouped:
+            result["total"] = int(total or 0)
+            continue
+        index = grouped[0]
+        if counts[index]:
+            result["facets"][facets[index].key][values[index]] = int(counts[index])
+    return result
+
+
+def _compute_union_all(query, filters, facets) -> dict:
+    base = query.order_by(None)
+    branches = [
+        base.filter(*_conditions(filters, facet.excluded_filters))
+        .with_entities(literal(facet.key).label("facet"), facet.column.label("value"), func.count().label("count"))
+        .group_by(facet.column)
+        .statement
+        for facet in facets
+    ]
+    branches.append(
+        base.filter(*_conditions(filters))
+        .with_entities(literal(TOTAL_FACET).label("facet"), null().label("value"), func.count().label("count"))
+        .statement
+    )
+
+    result = {"total": 0, "facets": {facet.key: {} for facet in facets}}
+    for key, value, count in db.session.execute(union_all(*branches)).all():
+        if key == TOTAL_FACET:
+            result["total"] = int(count or 0)
+        elif count:
+            result["facets"][key][value] = int(count)
+    return result
+
+
+def compute_facets(query, filters: Mapping[str, object], facets: Sequence[FacetSpec]) -> dict:
+    """Return ``{"total": n, "facets": {key: {value: count}}}`` for ``query``.
+
+    ``query`` carries the conditions every count shares (access scope, search);
+    ``filters`` maps filter names to conditions (``None`` when inactive).
+    Values with no matching rows are left out.
+    """
+    if db.engine.dialect.name == "postgresql":
+        return _compute_grouping_sets(query, filters, facets)
+    return _compute_union_all(query, filters, facets)
+
+
+def get_cached_facets(namespace: str, query, filters, facets, scope: dict) -> dict:
+    """``compute_facets`` cached per ``scope`` against the business data version.
+
+    ``scope`` must identify everything the query and filters depend on.
+    """
+    from services.dashboard_cache_service import get_versioned_payload
+
+    scope_key = hashlib.sha1(json.dumps(scope, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return get_versioned_payload(
+        namespace, scope_key, lambda: compute_facets(query, filters, facets), async_refresh=False
+    )
@@ -0,0 +1,341 @@
+"""Follow-up History entries (``followup_entries``): writes, legacy text migration and reads.
+
+New follow-ups are stored as ``FollowupEntry`` rows instead of being appended
+to the ``follow_up`` TEXT column. ``last_followup_at`` / ``followup_count`` on
+the lead or pipeline are maintained alongside so lists can sort and colour
+rows without touching the history.
+"""
+
+from __future__ import annotations
+
+import re
+from datetime import date, datetime
+from typing import Iterable
+
+from flask import current_app
+
+from extensions import db
+
+
+DEFAULT_PREVIEW_ENTRIES = 3
+DEFAULT_HISTORY_PAGE_SIZE = 20
+MAX_HISTORY_PAGE_SIZE = 100
+
+_DATETIME = r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}'
+
+# "Follow-up, 2024-01-15 10:30: ..." and "Follow-up [Call], 2024-01-15 10:30 (start -> end): ..."
+FOLLOWUP_LINE_PATTERN = re.compile(
+    r'^Follow-up(?: \[(?P<type>[^\]\n]*)\])?,\s+(?P<date>\d{4}-\d{2}-\d{2})(?: (?P<time>\d{2}:\d{2}))?'
+    rf'(?: \((?P<start>{_DATETIME}) -> (?P<end>{_DATETIME})\))?: ?(?P<text>.*)$'
+)
+# "To-do, 2024-01-15: ... by 2024-01-20" and "To-do [Call], 2024-01-15: ... scheduled start -> end"
+TODO_LINE_PATTERN = re.compile(
+    r'^To-do(?: \[(?P<type>[^\]\n]*)\])?,\s+(?P<date>\d{4}-\d{2}-\d{2}): ?(?P<text>.*)$'
+)
+TODO_TIMING_PATTERN = re.compile(
+    rf'^(?P<text>.*?)(?: scheduled (?P<start>{_DATETIME}) -> (?P<end>{_DATETIME})| by (?P<due>\d{{4}}-\d{{2}}-\d{{2}}))$'
+)
+
+
+def _get_models():
+    from models import FollowupEntry, Pipeline, SalesLead
+
+    return FollowupEntry, {'sales_lead': SalesLead, 'pipeline': Pipeline}
+
+
+def get_entity_type(entity) -> str:
+    _, entity_models = _get_models()
+    for entity_type, model in entity_models.items():
+        if isinstance(entity, model):
+            return entity_type
+    raise ValueError(f'Unsupported follow-up entity: {type(entity).__name__}')
+
+
+def _coerce_due_date(value):
+    """Return ``(date or None, leftover text)`` for the loosely typed due dates callers pass."""
+    if value in (None, ''):
+        return None, ''
+    if isinstance(value, datetime):
+        return value.date(), ''
+    if isinstance(value, date):
+        return value, ''
+    try:
+        return date.fromisoformat(str(value)), ''
+    except ValueError:
+        return None, f' by {value}'
+
+
+def record_followup(entity, timestamp: datetime) -> None:
+    """Update the summary for one follow-up appended at ``timestamp`` without reading history."""
+    entity.followup_count = (entity.followup_count or 0) + 1
+    timestamp = timestamp.replace(second=0, microsecond=0)
+    if entity.last_followup_at is None or timestamp > entity.last_followup_at:
+        entity.last_followup_at = timestamp
+
+
+def followup_entry_values(
+    kind, content, entry_at=None, activity_type=None,
+    schedule_start_at=None, schedule_end_at=None, due_date=None,
+) -> dict:
+    """``FollowupEntry`` column values for a new entry (without the entity columns)."""
+    entry_at = entry_at or datetime.utcnow()
+    due_date, due_suffix = _coerce_due_date(due_date)
+    return {
+        'kind': kind,
+        'activity_type': activity_type,
+        'entry_at': entry_at.replace(second=0, microsecond=0),
+        'schedule_start_at': schedule_start_at if schedule_start_at and schedule_end_at else None,
+        'schedule_end_at': schedule_end_at if schedule_start_at and schedule_end_at else None,
+        'due_date': due_date,
+        'content': f'{content}{due_suffix}',
+    }
+
+
+def add_followup_entry(
+    entity, kind, content, entry_at=None, activity_type=None,
+    schedule_start_at=None, schedule_end_at=None, due_date=None,
+):
+    """Attach a new history entry to ``entity`` (lead or pipeline, flushed or not)."""
+    FollowupEntry, _ = _get_models()
+    values = followup_entry_values(
+        kind, content, entry_at, activity_type, schedule_start_at, schedule_end_at, due_date,
+    )
+    entry = FollowupEntry(entity_type=get_entity_type(entity), **values)
+    entity.followup_entries.append(entry)
+    if kind == FollowupEntry.KIND_FOLLOWUP:
+        record_followup(entity, values['entry_at'])
+    return entry
+
+
+def _parse_datetime(value):
+    return datetime.strptime(value, '%Y-%m-%d %H:%M') if value else None
+
+
+def parse_followup_history(text: str | None, default_at: datetime | None = None) -> list[dict]:
+    """Split legacy Follow-up History text into entry dicts (``FollowupEntry`` columns).
+
+    Lines that do not start a Follow-up or To-do entry continue the previous
+    entry (multi-line notes); leading ones become a ``note`` entry dated
+    ``default_at`` so no text is lost.
+    """
+    FollowupEntry, _ = _get_models()
+    entries = []
+    for line in (text or '').splitlines():
+        entry = None
+        match = FOLLOWUP_LINE_PATTERN.match(line)
+        if match:
+            try:
+                entry = {
+                    'kind': FollowupEntry.KIND_FOLLOWUP,
+                    'activity_type': match.group('type'),
+                    'entry_at': datetime.strptime(
+                        f"{match.group('date')} {match.group('time') or '00:00'}", '%Y-%m-%d %H:%M'
+                    ),
+                    'schedule_start_at': _parse_datetime(match.group('start')),
+                    'schedule_end_at': _parse_datetime(match.group('end')),
+                    'due_date': None,
+                    'content': match.group('text'),
+                }
+            except ValueError:
+                entry = None
+        else:
+            match = TODO_LINE_PATTERN.match(line)
+            if match:
+                try:
+                    entry_at = datetime.strptime(match.group('date'), '%Y-%m-%d')
+                    timing = TODO_TIMING_PATTERN.match(match.group('text'))
+                    entry = {
+                        'kind': FollowupEntry.KIND_TODO,
+                        'activity_type': match.group('type'),
+                        'entry_at': entry_at,
+                        'schedule_start_at': _parse_datetime(timing.group('start')),
+                        'schedule_end_at': _parse_datetime(timing.group('end')),
+                        'due_date': date.fromisoformat(timing.group('due')) if timing.group('due') else None,
+                        'content': timing.group('text'),
+                    }
+                except (AttributeError, ValueError):
+                    entry = None
+
+        if entry is not None:
+            entries.append(entry)
+        elif entries:
+            entries[-1]['content'] = f"{entries[-1]['content']}\n{line}"
+        elif line.strip():
+            entries.append({
+                'kind': FollowupEntry.KIND_NOTE,
+                'activity_type': None,
+                'entry_at': default_at or datetime(1970, 1, 1),
+                'schedule_start_at': None,
+                'schedule_end_at': None,
+                'due_date': None,
+                'content': line,
+            })
+    return entries
+
+
+def import_followup_history(entity, text: str | None) -> int:
+    """Add entries parsed from free-form history text (Excel import); returns entries added."""
+    entries = parse_followup_history(text, default_at=datetime.now())
+    for values in entries:
+        add_followup_entry(entity, **values)
+    return len(entries)
+
+
+def render_followup_history(entity) -> str:
+    """Full history text for detail views: unmigrated legacy text first, then entries."""
+    lines = [entity.follow_up] if entity.follow_up else []
+    lines.extend(entry.to_history_line() for entry in entity.followup_entries)
+    return '\n'.join(lines)
+
+
+def _entity_filter(FollowupEntry, entity_type: str, entity_ids: Iterable[int]):
+    return db.and_(FollowupEntry.entity_type == entity_type, FollowupEntry.entity_id.in_(list(entity_ids)))
+
+
+def get_latest_followup_entries(entity_type: str, entity_ids: Iterable[int], limit: int | None = None) -> dict:
+    """Return ``{entity_id: [entries newest first]}`` holding at most ``limit`` entries each.
+
+    Entries are ordered by id (append order): legacy To-do lines carry only a
+    date, so ``entry_at`` alone would reorder migrated history.
+
+    One ``ROW_NUMBER() OVER (PARTITION BY entity_id)`` query for the whole page of rows.
+    """
+    FollowupEntry, _ = _get_models()
+    entity_ids = list(entity_ids)
+    if not entity_ids:
+        return {}
+    limit = limit or current_app.config.get('FOLLOWUP_PREVIEW_ENTRIES', DEFAULT_PREVIEW_ENTRIES)
+
+    row_number = db.func.row_number().over(
+        partition_by=FollowupEntry.entity_id,
+        order_by=FollowupEntry.id.desc(),
+    ).label('entry_row')
+    ranked = (
+        db.select(FollowupEntry.id, row_number)
+        .where(_entity_filter(FollowupEntry, entity_type, entity_ids))
+        .subquery()
+    )
+    entries = (
+        FollowupEntry.query.join(ranked, ranked.c.id == FollowupEntry.id)
+        .filter(ranked.c.entry_row <= limit)
+        .order_by(FollowupEntry.entity_id, ranked.c.entry_row)
+        .all()
+    )
+    latest = {}
+    for entry in entries:
+        latest.setdefault(entry.entity_id, []).append(entry)
+    return latest
+
+
+def get_followup_previews(entities, limit: int | None = None) -> dict:
+    """Return ``{entity_id: text}`` of the latest entries (newest first) for list and export cells."""
+    entities = [entity for entity in entities if entity.id is not None]
+    if not entities:
+        return {}
+    entity_type = get_entity_type(entities[0])
+    latest = get_latest_followup_entries(entity_type, [entity.id for entity in entities], limit)
+    previews = {}
+    for entity in entities:
+        lines = [entry.to_history_line() for entry in latest.get(entity.id, [])]
+        if entity.follow_up:
+            lines.append(entity.follow_up)
+        if lines:
+            previews[entity.id] = '\n'.join(lines)
+    return previews
+
+
+def get_followup_history_page(entity_type: str, entity_id: int, page: int = 1, per_page: int | None = None) -> dict:
+    """Return one page of an entity's history, newest first."""
+    FollowupEntry, _ = _get_models()
+    per_page = max(1, min(per_page or DEFAULT_HISTORY_PAGE_SIZE, MAX_HISTORY_PAGE_SIZE))
+    page = max(1, page or 1)
+    rows = (
+        FollowupEntry.query.filter(_entity_filter(FollowupEntry, entity_type, [entity_id]))
+        .order_by(FollowupEntry.id.desc())
+        .offset((page - 1) * per_page)
+        .limit(per_page + 1)
+        .all()
+    )
+    return {
+        'entries': [entry.to_dict() for entry in rows[:per_page]],
+        'page': page,
+        'per_page': per_page,
+        'has_more': len(rows) > per_page,
+    }
+
+
+def recompute_followup_summaries(entity_type: str, entity_ids: Iterable[int] | None = None) -> None:
+    """Set ``last_followup_at`` / ``followup_count`` from the entries table with one UPDATE."""
+    FollowupEntry, entity_models = _get_models()
+    table = entity_models[entity_type].__table__
+    entries = FollowupEntry.__table__
+    followups = db.and_(
+        entries.c.entity_type == entity_type,
+        entries.c.entity_id == table.c.id,
+        entries.c.kind == FollowupEntry.KIND_FOLLOWUP,
+    )
+    statement = table.update().values(
+        last_followup_at=db.select(db.func.max(entries.c.entry_at)).where(followups).scalar_subquery(),
+        followup_count=db.select(db.func.count(entries.c.id)).where(followups).scalar_subquery(),
+    )
+    if entity_ids is not None:
+        entity_ids = list(entity_ids)
+        if not entity_ids:
+            return
+        statement = statement.where(table.c.id.in_(entity_ids))
+    db.session.execute(statement)
+
+
+def migrate_legacy_followups(batch_size: int = 200) -> int:
+    """Move legacy ``follow_up`` text into entries and clear it; returns records migrated.
+
+    Uses Core statements so metrics and data-version hooks are not triggered.
+    """
+    FollowupEntry, entity_models = _get_models()
+    entries_table = FollowupEntry.__table__
+    total = 0
+    for entity_type, model in entity_models.items():
+        table = model.__table__
+        pending = db.and_(table.c.follow_up.isnot(None), table.c.follow_up != '')
+        while True:
+            rows = db.session.execute(
+                db.select(table.c.id, table.c.follow_up, table.c.created_at)
+                .where(pending)
+                .order_by(table.c.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            now = datetime.utcnow()
+            values = [
+                {**entry, 'entity_type': entity_type, 'entity_id': row_id, 'created_at': now}
+                for row_id, follow_up, created_at in rows
+                for entry in parse_followup_history(follow_up, default_at=created_at)
+            ]
+            if values:
+                db.session.execute(entries_table.insert(), values)
+            row_ids = [row[0] for row in rows]
+            db.session.execute(table.update().where(table.c.id.in_(row_ids)).values(follow_up=None))
+            recompute_followup_summaries(entity_type, row_ids)
+            db.session.commit()
+            total += len(rows)
+    return total
+
+
+def backfill_followup_summaries(only_missing: bool = True) -> int:
+    """Migrate remaining legacy text; without ``only_missing`` also recompute every summary."""
+    migrated = migrate_legacy_followups()
+    if not only_missing:
+        _, entity_models = _get_models()
+        for entity_type in entity_models:
+            recompute_followup_summaries(entity_type)
+        db.session.commit()
+    return migrated
+
+
+def register_followup_commands(app) -> None:
+    @app.cli.command("followup-backfill")
+    def followup_backfill_command():
+        """Migrate legacy follow_up text into followup_entries and recompute summaries."""
+        total = backfill_followup_summaries(only_missing=False)
+        print(f"[OK] Migrated follow-up history for {total} leads and pipelines")
@@ -0,0 +1,286 @@
+"""Monthly rollover of the rolling M1~M12 forecast, computed and written in batches.
+
+``calculate_pipeline_forecast`` remains the per-row rule used when a pipeline
+is saved. At the start of a month every pipeline's forecast goes stale at
+once; this job recomputes M1~M12 for a chunk of pipelines as one array
+operation and writes the chunk with a single executemany UPDATE. It also
+extends the revenue ledger horizon by the months that rolled in.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+
+import click
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import bindparam, delete, select
+
+from extensions import db
+from utils import get_forecast_base_month, get_month_end
+
+
+FORECAST_MONTHS = 12
+FORECAST_COLUMNS = tuple(f"m{index}" for index in range(1, FORECAST_MONTHS + 1))
+LOST_STAGE = "6b) Deal Lost"
+
+ROLLOVER_JOB_NAME = "forecast_rollover"
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def _get_models():
+    from models import Pipeline, PipelineRevenueMonth
+
+    return Pipeline, PipelineRevenueMonth
+
+
+def get_rollover_key(reference_date: date | None = None) -> str:
+    return get_forecast_base_month(reference_date).strftime("%Y-%m")
+
+
+def compute_forecast_matrix(rows, forecast_base_month: date):
+    """Return an ``len(rows) x 12`` array of M1~M12 values.
+
+    ``rows`` provide ``stage``, ``est_act_date``, ``mrc_usd`` and ``otc_usd``;
+    the rules match :func:`utils.calculate_pipeline_forecast`.
+    """
+    import numpy as np
+
+    month_starts = [forecast_base_month + relativedelta(months=index) for index in range(FORECAST_MONTHS)]
+    start = np.array([month.toordinal() for month in month_starts])
+    end = np.array([get_month_end(month).toordinal() for month in month_starts])
+    days_in_month = end - start + 1
+
+    activation = np.array([row.est_act_date.toordinal() if row.est_act_date else 0 for row in rows])[:, None]
+    mrc = np.array([float(row.mrc_usd or 0) for row in rows])[:, None]
+    otc = np.array([float(row.otc_usd or 0) for row in rows])[:, None]
+    forecast = np.array([row.stage != LOST_STAGE and row.est_act_date is not None for row in rows])[:, None]
+
+    prorated = mrc * (end - activation + 1) / days_in_month + otc
+    values = np.where(activation > end, 0.0, np.where(activation < start, mrc, prorated))
+    return np.round(np.where(forecast, values, 0.0), 4)
+
+
+def _ledger_rows_for_window(row, months: list[date]) -> list[dict]:
+    """Ledger rows for ``months`` that rolled into the horizon (same rules as the ledger builder)."""
+    activation_date = row.est_act_date
+    if not activation_date:
+        return []
+    monthly_recurring = row.mrc_usd or 0
+    one_time_charge = row.otc_usd or 0
+
+    ledger_rows = []
+    for month_start in months:
+        month_end = get_month_end(month_start)
+        if activation_date > month_end:
+            continue
+        if activation_date >= month_start:
+            days_in_month = (month_end - month_start).days + 1
+            mrc = monthly_recurring * ((month_end.day - activation_date.day + 1) / days_in_month) if monthly_recurring else 0
+            otc = one_time_charge
+        else:
+            mrc, otc = monthly_recurring, 0
+        if mrc or otc:
+            ledger_rows.append({
+                "pipeline_id": row.id,
+                "month_start": month_start,
+                "mrc": float(mrc),
+                "otc": float(otc),
+                "owner_id": row.owner_id,
+                "stage": row.stage,
+                "product": row.product,
+                "is_deleted": bool(row.is_deleted),
+            })
+    return ledger_rows
+
+
+def _extend_revenue_ledger(rows, forecast_base_month: date) -> None:
+    """Add ledger months between each pipeline's previous and the new horizon end.
+
+    Months that fell behind the new horizon start are deleted, so each
+    pipeline keeps a bounded number of rows.
+    """
+    from services.revenue_ledger_service import LEDGER_MONTHS_AHEAD, get_ledger_horizon
+
+    _, PipelineRevenueMonth = _get_models()
+    table = PipelineRevenueMonth.__table__
+    horizon_start, new_horizon = get_ledger_horizon(forecast_base_month)
+
+    db.session.execute(
+        delete(table).where(
+            table.c.pipeline_id.in_([row.id for row in rows]),
+            table.c.month_start < horizon_start,
+        )
+    )
+
+    rows_by_previous_base = {}
+    for row in rows:
+        if row.forecast_base_month and row.forecast_base_month < forecast_base_month:
+            rows_by_previous_base.setdefault(row.forecast_base_month, []).append(row)
+
+    for previous_base, group in rows_by_previous_base.items():
+        old_horizon = previous_base + relativedelta(months=LEDGER_MONTHS_AHEAD - 1)
+        months = []
+        month_start = max(old_horizon + relativedelta(months=1), forecast_base_month)
+        while month_start <= new_horizon:
+            months.append(month_start)
+            month_start = month_start + relativedelta(months=1)
+        if not months:
+            continue
+
+        db.session.execute(
+            delete(table).where(
+                table.c.pipeline_id.in_([row.id for row in group]),
+                table.c.month_start >= months[0],
+                table.c.month_start <= months[-1],
+            )
+        )
+        ledger_rows = [ledger_row for row in group for ledger_row in _ledger_rows_for_window(row, months)]
+        if ledger_rows:
+            db.session.execute(table.insert(), ledger_rows)
+
+
+def calculate_uncalculated_pipelines(reference_date: date | None = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Run the full ``calculate_pipeline_metrics`` for rows that never had it (no forecast base month).
+
+    Such rows come from legacy inserts that also skipped TCV/GP and the
+    revenue ledger, so a month shift alone would not fix them.
+    """
+    from models import disable_metrics_events
+    from services.weekly_metrics_service import refresh_weekly_metrics
+    from utils import calculate_pipeline_metrics
+
+    Pipeline, _ = _get_models()
+    forecast_base_month = get_forecast_base_month(reference_date)
+    total = 0
+    owner_ids = set()
+    with disable_metrics_events():
+        while True:
+            pipelines = (
+                Pipeline.query.options(db.selectinload(Pipeline.revenue_months))
+                .filter(Pipeline.is_deleted.is_(False), Pipeline.forecast_base_month.is_(None))
+                .order_by(Pipeline.id.asc())
+                .limit(chunk_size)
+                .all()
+            )
+            if not pipelines:
+                break
+            for pipeline in pipelines:
+                calculate_pipeline_metrics(pipeline, forecast_base_month)
+                owner_ids.add(pipeline.owner_id)
+            db.session.commit()
+            total += len(pipelines)
+    if owner_ids:
+        refresh_weekly_metrics(owner_ids=owner_ids)
+    return total
+
+
+def rollover_pipeline_forecasts(
+    reference_date: date | None = None,
+    only_stale: bool = True,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Recompute M1~M12 for pipelines in id-ordered chunks; return the number of pipelines updated.
+
+    With ``only_stale`` (default) only active pipelines whose forecast base month
+    is not the current month are touched; otherwise every pipeline is rewritten.
+    ``updated_at`` is left unchanged and no ORM events fire for the batch pass.
+    """
+    Pipeline, _ = _get_models()
+    table = Pipeline.__table__
+    forecast_base_month = get_forecast_base_month(reference_date)
+    total = calculate_uncalculated_pipelines(reference_date, chunk_size)
+
+    columns = (
+        table.c.id, table.c.stage, table.c.est_act_date, table.c.mrc_usd, table.c.otc_usd,
+        table.c.forecast_base_month, table.c.owner_id, table.c.product, table.c.is_deleted,
+    )
+    statement = (
+        table.update()
+        .where(table.c.id == bindparam("pipeline_id"))
+        .values(
+            forecast_base_month=forecast_base_month,
+            updated_at=table.c.updated_at,
+            **{column: bindparam(f"new_{column}") for column in FORECAST_COLUMNS},
+        )
+    )
+
+    last_id = 0
+    while True:
+        query = select(*columns).where(table.c.id > last_id)
+        if only_stale:
+            query = query.where(
+                table.c.is_deleted.is_(False),
+                db.or_(table.c.forecast_base_month.is_(None), table.c.forecast_base_month != forecast_base_month),
+            )
+        rows = db.session.execute(query.order_by(table.c.id.asc()).limit(chunk_size)).all()
+        if not rows:
+            break
+
+        matrix = compute_forecast_matrix(rows, forecast_base_month)
+        params = [
+            {"pipeline_id": row.id, **{f"new_{column}": float(value) for column, value in zip(FORECAST_COLUMNS, values)}}
+            for row, values in zip(rows, matrix.tolist())
+        ]
+        db.session.execute(statement, params)
+        _extend_revenue_ledger(rows, forecast_base_month)
+        db.session.commit()
+
+        total += len(rows)
+        last_id = rows[-1].id
+
+    if total:
+        from services.dashboard_cache_service import bump_data_version
+
+        bump_data_version()
+    return total
+
+
+def forecasts_are_stale(reference_date: date | None = None) -> bool:
+    Pipeline, _ = _get_models()
+    forecast_base_month = get_forecast_base_month(reference_date)
+    return db.session.query(
+        Pipeline.query.filter(
+            Pipeline.is_deleted.is_(False),
+            db.or_(Pipeline.forecast_base_month.is_(None), Pipeline.forecast_base_month != forecast_base_month),
+        ).exists()
+    ).scalar()
+
+
+def run_forecast_rollover(reference_date: date | None = None, force: bool = False) -> int | None:
+    """Run the monthly rollover under the ``forecast_rollover`` job lock.
+
+    Returns ``None`` when another worker holds the lock or this month's run has
+    already completed (unless ``force``), otherwise the number of pipelines updated.
+    """
+    from services.job_lock_service import acquire_job_lock, release_job_lock
+
+    run_key = get_rollover_key(reference_date)
+    worker_id = acquire_job_lock(ROLLOVER_JOB_NAME, run_key=None if force else run_key)
+    if worker_id is None:
+        return None
+
+    completed = False
+    try:
+        total = rollover_pipeline_forecasts(reference_date)
+        completed = True
+        return total
+    finally:
+        release_job_lock(ROLLOVER_JOB_NAME, worker_id, run_key=run_key, completed=completed)
+
+
+def ensure_forecasts_current(reference_date: date | None = None) -> None:
+    """Request-path fallback for when the scheduled rollover has not run yet this month."""
+    if forecasts_are_stale(reference_date):
+        run_forecast_rollover(reference_date, force=True)
+
+
+def register_forecast_rollover_commands(app) -> None:
+    @app.cli.command("forecast-rollover")
+    @click.option("--force", is_flag=True, help="Run even if this month's rollover already completed.")
+    def forecast_rollover_command(force):
+        """Roll M1~M12 forecasts to the current month (schedule on the 1st of each month)."""
+        total = run_forecast_rollover(force=force)
+        if total is None:
+            print(f"[INFO] Forecast rollover for {get_rollover_key()} already done or running elsewhere")
+            return
+        print(f"[OK] Rolled forecast to {get_rollover_key()} for {total} pipelines")
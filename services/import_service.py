@@ -0,0 +1,256 @@
+"""Column-wise cleaning of Sales Leads and Pipeline import sheets.
+
+Imports used to walk ``df.iterrows()`` and, for every cell, re-normalize the
+header, sniff the value's type and run ``validate_date`` (a list of
+``strptime`` formats, then dateutil). Here headers are normalized once and
+each column is converted as a whole with pandas:
+
+- text is stripped; blanks and ``nan`` become ``None``
+- numbers are coerced with ``to_numeric`` (thousands separators removed)
+- Excel serial numbers and ISO date strings are converted in one pass; only
+  dates in other formats go through ``validate_date``, once per distinct value
+- lead status/source and pipeline stage/level are mapped case-insensitively
+  onto the model's options
+
+Invalid cells are collected per row from boolean masks. The cleaned rows come
+back as dicts keyed by the normalized header, ready to build model instances.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Callable, Mapping
+
+from utils import validate_date
+
+
+# Excel serial numbers in this range (about 2009 to 2064) in date columns are dates
+EXCEL_SERIAL_MIN = 40000
+EXCEL_SERIAL_MAX = 60000
+EXCEL_EPOCH = "1899-12-30"
+
+EMAIL_PATTERN = r"^[\w\.-]+@[\w\.-]+\.\w+$"
+REQUIREMENTS_MAX_LENGTH = 200
+
+PIPELINE_NUMERIC_FIELDS = (
+    "tcv_usd", "mrc_usd", "otc_usd", "gp_margin", "win_rate", "gp",
+    "m1", "m2", "m3", "m4", "m5", "m6", "m7", "m8", "m9", "m10", "m11", "m12",
+)
+PIPELINE_INTEGER_FIELDS = ("contract_term_yrs", "id", "owner_id", "sales_lead_id")
+PIPELINE_STAGE_ALIASES = {"2) lead qualification": "2) Lead Qualified"}
+
+
+def normalize_header(name) -> str:
+    """``"Est. Sign Date"`` -> ``"est_sign_date"``: spaces, periods and dashes to ``_``, parentheses dropped."""
+    key = str(name).strip().replace(" ", "_").replace(".", "_").replace("-", "_").replace("(", "").replace(")", "")
+    return re.sub(r"_{2,}", "_", key.lower())
+
+
+def is_date_column(key: str) -> bool:
+    return key.endswith("_date") or key in ("date_added", "added")
+
+
+def normalize_columns(df):
+    """Rename ``df``'s columns with :func:`normalize_header`; the last of any duplicates wins."""
+    df = df.copy(deep=False)
+    df.columns = [normalize_header(column) for column in df.columns]
+    return df.loc[:, ~df.columns.duplicated(keep="last")]
+
+
+def _as_text(series):
+    """String form of every cell, stripped (``<NA>`` for missing cells); whole floats lose their ``.0``."""
+    import pandas as pd
+
+    series = series.infer_objects()
+    if pd.api.types.is_float_dtype(series):
+        present = series.dropna()
+        if (present % 1 == 0).all():
+            series = series.astype("Int64")
+    text = series.astype("string").str.strip()
+    return text.mask(text.eq("") | text.str.lower().eq("nan"))
+
+
+def _to_objects(series):
+    """Object series with ``None`` for missing values, as the model constructors expect."""
+    return series.astype(object).where(series.notna(), None)
+
+
+def clean_text(series):
+    """Stripped text, ``None`` for blank cells."""
+    return _to_objects(_as_text(series))
+
+
+def parse_dates(series):
+    """Return ``(dates, invalid)``: ``datetime.date`` or ``None`` per cell, and the non-blank cells that are not dates."""
+    import pandas as pd
+
+    dates = pd.Series(None, index=series.index, dtype=object)
+    text = _as_text(series)
+    present = text.notna().to_numpy()
+    text = text[present]
+
+    numbers = pd.to_numeric(text, errors="coerce")
+    serial = numbers[numbers.gt(EXCEL_SERIAL_MIN) & numbers.lt(EXCEL_SERIAL_MAX)]
+    if not serial.empty:
+        dates[serial.index] = pd.to_datetime(serial.astype("int64"), unit="D", origin=EXCEL_EPOCH).dt.date
+
+    strings = text[numbers.isna()]
+    if not strings.empty:
+        try:
+            parsed = pd.to_datetime(strings, format="ISO8601", errors="coerce")
+            parsed = parsed[parsed.notna()]
+            dates[parsed.index] = parsed.dt.date
+        except (TypeError, ValueError):  # e.g. mixed time zones: leave them all to validate_date
+            parsed = strings.iloc[:0]
+        # Other formats (2024/01/31, 31.01.2024, Jan 31, 2024, ...): once per distinct value
+        fallback = strings.drop(parsed.index)
+        if not fallback.empty:
+            lookup = {value: validate_date(value) for value in fallback.unique()}
+            dates[fallback.index] = fallback.map(lookup).astype(object)
+
+    dates = dates.where(dates.notna(), None)
+    return dates, present & dates.isna().to_numpy()
+
+
+def coerce_numbers(series, digits: int | None = 4):
+    """Return ``(numbers, invalid)``: floats (``NaN`` for blank cells) and the non-blank cells that are not numbers."""
+    import pandas as pd
+
+    text = _as_text(series).str.replace(",", "", regex=False).str.replace(" ", "", regex=False)
+    numbers = pd.to_numeric(text, errors="coerce").astype(float)
+    if digits is not None:
+        numbers = numbers.round(digits)
+    return numbers, text.notna().to_numpy() & numbers.isna().to_numpy()
+
+
+def map_choices(series, choices, aliases: Mapping[str, str] | None = None, separator: str | None = None):
+    """Return ``(values, invalid)`` mapping text case-insensitively onto ``choices`` (plus lowercase ``aliases``).
+
+    With ``separator`` only the first of several values (``"Event/Trade Show"``) is used.
+    """
+    lookup = {choice.lower(): choice for choice in choices}
+    lookup.update(aliases or {})
+    text = _as_text(series)
+    keys = text.str.lower()
+    if separator:
+        keys = keys.str.split(separator, regex=False).str[0].str.strip()
+    values = keys.map(lookup, na_action="ignore")
+    return _to_objects(values), text.notna().to_numpy() & values.isna().to_numpy()
+
+
+class RowErrors:
+    """Per-row error messages collected column by column from boolean masks."""
+
+    def __init__(self, index):
+        self.index = index
+        self.messages: dict = {}
+
+    def add(self, mask, message: str | Callable[[object], str], values=None) -> None:
+        """Record ``message`` for every row in ``mask`` (called with the row's value from ``values`` if callable)."""
+        import numpy as np
+
+        for position in np.flatnonzero(np.asarray(mask, dtype=bool)):
+            label = self.index[position]
+            text = message(values.iloc[position]) if callable(message) else message
+            self.messages.setdefault(label, []).append(text)
+
+    @property
+    def mask(self):
+        return self.index.isin(list(self.messages))
+
+    def format(self) -> list[str]:
+        """``"Row n: error, error"`` lines in sheet order (``n`` counts data rows from 1)."""
+        return [f"Row {label + 1}: {', '.join(self.messages[label])}" for label in self.index if label in self.messages]
+
+
+def _build_rows(df, columns: dict, errors: RowErrors) -> list[dict]:
+    import pandas as pd
+
+    frame = pd.DataFrame(columns, index=df.index).loc[~errors.mask]
+    return frame.astype(object).where(frame.notna(), None).to_dict("records")
+
+
+def clean_leads_import(df) -> tuple[list[dict], list[str]]:
+    """Clean a Sales Leads sheet; return ``(valid rows, "Row n: ..." error lines)``."""
+    from models import SalesLead
+
+    df = normalize_columns(df)
+    errors = RowErrors(df.index)
+    columns = {}
+    invalid_dates = {}
+    for key in df.columns:
+        if is_date_column(key):
+            columns[key], invalid_dates[key] = parse_dates(df[key])
+        else:
+            columns[key] = clean_text(df[key])
+
+    if "name" in columns:
+        errors.add(columns["name"].isna(), "Name is required")
+    else:
+        errors.add([True] * len(df.index), "Name is required")
+
+    if "leads_status" in columns:
+        text = columns["leads_status"]
+        columns["leads_status"], invalid = map_choices(text, SalesLead.STATUS_OPTIONS)
+        errors.add(invalid, lambda value: (
+            f"Invalid status '{value}'. Must be one of: {', '.join(SalesLead.STATUS_OPTIONS)}"
+        ), text)
+
+    if "source" in columns:
+        text = columns["source"]
+        columns["source"], invalid = map_choices(text, SalesLead.SOURCE_OPTIONS, separator="/")
+        errors.add(invalid, lambda value: (
+            f"Invalid source '{value}'. Must be one of: {', '.join(SalesLead.SOURCE_OPTIONS)}"
+        ), text)
+
+    if "date_added" in columns:
+        errors.add(invalid_dates["date_added"], lambda value: (
+            f"Invalid date format '{value}'. Supported formats: YYYY-MM-DD (2025-03-28), YYYY/MM/DD, Jan 1, 2024, etc."
+        ), clean_text(df["date_added"]))
+
+    if "email" in columns:
+        email = columns["email"].astype("string")
+        invalid = email.notna() & ~email.str.match(EMAIL_PATTERN).fillna(False).astype(bool)
+        errors.add(invalid, lambda value: f"Invalid email format '{value}'", email)
+
+    if "requirements" in columns:
+        too_long = columns["requirements"].astype("string").str.len().gt(REQUIREMENTS_MAX_LENGTH).fillna(False)
+        errors.add(too_long, f"Requirements must be {REQUIREMENTS_MAX_LENGTH} characters or fewer")
+
+    return _build_rows(df, columns, errors), errors.format()
+
+
+def clean_pipeline_import(df) -> tuple[list[dict], list[str]]:
+    """Clean a Pipeline sheet; return ``(valid rows, "Row n: ..." error lines)``.
+
+    Blank amounts become 0; blank dates and integers ``None``.
+    """
+    import numpy as np
+    from models import Pipeline
+
+    df = normalize_columns(df)
+    errors = RowErrors(df.index)
+    columns = {}
+    for key in df.columns:
+        if key in ("stage", "level"):
+            text = clean_text(df[key])
+            choices = Pipeline.STAGE_OPTIONS if key == "stage" else Pipeline.LEVEL_OPTIONS
+            columns[key], invalid = map_choices(text, choices, PIPELINE_STAGE_ALIASES if key == "stage" else None)
+            errors.add(invalid, lambda value, key=key, choices=choices: (
+                f"Invalid {key} '{value}'. Must be one of: {', '.join(choices)}"
+            ), text)
+        elif is_date_column(key):
+            columns[key], invalid = parse_dates(df[key])
+            errors.add(invalid, lambda value, key=key: f"Invalid date format '{value}' for {key}", clean_text(df[key]))
+        elif key in PIPELINE_NUMERIC_FIELDS:
+            numbers, invalid = coerce_numbers(df[key])
+            columns[key] = numbers.fillna(0)
+            errors.add(invalid, f"{key} must be a valid number")
+        elif key in PIPELINE_INTEGER_FIELDS:
+            numbers, invalid = coerce_numbers(df[key], digits=None)
+            columns[key] = _to_objects(np.trunc(numbers).astype("Int64"))
+            errors.add(invalid, f"{key} must be a valid integer")
+        else:
+            columns[key] = clean_text(df[key])
+
+    return _build_rows(df, columns, errors), errors.format()
@@ -0,0 +1,73 @@
+"""Database-backed locks for periodic jobs shared by several workers or hosts."""
+
+from __future__ import annotations
+
+import os
+import socket
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+
+
+DEFAULT_STALE_SECONDS = 3600
+
+
+def _get_lock_model():
+    from models import JobLock
+
+    return JobLock
+
+
+def get_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def acquire_job_lock(name: str, run_key: str | None = None, stale_seconds: int = DEFAULT_STALE_SECONDS) -> str | None:
+    """Claim ``name`` for this process; return the lock owner id, or ``None`` if not acquired.
+
+    The lock is refused while another worker holds it (unless its claim is
+    older than ``stale_seconds``) and, when ``run_key`` is given, once a run
+    for that key has already completed.
+    """
+    JobLock = _get_lock_model()
+    if db.session.get(JobLock, name) is None:
+        try:
+            db.session.add(JobLock(name=name))
+            db.session.commit()
+        except IntegrityError:
+            # Another worker created the row first
+            db.session.rollback()
+
+    now = datetime.utcnow()
+    worker_id = get_worker_id()
+    conditions = [
+        JobLock.name == name,
+        db.or_(JobLock.locked_at.is_(None), JobLock.locked_at < now - timedelta(seconds=stale_seconds)),
+    ]
+    if run_key is not None:
+        conditions.append(db.or_(JobLock.last_run_key.is_(None), JobLock.last_run_key != run_key))
+
+    claimed = db.session.query(JobLock).filter(*conditions).update(
+        {"locked_at": now, "locked_by": worker_id},
+        synchronize_session=False,
+    )
+    db.session.commit()
+    return worker_id if claimed else None
+
+
+def release_job_lock(name: str, worker_id: str, run_key: str | None = None, completed: bool = True) -> None:
+    """Release a lock taken by :func:`acquire_job_lock`, recording ``run_key`` when completed."""
+    JobLock = _get_lock_model()
+    values = {"locked_at": None, "locked_by": None}
+    if completed:
+        values["last_completed_at"] = datetime.utcnow()
+        if run_key is not None:
+            values["last_run_key"] = run_key
+    db.session.rollback()
+    db.session.query(JobLock).filter(JobLock.name == name, JobLock.locked_by == worker_id).update(
+        values,
+        synchronize_session=False,
+    )
+    db.session.commit()
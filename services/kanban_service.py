@@ -0,0 +1,252 @@
+"""Pipeline kanban board: per-stage aggregates and cursor-paginated cards."""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from typing import Iterable
+
+from flask import current_app
+
+from extensions import db
+
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+LOST_STAGE = "6b) Deal Lost"
+
+
+def _get_models():
+    from models import Pipeline, User
+
+    return Pipeline, User
+
+
+def get_kanban_stages(include_lost: bool = True) -> list[dict]:
+    """Board columns in display order; the lost stage is always last."""
+    Pipeline, _ = _get_models()
+    stages = [
+        {"value": stage, "label": stage, "is_lost": False}
+        for stage in Pipeline.STAGE_OPTIONS
+        if stage != LOST_STAGE
+    ]
+    if include_lost:
+        stages.append({"value": LOST_STAGE, "label": LOST_STAGE, "is_lost": True})
+    return stages
+
+
+def get_page_size(limit=None) -> int:
+    """Clamp a requested page size to ``1..MAX_PAGE_SIZE`` (default ``KANBAN_PAGE_SIZE``)."""
+    default = current_app.config.get("KANBAN_PAGE_SIZE", DEFAULT_PAGE_SIZE)
+    try:
+        limit = int(limit) if limit not in (None, "") else default
+    except (TypeError, ValueError):
+        limit = default
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def encode_cursor(pipeline_id: int) -> str:
+    payload = json.dumps({"id": pipeline_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str | None) -> int | None:
+    """Return the last seen pipeline id from an opaque cursor; ``ValueError`` if malformed."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))["id"]
+        return int(value)
+    except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError) as exc:
+        raise ValueError("Invalid kanban cursor") from exc
+
+
+def _filter_owners(query, owner_ids: Iterable[int] | None):
+    Pipeline, _ = _get_models()
+    if owner_ids:
+        query = query.filter(Pipeline.owner_id.in_(list(owner_ids)))
+    return query
+
+
+def get_kanban_stage_aggregates(base_query, owner_ids: Iterable[int] | None = None) -> dict:
+    """Return ``{stage: {count, tcv_usd, mrc_usd, gp}}`` from the pipeline summary's GROUP BY."""
+    from services.pipeline_summary_service import get_pipeline_summary
+
+    return get_pipeline_summary(_filter_owners(base_query, owner_ids))["stages"]
+
+
+def _card_columns():
+    Pipeline, User = _get_models()
+    return (
+        Pipeline.id,
+        Pipeline.company,
+        Pipeline.name,
+        Pipeline.owner_id,
+        User.username.label("owner_name"),
+        Pipeline.tcv_usd,
+        Pipeline.mrc_usd,
+        Pipeline.win_rate,
+        Pipeline.stage,
+        Pipeline.est_sign_date,
+        Pipeline.level,
+        Pipeline.last_followup_at,
+    )
+
+
+def _serialize_card(row) -> dict:
+    return {
+        "id": row.id,
+        "company": row.company,
+        "name": row.name,
+        "owner_id": row.owner_id,
+        "owner_name": row.owner_name,
+        "tcv_usd": row.tcv_usd or 0,
+        "mrc_usd": row.mrc_usd or 0,
+        "win_rate": row.win_rate,
+        "stage": row.stage,
+        "est_sign_date": row.est_sign_date.strftime("%Y-%m-%d") if row.est_sign_date else None,
+        "latest_followup": row.last_followup_at.strftime("%Y-%m-%d") if row.last_followup_at else None,
+        "level": row.level,
+        "is_lost": row.stage == LOST_STAGE,
+    }
+
+
+def _page(rows: list, limit: int) -> tuple[list[dict], str | None]:
+    has_more = len(rows) > limit
+    cards = [_serialize_card(row) for row in rows[:limit]]
+    next_cursor = encode_cursor(cards[-1]["id"]) if has_more else None
+    return cards, next_cursor
+
+
+def get_kanban_cards(
+    base_query,
+    stage: str,
+    cursor: str | None = None,
+    limit: int | None = None,
+    owner_ids: Iterable[int] | None = None,
+) -> dict:
+    """Return one page of cards for ``stage``, newest first, keyed on ``Pipeline.id``.
+
+    The result is ``{"stage", "cards", "next_cursor"}``; ``next_cursor`` is
+    ``None`` on the last page.
+    """
+    Pipeline, User = _get_models()
+    limit = get_page_size(limit)
+    last_id = decode_cursor(cursor)
+
+    query = (
+        _filter_owners(base_query, owner_ids)
+        .outerjoin(User, User.id == Pipeline.owner_id)
+        .with_entities(*_card_columns())
+        .filter(Pipeline.stage == stage)
+    )
+    if last_id is not None:
+        query = query.filter(Pipeline.id < last_id)
+    rows = query.order_by(Pipeline.id.desc()).limit(limit + 1).all()
+
+    cards, next_cursor = _page(rows, limit)
+    return {"stage": stage, "cards": cards, "next_cursor": next_cursor}
+
+
+def build_kanban_board(
+    base_query,
+    limit: int | None = None,
+    owner_ids: Iterable[int] | None = None,
+    include_lost: bool = True,
+) -> dict:
+    """Return the board's columns with aggregates and the first page of cards each.
+
+    Two queries regardless of pipeline count: the stage GROUP BY and a
+    ``ROW_NUMBER() OVER (PARTITION BY stage)`` query for the first pages.
+    """
+    Pipeline, User = _get_models()
+    limit = get_page_size(limit)
+    stages = get_kanban_stages(include_lost)
+    aggregates = get_kanban_stage_aggregates(base_query, owner_ids)
+
+    row_number = (
+        db.func.row_number()
+        .over(partition_by=Pipeline.stage, order_by=Pipeline.id.desc())
+        .label("stage_row")
+    )
+    ranked = (
+        _filter_owners(base_query, owner_ids)
+        .outerjoin(User, User.id == Pipeline.owner_id)
+        .with_entities(*_card_columns(), row_number)
+        .filter(Pipeline.stage.in_([stage["value"] for stage in stages]))
+        .subquery()
+    )
+    rows = (
+        db.session.query(ranked)
+        .filter(ranked.c.stage_row <= limit + 1)
+        .order_by(ranked.c.stage, ranked.c.id.desc())
+        .all()
+    )
+    rows_by_stage = {}
+    for row in rows:
+        rows_by_stage.setdefault(row.stage, []).append(row)
+
+    columns = []
+    for stage in stages:
+        totals = aggregates.get(stage["value"], {"count": 0, "tcv_usd": 0.0, "mrc_usd": 0.0, "gp": 0.0})
+        cards, next_cursor = _page(rows_by_stage.get(stage["value"], []), limit)
+        columns.append({**stage, **totals, "cards": cards, "next_cursor": next_cursor})
+    return {"stages": columns, "page_size": limit}
+
+
+def _legacy_card_columns():
+    Pipeline, User = _get_models()
+    return (
+        Pipeline.id,
+        Pipeline.company,
+        Pipeline.name,
+        Pipeline.product,
+        Pipeline.tcv_usd,
+        User.username.label("owner"),
+        Pipeline.level,
+        Pipeline.win_rate,
+        Pipeline.stage,
+        Pipeline.est_sign_date,
+        Pipeline.date_added,
+    )
+
+
+def _serialize_legacy_card(row) -> dict:
+    return {
+        "id": row.id,
+        "company": row.company or "",
+        "name": row.name or "",
+        "product": row.product or "",
+        "tcv_usd": row.tcv_usd or 0,
+        "owner": row.owner or "",
+        "level": row.level or "",
+        "win_rate": row.win_rate or 0,
+        "est_sign_date": row.est_sign_date.strftime("%Y-%m-%d") if row.est_sign_date else None,
+        "date_added": row.date_added.strftime("%Y-%m-%d") if row.date_added else None,
+    }
+
+
+def get_legacy_kanban_data(base_query, owner_ids: Iterable[int] | None = None) -> dict:
+    """Return the pre-pagination ``{stage: [cards]}`` payload of ``/pipeline/api/kanban-data``.
+
+    Every visible card of every stage, newest ``date_added`` first, with the
+    original card fields and ``None`` coerced to ``''`` / ``0``. One column
+    query with the owner joined; new clients should use the paginated
+    :func:`build_kanban_board` columns instead.
+    """
+    Pipeline, User = _get_models()
+    rows = (
+        _filter_owners(base_query, owner_ids)
+        .outerjoin(User, User.id == Pipeline.owner_id)
+        .with_entities(*_legacy_card_columns())
+        .filter(Pipeline.stage.in_(Pipeline.STAGE_OPTIONS))
+        .order_by(Pipeline.date_added.desc())
+        .all()
+    )
+    data = {stage: [] for stage in Pipeline.STAGE_OPTIONS}
+    for row in rows:
+        data[row.stage].append(_serialize_legacy_card(row))
+    return data
@@ -0,0 +1,54 @@
+"""Load only the columns a list page or export actually shows.
+
+List and export queries used to load whole ``SalesLead`` / ``Pipeline`` rows,
+including wide TEXT columns (``follow_up``, ``comments``, ``requirements``,
+``note``), and resolved each owner through a lazy ``owner`` relationship.
+:func:`project_list_columns` restricts the SELECT to the attributes behind
+the user's visible columns (``load_only``) and, when the owner column is
+shown, fetches the owner's username in the same statement.
+
+Rows are still ORM instances, so templates and helper methods keep working;
+reading an attribute outside the projection falls back to a per-row load,
+which is why every column key must list all the attributes its cell reads.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Mapping, Sequence
+
+from sqlalchemy.orm import joinedload, load_only
+
+
+def get_projected_fields(
+    column_keys: Iterable[str],
+    column_fields: Mapping[str, Sequence[str]],
+    always: Iterable[str] = (),
+) -> list[str]:
+    """Attribute names needed to render ``column_keys`` (plus ``id`` and ``always``), in a stable order."""
+    fields = {"id", *always}
+    for column_key in column_keys:
+        fields.update(column_fields.get(column_key, (column_key,)))
+    return sorted(fields)
+
+
+def project_list_columns(
+    query,
+    model,
+    column_keys: Iterable[str],
+    column_fields: Mapping[str, Sequence[str]],
+    always: Iterable[str] = (),
+):
+    """Restrict ``query`` to the columns behind ``column_keys``.
+
+    ``column_fields`` maps a column key to the model attributes its cell reads
+    (keys not listed read the attribute of the same name). The ``owner``
+    column is loaded with a joined ``users.username`` instead of a lazy load.
+    """
+    from models import User
+
+    column_keys = list(column_keys)
+    fields = get_projected_fields(column_keys, column_fields, always)
+    options = [load_only(*[getattr(model, field) for field in fields])]
+    if "owner" in column_keys:
+        options.append(joinedload(model.owner).load_only(User.id, User.username))
+    return query.options(*options)
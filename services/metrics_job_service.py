@@ -0,0 +1,184 @@
+"""Durable queue of weekly metrics refreshes processed by ``flask metrics-worker``."""
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from flask import current_app
+
+from extensions import db
+from services.dashboard_cache_service import bump_data_version
+
+
+DEFAULT_COALESCE_SECONDS = 2
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_POLL_SECONDS = 2.0
+DEFAULT_RECONCILE_INTERVAL = 3600
+
+# A running job whose worker died is handed out again after this long.
+STALE_LOCK_SECONDS = 600
+
+
+def _get_job_model():
+    from models import MetricsJob
+
+    return MetricsJob
+
+
+def enqueue_metrics_jobs(session, owner_ids: Iterable[int | None]) -> int:
+    """Add one pending job per owner id to ``session`` (``None`` = company only)."""
+    MetricsJob = _get_job_model()
+    count = 0
+    for owner_id in owner_ids:
+        session.add(MetricsJob(owner_id=owner_id))
+        count += 1
+    return count
+
+
+def _claim_jobs(batch_size: int, coalesce_seconds: int) -> list:
+    """Mark the next batch of due jobs as running and return them.
+
+    Jobs only become due ``coalesce_seconds`` after they were created so bursts
+    of commits for the same owner collapse into one refresh; every other due
+    job for an owner that is picked is claimed along with it.
+
+    The candidate ids are selected first and claimed by id with the due
+    conditions repeated as guards, so a job another worker claimed in between
+    is skipped. Only the ids this worker actually updated are returned
+    (``UPDATE ... RETURNING`` where the dialect supports it, otherwise one
+    guarded UPDATE per id checked by its rowcount).
+    """
+    MetricsJob = _get_job_model()
+    now = datetime.utcnow()
+    due = db.or_(
+        db.and_(
+            MetricsJob.status == "pending",
+            MetricsJob.available_at <= now,
+            MetricsJob.created_at <= now - timedelta(seconds=coalesce_seconds),
+        ),
+        db.and_(
+            MetricsJob.status == "running",
+            MetricsJob.locked_at <= now - timedelta(seconds=STALE_LOCK_SECONDS),
+        ),
+    )
+
+    seed_owner_ids = {
+        owner_id
+        for (owner_id,) in db.session.query(MetricsJob.owner_id)
+        .filter(due)
+        .order_by(MetricsJob.id.asc())
+        .limit(batch_size)
+        .all()
+    }
+    if not seed_owner_ids:
+        return []
+
+    owner_filters = [MetricsJob.owner_id.in_([owner_id for owner_id in seed_owner_ids if owner_id is not None])]
+    if None in seed_owner_ids:
+        owner_filters.append(MetricsJob.owner_id.is_(None))
+
+    candidate_ids = [
+        job_id
+        for (job_id,) in db.session.query(MetricsJob.id).filter(due, db.or_(*owner_filters)).all()
+    ]
+    claim = (
+        db.update(MetricsJob)
+        .values(status="running", locked_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if db.session.get_bind().dialect.update_returning:
+        claimed_ids = [
+            job_id
+            for (job_id,) in db.session.execute(
+                claim.where(MetricsJob.id.in_(candidate_ids), due).returning(MetricsJob.id)
+            ).all()
+        ]
+    else:
+        claimed_ids = [
+            job_id
+            for job_id in candidate_ids
+            if db.session.execute(claim.where(MetricsJob.id == job_id, due)).rowcount == 1
+        ]
+    db.session.commit()
+    if not claimed_ids:
+        return []
+
+    return MetricsJob.query.filter(MetricsJob.id.in_(claimed_ids)).order_by(MetricsJob.id.asc()).all()
+
+
+def process_metrics_jobs(batch_size: int | None = None) -> dict:
+    """Claim one coalesced batch of jobs and rebuild the affected owners' and the company's rows.
+
+    Only the claimed owners are computed (grouped queries filtered to them);
+    the company row comes from ungrouped aggregates.
+
+    Returns counts of processed jobs, distinct owners refreshed and jobs that
+    failed permanently. Failed batches are retried with exponential backoff
+    until ``METRICS_JOB_MAX_ATTEMPTS`` is reached.
+    """
+    from services.weekly_metrics_service import rebuild_weekly_metrics
+
+    config = current_app.config
+    batch_size = batch_size or config.get("METRICS_JOB_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+    coalesce_seconds = config.get("METRICS_JOB_COALESCE_SECONDS", DEFAULT_COALESCE_SECONDS)
+    max_attempts = config.get("METRICS_JOB_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)
+
+    jobs = _claim_jobs(batch_size, coalesce_seconds)
+    if not jobs:
+        return {"jobs": 0, "owners": 0, "failed": 0}
+
+    owner_ids = sorted({job.owner_id for job in jobs if job.owner_id is not None})
+    try:
+        rebuild_weekly_metrics(owner_ids=owner_ids)
+    except Exception as exc:
+        db.session.rollback()
+        now = datetime.utcnow()
+        failed = 0
+        for job in jobs:
+            job.attempts = (job.attempts or 0) + 1
+            job.last_error = str(exc)[:2000]
+            job.locked_at = None
+            if job.attempts >= max_attempts:
+                job.status = "failed"
+                failed += 1
+            else:
+                job.status = "pending"
+                job.available_at = now + timedelta(seconds=2 ** job.attempts)
+        db.session.commit()
+        current_app.logger.warning("Weekly metrics job batch failed for owners %s: %s", owner_ids, exc)
+        return {"jobs": len(jobs), "owners": 0, "failed": failed}
+
+    MetricsJob = _get_job_model()
+    MetricsJob.query.filter(MetricsJob.id.in_([job.id for job in jobs])).delete(synchronize_session=False)
+    db.session.commit()
+    bump_data_version()
+    return {"jobs": len(jobs), "owners": len(owner_ids), "failed": 0}
+
+
+def run_metrics_worker(once: bool = False, poll_seconds: float | None = None) -> None:
+    """Process jobs until interrupted, reconciling the snapshots every ``WEEKLY_METRICS_RECONCILE_INTERVAL``.
+
+    With ``once`` drain the due queue and stop (without reconciling).
+    """
+    from services.weekly_metrics_service import reconcile_weekly_metrics
+
+    poll_seconds = poll_seconds or current_app.config.get("METRICS_WORKER_POLL_SECONDS", DEFAULT_POLL_SECONDS)
+    reconcile_interval = current_app.config.get("WEEKLY_METRICS_RECONCILE_INTERVAL", DEFAULT_RECONCILE_INTERVAL)
+    last_reconcile = time.monotonic()
+    while True:
+        if not once and reconcile_interval and time.monotonic() - last_reconcile >= reconcile_interval:
+            drift = reconcile_weekly_metrics()
+            if drift:
+                current_app.logger.warning("Repaired weekly metrics drift: %s", drift)
+            last_reconcile = time.monotonic()
+
+        result = process_metrics_jobs()
+        if result["jobs"]:
+            print(f"[OK] Processed {result['jobs']} metrics jobs for {result['owners']} owners"
+                  f" ({result['failed']} failed)")
+            continue
+        if once:
+            return
+        time.sleep(poll_seconds)
@@ -0,0 +1,253 @@
+"""Keyset (seek) pagination for list pages, with opaque cursors and cached totals.
+
+A page is fetched with ``WHERE <after the cursor row> ORDER BY <sort keys>
+LIMIT per_page + 1``, so its cost does not grow with the page depth. The
+cursor carries the sort key values of the boundary row; the last key must be
+unique (the primary key) so rows are never skipped or repeated.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import NamedTuple, Sequence
+
+from flask import current_app
+from sqlalchemy import false, func, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.visitors import InternalTraversal
+
+from extensions import db
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 200
+
+
+class SortOrder(ColumnElement):
+    """``ORDER BY`` term for a sort key, rendered so a matching index can supply the order.
+
+    NOT NULL columns get no ``NULLS`` clause. SQLite cannot put ``NULLS
+    FIRST/LAST`` in an index, and sorts NULL first ascending and last
+    descending; the other placement is rendered as ``col IS NULL, col`` so an
+    index on ``(col IS NULL, col)`` still matches.
+    """
+
+    inherit_cache = True
+    _traverse_internals = [
+        ("column", InternalTraversal.dp_clauseelement),
+        ("descending", InternalTraversal.dp_boolean),
+        ("nulls_last", InternalTraversal.dp_boolean),
+        ("nullable", InternalTraversal.dp_boolean),
+    ]
+
+    def __init__(self, column, descending: bool, nulls_last: bool):
+        self.column = column.expression if hasattr(column, "expression") else column
+        self.descending = descending
+        self.nulls_last = nulls_last
+        self.nullable = getattr(self.column, "nullable", True)
+
+    def _direction(self, expression):
+        return expression.desc() if self.descending else expression.asc()
+
+
+@compiles(SortOrder)
+def _compile_sort_order(element, compiler, **kw):
+    expression = element._direction(element.column)
+    if element.nullable:
+        expression = expression.nullslast() if element.nulls_last else expression.nullsfirst()
+    return compiler.process(expression, **kw)
+
+
+@compiles(SortOrder, "sqlite")
+def _compile_sort_order_sqlite(element, compiler, **kw):
+    expression = compiler.process(element._direction(element.column), **kw)
+    if not element.nullable or element.nulls_last == element.descending:
+        return expression
+    is_null = element.column.is_(None)
+    nulls = is_null.asc() if element.nulls_last else is_null.desc()
+    return f"{compiler.process(nulls, **kw)}, {expression}"
+
+
+class SortKey(NamedTuple):
+    column: object
+    descending: bool = False
+    nulls_last: bool = True
+
+    def reversed(self) -> "SortKey":
+        return SortKey(self.column, not self.descending, not self.nulls_last)
+
+    def order_by(self):
+        return SortOrder(self.column, self.descending, self.nulls_last)
+
+    def after(self, value):
+        """Rows that sort strictly after ``value`` on this key alone."""
+        if value is None:
+            return self.column.isnot(None) if not self.nulls_last else false()
+        condition = self.column < value if self.descending else self.column > value
+        if self.nulls_last:
+            condition = db.or_(condition, self.column.is_(None))
+        return condition
+
+    def equals(self, value):
+        return self.column.is_(None) if value is None else self.column == value
+
+
+@dataclass
+class KeysetPage:
+    items: list
+    per_page: int
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+    total: int | None = None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self) -> bool:
+        return self.prev_cursor is not None
+
+
+def get_page_size(per_page=None) -> int:
+    """Clamp a requested page size to ``1..MAX_PAGE_SIZE`` (default ``LIST_PAGE_SIZE``)."""
+    default = current_app.config.get("LIST_PAGE_SIZE", DEFAULT_PAGE_SIZE)
+    try:
+        per_page = int(per_page) if per_page not in (None, "") else default
+    except (TypeError, ValueError):
+        per_page = default
+    return max(1, min(per_page, MAX_PAGE_SIZE))
+
+
+def _dump_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _load_value(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        raise ValueError("Unknown cursor value")
+    return value
+
+
+def encode_cursor(values: Sequence, direction: str, signature: str) -> str:
+    payload = {"v": [_dump_value(value) for value in values], "d": direction, "s": signature}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, signature: str, key_count: int) -> tuple[str, list]:
+    """Return ``(direction, values)``; ``ValueError`` if malformed or made for another sort."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        direction = payload["d"]
+        values = [_load_value(value) for value in payload["v"]]
+        token_signature = payload["s"]
+    except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError) as exc:
+        raise ValueError("Invalid page cursor") from exc
+    if direction not in ("next", "prev") or token_signature != signature or len(values) != key_count:
+        raise ValueError("Invalid page cursor")
+    return direction, values
+
+
+def _seek_condition(sort_keys: Sequence[SortKey], values: Sequence):
+    clauses = []
+    for index, key in enumerate(sort_keys):
+        prefix = [previous.equals(values[position]) for position, previous in enumerate(sort_keys[:index])]
+        clauses.append(db.and_(*prefix, key.after(values[index])))
+    return db.or_(*clauses)
+
+
+def _row_values(item, sort_keys: Sequence[SortKey]) -> list:
+    return [getattr(item, key.column.key) for key in sort_keys]
+
+
+def paginate_keyset(
+    query,
+    sort_keys: Sequence[SortKey],
+    cursor: str | None = None,
+    per_page: int | None = None,
+    signature: str = "",
+) -> KeysetPage:
+    """Return one page of ``query`` ordered by ``sort_keys``.
+
+    ``signature`` identifies the sort (e.g. ``"date_added:desc"``); cursors
+    created under another signature raise ``ValueError``, as do malformed ones.
+    """
+    per_page = get_page_size(per_page)
+    direction, values = ("next", None)
+    if cursor:
+        direction, values = decode_cursor(cursor, signature, len(sort_keys))
+
+    keys = list(sort_keys) if direction == "next" else [key.reversed() for key in sort_keys]
+    page_query = query.order_by(None).order_by(*[key.order_by() for key in keys])
+    if values is not None:
+        page_query = page_query.filter(_seek_condition(keys, values))
+    rows = page_query.limit(per_page + 1).all()
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == "prev":
+        rows.reverse()
+        has_next, has_prev = values is not None, has_more
+    else:
+        has_next, has_prev = has_more, values is not None
+
+    page = KeysetPage(items=rows, per_page=per_page)
+    if rows and has_next:
+        page.next_cursor = encode_cursor(_row_values(rows[-1], sort_keys), "next", signature)
+    if rows and has_prev:
+        page.prev_cursor = encode_cursor(_row_values(rows[0], sort_keys), "prev", signature)
+    return page
+
+
+def iter_keyset_chunks(query, sort_keys: Sequence[SortKey], chunk_size: int):
+    """Yield every row of ``query`` in ``sort_keys`` order as lists of up to ``chunk_size`` rows.
+
+    Each chunk is its own bounded seek query that is fully fetched, so no
+    cursor stays open between chunks and callers may commit in between.
+    """
+    ordered = query.order_by(None).order_by(*[key.order_by() for key in sort_keys])
+    values = None
+    while True:
+        chunk_query = ordered if values is None else ordered.filter(_seek_condition(sort_keys, values))
+        rows = chunk_query.limit(chunk_size).all()
+        if rows:
+            yield rows
+        if len(rows) < chunk_size:
+            return
+        values = _row_values(rows[-1], sort_keys)
+
+
+def get_list_total(namespace: str, query, scope: dict) -> int | None:
+    """Exact row count for ``query``, cached per ``scope`` against the business data version.
+
+    Returns ``None`` when ``LIST_EXACT_TOTALS`` is off, so pages never count.
+    ``scope`` must identify everything the query depends on (user scope and filters).
+    """
+    if not current_app.config.get("LIST_EXACT_TOTALS", True):
+        return None
+
+    from services.dashboard_cache_service import get_versioned_payload
+
+    statement = query.order_by(None).statement
+    scope_key = hashlib.sha1(json.dumps(scope, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def build():
+        return db.session.execute(select(func.count()).select_from(statement.subquery())).scalar() or 0
+
+    return get_versioned_payload(namespace, scope_key, build, async_refresh=False)
@@ -0,0 +1,79 @@
+"""Whole-set summary of a filtered pipeline query, from one GROUP BY statement.
+
+The Pipeline list header, the kanban columns and the Excel export all need
+the same figures (count, TCV/MRC/GP sums, won/lost counts, per-stage counts)
+for every row the filters match, not just the rows on screen. They are
+aggregated per stage in SQL and the totals are added up from those few rows.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+
+from flask import current_app
+
+from extensions import db
+
+
+WON_STAGES = ("6a) Deal Won", "7) Activated")
+LOST_STAGE = "6b) Deal Lost"
+
+
+def _get_models():
+    from models import Pipeline
+
+    return Pipeline
+
+
+def _empty_totals() -> dict:
+    return {"count": 0, "tcv_usd": 0.0, "mrc_usd": 0.0, "gp": 0.0}
+
+
+def get_pipeline_summary(query) -> dict:
+    """Return ``{count, tcv_usd, mrc_usd, gp, won_count, lost_count, active_count, stages}``.
+
+    ``stages`` maps each stage present in ``query`` to its own
+    ``{count, tcv_usd, mrc_usd, gp}``. Ordering on ``query`` is ignored.
+    """
+    Pipeline = _get_models()
+    rows = (
+        query.order_by(None)
+        .with_entities(
+            Pipeline.stage,
+            db.func.count(Pipeline.id),
+            db.func.coalesce(db.func.sum(Pipeline.tcv_usd), 0),
+            db.func.coalesce(db.func.sum(Pipeline.mrc_usd), 0),
+            db.func.coalesce(db.func.sum(Pipeline.gp), 0),
+        )
+        .group_by(Pipeline.stage)
+        .all()
+    )
+
+    summary = {**_empty_totals(), "won_count": 0, "lost_count": 0, "active_count": 0, "stages": {}}
+    for stage, count, tcv, mrc, gp in rows:
+        totals = {"count": int(count or 0), "tcv_usd": float(tcv or 0), "mrc_usd": float(mrc or 0), "gp": float(gp or 0)}
+        summary["stages"][stage] = totals
+        for key, value in totals.items():
+            summary[key] += value
+        if stage in WON_STAGES:
+            summary["won_count"] += totals["count"]
+        if stage == LOST_STAGE:
+            summary["lost_count"] += totals["count"]
+    summary["active_count"] = summary["count"] - summary["lost_count"]
+    return summary
+
+
+def get_cached_pipeline_summary(namespace: str, query, scope: dict) -> dict | None:
+    """``get_pipeline_summary`` cached per ``scope`` against the business data version.
+
+    Returns ``None`` when ``LIST_EXACT_TOTALS`` is off, like ``get_list_total``.
+    ``scope`` must identify everything the query depends on (user scope and filters).
+    """
+    if not current_app.config.get("LIST_EXACT_TOTALS", True):
+        return None
+
+    from services.dashboard_cache_service import get_versioned_payload
+
+    scope_key = hashlib.sha1(json.dumps(scope, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return get_versioned_payload(namespace, scope_key, lambda: get_pipeline_summary(query), async_refresh=False)
@@ -0,0 +1,142 @@
+"""Materialized user -> pipeline visibility (owner or support team member).
+
+Non-admin access used to OR ``owner_id`` with a ``support_team.contains()``
+subquery on every page, and ``User.can_access_pipeline`` loaded the whole
+support team. ``pipeline_visibility`` holds one row per (user, pipeline) the
+user owns or supports, so access filtering is one join on its primary key.
+
+Rows are recomputed per pipeline after any flush that inserts or deletes a
+pipeline, changes its owner or changes its support team. Core-level writes
+bypass that hook and must call :func:`refresh_pipeline_visibility` (or
+``flask pipeline-visibility-rebuild``).
+"""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+from flask import g, has_app_context
+from sqlalchemy import and_, event, inspect as sa_inspect, select, union
+
+from extensions import db
+
+
+MEMO_KEY = "visible_pipeline_ids"
+CHUNK_SIZE = 500
+
+
+def _get_models():
+    from models import Pipeline, PipelineVisibility, User, pipeline_support
+
+    return Pipeline, PipelineVisibility, User, pipeline_support
+
+
+def _clear_memo() -> None:
+    if has_app_context():
+        g.pop(MEMO_KEY, None)
+
+
+def _visibility_rows(pipeline_ids=None):
+    """SELECT (user_id, pipeline_id) for owners and support members, optionally for some pipelines."""
+    Pipeline, _, _, pipeline_support = _get_models()
+    pipeline = Pipeline.__table__
+    owners = select(pipeline.c.owner_id.label("user_id"), pipeline.c.id.label("pipeline_id")).where(
+        pipeline.c.owner_id.isnot(None)
+    )
+    supporters = select(pipeline_support.c.user_id, pipeline_support.c.pipeline_id)
+    if pipeline_ids is not None:
+        owners = owners.where(pipeline.c.id.in_(pipeline_ids))
+        supporters = supporters.where(pipeline_support.c.pipeline_id.in_(pipeline_ids))
+    return union(owners, supporters)
+
+
+def refresh_pipeline_visibility(pipeline_ids: Iterable[int], connection=None) -> None:
+    """Recompute the visibility rows of ``pipeline_ids`` (deleted pipelines lose theirs)."""
+    ids = sorted({pipeline_id for pipeline_id in pipeline_ids if pipeline_id is not None})
+    if not ids:
+        return
+    _, PipelineVisibility, _, _ = _get_models()
+    table = PipelineVisibility.__table__
+    connection = connection or db.session.connection()
+    for start in range(0, len(ids), CHUNK_SIZE):
+        chunk = ids[start:start + CHUNK_SIZE]
+        connection.execute(table.delete().where(table.c.pipeline_id.in_(chunk)))
+        connection.execute(table.insert().from_select(["user_id", "pipeline_id"], _visibility_rows(chunk)))
+    _clear_memo()
+
+
+def rebuild_pipeline_visibility() -> int:
+    """Rebuild the whole mapping; return the number of rows."""
+    _, PipelineVisibility, _, _ = _get_models()
+    table = PipelineVisibility.__table__
+    with db.engine.begin() as connection:
+        connection.execute(table.delete())
+        connection.execute(table.insert().from_select(["user_id", "pipeline_id"], _visibility_rows()))
+        total = connection.execute(select(db.func.count()).select_from(table)).scalar() or 0
+    _clear_memo()
+    return total
+
+
+def get_visible_pipeline_ids(user_id: int) -> frozenset:
+    """Ids of pipelines ``user_id`` owns or supports, memoized on ``g`` for the current request.
+
+    The memo is dropped whenever the mapping is refreshed, so checks after a
+    flush in the same request see the change.
+    """
+    memo = g.setdefault(MEMO_KEY, {}) if has_app_context() else {}
+    if user_id not in memo:
+        _, PipelineVisibility, _, _ = _get_models()
+        memo[user_id] = frozenset(
+            pipeline_id for (pipeline_id,) in
+            db.session.query(PipelineVisibility.pipeline_id).filter(PipelineVisibility.user_id == user_id)
+        )
+    return memo[user_id]
+
+
+def filter_visible_pipelines(query, user_id: int):
+    """Restrict a ``Pipeline`` query to pipelines ``user_id`` owns or supports (one indexed join)."""
+    Pipeline, PipelineVisibility, _, _ = _get_models()
+    return query.join(
+        PipelineVisibility,
+        and_(PipelineVisibility.pipeline_id == Pipeline.id, PipelineVisibility.user_id == user_id),
+    )
+
+
+def _changed_pipeline_ids(session) -> set:
+    Pipeline, _, User, _ = _get_models()
+    changed = set()
+    for obj in session.new:
+        if isinstance(obj, Pipeline):
+            changed.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Pipeline):
+            changed.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Pipeline):
+            attrs = sa_inspect(obj).attrs
+            if attrs.owner_id.history.has_changes() or attrs.support_team.history.has_changes():
+                changed.add(obj.id)
+        elif isinstance(obj, User):
+            history = sa_inspect(obj).attrs.supported_pipelines.history
+            changed.update(pipeline.id for pipeline in (*history.added, *history.deleted))
+    return changed
+
+
+def _refresh_after_flush(session, flush_context):
+    # new/dirty/deleted still show the pre-flush state here, with primary keys assigned
+    changed = _changed_pipeline_ids(session)
+    if changed:
+        refresh_pipeline_visibility(changed, session.connection())
+
+
+def register_pipeline_visibility_hooks(app) -> None:
+    if not event.contains(db.session, "after_flush", _refresh_after_flush):
+        event.listen(db.session, "after_flush", _refresh_after_flush)
+
+
+def register_pipeline_visibility_commands(app) -> None:
+    @app.cli.command("pipeline-visibility-rebuild")
+    def pipeline_visibility_rebuild_command():
+        """Recompute the user -> pipeline visibility mapping from owners and support teams."""
+        total = rebuild_pipeline_visibility()
+        print(f"[OK] Rebuilt pipeline visibility ({total} rows)")
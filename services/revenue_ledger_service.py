@@ -0,0 +1,325 @@
+"""Monthly revenue ledger (``pipeline_revenue_month``) maintenance and period queries."""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Iterable
+
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import event, inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from extensions import db
+from utils import get_forecast_base_month, get_month_end, get_quarter_dates
+
+
+# Months after the forecast base month (inclusive of it) that receive ledger rows.
+LEDGER_MONTHS_AHEAD = 36
+
+# Months before the forecast base month that keep their rows (covers the current quarter and a trailing year).
+LEDGER_MONTHS_BEHIND = 12
+
+# Pipeline columns copied onto every ledger row so period queries need no join.
+LEDGER_KEY_COLUMNS = ("owner_id", "stage", "product", "is_deleted")
+
+LEDGER_GROUP_COLUMNS = ("owner_id", "product", "stage", "month_start")
+
+
+def _get_models():
+    from models import Pipeline, PipelineRevenueMonth
+
+    return Pipeline, PipelineRevenueMonth
+
+
+def get_ledger_horizon(reference_date: date | None = None) -> tuple[date, date]:
+    """Return the first and last ``month_start`` that hold ledger rows."""
+    base_month = get_forecast_base_month(reference_date)
+    return (
+        base_month - relativedelta(months=LEDGER_MONTHS_BEHIND),
+        base_month + relativedelta(months=LEDGER_MONTHS_AHEAD - 1),
+    )
+
+
+def _check_horizon(start_date: date, end_date: date, reference_date: date | None = None) -> None:
+    horizon_start, horizon_end = get_ledger_horizon(reference_date)
+    if date(start_date.year, start_date.month, 1) < horizon_start or end_date > get_month_end(horizon_end):
+        raise ValueError(
+            f"Revenue period {start_date} to {end_date} is outside the ledger horizon "
+            f"{horizon_start} to {get_month_end(horizon_end)}"
+        )
+
+
+def build_revenue_ledger_amounts(pipeline, reference_date: date | None = None) -> dict:
+    """Return ``{month_start: (mrc, otc)}`` recognised for ``pipeline``.
+
+    Uses the same recognition rules as ``calculate_pipeline_quarter_revenue``:
+    OTC in the activation month, MRC prorated by day in the activation month
+    and in full afterwards. Only months inside :func:`get_ledger_horizon` get
+    rows, so a deal activated years ago holds at most
+    ``LEDGER_MONTHS_BEHIND + LEDGER_MONTHS_AHEAD`` of them. Stage is not
+    applied here; lost deals keep their rows and are filtered by the stage key.
+    """
+    activation_date = pipeline.est_act_date
+    if not activation_date:
+        return {}
+
+    horizon_start, horizon_end = get_ledger_horizon(reference_date)
+    monthly_recurring = pipeline.mrc_usd or 0
+    one_time_charge = pipeline.otc_usd or 0
+
+    amounts = {}
+    month_start = max(date(activation_date.year, activation_date.month, 1), horizon_start)
+    while month_start <= horizon_end:
+        month_end = get_month_end(month_start)
+        if month_start <= activation_date <= month_end:
+            days_in_month = (month_end - month_start).days + 1
+            activated_days = month_end.day - activation_date.day + 1
+            mrc = monthly_recurring * (activated_days / days_in_month) if monthly_recurring else 0
+            otc = one_time_charge
+        else:
+            mrc = monthly_recurring
+            otc = 0
+        if mrc or otc:
+            amounts[month_start] = (float(mrc), float(otc))
+        month_start = month_start + relativedelta(months=1)
+    return amounts
+
+
+def sync_pipeline_revenue_ledger(pipeline, reference_date: date | None = None) -> None:
+    """Bring ``pipeline.revenue_months`` in line with its current values.
+
+    Existing rows are updated in place, so unchanged months cause no writes
+    and rows are inserted or deleted with the pipeline's own flush. Reading
+    ``revenue_months`` costs one SELECT for a persistent pipeline (none for a
+    new one), so batch callers load the collections of a whole chunk up front
+    with ``selectinload(Pipeline.revenue_months)``.
+    """
+    _, PipelineRevenueMonth = _get_models()
+
+    amounts = build_revenue_ledger_amounts(pipeline, reference_date)
+    # New rows get their keys in ``_copy_keys_on_insert`` once the pipeline row is flushed.
+    keys = {column: getattr(pipeline, column) for column in LEDGER_KEY_COLUMNS}
+    keys["is_deleted"] = bool(keys["is_deleted"])
+
+    existing = {row.month_start: row for row in pipeline.revenue_months}
+    for month_start, row in existing.items():
+        if month_start not in amounts:
+            pipeline.revenue_months.remove(row)
+
+    for month_start, (mrc, otc) in amounts.items():
+        row = existing.get(month_start)
+        if row is None:
+            pipeline.revenue_months.append(PipelineRevenueMonth(month_start=month_start, mrc=mrc, otc=otc))
+            continue
+        for column, value in (("mrc", mrc), ("otc", otc), *keys.items()):
+            if getattr(row, column) != value:
+                setattr(row, column, value)
+
+
+def _sync_ledger_keys(mapper, connection, target):
+    """Copy owner/stage/product/deletion changes made outside calculate_pipeline_metrics."""
+    state = sa_inspect(target)
+    changed = {
+        column: getattr(target, column)
+        for column in LEDGER_KEY_COLUMNS
+        if state.attrs[column].history.has_changes()
+    }
+    if not changed:
+        return
+    if "is_deleted" in changed:
+        changed["is_deleted"] = bool(changed["is_deleted"])
+
+    _, PipelineRevenueMonth = _get_models()
+    table = PipelineRevenueMonth.__table__
+    connection.execute(table.update().where(table.c.pipeline_id == target.id).values(**changed))
+
+
+def _copy_keys_on_insert(mapper, connection, target):
+    """Take the keys from the flushed pipeline, whose defaults and FKs are now populated."""
+    pipeline = target.pipeline
+    if pipeline is None:
+        return
+    for column in LEDGER_KEY_COLUMNS:
+        setattr(target, column, getattr(pipeline, column))
+    target.is_deleted = bool(target.is_deleted)
+
+
+def register_revenue_ledger_hooks(app) -> None:
+    Pipeline, PipelineRevenueMonth = _get_models()
+    if not event.contains(Pipeline, "after_update", _sync_ledger_keys):
+        event.listen(Pipeline, "after_update", _sync_ledger_keys)
+        event.listen(PipelineRevenueMonth, "before_insert", _copy_keys_on_insert)
+
+
+def _month_range_filters(start_date: date, end_date: date, owner_ids: Iterable[int] | None = None):
+    _, PipelineRevenueMonth = _get_models()
+    filters = [
+        PipelineRevenueMonth.month_start >= date(start_date.year, start_date.month, 1),
+        PipelineRevenueMonth.month_start <= end_date,
+        PipelineRevenueMonth.is_deleted.is_(False),
+        PipelineRevenueMonth.stage != "6b) Deal Lost",
+    ]
+    if owner_ids is not None:
+        filters.append(PipelineRevenueMonth.owner_id.in_(list(owner_ids)))
+    return filters
+
+
+def get_period_revenue(
+    start_date: date,
+    end_date: date,
+    group_by: str | None = None,
+    owner_ids: Iterable[int] | None = None,
+    reference_date: date | None = None,
+):
+    """Sum recognised revenue for whole months between ``start_date`` and ``end_date``.
+
+    Without ``group_by`` returns a float; otherwise a dict keyed by the
+    ``owner_id``, ``product``, ``stage`` or ``month_start`` value. Raises
+    ``ValueError`` for periods outside the ledger horizon of ``reference_date``
+    (today by default), which have no rows to sum.
+    """
+    _, PipelineRevenueMonth = _get_models()
+    _check_horizon(start_date, end_date, reference_date)
+    revenue = db.func.coalesce(db.func.sum(PipelineRevenueMonth.mrc + PipelineRevenueMonth.otc), 0)
+    filters = _month_range_filters(start_date, end_date, owner_ids)
+
+    if group_by is None:
+        return float(db.session.query(revenue).filter(*filters).scalar() or 0)
+
+    if group_by not in LEDGER_GROUP_COLUMNS:
+        raise ValueError(f"Unsupported revenue grouping: {group_by}")
+    column = getattr(PipelineRevenueMonth, group_by)
+    rows = db.session.query(column, revenue).filter(*filters).group_by(column).all()
+    return {key: float(value or 0) for key, value in rows}
+
+
+def get_quarterly_revenue(
+    ref_date: date | None = None,
+    quarters: int = 4,
+    owner_ids: Iterable[int] | None = None,
+) -> list[dict]:
+    """Return revenue for the current quarter and the following ones from one GROUP BY month query.
+
+    Raises ``ValueError`` when the last quarter ends past the ledger horizon.
+    """
+    ref_date = ref_date or date.today()
+    first_start, _ = get_quarter_dates(ref_date)
+    periods = []
+    for offset in range(quarters):
+        quarter_start = first_start + relativedelta(months=3 * offset)
+        periods.append({"start": quarter_start, "end": get_month_end(quarter_start + relativedelta(months=2))})
+
+    by_month = get_period_revenue(
+        periods[0]["start"], periods[-1]["end"], group_by="month_start", owner_ids=owner_ids, reference_date=ref_date
+    )
+    for period in periods:
+        period["revenue"] = sum(
+            value for month_start, value in by_month.items() if period["start"] <= month_start <= period["end"]
+        )
+    return periods
+
+
+def _period_sums(periods: list[tuple[date, date]]) -> list:
+    """One ``SUM(CASE ...)`` of ``mrc + otc`` per period."""
+    _, PipelineRevenueMonth = _get_models()
+    amount = PipelineRevenueMonth.mrc + PipelineRevenueMonth.otc
+    return [
+        db.func.coalesce(
+            db.func.sum(
+                db.case(
+                    (
+                        db.and_(
+                            PipelineRevenueMonth.month_start >= date(start_date.year, start_date.month, 1),
+                            PipelineRevenueMonth.month_start <= end_date,
+                        ),
+                        amount,
+                    ),
+                    else_=0,
+                )
+            ),
+            0,
+        )
+        for start_date, end_date in periods
+    ]
+
+
+def get_pipeline_revenue_by_period(session: Session, pipeline_id: int, periods: list[tuple[date, date]]) -> tuple:
+    """Sum each of ``periods`` over one pipeline's stored rows, whatever its stage or deletion flag."""
+    _, PipelineRevenueMonth = _get_models()
+    row = session.query(*_period_sums(periods)).filter(PipelineRevenueMonth.pipeline_id == pipeline_id).one()
+    return tuple(float(value or 0) for value in row)
+
+
+def get_revenue_by_period(
+    session: Session,
+    periods: list[tuple[date, date]],
+    owner_ids: Iterable[int] | None = None,
+    reference_date: date | None = None,
+    include_company: bool = True,
+) -> tuple[dict, list[float]]:
+    """Sum each of ``periods`` per owner and for the whole company.
+
+    Returns ``({owner_id: [revenue per period]}, [company revenue per period])``
+    from one grouped and one ungrouped ``SUM(CASE ...)`` query; ``owner_ids``
+    limits the grouped query to those owners and ``include_company=False``
+    skips the ungrouped one (the company list is then empty).
+    """
+    _, PipelineRevenueMonth = _get_models()
+    owner_ids = None if owner_ids is None else list(owner_ids)
+    for start_date, end_date in periods:
+        _check_horizon(start_date, end_date, reference_date)
+
+    sums = _period_sums(periods)
+    first_start = min(start_date for start_date, _ in periods)
+    last_end = max(end_date for _, end_date in periods)
+
+    by_owner = {}
+    if owner_ids is None or owner_ids:
+        rows = (
+            session.query(PipelineRevenueMonth.owner_id, *sums)
+            .filter(*_month_range_filters(first_start, last_end, owner_ids))
+            .group_by(PipelineRevenueMonth.owner_id)
+            .all()
+        )
+        for owner_id, *values in rows:
+            by_owner[owner_id] = [float(value or 0) for value in values]
+    company = []
+    if include_company:
+        company_row = session.query(*sums).filter(*_month_range_filters(first_start, last_end)).one()
+        company = [float(value or 0) for value in company_row]
+    return by_owner, company
+
+
+def rebuild_revenue_ledger(reference_date: date | None = None, batch_size: int = 500) -> int:
+    """Resync the ledger for every pipeline (backfill for existing databases)."""
+    from models import disable_metrics_events
+
+    Pipeline, _ = _get_models()
+    total = 0
+    last_id = 0
+    with disable_metrics_events():
+        while True:
+            pipelines = (
+                Pipeline.query.options(db.selectinload(Pipeline.revenue_months))
+                .filter(Pipeline.id > last_id)
+                .order_by(Pipeline.id.asc())
+                .limit(batch_size)
+                .all()
+            )
+            if not pipelines:
+                break
+            for pipeline in pipelines:
+                sync_pipeline_revenue_ledger(pipeline, reference_date)
+            # Read before the commit expires it; a refresh would reload the collection on its own.
+            last_id = pipelines[-1].id
+            db.session.commit()
+            total += len(pipelines)
+    return total
+
+
+def register_revenue_ledger_commands(app) -> None:
+    @app.cli.command("revenue-ledger-rebuild")
+    def revenue_ledger_rebuild_command():
+        """Rebuild pipeline_revenue_month rows for all pipelines."""
+        total = rebuild_revenue_ledger()
+        print(f"[OK] Rebuilt revenue ledger for {total} pipelines")
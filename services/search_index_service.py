@@ -0,0 +1,240 @@
+"""Indexed substring search on Sales Lead / Pipeline company, name and event.
+
+``ilike('%term%')`` cannot use a B-tree index, so every list filter and
+typeahead keystroke scanned the table. Each backend gets its own index:
+
+- PostgreSQL: ``pg_trgm`` GIN indexes on the searched columns; ``ILIKE`` uses
+  them directly and ``similarity()`` ranks typeahead results.
+- SQLite: an FTS5 ``trigram`` shadow table per model whose ``rowid`` is the
+  record id, kept in sync by mapper events; ``bm25`` ranks results.
+
+Terms shorter than one trigram (3 characters), other databases and a missing
+FTS5 module fall back to ``ILIKE``. Core-level writes bypass the mapper
+events and must call :func:`index_records` (or ``flask search-index-rebuild``).
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Sequence
+
+from sqlalchemy import column, event, func, inspect as sa_inspect, select, table, text
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+
+from extensions import db
+
+
+MIN_TERM_LENGTH = 3
+
+# Model name -> searchable columns; each model gets an FTS table named ``<table>_search``.
+SEARCH_FIELDS = {
+    "SalesLead": ("company", "name", "event"),
+    "Pipeline": ("company", "name"),
+}
+
+
+def _get_models():
+    from models import Pipeline, SalesLead
+
+    return {"SalesLead": SalesLead, "Pipeline": Pipeline}
+
+
+def _fields(model) -> tuple[str, ...]:
+    return SEARCH_FIELDS[model.__name__]
+
+
+def _fts_name(model) -> str:
+    return f"{model.__tablename__}_search"
+
+
+def _fts_table(model):
+    name = _fts_name(model)
+    return table(name, column("rowid"), column("rank"), column(name), *[column(field) for field in _fields(model)])
+
+
+def _dialect_name(bind=None) -> str:
+    return (bind or db.engine).dialect.name
+
+
+def _fts_exists(connection, model) -> bool:
+    """Whether the model's FTS table exists; only a positive answer is cached on the connection."""
+    cache = connection.info.setdefault("search_fts_tables", set())
+    name = _fts_name(model)
+    if name in cache:
+        return True
+    found = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": name}
+    ).first()
+    if found:
+        cache.add(name)
+    return found is not None
+
+
+def ensure_search_index() -> list[str]:
+    """Create the backend's search indexes if missing; return the names that now exist."""
+    dialect = _dialect_name()
+    if dialect == "postgresql":
+        return _ensure_trigram_indexes()
+    if dialect == "sqlite":
+        return _ensure_fts_tables()
+    return []
+
+
+def _ensure_trigram_indexes() -> list[str]:
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except SQLAlchemyError as exc:
+        print(f"[WARN] pg_trgm extension unavailable, company search uses unindexed ILIKE: {exc}")
+        return []
+
+    created = []
+    with db.engine.begin() as connection:
+        for model in _get_models().values():
+            for field in _fields(model):
+                name = f"ix_{model.__tablename__}_{field}_trgm"
+                connection.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS {name} ON {model.__tablename__} USING gin ({field} gin_trgm_ops)"
+                ))
+                created.append(name)
+    return created
+
+
+def _ensure_fts_tables() -> list[str]:
+    created = []
+    try:
+        with db.engine.begin() as connection:
+            for model in _get_models().values():
+                connection.execute(text(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {_fts_name(model)} "
+                    f"USING fts5({', '.join(_fields(model))}, tokenize='trigram')"
+                ))
+                created.append(_fts_name(model))
+    except OperationalError as exc:
+        print(f"[WARN] SQLite FTS5 trigram tokenizer unavailable, company search uses ILIKE: {exc}")
+        return []
+    return created
+
+
+def index_records(model, ids: Iterable[int], connection=None) -> None:
+    """Re-index ``ids`` of ``model`` from the base table (removes ids that no longer exist)."""
+    ids = list(ids)
+    if not ids or _dialect_name(connection) != "sqlite":
+        return
+    connection = connection or db.session.connection()
+    if not _fts_exists(connection, model):
+        return
+    fields = _fields(model)
+    source = model.__table__
+    fts = _fts_table(model)
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        connection.execute(fts.delete().where(fts.c.rowid.in_(chunk)))
+        connection.execute(
+            fts.insert().from_select(
+                ["rowid", *fields],
+                select(source.c.id, *[source.c[field] for field in fields]).where(source.c.id.in_(chunk)),
+            )
+        )
+
+
+def rebuild_search_index() -> int:
+    """Refill every FTS table from its base table; return the number of rows indexed."""
+    if _dialect_name() != "sqlite":
+        return 0
+    total = 0
+    with db.engine.begin() as connection:
+        for model in _get_models().values():
+            if not _fts_exists(connection, model):
+                continue
+            fts = _fts_table(model)
+            source = model.__table__
+            connection.execute(fts.delete())
+            result = connection.execute(
+                fts.insert().from_select(
+                    ["rowid", *_fields(model)],
+                    select(source.c.id, *[source.c[field] for field in _fields(model)]),
+                )
+            )
+            total += result.rowcount or 0
+    return total
+
+
+def _fts_match(term: str, fields: Sequence[str]) -> str:
+    phrase = '"' + term.replace('"', '""') + '"'
+    return f"{{{' '.join(fields)}}} : {phrase}"
+
+
+def _use_fts(model, term: str) -> bool:
+    if _dialect_name() != "sqlite" or len(term) < MIN_TERM_LENGTH:
+        return False
+    return _fts_exists(db.session.connection(), model)
+
+
+def search_condition(model, term: str, fields: Sequence[str] = ("company",)):
+    """WHERE clause matching rows whose ``fields`` contain ``term`` (case-insensitive)."""
+    term = (term or "").strip()
+    if _use_fts(model, term):
+        fts = _fts_table(model)
+        matches = select(fts.c.rowid).where(fts.c[_fts_name(model)].op("MATCH")(_fts_match(term, fields)))
+        return model.id.in_(matches)
+    like = f"%{term}%"
+    return db.or_(*[getattr(model, field).ilike(like) for field in fields])
+
+
+def apply_ranked_search(query, model, term: str, fields: Sequence[str] = ("company",)):
+    """Filter ``query`` like :func:`search_condition` and order the best matches first.
+
+    Callers append their own ``order_by`` as tiebreakers.
+    """
+    term = (term or "").strip()
+    if _use_fts(model, term):
+        fts = _fts_table(model)
+        matches = (
+            select(fts.c.rowid.label("id"), fts.c.rank.label("rank"))
+            .where(fts.c[_fts_name(model)].op("MATCH")(_fts_match(term, fields)))
+            .subquery()
+        )
+        return query.join(matches, matches.c.id == model.id).order_by(matches.c.rank)
+
+    query = query.filter(search_condition(model, term, fields))
+    if _dialect_name() == "postgresql" and len(term) >= MIN_TERM_LENGTH:
+        scores = [func.similarity(func.coalesce(getattr(model, field), ""), term) for field in fields]
+        return query.order_by(func.greatest(*scores).desc())
+    # Without trigram scores, prefix matches rank above other substring matches
+    prefix = db.or_(*[getattr(model, field).ilike(f"{term}%") for field in fields])
+    return query.order_by(db.case((prefix, 0), else_=1))
+
+
+def _searched_fields_changed(target) -> bool:
+    state = sa_inspect(target)
+    return any(state.attrs[field].history.has_changes() for field in _fields(type(target)))
+
+
+def _index_after_insert(mapper, connection, target):
+    index_records(type(target), [target.id], connection)
+
+
+def _index_after_update(mapper, connection, target):
+    if _searched_fields_changed(target):
+        index_records(type(target), [target.id], connection)
+
+
+def _index_after_delete(mapper, connection, target):
+    index_records(type(target), [target.id], connection)
+
+
+def register_search_index_hooks(app) -> None:
+    for model in _get_models().values():
+        if not event.contains(model, "after_insert", _index_after_insert):
+            event.listen(model, "after_insert", _index_after_insert)
+            event.listen(model, "after_update", _index_after_update)
+            event.listen(model, "after_delete", _index_after_delete)
+
+
+def register_search_index_commands(app) -> None:
+    @app.cli.command("search-index-rebuild")
+    def search_index_rebuild_command():
+        """Create missing search indexes and refill the SQLite FTS tables."""
+        created = ensure_search_index()
+        total = rebuild_search_index()
+        print(f"[OK] Search indexes ready ({', '.join(created) or 'ILIKE fallback'}); {total} rows indexed")
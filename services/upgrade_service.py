@@ -0,0 +1,273 @@
+"""Database upgrade (``flask bitcrm-upgrade``): schema DDL, versioned data fixes and user seeding.
+
+Everything that used to run inside ``create_app`` on every worker start lives
+here and runs once per deploy. Application startup only compares the recorded
+``schema_versions`` value with ``SCHEMA_VERSION``.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+
+import click
+from sqlalchemy import text, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from extensions import db
+
+
+# Bump together with a new entry in ``UPGRADE_STEPS`` whenever models change;
+# DDL-only versions use ``None`` as the step (create_all runs on every upgrade).
+SCHEMA_VERSION = 9
+
+# Arbitrary key shared by every process running the upgrade on PostgreSQL.
+UPGRADE_LOCK_KEY = 7_302_214_011
+
+WEEKLY_METRIC_AMOUNT_COLUMNS = (
+    'tcv', 'current_qtr_revenue', 'next_qtr_revenue', 'tcv_vs_last_week', 'tcv_vs_last_month',
+)
+
+DEFAULT_PASSWORD = 'bitcrm'
+DEFAULT_USERS = (
+    ('Bruce', 'bruce@example.com', 'admin'),
+    ('Admin', 'admin@example.com', 'admin'),
+    ('Eric', 'eric@example.com', 'sales'),
+    ('Anthony', 'anthony@example.com', 'sales'),
+    ('Joseph', 'joseph@example.com', 'sales'),
+    ('Romeo', 'romeo@example.com', 'sales'),
+    ('Uly', 'uly@example.com', 'sales'),
+    ('Lancey', 'lancey@example.com', 'sales'),
+    ('Sherwin', 'sherwin@example.com', 'sales'),
+    ('Cean', 'cean@example.com', 'sales'),
+    ('Jeromo', 'jeromo@example.com', 'sales'),
+    ('Jokie', 'jokie@example.com', 'sales'),
+    ('Jam', 'jam@example.com', 'sales'),
+    ('Romeo_m', 'romeo_m@example.com', 'marketing'),
+    ('Lancey_m', 'lancey_m@example.com', 'marketing'),
+)
+
+
+def _upgrade_legacy_data() -> None:
+    """Current activity terminology/statuses and default dashboard filters."""
+    from schema_updates import ensure_sales_activity_statuses, ensure_sales_activity_terminology
+    from models import User
+
+    ensure_sales_activity_terminology()
+    ensure_sales_activity_statuses()
+    db.session.execute(
+        update(User).where(User.dashboard_filters.is_(None)).values(dashboard_filters='{}')
+    )
+    db.session.commit()
+
+
+def _upgrade_followup_entries() -> None:
+    """Parse legacy ``follow_up`` text into ``followup_entries`` and fill the summary columns."""
+    from services.followup_service import backfill_followup_summaries
+
+    migrated = backfill_followup_summaries(only_missing=True)
+    if migrated:
+        print(f"[OK] Migrated follow-up history for {migrated} records")
+
+
+def _upgrade_search_index() -> None:
+    """Fill the SQLite FTS search tables from existing Sales Leads and Pipelines."""
+    from services.search_index_service import rebuild_search_index
+
+    indexed = rebuild_search_index()
+    if indexed:
+        print(f"[OK] Indexed {indexed} records for company search")
+
+
+def _upgrade_query_indexes() -> None:
+    """Composite and partial (``is_deleted = false``) indexes for the hot list and log queries."""
+    from schema_updates import ensure_model_indexes
+
+    created = ensure_model_indexes()
+    if created:
+        print(f"[OK] Created indexes: {', '.join(created)}")
+
+
+def _upgrade_pipeline_visibility() -> None:
+    """Fill ``pipeline_visibility`` from pipeline owners and support teams."""
+    from services.pipeline_visibility_service import rebuild_pipeline_visibility
+
+    rows = rebuild_pipeline_visibility()
+    if rows:
+        print(f"[OK] Built pipeline visibility ({rows} rows)")
+
+
+def _upgrade_weekly_metric_amounts() -> None:
+    """Store weekly metric amounts unrounded and rebuild them, so deltas and rebuilds agree."""
+    from services.weekly_metrics_service import rebuild_weekly_metrics
+
+    if db.engine.dialect.name == 'postgresql':
+        for column in WEEKLY_METRIC_AMOUNT_COLUMNS:
+            db.session.execute(text(
+                f'ALTER TABLE weekly_metrics ALTER COLUMN {column} TYPE DOUBLE PRECISION'
+            ))
+        db.session.commit()
+    # SQLite keeps non-integral REALs in INTEGER columns as they are
+    rebuild_weekly_metrics()
+
+
+def _upgrade_list_order_indexes() -> None:
+    """Replace the list sort indexes with ones matching the keyset ORDER BY (directions and NULLs).
+
+    The single-column ``is_deleted`` indexes are dropped too: they match almost
+    every row, yet SQLite preferred them over the partial sort indexes.
+    """
+    for name in (
+        'ix_sales_leads_active_date_name', 'ix_pipeline_active_date_name',
+        'ix_sales_leads_is_deleted', 'ix_pipeline_is_deleted',
+    ):
+        db.session.execute(text(f'DROP INDEX IF EXISTS {name}'))
+    db.session.commit()
+    _upgrade_query_indexes()
+
+
+UPGRADE_STEPS = (
+    (1, 'Sales activity terminology, statuses and dashboard filter defaults', _upgrade_legacy_data),
+    (2, 'Follow-up history entries and summary columns', _upgrade_followup_entries),
+    (3, 'Scheduled job locks (job_locks)', None),
+    (4, 'Company/name search index (pg_trgm or SQLite FTS5)', _upgrade_search_index),
+    (5, 'Composite and partial indexes for list, task and activity log queries', _upgrade_query_indexes),
+    (6, 'Materialized pipeline visibility (pipeline_visibility)', _upgrade_pipeline_visibility),
+    (7, 'Background export jobs (export_jobs)', None),
+    (8, 'Unrounded weekly metric amounts', _upgrade_weekly_metric_amounts),
+    (9, 'List sort indexes matching the keyset order', _upgrade_list_order_indexes),
+)
+
+
+def get_schema_version() -> int:
+    """Return the highest applied upgrade step, ``0`` for a database that was never upgraded."""
+    from models import SchemaVersion
+
+    try:
+        version = db.session.query(db.func.max(SchemaVersion.version)).scalar()
+    except SQLAlchemyError:
+        # schema_versions does not exist yet
+        db.session.rollback()
+        return 0
+    return int(version or 0)
+
+
+@contextmanager
+def _upgrade_lock():
+    """Serialize concurrent upgrades (several containers starting at once) on PostgreSQL."""
+    if db.engine.dialect.name != 'postgresql':
+        yield
+        return
+    with db.engine.connect() as connection:
+        connection.execute(text('SELECT pg_advisory_lock(:key)'), {'key': UPGRADE_LOCK_KEY})
+        try:
+            yield
+        finally:
+            connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': UPGRADE_LOCK_KEY})
+
+
+def apply_schema_ddl() -> None:
+    """Add missing columns/indexes to existing tables, then create any missing tables and search indexes."""
+    import models  # noqa: F401 - register every table with the metadata
+    from schema_updates import ensure_sales_activity_columns
+    from services.search_index_service import ensure_search_index
+
+    ensure_sales_activity_columns()
+    db.create_all()
+    ensure_search_index()
+
+
+def refresh_stale_forecasts() -> int:
+    """Roll M1~M12 forward for pipelines whose forecast base month is not current."""
+    from services.forecast_rollover_service import rollover_pipeline_forecasts
+
+    return rollover_pipeline_forecasts()
+
+
+def seed_default_users() -> int:
+    """Create the default accounts when the users table is empty; return how many were created."""
+    from models import User
+
+    if db.session.query(User.id).first() is not None:
+        return 0
+    for username, email, role in DEFAULT_USERS:
+        user = User(username=username, email=email, role=role)
+        user.set_password(DEFAULT_PASSWORD)
+        db.session.add(user)
+    db.session.commit()
+    return len(DEFAULT_USERS)
+
+
+def run_upgrade(seed_users: bool = False, refresh_forecasts: bool = True) -> int:
+    """Bring the database to ``SCHEMA_VERSION``; safe to run any number of times.
+
+    Returns the number of upgrade steps applied by this call.
+    """
+    from models import SchemaVersion
+
+    with _upgrade_lock():
+        apply_schema_ddl()
+
+        current = get_schema_version()
+        applied = 0
+        for version, description, step in UPGRADE_STEPS:
+            if version <= current:
+                continue
+            if step is not None:
+                step()
+            db.session.add(SchemaVersion(version=version, description=description))
+            db.session.commit()
+            applied += 1
+            print(f"[OK] Applied schema version {version}: {description}")
+
+        if refresh_forecasts:
+            refreshed = refresh_stale_forecasts()
+            if refreshed:
+                print(f"[OK] Refreshed rolling forecast for {refreshed} pipelines")
+
+        if seed_users:
+            created = seed_default_users()
+            if created:
+                print(f"[OK] Created {created} default users")
+    return applied
+
+
+def check_schema_version(app) -> int:
+    """Startup check: auto-upgrade when allowed (``SCHEMA_AUTO_UPGRADE``), otherwise warn.
+
+    The auto-upgrade also creates the default accounts while the users table is
+    empty (``SEED_DEFAULT_USERS``, off under ``TESTING``), so a fresh database
+    can be logged into; otherwise an empty users table is reported at startup.
+    """
+    version = get_schema_version()
+    auto_upgrade = app.config.get('SCHEMA_AUTO_UPGRADE', True)
+    seed_users = auto_upgrade and app.config.get('SEED_DEFAULT_USERS', not app.testing)
+    if version < SCHEMA_VERSION:
+        if not auto_upgrade:
+            print(
+                f"[WARN] Database schema version {version} is behind {SCHEMA_VERSION}; "
+                "run `flask bitcrm-upgrade` before serving traffic"
+            )
+            return version
+        run_upgrade(seed_users=seed_users)
+        version = get_schema_version()
+    elif seed_users:
+        with _upgrade_lock():
+            created = seed_default_users()
+        if created:
+            print(f"[OK] Created {created} default users")
+
+    from models import User
+
+    if not app.testing and db.session.query(User.id).first() is None:
+        print("[WARN] No user accounts exist; run `flask bitcrm-upgrade` to create the default accounts")
+    return version
+
+
+def register_upgrade_commands(app) -> None:
+    @app.cli.command("bitcrm-upgrade")
+    @click.option("--seed-users/--no-seed-users", default=True,
+                  help="Create the default accounts when the users table is empty.")
+    def bitcrm_upgrade_command(seed_users):
+        """Apply schema DDL and pending data upgrades, refresh forecasts and seed default users."""
+        applied = run_upgrade(seed_users=seed_users)
+        print(f"[OK] Database at schema version {get_schema_version()} ({applied} steps applied)")
@@ -2,17 +2,58 @@
 
 from __future__ import annotations
 
+import weakref
 from datetime import date, datetime, timedelta
 from typing import Iterable
 
+import click
+from flask import current_app, has_app_context
 from sqlalchemy import event, inspect as sa_inspect
 from sqlalchemy.orm import Session, sessionmaker
 
 from extensions import db
-from utils import calculate_quarter_revenue, get_next_quarter_dates, get_quarter_dates
+from utils import get_next_quarter_dates, get_quarter_dates
 
 
-TRACKED_MODELS = {"SalesLead", "Pipeline"}
+# Columns whose before/after values decide a row's contribution to the snapshot.
+TRACKED_ATTRIBUTES = {
+    "SalesLead": ("owner_id", "leads_status", "is_deleted"),
+    "Pipeline": ("owner_id", "company", "stage", "tcv_usd", "is_deleted"),
+}
+
+# Metrics that are plain sums over rows and can therefore be maintained by deltas.
+DELTA_METRICS = (
+    "leads_count",
+    "qualified_leads_count",
+    "pipeline_count",
+    "tcv",
+    "current_qtr_revenue",
+    "next_qtr_revenue",
+)
+
+# Every stored snapshot figure; customer_count is a distinct count and is recounted, not summed.
+SNAPSHOT_METRICS = DELTA_METRICS + ("customer_count",)
+
+# Money metrics are stored as unrounded sums so that deltas and rebuilds agree;
+# they are rounded once, when read for display (see ``whole_amount``).
+AMOUNT_METRICS = ("tcv", "current_qtr_revenue", "next_qtr_revenue")
+COUNT_METRICS = tuple(metric for metric in SNAPSHOT_METRICS if metric not in AMOUNT_METRICS)
+
+# Stored and recomputed sums closer than this are float noise from a different summation order.
+AMOUNT_TOLERANCE = 0.01
+
+# Week-over-week columns move together with their metric because last week is frozen.
+VS_LAST_WEEK_COLUMNS = {
+    "leads_count": "leads_vs_last_week",
+    "qualified_leads_count": "qualified_vs_last_week",
+    "pipeline_count": "pipeline_vs_last_week",
+    "tcv": "tcv_vs_last_week",
+}
+
+WEEKLY_METRICS_MODES = ("sync", "deferred", "disabled")
+
+_active_history_configured = False
+_session_factories = weakref.WeakKeyDictionary()
 
 
 def get_week_start(ref_date: date | None = None) -> date:
@@ -25,7 +66,11 @@ def get_last_week_start(ref_date: date | None = None) -> date:
 
 
 def _get_session_factory():
-    return sessionmaker(bind=db.engine, expire_on_commit=False)
+    engine = db.engine
+    factory = _session_factories.get(engine)
+    if factory is None:
+        factory = _session_factories[engine] = sessionmaker(bind=engine, expire_on_commit=False)
+    return factory
 
 
 def _normalize_owner_ids(owner_ids: Iterable[int | None] | None) -> list[int]:
@@ -36,27 +81,226 @@ def _normalize_owner_ids(owner_ids: Iterable[int | None] | None) -> list[int]:
     return sorted(set(normalized))
 
 
-def _tracked_owner_ids(obj) -> set[int]:
-    owner_ids = set()
+def _column_default(obj, key):
+    column = obj.__table__.columns.get(key)
+    default = column.default if column is not None else None
+    if default is not None and default.is_scalar:
+        return default.arg
+    return None
 
-    if obj.__class__.__name__ not in TRACKED_MODELS:
-        return owner_ids
 
-    current_owner_id = getattr(obj, "owner_id", None)
-    if current_owner_id:
-        owner_ids.add(int(current_owner_id))
+def _current_value(obj, key):
+    state = sa_inspect(obj)
+    if key in state.dict:
+        return state.dict[key]
+    if state.transient or state.pending:
+        return _column_default(obj, key)
+    return getattr(obj, key)
 
-    try:
-        history = sa_inspect(obj).attrs.owner_id.history
-    except Exception:
-        history = None
 
-    if history:
-        for owner_id in list(history.added) + list(history.deleted):
-            if owner_id:
-                owner_ids.add(int(owner_id))
+def _previous_value(obj, key):
+    history = sa_inspect(obj).attrs[key].load_history()
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return None
+
+
+def _pipeline_owner(values: dict) -> tuple[int | None, bool]:
+    """Return ``(owner_id, counted)`` for a pipeline row's values."""
+    owner_id = int(values["owner_id"]) if values.get("owner_id") else None
+    # Mirror the SQL filters: NULL never matches ``is_deleted IS false`` or ``stage != ...``.
+    counted = values.get("is_deleted") is False and values.get("stage") not in (None, "6b) Deal Lost")
+    return owner_id, counted
+
+
+def _ledger_quarters(ref_date: date) -> list[tuple[date, date]]:
+    return [get_quarter_dates(ref_date), get_next_quarter_dates(ref_date)]
+
+
+def _quarter_totals(amounts: list[tuple[date, float]], ref_date: date) -> tuple:
+    return tuple(
+        float(sum(amount for month_start, amount in amounts if start <= month_start <= end))
+        for start, end in _ledger_quarters(ref_date)
+    )
+
+
+def _ledger_amount(row, previous: bool = False) -> float:
+    if previous:
+        return (_previous_value(row, "mrc") or 0) + (_previous_value(row, "otc") or 0)
+    return (row.mrc or 0) + (row.otc or 0)
+
+
+def _pipeline_ledger_revenue(obj, ref_date: date, moved: bool, handled_rows: set) -> tuple[tuple, tuple]:
+    """Return the (current, next) quarter revenue of a pipeline's ledger rows before and after this flush.
+
+    Revenue is read from the ``pipeline_revenue_month`` rows written by
+    ``calculate_pipeline_metrics`` (the rows rebuild and reconcile sum), so a
+    delta and a recount agree. A pipeline that ``moved`` (new, deleted, or
+    with another owner, stage or deletion flag) carries all of its rows; it
+    reads its unloaded rows with one SUM, which cannot autoflush mid-flush.
+    Otherwise only rows added to or removed from its collection count here;
+    rows updated in place are handled by :func:`_collect_ledger_row_delta`.
+    Rows accounted for are added to ``handled_rows``.
+    """
+    state = sa_inspect(obj)
+    if "revenue_months" not in state.dict:
+        if not moved or state.key is None:
+            return (0.0, 0.0), (0.0, 0.0)
+        from services.revenue_ledger_service import get_pipeline_revenue_by_period
+
+        stored = get_pipeline_revenue_by_period(state.session, obj.id, _ledger_quarters(ref_date))
+        return stored, stored
+
+    history = state.attrs.revenue_months.load_history()
+    kept = history.unchanged if moved else ()
+    handled_rows.update(id(row) for row in (*kept, *history.added, *history.deleted))
+    before = [
+        (row.month_start, _ledger_amount(row, previous=True))
+        for row in (*kept, *history.deleted)
+        if sa_inspect(row).key is not None
+    ]
+    after = [(row.month_start, _ledger_amount(row)) for row in (*kept, *history.added)]
+    return _quarter_totals(before, ref_date), _quarter_totals(after, ref_date)
+
+
+def _collect_ledger_row_delta(row, deltas: dict, ref_date: date, *, is_deleted=False) -> None:
+    """Accumulate the revenue change of a ledger row updated (or deleted) on its own.
+
+    The row counts for its pipeline's current owner, stage and deletion flag,
+    which did not change in this flush (moved pipelines handle their rows).
+    """
+    Pipeline = _get_models()["Pipeline"]
+    pipeline = sa_inspect(row).session.get(Pipeline, row.pipeline_id) if row.pipeline_id else None
+    if pipeline is None:
+        return
+    owner_id, active = _pipeline_owner({key: _current_value(pipeline, key) for key in ("owner_id", "stage", "is_deleted")})
+    if not active:
+        return
+
+    before = _quarter_totals([(row.month_start, _ledger_amount(row, previous=True))], ref_date)
+    after = (0.0, 0.0) if is_deleted else _quarter_totals([(row.month_start, _ledger_amount(row))], ref_date)
+    owner_deltas = deltas.setdefault(owner_id, {})
+    for metric, old, new in zip(("current_qtr_revenue", "next_qtr_revenue"), before, after):
+        owner_deltas[metric] = owner_deltas.get(metric, 0) + new - old
+
+
+def _row_contribution(model_name: str, values: dict, revenue: tuple = (0.0, 0.0)) -> tuple[int | None, dict]:
+    """Return ``(owner_id, metrics)`` that one row adds to the weekly snapshot.
+
+    ``revenue`` is a pipeline's (current, next) quarter ledger revenue.
+    """
+    if model_name == "Pipeline":
+        owner_id, counted = _pipeline_owner(values)
+        if not counted:
+            return owner_id, {}
+        return owner_id, {
+            "pipeline_count": 1,
+            "tcv": values.get("tcv_usd") or 0,
+            "current_qtr_revenue": revenue[0],
+            "next_qtr_revenue": revenue[1],
+        }
+
+    owner_id = int(values["owner_id"]) if values.get("owner_id") else None
+    # Mirror the SQL filters: NULL never matches ``is_deleted IS false``.
+    if values.get("is_deleted") is not False:
+        return owner_id, {}
+
+    if model_name == "SalesLead":
+        status = values.get("leads_status")
+        return owner_id, {
+            "leads_count": 1 if status is not None and status != "Unqualified" else 0,
+            "qualified_leads_count": 1 if status == "Qualified" else 0,
+        }
+    return owner_id, {}
+
+
+def _customer_key(values: dict) -> tuple | None:
+    """Return the ``(owner_id, company)`` a pipeline row counts as a customer for."""
+    if values.get("is_deleted") is not False or values.get("stage") in (None, "6b) Deal Lost"):
+        return None
+    if not values.get("company"):
+        return None
+    return values.get("owner_id"), values["company"]
+
+
+def _collect_row_deltas(
+    obj,
+    deltas: dict,
+    ref_date: date,
+    *,
+    is_new=False,
+    is_deleted=False,
+    customer_owner_ids: set | None = None,
+    handled_rows: set | None = None,
+) -> None:
+    """Accumulate the signed snapshot change caused by flushing ``obj``.
+
+    Owners whose distinct customer set may have changed are added to
+    ``customer_owner_ids`` so their ``customer_count`` can be recounted.
+    Ledger rows whose revenue was counted with a pipeline go into ``handled_rows``.
+    """
+    model_name = obj.__class__.__name__
+    attributes = TRACKED_ATTRIBUTES.get(model_name)
+    if not attributes:
+        return
+
+    before = None if is_new else {key: _previous_value(obj, key) for key in attributes}
+    after = None if is_deleted else {key: _current_value(obj, key) for key in attributes}
+
+    before_revenue = after_revenue = (0.0, 0.0)
+    if model_name == "Pipeline":
+        moved = before is None or after is None or _pipeline_owner(before) != _pipeline_owner(after)
+        before_revenue, after_revenue = _pipeline_ledger_revenue(
+            obj, ref_date, moved, handled_rows if handled_rows is not None else set()
+        )
+
+    contributions = []
+    before_customer = after_customer = None
+    if before is not None:
+        contributions.append((-1, _row_contribution(model_name, before, before_revenue)))
+        if model_name == "Pipeline":
+            before_customer = _customer_key(before)
+    if after is not None:
+        contributions.append((1, _row_contribution(model_name, after, after_revenue)))
+        if model_name == "Pipeline":
+            after_customer = _customer_key(after)
+
+    if customer_owner_ids is not None and before_customer != after_customer:
+        customer_owner_ids.update(key[0] for key in (before_customer, after_customer) if key is not None)
+
+    for sign, (owner_id, metrics) in contributions:
+        owner_deltas = deltas.setdefault(owner_id, {})
+        for metric, value in metrics.items():
+            owner_deltas[metric] = owner_deltas.get(metric, 0) + sign * value
+
+
+def _nonzero_deltas(metric_deltas: dict) -> dict:
+    return {metric: value for metric, value in metric_deltas.items() if value}
+
+
+def whole_amount(value) -> int:
+    """Round a stored (unrounded) snapshot amount for display."""
+    return int(round(value or 0))
+
+
+def _configure_active_history() -> None:
+    """Load previous values on assignment so deltas always see the old row."""
+    global _active_history_configured
+    if _active_history_configured:
+        return
+
+    models = _get_models()
+    for model_name, attributes in TRACKED_ATTRIBUTES.items():
+        model = models[model_name]
+        for key in attributes:
+            event.listen(getattr(model, key), "set", _noop_set_listener, active_history=True)
+    _active_history_configured = True
+
 
-    return owner_ids
+def _noop_set_listener(target, value, oldvalue, initiator):
+    return None
 
 
 def _get_or_create_record(session: Session, owner_id: int | None, week_start: date):
@@ -84,14 +328,33 @@ def _get_models():
     }
 
 
+def _ledger_quarter_revenue(
+    session: Session,
+    ref_date: date,
+    owner_ids: Iterable[int] | None = None,
+    include_company: bool = True,
+) -> tuple[dict, list[float]]:
+    """Unrounded current and next quarter revenue from the monthly revenue ledger.
+
+    Returns ``({owner_id: [current, next]}, [company current, company next])``.
+    """
+    from services.revenue_ledger_service import get_revenue_by_period
+
+    return get_revenue_by_period(
+        session,
+        [get_quarter_dates(ref_date), get_next_quarter_dates(ref_date)],
+        owner_ids=owner_ids,
+        reference_date=ref_date,
+        include_company=include_company,
+    )
+
+
 def compute_owner_metrics(owner_id: int, session: Session, ref_date: date | None = None) -> dict:
     models = _get_models()
     Pipeline = models["Pipeline"]
     SalesLead = models["SalesLead"]
 
     ref_date = ref_date or date.today()
-    current_qtr = get_quarter_dates(ref_date)
-    next_qtr = get_next_quarter_dates(ref_date)
 
     pipelines = (
         session.query(Pipeline)
@@ -123,14 +386,17 @@ def compute_owner_metrics(owner_id: int, session: Session, ref_date: date | None
         .count()
     )
 
+    by_owner, _ = _ledger_quarter_revenue(session, ref_date, owner_ids=[owner_id], include_company=False)
+    current_qtr_revenue, next_qtr_revenue = by_owner.get(owner_id, (0.0, 0.0))
+
     return {
         "leads_count": int(leads_count),
         "qualified_leads_count": int(qualified_leads_count),
         "pipeline_count": len(pipelines),
         "customer_count": len({pipeline.company for pipeline in pipelines if pipeline.company}),
-        "tcv": int(sum((pipeline.tcv_usd or 0) for pipeline in pipelines)),
-        "current_qtr_revenue": int(calculate_quarter_revenue(pipelines, current_qtr[0], current_qtr[1])),
-        "next_qtr_revenue": int(calculate_quarter_revenue(pipelines, next_qtr[0], next_qtr[1])),
+        "tcv": float(sum((pipeline.tcv_usd or 0) for pipeline in pipelines)),
+        "current_qtr_revenue": current_qtr_revenue,
+        "next_qtr_revenue": next_qtr_revenue,
     }
 
 
@@ -140,29 +406,128 @@ def compute_company_metrics(session: Session, ref_date: date | None = None) -> d
     SalesLead = models["SalesLead"]
 
     ref_date = ref_date or date.today()
-    current_qtr = get_quarter_dates(ref_date)
-    next_qtr = get_next_quarter_dates(ref_date)
 
     pipelines = session.query(Pipeline).filter(Pipeline.is_deleted.is_(False), Pipeline.stage != "6b) Deal Lost").all()
 
     leads_count = session.query(SalesLead).filter(SalesLead.is_deleted.is_(False), SalesLead.leads_status != "Unqualified").count()
     qualified_leads_count = session.query(SalesLead).filter(SalesLead.is_deleted.is_(False), SalesLead.leads_status == "Qualified").count()
+    _, (current_qtr_revenue, next_qtr_revenue) = _ledger_quarter_revenue(session, ref_date, owner_ids=[])
 
     return {
         "leads_count": int(leads_count),
         "qualified_leads_count": int(qualified_leads_count),
         "pipeline_count": len(pipelines),
-        "tcv": int(sum((pipeline.tcv_usd or 0) for pipeline in pipelines)),
-        "current_qtr_revenue": int(calculate_quarter_revenue(pipelines, current_qtr[0], current_qtr[1])),
-        "next_qtr_revenue": int(calculate_quarter_revenue(pipelines, next_qtr[0], next_qtr[1])),
+        "customer_count": len({pipeline.company for pipeline in pipelines if pipeline.company}),
+        "tcv": float(sum((pipeline.tcv_usd or 0) for pipeline in pipelines)),
+        "current_qtr_revenue": current_qtr_revenue,
+        "next_qtr_revenue": next_qtr_revenue,
+    }
+
+
+def _empty_metrics() -> dict:
+    return {
+        "leads_count": 0,
+        "qualified_leads_count": 0,
+        "pipeline_count": 0,
+        "customer_count": 0,
+        "tcv": 0.0,
+        "current_qtr_revenue": 0.0,
+        "next_qtr_revenue": 0.0,
     }
 
 
+def compute_all_weekly_metrics(
+    session: Session,
+    ref_date: date | None = None,
+    owner_ids: Iterable[int] | None = None,
+) -> tuple[dict, dict]:
+    """Compute owners' metrics and the company total with grouped queries.
+
+    Returns ``(owner_metrics, company_metrics)`` where ``owner_metrics`` maps
+    each owner id that has leads or pipelines to the same dict shape as
+    :func:`compute_owner_metrics`. Owners without rows are absent.
+    ``owner_ids`` limits the per-owner GROUP BYs to those owners; the company
+    totals always cover every row and come from ungrouped aggregates. Quarter
+    revenue is summed from the ``pipeline_revenue_month`` ledger.
+    """
+    models = _get_models()
+    Pipeline = models["Pipeline"]
+    SalesLead = models["SalesLead"]
+
+    ref_date = ref_date or date.today()
+    if owner_ids is not None:
+        owner_ids = _normalize_owner_ids(owner_ids)
+
+    def for_owners(query, owner_column):
+        return query if owner_ids is None else query.filter(owner_column.in_(owner_ids))
+
+    owner_metrics = {}
+    company_metrics = _empty_metrics()
+
+    lead_counts = (
+        db.func.sum(db.case((SalesLead.leads_status != "Unqualified", 1), else_=0)),
+        db.func.sum(db.case((SalesLead.leads_status == "Qualified", 1), else_=0)),
+    )
+    lead_filters = (SalesLead.is_deleted.is_(False),)
+    lead_rows = []
+    if owner_ids is None or owner_ids:
+        lead_rows = (
+            for_owners(session.query(SalesLead.owner_id, *lead_counts).filter(*lead_filters), SalesLead.owner_id)
+            .group_by(SalesLead.owner_id)
+            .all()
+        )
+    for owner_id, leads_count, qualified_leads_count in lead_rows:
+        metrics = owner_metrics.setdefault(owner_id, _empty_metrics())
+        metrics["leads_count"] = int(leads_count or 0)
+        metrics["qualified_leads_count"] = int(qualified_leads_count or 0)
+    leads_count, qualified_leads_count = session.query(*lead_counts).filter(*lead_filters).one()
+    company_metrics["leads_count"] = int(leads_count or 0)
+    company_metrics["qualified_leads_count"] = int(qualified_leads_count or 0)
+
+    active_pipeline_filters = (Pipeline.is_deleted.is_(False), Pipeline.stage != "6b) Deal Lost")
+    customer = db.func.nullif(Pipeline.company, "")
+    pipeline_totals = (
+        db.func.count(Pipeline.id),
+        db.func.sum(db.func.coalesce(Pipeline.tcv_usd, 0)),
+        db.func.count(db.distinct(customer)),
+    )
+
+    pipeline_rows = []
+    if owner_ids is None or owner_ids:
+        pipeline_rows = (
+            for_owners(
+                session.query(Pipeline.owner_id, *pipeline_totals).filter(*active_pipeline_filters), Pipeline.owner_id
+            )
+            .group_by(Pipeline.owner_id)
+            .all()
+        )
+    for owner_id, pipeline_count, tcv, customer_count in pipeline_rows:
+        metrics = owner_metrics.setdefault(owner_id, _empty_metrics())
+        metrics["pipeline_count"] = int(pipeline_count or 0)
+        metrics["tcv"] = float(tcv or 0)
+        metrics["customer_count"] = int(customer_count or 0)
+    pipeline_count, tcv, customer_count = session.query(*pipeline_totals).filter(*active_pipeline_filters).one()
+    company_metrics["pipeline_count"] = int(pipeline_count or 0)
+    company_metrics["tcv"] = float(tcv or 0)
+    company_metrics["customer_count"] = int(customer_count or 0)
+
+    # Quarter revenue comes from the monthly revenue ledger maintained by calculate_pipeline_metrics.
+    revenue_by_owner, company_revenue = _ledger_quarter_revenue(session, ref_date, owner_ids=owner_ids)
+    for owner_id, (current_revenue, next_revenue) in revenue_by_owner.items():
+        metrics = owner_metrics.setdefault(owner_id, _empty_metrics())
+        metrics["current_qtr_revenue"] = current_revenue
+        metrics["next_qtr_revenue"] = next_revenue
+    company_metrics["current_qtr_revenue"], company_metrics["next_qtr_revenue"] = company_revenue
+
+    return owner_metrics, company_metrics
+
+
 def _apply_metric_values(record, metrics: dict, previous_record=None):
     record.leads_count = metrics["leads_count"]
     record.qualified_leads_count = metrics["qualified_leads_count"]
     record.pipeline_count = metrics["pipeline_count"]
     record.tcv = metrics["tcv"]
+    record.customer_count = metrics["customer_count"]
     record.current_qtr_revenue = metrics["current_qtr_revenue"]
     record.next_qtr_revenue = metrics["next_qtr_revenue"]
 
@@ -170,7 +535,7 @@ def _apply_metric_values(record, metrics: dict, previous_record=None):
     record.leads_vs_last_week = metrics["leads_count"] - int(getattr(previous_record, "leads_count", 0) or 0)
     record.qualified_vs_last_week = metrics["qualified_leads_count"] - int(getattr(previous_record, "qualified_leads_count", 0) or 0)
     record.pipeline_vs_last_week = metrics["pipeline_count"] - int(getattr(previous_record, "pipeline_count", 0) or 0)
-    record.tcv_vs_last_week = metrics["tcv"] - int(getattr(previous_record, "tcv", 0) or 0)
+    record.tcv_vs_last_week = metrics["tcv"] - (getattr(previous_record, "tcv", 0) or 0)
 
     record.leads_vs_last_month = 0
     record.qualified_vs_last_month = 0
@@ -181,24 +546,20 @@ def _apply_metric_values(record, metrics: dict, previous_record=None):
 
 def refresh_weekly_metrics(owner_ids: Iterable[int] | None = None, ref_date: date | None = None) -> None:
     models = _get_models()
-    User = models["User"]
     WeeklyMetrics = models["WeeklyMetrics"]
 
     ref_date = ref_date or date.today()
     week_start = get_week_start(ref_date)
     last_week_start = get_last_week_start(ref_date)
     owner_ids = _normalize_owner_ids(owner_ids)
+    if not owner_ids:
+        rebuild_weekly_metrics(ref_date=ref_date)
+        return
 
     session_factory = _get_session_factory()
     session = session_factory()
 
     try:
-        if not owner_ids:
-            owner_ids = [
-                user.id
-                for user in session.query(User).filter_by(is_active=True).all()
-            ]
-
         for owner_id in owner_ids:
             metrics = compute_owner_metrics(owner_id, session=session, ref_date=ref_date)
             previous_record = (
@@ -227,6 +588,228 @@ def refresh_weekly_metrics(owner_ids: Iterable[int] | None = None, ref_date: dat
         session.close()
 
 
+def _metric_row_values(metrics: dict, previous_record=None) -> dict:
+    values = {metric: int(metrics[metric]) for metric in COUNT_METRICS}
+    values.update({metric: float(metrics[metric]) for metric in AMOUNT_METRICS})
+    for metric, vs_column in VS_LAST_WEEK_COLUMNS.items():
+        values[vs_column] = values[metric] - (getattr(previous_record, metric, 0) or 0)
+    values.update(
+        leads_vs_last_month=0,
+        qualified_vs_last_month=0,
+        pipeline_vs_last_month=0,
+        tcv_vs_last_month=0,
+        updated_at=datetime.utcnow(),
+    )
+    return values
+
+
+def rebuild_weekly_metrics(ref_date: date | None = None, owner_ids: Iterable[int] | None = None) -> dict:
+    """Rebuild the week's snapshots for all active owners and the company.
+
+    Metrics come from :func:`compute_all_weekly_metrics` and are written with
+    one bulk UPDATE for existing rows and one bulk INSERT for missing ones.
+    ``owner_ids`` restricts which owner rows are computed and rewritten (an
+    empty list rewrites only the company row, which is always rewritten).
+    Returns the computed company metrics.
+    """
+    models = _get_models()
+    User = models["User"]
+    WeeklyMetrics = models["WeeklyMetrics"]
+
+    ref_date = ref_date or date.today()
+    week_start = get_week_start(ref_date)
+    last_week_start = get_last_week_start(ref_date)
+
+    session = _get_session_factory()()
+    try:
+        rows_query = session.query(WeeklyMetrics).filter(WeeklyMetrics.week_start.in_([week_start, last_week_start]))
+        if owner_ids is None:
+            owner_ids = [user_id for (user_id,) in session.query(User.id).filter_by(is_active=True).all()]
+            owner_metrics, company_metrics = compute_all_weekly_metrics(session, ref_date=ref_date)
+        else:
+            owner_ids = _normalize_owner_ids(owner_ids)
+            owner_metrics, company_metrics = compute_all_weekly_metrics(session, ref_date=ref_date, owner_ids=owner_ids)
+            rows_query = rows_query.filter(
+                db.or_(WeeklyMetrics.owner_id.in_(owner_ids), WeeklyMetrics.owner_id.is_(None))
+            )
+
+        rows = rows_query.order_by(WeeklyMetrics.id.asc()).all()
+        current_ids = {}
+        previous_records = {}
+        for row in rows:
+            if row.week_start == week_start:
+                current_ids.setdefault(row.owner_id, row.id)
+            else:
+                previous_records.setdefault(row.owner_id, row)
+
+        updates = []
+        inserts = []
+        targets = [(owner_id, owner_metrics.get(owner_id) or _empty_metrics()) for owner_id in owner_ids]
+        targets.append((None, company_metrics))
+        for owner_id, metrics in targets:
+            values = _metric_row_values(metrics, previous_records.get(owner_id))
+            if owner_id in current_ids:
+                updates.append({"id": current_ids[owner_id], **values})
+            else:
+                inserts.append({"owner_id": owner_id, "week_start": week_start, **values})
+
+        if updates:
+            session.execute(db.update(WeeklyMetrics), updates)
+        if inserts:
+            session.execute(db.insert(WeeklyMetrics), inserts)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+    return company_metrics
+
+
+def _customer_count_subquery(owner_id: int | None):
+    pipeline = _get_models()["Pipeline"].__table__
+    query = db.select(db.func.count(db.distinct(db.func.nullif(pipeline.c.company, "")))).where(
+        pipeline.c.is_deleted.is_(False),
+        pipeline.c.stage != "6b) Deal Lost",
+    )
+    if owner_id is not None:
+        query = query.where(pipeline.c.owner_id == owner_id)
+    return query.scalar_subquery()
+
+
+def apply_weekly_metrics_deltas(
+    owner_deltas: dict,
+    ref_date: date | None = None,
+    customer_owner_ids: Iterable[int] = (),
+) -> list[int]:
+    """Add signed metric deltas to the owner and company snapshots of the week.
+
+    ``owner_deltas`` maps owner ids (``None`` for ownerless leads) to metric
+    deltas. The company row receives the sum of every owner's deltas.
+    ``customer_count`` is recounted in the same UPDATE for the owners in
+    ``customer_owner_ids`` and, whenever that is not empty (``None`` included),
+    for the company row. Owners whose snapshot row
+    does not exist yet are fully refreshed instead; their ids are returned.
+    """
+    models = _get_models()
+    table = models["WeeklyMetrics"].__table__
+
+    ref_date = ref_date or date.today()
+    week_start = get_week_start(ref_date)
+    customer_owner_ids = set(customer_owner_ids)
+    # Any customer change, including one on an ownerless pipeline, changes the company's distinct count
+    recount_company = bool(customer_owner_ids)
+    customer_owner_ids.discard(None)
+
+    company_deltas = {}
+    for metric_deltas in owner_deltas.values():
+        for metric, value in metric_deltas.items():
+            company_deltas[metric] = company_deltas.get(metric, 0) + value
+
+    targets = {
+        owner_id: _nonzero_deltas(metric_deltas)
+        for owner_id, metric_deltas in owner_deltas.items()
+        if owner_id is not None
+    }
+    for owner_id in customer_owner_ids:
+        targets.setdefault(owner_id, {})
+    targets[None] = _nonzero_deltas(company_deltas)
+
+    missing_owner_ids = []
+    company_missing = False
+    now = datetime.utcnow()
+    with db.engine.begin() as connection:
+        for owner_id, deltas in targets.items():
+            recount_customers = recount_company if owner_id is None else owner_id in customer_owner_ids
+            if not deltas and not recount_customers:
+                continue
+
+            values = {"updated_at": now}
+            for metric, value in deltas.items():
+                values[metric] = db.func.coalesce(table.c[metric], 0) + value
+                vs_column = VS_LAST_WEEK_COLUMNS.get(metric)
+                if vs_column:
+                    values[vs_column] = db.func.coalesce(table.c[vs_column], 0) + value
+            if recount_customers:
+                values["customer_count"] = _customer_count_subquery(owner_id)
+
+            owner_condition = table.c.owner_id.is_(None) if owner_id is None else table.c.owner_id == owner_id
+            result = connection.execute(
+                table.update()
+                .where(owner_condition, table.c.week_start == week_start)
+                .values(**values)
+            )
+            if result.rowcount == 0:
+                if owner_id is None:
+                    company_missing = True
+                else:
+                    missing_owner_ids.append(owner_id)
+
+    if missing_owner_ids or company_missing:
+        refresh_weekly_metrics(owner_ids=missing_owner_ids or None, ref_date=ref_date)
+    return missing_owner_ids
+
+
+def _metrics_differ(record, metrics: dict) -> dict:
+    drift = {}
+    for metric, actual in metrics.items():
+        stored = (getattr(record, metric, 0) or 0) if record is not None else None
+        if metric in AMOUNT_METRICS:
+            differs = stored is None or abs(stored - actual) > AMOUNT_TOLERANCE
+        else:
+            differs = stored != int(actual)
+        if differs:
+            drift[metric] = {"stored": stored, "actual": actual}
+    return drift
+
+
+def reconcile_weekly_metrics(ref_date: date | None = None) -> dict:
+    """Recompute the week's snapshots from source rows and repair any drift.
+
+    Incremental deltas are skipped while metric events are disabled (bulk
+    jobs) and raw SQL writes bypass them, so this full pass is the safety net.
+    It runs from ``flask metrics-reconcile`` (and the metrics worker), never
+    on a request. Returns the drift found per owner id (``None`` is the
+    company row).
+    """
+    models = _get_models()
+    User = models["User"]
+    WeeklyMetrics = models["WeeklyMetrics"]
+
+    ref_date = ref_date or date.today()
+    week_start = get_week_start(ref_date)
+
+    session = _get_session_factory()()
+    try:
+        owner_ids = [user_id for (user_id,) in session.query(User.id).filter_by(is_active=True).all()]
+        records = {
+            record.owner_id: record
+            for record in session.query(WeeklyMetrics).filter(WeeklyMetrics.week_start == week_start).all()
+        }
+        owner_metrics, company_metrics = compute_all_weekly_metrics(session, ref_date=ref_date)
+    finally:
+        session.close()
+
+    drift = {}
+    targets = [(owner_id, owner_metrics.get(owner_id) or _empty_metrics()) for owner_id in owner_ids]
+    targets.append((None, company_metrics))
+    for owner_id, metrics in targets:
+        owner_drift = _metrics_differ(records.get(owner_id), {key: metrics[key] for key in SNAPSHOT_METRICS})
+        if owner_drift:
+            drift[owner_id] = owner_drift
+
+    if drift:
+        from services.dashboard_cache_service import bump_data_version
+
+        rebuild_weekly_metrics(
+            ref_date=ref_date,
+            owner_ids=[owner_id for owner_id in drift if owner_id is not None],
+        )
+        bump_data_version()
+    return drift
+
+
 def ensure_current_week_snapshots(ref_date: date | None = None) -> None:
     models = _get_models()
     User = models["User"]
@@ -252,7 +835,7 @@ def ensure_current_week_snapshots(ref_date: date | None = None) -> None:
     )
 
     if missing_owner_ids or not company_exists:
-        refresh_weekly_metrics(owner_ids=active_owner_ids, ref_date=ref_date)
+        rebuild_weekly_metrics(ref_date=ref_date)
 
 
 def build_summary_metric(current_value: int | float, previous_value: int | float) -> dict:
@@ -294,9 +877,9 @@ def get_company_dashboard_summary(ref_date: date | None = None) -> dict:
         "leads": build_summary_metric(current_record.leads_count or 0, previous_record.leads_count or 0),
         "qualified": build_summary_metric(current_record.qualified_leads_count or 0, previous_record.qualified_leads_count or 0),
         "pipeline": build_summary_metric(current_record.pipeline_count or 0, previous_record.pipeline_count or 0),
-        "tcv": build_summary_metric(current_record.tcv or 0, previous_record.tcv or 0),
-        "current_qtr_revenue": build_summary_metric(current_record.current_qtr_revenue or 0, previous_record.current_qtr_revenue or 0),
-        "next_qtr_revenue": build_summary_metric(current_record.next_qtr_revenue or 0, previous_record.next_qtr_revenue or 0),
+        "tcv": build_summary_metric(whole_amount(current_record.tcv), whole_amount(previous_record.tcv)),
+        "current_qtr_revenue": build_summary_metric(whole_amount(current_record.current_qtr_revenue), whole_amount(previous_record.current_qtr_revenue)),
+        "next_qtr_revenue": build_summary_metric(whole_amount(current_record.next_qtr_revenue), whole_amount(previous_record.next_qtr_revenue)),
     }
 
 
@@ -328,9 +911,9 @@ def get_owner_dashboard_summary(owner_id: int, ref_date: date | None = None) ->
         "leads": build_summary_metric(current_record.leads_count or 0, previous_record.leads_count or 0),
         "qualified": build_summary_metric(current_record.qualified_leads_count or 0, previous_record.qualified_leads_count or 0),
         "pipeline": build_summary_metric(current_record.pipeline_count or 0, previous_record.pipeline_count or 0),
-        "tcv": build_summary_metric(current_record.tcv or 0, previous_record.tcv or 0),
-        "current_qtr_revenue": build_summary_metric(current_record.current_qtr_revenue or 0, previous_record.current_qtr_revenue or 0),
-        "next_qtr_revenue": build_summary_metric(current_record.next_qtr_revenue or 0, previous_record.next_qtr_revenue or 0),
+        "tcv": build_summary_metric(whole_amount(current_record.tcv), whole_amount(previous_record.tcv)),
+        "current_qtr_revenue": build_summary_metric(whole_amount(current_record.current_qtr_revenue), whole_amount(previous_record.current_qtr_revenue)),
+        "next_qtr_revenue": build_summary_metric(whole_amount(current_record.next_qtr_revenue), whole_amount(previous_record.next_qtr_revenue)),
     }
 
 
@@ -344,18 +927,23 @@ def get_owner_dashboard_metrics(ref_date: date | None = None) -> list[dict]:
 
     ensure_current_week_snapshots(ref_date=ref_date)
 
-    users = User.query.filter_by(is_active=True).all()
-    records = {
-        record.owner_id: record
-        for record in WeeklyMetrics.query.filter(
-            WeeklyMetrics.week_start == week_start,
-            WeeklyMetrics.owner_id.isnot(None),
-        ).all()
-    }
+    rows = (
+        db.session.query(User, WeeklyMetrics)
+        .outerjoin(
+            WeeklyMetrics,
+            db.and_(WeeklyMetrics.owner_id == User.id, WeeklyMetrics.week_start == week_start),
+        )
+        .filter(User.is_active.is_(True))
+        .all()
+    )
 
     metrics = []
-    for user in users:
-        record = records.get(user.id) or WeeklyMetrics(owner_id=user.id, week_start=week_start)
+    seen_user_ids = set()
+    for user, record in rows:
+        if user.id in seen_user_ids:
+            continue
+        seen_user_ids.add(user.id)
+        record = record or WeeklyMetrics(owner_id=user.id, week_start=week_start)
         metrics.append({
             "user": user,
             "user_id": user.id,
@@ -364,47 +952,127 @@ def get_owner_dashboard_metrics(ref_date: date | None = None) -> list[dict]:
             "leads_count": int(record.leads_count or 0),
             "qualified_leads_count": int(record.qualified_leads_count or 0),
             "pipeline_count": int(record.pipeline_count or 0),
-            "customer_count": compute_owner_metrics(user.id, session=db.session, ref_date=ref_date)["customer_count"],
-            "tcv": int(record.tcv or 0),
-            "current_qtr_revenue": int(record.current_qtr_revenue or 0),
-            "next_qtr_revenue": int(record.next_qtr_revenue or 0),
+            "customer_count": int(record.customer_count or 0),
+            "tcv": whole_amount(record.tcv),
+            "current_qtr_revenue": whole_amount(record.current_qtr_revenue),
+            "next_qtr_revenue": whole_amount(record.next_qtr_revenue),
         })
 
     metrics.sort(key=lambda item: item["tcv"], reverse=True)
     return metrics
 
 
+def get_weekly_metrics_mode() -> str:
+    """Return the configured post-commit refresh mode (sync, deferred or disabled)."""
+    if not has_app_context():
+        return "sync"
+    mode = str(current_app.config.get("WEEKLY_METRICS_MODE") or "sync").lower()
+    return mode if mode in WEEKLY_METRICS_MODES else "sync"
+
+
+def _collect_weekly_metrics_changes(session, flush_context, instances):
+    from models import Pipeline, PipelineRevenueMonth, metrics_events_disabled
+
+    mode = get_weekly_metrics_mode()
+    if mode == "disabled" or metrics_events_disabled():
+        return
+
+    deltas = session.info.setdefault("weekly_metrics_deltas", {})
+    customer_owner_ids = session.info.setdefault("weekly_metrics_customer_owner_ids", set())
+    ref_date = date.today()
+    handled_rows = set()
+    collect = {"customer_owner_ids": customer_owner_ids, "handled_rows": handled_rows}
+    for obj in session.new:
+        _collect_row_deltas(obj, deltas, ref_date, is_new=True, **collect)
+    for obj in session.dirty:
+        # A pipeline whose ledger rows were only added or removed is modified through the collection
+        if session.is_modified(obj, include_collections=isinstance(obj, Pipeline)):
+            _collect_row_deltas(obj, deltas, ref_date, **collect)
+    for obj in session.deleted:
+        _collect_row_deltas(obj, deltas, ref_date, is_deleted=True, **collect)
+
+    # Ledger rows rewritten in place by calculate_pipeline_metrics (possibly in a later flush than the pipeline)
+    for obj in session.dirty:
+        if isinstance(obj, PipelineRevenueMonth) and id(obj) not in handled_rows and session.is_modified(obj):
+            _collect_ledger_row_delta(obj, deltas, ref_date)
+    for obj in session.deleted:
+        if isinstance(obj, PipelineRevenueMonth) and id(obj) not in handled_rows:
+            _collect_ledger_row_delta(obj, deltas, ref_date, is_deleted=True)
+
+    if mode == "deferred":
+        # Jobs are added to this flush so they commit atomically with the data change.
+        from services.metrics_job_service import enqueue_metrics_jobs
+
+        affected = {owner_id for owner_id, metric_deltas in deltas.items() if any(metric_deltas.values())}
+        affected |= customer_owner_ids
+        enqueued = session.info.setdefault("weekly_metrics_enqueued_owner_ids", set())
+        enqueue_metrics_jobs(session, affected - enqueued)
+        enqueued |= affected
+
+
+def _apply_weekly_metrics_after_commit(session):
+    session.info.pop("weekly_metrics_enqueued_owner_ids", None)
+    if get_weekly_metrics_mode() != "sync":
+        _clear_weekly_metrics_changes(session)
+        return
+
+    owner_deltas = {
+        owner_id: metric_deltas
+        for owner_id, metric_deltas in session.info.pop("weekly_metrics_deltas", {}).items()
+        if any(metric_deltas.values())
+    }
+    customer_owner_ids = session.info.pop("weekly_metrics_customer_owner_ids", set())
+    if not owner_deltas and not customer_owner_ids:
+        return
+    try:
+        apply_weekly_metrics_deltas(owner_deltas, customer_owner_ids=customer_owner_ids)
+    except Exception as exc:
+        current_app.logger.warning(
+            "Failed to apply weekly metrics deltas for %s: %s", sorted(owner_deltas, key=str), exc
+        )
+
+
+def _clear_weekly_metrics_changes(session):
+    session.info.pop("weekly_metrics_deltas", None)
+    session.info.pop("weekly_metrics_customer_owner_ids", None)
+    session.info.pop("weekly_metrics_enqueued_owner_ids", None)
+
+
 def register_weekly_metrics_hooks(app) -> None:
     if app.extensions.get("weekly_metrics_hooks_registered"):
         return
 
-    from models import metrics_events_disabled
+    _configure_active_history()
 
-    @event.listens_for(db.session, "before_flush")
-    def collect_weekly_metrics_changes(session, flush_context, instances):
-        if metrics_events_disabled():
-            session.info.pop("weekly_metrics_owner_ids", None)
-            return
+    # ``db.session`` is shared by every app instance, so attach the listeners only once.
+    if not event.contains(db.session, "before_flush", _collect_weekly_metrics_changes):
+        event.listen(db.session, "before_flush", _collect_weekly_metrics_changes)
+        event.listen(db.session, "after_commit", _apply_weekly_metrics_after_commit)
+        event.listen(db.session, "after_rollback", _clear_weekly_metrics_changes)
+
+    app.extensions["weekly_metrics_hooks_registered"] = True
 
-        owner_ids = set(session.info.get("weekly_metrics_owner_ids", set()))
-        for collection in (session.new, session.dirty, session.deleted):
-            for obj in collection:
-                owner_ids.update(_tracked_owner_ids(obj))
-        if owner_ids:
-            session.info["weekly_metrics_owner_ids"] = owner_ids
-
-    @event.listens_for(db.session, "after_commit")
-    def refresh_weekly_metrics_after_commit(session):
-        owner_ids = session.info.pop("weekly_metrics_owner_ids", set())
-        if not owner_ids:
+
+def register_weekly_metrics_commands(app) -> None:
+    @app.cli.command("metrics-reconcile")
+    def metrics_reconcile_command():
+        """Recompute this week's metrics snapshots and repair drift."""
+        drift = reconcile_weekly_metrics()
+        if not drift:
+            print("[OK] Weekly metrics are consistent")
             return
-        try:
-            refresh_weekly_metrics(owner_ids=owner_ids)
-        except Exception as exc:
-            app.logger.warning("Failed to refresh weekly metrics for %s: %s", sorted(owner_ids), exc)
+        for owner_id, metrics in drift.items():
+            label = "company" if owner_id is None else f"owner {owner_id}"
+            print(f"[FIXED] {label}: {metrics}")
 
-    @event.listens_for(db.session, "after_rollback")
-    def clear_weekly_metrics_changes(session):
-        session.info.pop("weekly_metrics_owner_ids", None)
+    @app.cli.command("metrics-worker")
+    @click.option("--once", is_flag=True, help="Drain the due jobs and exit.")
+    @click.option("--poll", type=float, default=None, help="Seconds to sleep when the queue is empty.")
+    def metrics_worker_command(once, poll):
+        """Process deferred weekly metrics refresh jobs."""
+        from services.metrics_job_service import run_metrics_worker
 
-    app.extensions["weekly_metrics_hooks_registered"] = True
+        try:
+            run_metrics_worker(once=once, poll_seconds=poll)
+        except KeyboardInterrupt:
+            print("[OK] Metrics worker stopped")
@@ -0,0 +1,75 @@
+(function () {
+    'use strict';
+
+    // Export links marked with data-export-job="<kind>" queue a background job instead of
+    // downloading inline, show its progress and start the download once the file is ready.
+    const POLL_INTERVAL_MS = 1500;
+
+    function getRoot() {
+        return document.getElementById('exportJobStatus');
+    }
+
+    function showStatus(root, text, percent, isError) {
+        root.classList.remove('d-none');
+        root.classList.toggle('alert-danger', Boolean(isError));
+        root.classList.toggle('alert-info', !isError);
+        root.querySelector('[data-export-job-text]').textContent = text;
+        const bar = root.querySelector('.progress-bar');
+        bar.parentElement.classList.toggle('d-none', Boolean(isError));
+        bar.style.width = (percent || 0) + '%';
+    }
+
+    function describe(root, job) {
+        if (job.status === 'pending') return root.dataset.textQueued;
+        if (job.total_rows) return root.dataset.textRunning + ' ' + job.rows_done + ' / ' + job.total_rows;
+        return root.dataset.textRunning;
+    }
+
+    function poll(root, statusUrl) {
+        fetch(statusUrl, { headers: { 'Accept': 'application/json' } })
+            .then(function (response) { return response.json(); })
+            .then(function (data) {
+                const job = data.job;
+                if (job.status === 'done') {
+                    showStatus(root, root.dataset.textDone, 100, false);
+                    window.location.href = job.download_url;
+                    setTimeout(function () { root.classList.add('d-none'); }, 3000);
+                } else if (job.status === 'failed') {
+                    showStatus(root, root.dataset.textFailed + (job.error ? ': ' + job.error : ''), 0, true);
+                } else {
+                    showStatus(root, describe(root, job), job.percent, false);
+                    setTimeout(function () { poll(root, statusUrl); }, POLL_INTERVAL_MS);
+                }
+            })
+            .catch(function () {
+                showStatus(root, root.dataset.textFailed, 0, true);
+            });
+    }
+
+    document.addEventListener('click', function (event) {
+        const link = event.target.closest('a[data-export-job]');
+        const root = getRoot();
+        if (!link || !root) return;
+        event.preventDefault();
+
+        // Same arguments as the inline export link, plus the kind of export
+        const params = new URL(link.href, window.location.origin).searchParams;
+        params.set('kind', link.dataset.exportJob);
+        showStatus(root, root.dataset.textQueued, 0, false);
+        fetch(root.dataset.createUrl + '?' + params.toString(), {
+            method: 'POST',
+            headers: { 'Accept': 'application/json' }
+        })
+            .then(function (response) { return response.json(); })
+            .then(function (data) {
+                if (!data.success) {
+                    showStatus(root, root.dataset.textFailed + (data.error ? ': ' + data.error : ''), 0, true);
+                    return;
+                }
+                poll(root, data.job.status_url);
+            })
+            .catch(function () {
+                showStatus(root, root.dataset.textFailed, 0, true);
+            });
+    });
+})();
@@ -0,0 +1,125 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import routes
+from app import create_app
+from extensions import cache, db
+from models import Pipeline, User
+from services import dashboard_cache_service
+from services.dashboard_cache_service import get_data_version, get_versioned_payload
+
+
+class DashboardCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.temp_dir.name, 'test_bitcrm.db')
+
+        class TestConfig:
+            TESTING = True
+            SECRET_KEY = 'test-secret'
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SQLALCHEMY_ENGINE_OPTIONS = {}
+            CACHE_TYPE = 'SimpleCache'
+            UPLOAD_FOLDER = os.path.join(self.temp_dir.name, 'uploads')
+            EXCEL_TEMPLATES_FOLDER = os.path.join(self.temp_dir.name, 'templates')
+            DASHBOARD_CACHE_ASYNC_REFRESH = False
+
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        cache.clear()
+
+        admin = User(username='Admin', role='admin')
+        admin.set_password('bitcrm')
+        db.session.add(admin)
+        db.session.commit()
+        self.admin_id = admin.id
+
+        self.client = self.app.test_client()
+        response = self.client.post(
+            '/login',
+            data={'username': 'Admin', 'password': 'bitcrm'},
+            follow_redirects=True,
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def tearDown(self):
+        cache.clear()
+        db.session.remove()
+        self.ctx.pop()
+        self.temp_dir.cleanup()
+
+    def _add_pipeline(self, name):
+        db.session.add(Pipeline(name=name, company=f'{name} Co', owner_id=self.admin_id, stage='1) Prospecting'))
+        db.session.commit()
+
+    def test_business_commits_bump_the_data_version(self):
+        version = get_data_version()
+        user = db.session.get(User, self.admin_id)
+        user.email = 'admin@example.com'
+        db.session.commit()
+        self.assertEqual(get_data_version(), version)
+
+        self._add_pipeline('Versioned')
+        self.assertEqual(get_data_version(), version + 1)
+
+    def test_dashboard_is_served_from_cache_until_data_changes(self):
+        cache.clear()  # the login redirect already rendered the dashboard
+        with mock.patch.object(routes, '_build_dashboard_payload', wraps=routes._build_dashboard_payload) as builder:
+            self.assertEqual(self.client.get('/dashboard').status_code, 200)
+            self.assertEqual(self.client.get('/dashboard').status_code, 200)
+            self.assertEqual(builder.call_count, 1)
+
+            self._add_pipeline('Fresh Deal')
+            response = self.client.get('/dashboard')
+            self.assertEqual(builder.call_count, 2)
+            self.assertIn(b'Fresh Deal', response.data)
+
+    def test_stale_entry_is_served_while_one_background_refresh_runs(self):
+        self.app.config['DASHBOARD_CACHE_ASYNC_REFRESH'] = True
+        calls = []
+
+        def build():
+            calls.append(get_data_version())
+            return {'version': get_data_version()}
+
+        self.assertEqual(get_versioned_payload('test', 'all', build), {'version': 0})
+        self._add_pipeline('Stale Deal')
+
+        self.assertEqual(get_versioned_payload('test', 'all', build), {'version': 0})
+        deadline = time.time() + 5
+        while len(calls) < 2 and time.time() < deadline:
+            time.sleep(0.05)
+        time.sleep(0.1)
+        self.assertEqual(get_versioned_payload('test', 'all', build), {'version': 1})
+        self.assertEqual(calls, [0, 1])
+
+    def test_file_cache_lock_left_by_a_dead_refresh_expires(self):
+        cache_dir = os.path.join(self.temp_dir.name, 'cache')
+
+        class FileCacheConfig:
+            TESTING = True
+            SECRET_KEY = 'test-secret'
+            SQLALCHEMY_DATABASE_URI = self.app.config['SQLALCHEMY_DATABASE_URI']
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SQLALCHEMY_ENGINE_OPTIONS = {}
+            CACHE_TYPE = 'FileSystemCache'
+            CACHE_DIR = cache_dir
+
+        file_app = create_app(FileCacheConfig)
+        with file_app.app_context():
+            lock_key = 'versioned:test:all:refreshing'
+            # Written by a worker that died before deleting it; its timeout has passed
+            cache.add(lock_key, True, timeout=-1)
+            self.assertTrue(os.listdir(cache_dir))
+            self.assertTrue(dashboard_cache_service._acquire_refresh_lock(lock_key))
+            self.assertFalse(dashboard_cache_service._acquire_refresh_lock(lock_key))
+            cache.clear()
+
+
+if __name__ == '__main__':
+    unittest.main()
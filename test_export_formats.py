@@ -0,0 +1,108 @@
+import csv
+import io
+import os
+import tempfile
+import unittest
+from datetime import date
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app import create_app
+from extensions import cache, db
+from models import ActivityLog, Pipeline, SalesLead, User
+
+
+class ExportFormatTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.temp_dir.name, 'test_bitcrm.db')
+
+        class TestConfig:
+            TESTING = True
+            SECRET_KEY = 'test-secret'
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SQLALCHEMY_ENGINE_OPTIONS = {}
+            CACHE_TYPE = 'SimpleCache'
+            UPLOAD_FOLDER = os.path.join(self.temp_dir.name, 'uploads')
+            EXCEL_TEMPLATES_FOLDER = os.path.join(self.temp_dir.name, 'templates')
+            DASHBOARD_CACHE_ASYNC_REFRESH = False
+            EXPORT_CHUNK_SIZE = 2
+
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        cache.clear()
+
+        self.admin = User(username='Admin', role='admin')
+        self.admin.set_password('bitcrm')
+        db.session.add(self.admin)
+        db.session.commit()
+
+        for index in range(3):
+            db.session.add(SalesLead(
+                name=f'Lead {index}', company=f'公司 {index}', source='Website',
+                leads_status='Waiting for Response', owner_id=self.admin.id, date_added=date(2026, 1, index + 1),
+            ))
+            db.session.add(Pipeline(
+                name=f'Deal {index}', company=f'Co {index}', owner_id=self.admin.id, stage='1) Prospecting',
+                mrc_usd=100, contract_term_yrs=1, gp_margin=0.25, est_sign_date=date(2026, 3, index + 1),
+            ))
+        db.session.commit()
+        self.client = self.app.test_client()
+        self.client.post('/login', data={'username': 'Admin', 'password': 'bitcrm'})
+
+    def tearDown(self):
+        cache.clear()
+        db.session.remove()
+        self.ctx.pop()
+        self.temp_dir.cleanup()
+
+    def test_leads_csv_is_streamed_and_logged(self):
+        response = self.client.get('/leads/export?format=csv')
+        self.assertTrue(response.is_streamed)
+        self.assertTrue(response.mimetype.startswith('text/csv'))
+        self.assertIn('.csv', response.headers['Content-Disposition'])
+
+        text = response.get_data(as_text=True)
+        self.assertTrue(text.startswith('\ufeff'))
+        rows = list(csv.DictReader(io.StringIO(text.lstrip('\ufeff'))))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(sorted(row['Company'] for row in rows), ['公司 0', '公司 1', '公司 2'])
+        self.assertIn('2026-01-01', {row['Date Added'] for row in rows})
+        self.assertEqual(
+            ActivityLog.query.filter_by(action_type='Leads - Exported').one().subject_name,
+            '3 leads exported',
+        )
+
+    def test_pipeline_parquet_has_typed_columns(self):
+        response = self.client.get('/pipeline/export?format=parquet')
+        self.assertEqual(response.status_code, 200)
+        table = pq.read_table(io.BytesIO(response.data))
+        self.assertEqual(table.num_rows, 3)
+        self.assertEqual(table.schema.field('TCV').type, pa.float64())
+        self.assertEqual(table.schema.field('Term').type, pa.int64())
+        self.assertEqual(table.schema.field('Est. Sign').type, pa.date32())
+        self.assertNotIn('Summary', table.schema.names)
+        self.assertEqual(sorted(table.column('Est. Sign').to_pylist())[0], date(2026, 3, 1))
+
+        response = self.client.get('/pipeline/export?format=xlsx')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/pipeline/export?format=pdf').status_code, 400)
+
+    def test_activity_log_export_uses_archive_filters(self):
+        self.client.get('/leads/export?format=parquet')
+        response = self.client.get('/admin/login-logs/export?format=csv&action=Exported')
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True).lstrip('\ufeff'))))
+        self.assertEqual([row['Action'] for row in rows], ['Leads - Exported'])
+        self.assertRegex(rows[0]['Time'], r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$')
+
+        response = self.client.get('/admin/login-logs/export?format=parquet')
+        table = pq.read_table(io.BytesIO(response.data))
+        self.assertEqual(table.schema.field('Time').type, pa.timestamp('us'))
+        self.assertGreaterEqual(table.num_rows, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
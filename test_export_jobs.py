@@ -0,0 +1,134 @@
+import os
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta
+from io import BytesIO
+
+from openpyxl import load_workbook
+
+from app import create_app
+from extensions import cache, db
+from models import ActivityLog, ExportJob, Pipeline, SalesLead, User
+from services.export_job_service import cleanup_export_jobs, get_export_path, process_export_jobs
+
+
+class ExportJobTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.temp_dir.name, 'test_bitcrm.db')
+        self.export_folder = os.path.join(self.temp_dir.name, 'exports')
+
+        class TestConfig:
+            TESTING = True
+            SECRET_KEY = 'test-secret'
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SQLALCHEMY_ENGINE_OPTIONS = {}
+            CACHE_TYPE = 'SimpleCache'
+            UPLOAD_FOLDER = os.path.join(self.temp_dir.name, 'uploads')
+            EXCEL_TEMPLATES_FOLDER = os.path.join(self.temp_dir.name, 'templates')
+            DASHBOARD_CACHE_ASYNC_REFRESH = False
+            EXPORT_CHUNK_SIZE = 2
+            EXPORT_JOBS_ENABLED = True
+            EXPORT_FOLDER = self.export_folder
+
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        cache.clear()
+
+        self.admin = User(username='Admin', role='admin')
+        self.sales = User(username='Eric', role='sales')
+        for user in (self.admin, self.sales):
+            user.set_password('bitcrm')
+        db.session.add_all([self.admin, self.sales])
+        db.session.commit()
+
+        for index in range(5):
+            db.session.add(SalesLead(
+                name=f'Lead {index}', company=f'Company {index}', source='Website',
+                leads_status='Waiting for Response', owner_id=self.admin.id, date_added=date(2026, 1, index % 2 + 1),
+            ))
+            db.session.add(Pipeline(
+                name=f'Deal {index}', company=f'Co {index}', owner_id=self.admin.id, stage='1) Prospecting',
+                mrc_usd=100, contract_term_yrs=1, date_added=date(2026, 2, index % 2 + 1),
+            ))
+        db.session.commit()
+        self.client = self.app.test_client()
+        self.client.post('/login', data={'username': 'Admin', 'password': 'bitcrm'})
+
+    def tearDown(self):
+        cache.clear()
+        db.session.remove()
+        self.ctx.pop()
+        self.temp_dir.cleanup()
+
+    def _enqueue(self, kind, export_format):
+        response = self.client.post(f'/api/exports?kind={kind}&format={export_format}')
+        self.assertEqual(response.status_code, 202)
+        return response.get_json()['job']
+
+    def test_pipeline_job_reports_progress_and_downloads_the_workbook(self):
+        job = self._enqueue('pipeline', 'xlsx')
+        self.assertEqual(job['status'], 'pending')
+        self.assertIsNone(job['download_url'])
+        self.assertEqual(self.client.get(f"/api/exports/{job['id']}/download").status_code, 404)
+
+        self.assertEqual(process_export_jobs(), {'jobs': 1, 'failed': 0})
+        status = self.client.get(job['status_url']).get_json()['job']
+        self.assertEqual(status['status'], 'done')
+        self.assertEqual((status['rows_done'], status['total_rows'], status['percent']), (5, 5, 100))
+        self.assertTrue(status['file_name'].startswith('pipeline_export_'))
+
+        response = self.client.get(status['download_url'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(status['file_name'], response.headers['Content-Disposition'])
+        workbook = load_workbook(BytesIO(response.data), read_only=True)
+        self.assertEqual(workbook.sheetnames, ['Pipeline', 'Summary'])
+        self.assertEqual(len(list(workbook['Pipeline'].iter_rows(min_row=2))), 5)
+        workbook.close()
+        response.close()
+        self.assertEqual(
+            ActivityLog.query.filter_by(action_type='Pipeline - Exported').one().subject_name,
+            '5 pipelines exported',
+        )
+
+    def test_job_csv_matches_the_inline_export(self):
+        inline = self.client.get('/leads/export?format=csv').get_data(as_text=True)
+        job = self._enqueue('leads', 'csv')
+        process_export_jobs()
+
+        response = self.client.get(f"/api/exports/{job['id']}/download")
+        self.assertEqual(response.get_data(as_text=True), inline)
+        response.close()
+
+    def test_jobs_are_private_to_their_user(self):
+        job = self._enqueue('activity_logs', 'csv')
+        process_export_jobs()
+
+        self.client.get('/logout')
+        self.client.post('/login', data={'username': 'Eric', 'password': 'bitcrm'})
+        self.assertEqual(self.client.get(job['status_url']).status_code, 404)
+        self.assertEqual(self.client.get(f"/api/exports/{job['id']}/download").status_code, 404)
+        self.assertEqual(self.client.post('/api/exports?kind=activity_logs&format=csv').status_code, 403)
+
+    def test_cleanup_removes_expired_jobs_and_stray_files(self):
+        job = self._enqueue('leads', 'parquet')
+        process_export_jobs()
+        path = get_export_path(db.session.get(ExportJob, job['id']))
+        self.assertTrue(os.path.isfile(path))
+
+        stray = os.path.join(self.export_folder, '999.csv')
+        with open(stray, 'w') as fileobj:
+            fileobj.write('orphan')
+        os.utime(stray, (0, 0))
+
+        self.assertEqual(cleanup_export_jobs(), {'jobs': 0, 'files': 1})
+        self.assertTrue(os.path.isfile(path))
+        self.assertEqual(cleanup_export_jobs(datetime.utcnow() + timedelta(hours=25)), {'jobs': 1, 'files': 0})
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(ExportJob.query.count(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
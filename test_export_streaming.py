@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+from io import BytesIO
+
+from openpyxl import load_workbook
+
+from app import create_app
+from extensions import cache, db
+from models import FollowupEntry, Pipeline, User
+from services.export_service import (
+    MONEY_FORMAT,
+    ExportColumn,
+    ExportSheet,
+    iter_query_chunks,
+    write_xlsx,
+)
+
+
+class ExportStreamingTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.temp_dir.name, 'test_bitcrm.db')
+
+        class TestConfig:
+            TESTING = True
+            SECRET_KEY = 'test-secret'
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SQLALCHEMY_ENGINE_OPTIONS = {}
+            CACHE_TYPE = 'SimpleCache'
+            UPLOAD_FOLDER = os.path.join(self.temp_dir.name, 'uploads')
+            EXCEL_TEMPLATES_FOLDER = os.path.join(self.temp_dir.name, 'templates')
+            DASHBOARD_CACHE_ASYNC_REFRESH = False
+            EXPORT_CHUNK_SIZE = 2
+
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        cache.clear()
+
+        self.admin = User(username='Admin', role='admin')
+        self.admin.set_password('bitcrm')
+        db.session.add(self.admin)
+        db.session.commit()
+
+        for index in range(5):
+            db.session.add(Pipeline(
+                name=f'Deal {index}', company=f'Co {index}', owner_id=self.admin.id,
+                stage='1) Prospecting', mrc_usd=100 + index, contract_term_yrs=1, follow_up=f'legacy {index}',
+            ))
+        db.session.commit()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        cache.clear()
+        db.session.remove()
+        self.ctx.pop()
+        self.temp_dir.cleanup()
+
+    def test_query_is_read_in_chunks(self):
+        chunks = list(iter_query_chunks(Pipeline.query.order_by(Pipeline.id)))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+
+    def test_write_only_workbook_formats_columns(self):
+        columns = [ExportColumn('name', 'Name'), ExportColumn('tcv', 'TCV', MONEY_FORMAT)]
+        rows = ([f'Row {index}', index * 1.5] for index in range(3))
+        output = BytesIO()
+        counts = write_xlsx(output, [ExportSheet('Data', columns, rows), ExportSheet('Empty', columns, [])])
+        self.assertEqual(counts, {'Data': 3, 'Empty': 0})
+
+        sheet = load_workbook(output)['Data']
+        self.assertEqual([cell.value for cell in sheet[1]], ['Name', 'TCV'])
+        self.assertTrue(sheet['A1'].font.bold)
+        self.assertEqual(sheet['B3'].value, 1.5)
+        self.assertEqual(sheet['B3'].number_format, MONEY_FORMAT)
+        self.assertEqual(sheet['A3'].number_format, 'General')
+
+    def test_pipeline_export_streams_every_chunk(self):
+        first = Pipeline.query.order_by(Pipeline.id).first()
+        db.session.add(FollowupEntry(entity_type='pipeline', entity_id=first.id, content='Called back'))
+        db.session.commit()
+        self.client.post('/login', data={'username': 'Admin', 'password': 'bitcrm'})
+
+        response = self.client.get('/pipeline/export?show_lost=true')
+        self.assertTrue(response.is_streamed)
+        workbook = load_workbook(BytesIO(response.data))
+        sheet = workbook['Pipeline']
+        header = [cell.value for cell in sheet[1]]
+        rows = list(sheet.iter_rows(min_row=2))
+        self.assertEqual(len(rows), 5)
+
+        tcv_index = header.index('TCV')
+        # Export recalculates metrics for never-calculated rows first, so compare with the stored values
+        db.session.expire_all()
+        self.assertEqual(
+            sorted(row[tcv_index].value for row in rows),
+            sorted(pipeline.tcv_usd for pipeline in Pipeline.query.all()),
+        )
+        self.assertEqual(rows[0][tcv_index].number_format, MONEY_FORMAT)
+
+        followups = [row[header.index('Follow-up')].value for row in rows]
+        self.assertEqual(len([text for text in followups if text and 'legacy' in text]), 5)
+        self.assertEqual(len([text for text in followups if 'Called back' in text]), 1)
+        self.assertEqual(workbook['Summary']['B2'].value, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import event
+
+from app import create_app
+from extensions import cache, db
+from models import SalesLead, User
+from services.facet_service import FacetSpec, compute_facets, get_cached_facets
+
+
+LEAD_FACETS = (
+    FacetSpec('status', SalesLead.leads_status, ('status',)),
+    FacetSpec('source', SalesLead.source, ('source',)),
+    FacetSpec('owner', SalesLead.owner_id, ('owner',)),
+)
+
+
+class FacetTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.temp_dir.name, 'test_bitcrm.db')
+
+        class TestConfig:
+            TESTING = True
+            SECRET_KEY = 'test-secret'
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SQLALCHEMY_ENGINE_OPTIONS = {}
+            CACHE_TYPE = 'SimpleCache'
+            UPLOAD_FOLDER = os.path.join(self.temp_dir.name, 'uploads')
+            EXCEL_TEMPLATES_FOLDER = os.path.join(self.temp_dir.name, 'templates')
+            DASHBOARD_CACHE_ASYNC_REFRESH = False
+
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        cache.clear()
+
+        self.admin = User(username='Admin', role='admin')
+        self.sales = User(username='Sam', role='sales')
+        for user in (self.admin, self.sales):
+            user.set_password('bitcrm')
+        db.session.add_all([self.admin, self.sales])
+        db.session.commit()
+
+        specs = [
+            ('Website', 'Waiting for Response', self.admin.id),
+            ('Website', 'Waiting to be Contacted', self.admin.id),
+            ('Referral', 'Waiting for Response', self.sales.id),
+            ('Referral', 'Qualified', self.sales.id),
+            ('Event', 'Unqualified', self.sales.id),
+        ]
+        for index, (source, status, owner_id) in enumerate(specs):
+            db.session.add(SalesLead(
+                name=f'Lead {index}', company=f'Co {index}', source=source,
+                leads_status=status, owner_id=owner_id,
+            ))
+        db.session.commit()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        cache.clear()
+        db.session.remove()
+        self.ctx.pop()
+        self.temp_dir.cleanup()
+
+    def _base_query(self):
+        return SalesLead.query.filter(SalesLead.is_deleted.is_(False))
+
+    def _filters(self, source=None, owner=None):
+        return {
+            'status': None,
+            'source': SalesLead.source.in_(source) if source else None,
+            'owner': SalesLead.owner_id.in_(owner) if owner else None,
+        }
+
+    def test_facets_are_one_statement_ignoring_their_own_filter(self):
+        statements = []
+
+        def count_statement(*args):
+            statements.append(args[2])
+
+        event.listen(db.engine, 'before_cursor_execute', count_statement)
+        try:
+            result = compute_facets(
+                self._base_query().order_by(SalesLead.id), self._filters(source=['Referral']), LEAD_FACETS
+            )
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count_statement)
+
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(result['total'], 2)
+        self.assertEqual(result['facets']['source'], {'Website': 2, 'Referral': 2, 'Event': 1})
+        self.assertEqual(result['facets']['status'], {'Waiting for Response': 1, 'Qualified': 1})
+        self.assertEqual(result['facets']['owner'], {self.sales.id: 2})
+
+    def test_cached_facets_follow_data_version(self):
+        filters = self._filters(owner=[self.admin.id])
+        scope = {'scope': 'all', 'owner': [self.admin.id]}
+        result = get_cached_facets('test_facets', self._base_query(), filters, LEAD_FACETS, scope)
+        self.assertEqual(result['total'], 2)
+
+        db.session.add(SalesLead(name='New', company='New Co', source='Event',
+                                 leads_status='Qualified', owner_id=self.admin.id))
+        db.session.commit()
+        result = get_cached_facets('test_facets', self._base_query(), filters, LEAD_FACETS, scope)
+        self.assertEqual(result['total'], 3)
+        self.assertEqual(result['facets']['source']['Event'], 1)
+
+    def test_leads_page_shows_facet_counts(self):
+        self.client.post('/login', data={'username': 'Admin', 'password': 'bitcrm'})
+        html = self.client.get('/leads/?source=Website&source=Referral').get_data(as_text=True)
+        # Sources count every lead outside the default-hidden statuses, whatever source is selected
+        self.assertIn('Event <span class="text-muted small">0</span>', html)
+        self.assertIn('Website <span class="text-muted small">2</span>', html)
+        self.assertIn('Referral <span class="text-muted small">1</span>', html)
+        self.assertIn('Sam <span class="text-muted small">1</span>', html)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from app import create_app
+from extensions import db
+from models import Pipeline, PipelineRevenueMonth, User
+from services.forecast_rollover_service import (
+    FORECAST_COLUMNS,
+    compute_forecast_matrix,
+    rollover_pipeline_forecasts,
+    run_forecast_rollover,
+)
+from services.revenue_ledger_service import build_revenue_ledger_amounts
+from utils import calculate_pipeline_forecast, calculate_pipeline_metrics
+
+
+class ForecastRolloverTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.temp_dir.name, 'test_bitcrm.db')
+
+        class TestConfig:
+            TESTING = True
+            SECRET_KEY = 'test-secret'
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SQLALCHEMY_ENGINE_OPTIONS = {}
+            CACHE_TYPE = 'SimpleCache'
+            UPLOAD_FOLDER = os.path.join(self.temp_dir.name, 'uploads')
+            EXCEL_TEMPLATES_FOLDER = os.path.join(self.temp_dir.name, 'templates')
+
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+
+        owner = User(username='Owner', role='sales')
+        owner.set_password('bitcrm')
+        db.session.add(owner)
+        db.session.commit()
+        self.owner_id = owner.id
+
+        self.old_month = date(2026, 2, 1)
+        self.new_month = date(2026, 3, 1)
+        specs = [
+            ('Active', '4) Proposal', date(2025, 12, 10), 100, 50),
+            ('Mid Month', '5) Negotiation', date(2026, 3, 17), 310, 20),
+            ('Horizon', '2) Qualification', date(2029, 2, 20), 280, 90),
+            ('Future', '1) Prospecting', date(2027, 6, 1), 120, 0),
+            ('Lost', '6b) Deal Lost', date(2024, 6, 1), 500, 0),
+            ('Undated', '1) Prospecting', None, 75, 0),
+        ]
+        for name, stage, act_date, mrc, otc in specs:
+            pipeline = Pipeline(
+                name=name, company=f'{name} Co', owner_id=self.owner_id, stage=stage,
+                est_act_date=act_date, mrc_usd=mrc, otc_usd=otc,
+                contract_term_yrs=1, gp_margin=0.3,
+            )
+            calculate_pipeline_metrics(pipeline, self.old_month)
+            db.session.add(pipeline)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        self.ctx.pop()
+        self.temp_dir.cleanup()
+
+    def _expected(self, pipeline):
+        probe = Pipeline(stage=pipeline.stage, est_act_date=pipeline.est_act_date,
+                         mrc_usd=pipeline.mrc_usd, otc_usd=pipeline.otc_usd)
+        calculate_pipeline_forecast(probe, self.new_month)
+        return [getattr(probe, column) for column in FORECAST_COLUMNS]
+
+    def test_matrix_matches_row_by_row_forecast(self):
+        pipelines = Pipeline.query.order_by(Pipeline.id).all()
+        matrix = compute_forecast_matrix(pipelines, self.new_month)
+        for pipeline, values in zip(pipelines, matrix.tolist()):
+            for actual, expected in zip(values, self._expected(pipeline)):
+                self.assertAlmostEqual(actual, expected, places=4, msg=pipeline.name)
+
+    def test_rollover_updates_stale_rows_and_extends_ledger(self):
+        self.assertEqual(rollover_pipeline_forecasts(self.new_month, chunk_size=4), 6)
+        self.assertEqual(rollover_pipeline_forecasts(self.new_month), 0)
+
+        db.session.expire_all()
+        for pipeline in Pipeline.query.all():
+            self.assertEqual(pipeline.forecast_base_month, self.new_month)
+            for column, expected in zip(FORECAST_COLUMNS, self._expected(pipeline)):
+                self.assertAlmostEqual(getattr(pipeline, column), expected, places=4)
+
+            ledger = {row.month_start: (row.mrc, row.otc) for row in pipeline.revenue_months}
+            expected_ledger = build_revenue_ledger_amounts(pipeline, self.new_month)
+            self.assertEqual(ledger.keys(), expected_ledger.keys(), pipeline.name)
+            for month_start, (mrc, otc) in expected_ledger.items():
+                self.assertAlmostEqual(ledger[month_start][0], mrc, places=6)
+                self.assertAlmostEqual(ledger[month_start][1], otc, places=6)
+
+        horizon = Pipeline.query.filter_by(name='Horizon').one()
+        self.assertEqual(
+            [row.month_start for row in horizon.revenue_months],
+            [date(2029, 2, 1)],
+        )
+        # Every dated pipeline with revenue gains the month that rolled into the horizon (lost deals included)
+        self.assertEqual(PipelineRevenueMonth.query.filter_by(month_start=date(2029, 2, 1)).count(), 5)
+        # and drops the one that fell behind its start
+        self.assertEqual(PipelineRevenueMonth.query.filter(PipelineRevenueMonth.month_start < date(2025, 3, 1)).count(), 0)
+        self.assertEqual(PipelineRevenueMonth.query.filter_by(month_start=date(2025, 3, 1)).count(), 1)
+
+    def test_locked_job_runs_once_per_month(self):
+        self.assertEqual(run_forecast_rollover(self.new_month), 6)
+        self.assertIsNone(run_forecast_rollover(self.new_month))
+        self.assertEqual(run_forecast_rollover(self.new_month, force=True), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import os
+import tempfile
+import unittest
+from datetime import date, datetime
+from io import BytesIO
+
+from openpyxl import Workbook
+from sqlalchemy import event
+
+from app import create_app
+from extensions import db
+from models import FollowupEntry, Pipeline, PipelineVisibility, SalesLead, User, WeeklyMetrics
+from services.search_index_service import search_condition
+from services.weekly_metrics_service import get_week_start
+
+
+class BulkImportTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.temp_dir.name, 'test_bitcrm.db')
+
+        class TestConfig:
+            TESTING = True
+            SECRET_KEY = 'test-secret'
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SQLALCHEMY_ENGINE_OPTIONS = {}
+            CACHE_TYPE = 'SimpleCache'
+            UPLOAD_FOLDER = os.path.join(self.temp_dir.name, 'uploads')
+            EXCEL_TEMPLATES_FOLDER = os.path.join(self.temp_dir.name, 'templates')
+            DASHBOARD_CACHE_ASYNC_REFRESH = False
+            IMPORT_BATCH_SIZE = 2
+
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+
+        self.admin = User(username='Admin', role='admin')
+        self.sales = User(username='Eric', role='sales')
+        for user in (self.admin, self.sales):
+            user.set_password('bitcrm')
+        db.session.add_all([self.admin, self.sales])
+        db.session.commit()
+        self.client = self.app.test_client()
+        self.client.post('/login', data={'username': 'Admin', 'password': 'bitcrm'})
+
+    def tearDown(self):
+        db.session.remove()
+        self.ctx.pop()
+        self.temp_dir.cleanup()
+
+    def _upload(self, url, header, rows):
+        workbook = Workbook()
+        worksheet = workbook.active
+        worksheet.append(header)
+        for row in rows:
+            worksheet.append(row)
+        stream = BytesIO()
+        workbook.save(stream)
+        stream.seek(0)
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            response = self.client.post(url, data={'file': (stream, 'import.xlsx')}, content_type='multipart/form-data')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        self.assertEqual(response.status_code, 302)
+        db.session.expire_all()
+        return statements
+
+    def test_leads_are_inserted_in_batches_with_their_qualified_pipelines(self):
+        statements = self._upload('/leads/import', ['Name', 'Company', 'Leads Status', 'Owner'], [
+            ['Bulk Lead 1', 'Bulk Co 1', 'Qualified', 'Eric'],
+            ['Bulk Lead 2', 'Bulk Co 2', 'Waiting for Response', 'Eric'],
+            ['Bulk Lead 3', 'Bulk Co 3', 'qualified', 'Admin'],
+            ['Bulk Lead 4', 'Bulk Co 4', None, 'Nobody'],
+            ['Bulk Lead 5', 'Bulk Co 5', 'Unqualified', None],
+        ])
+
+        # One username lookup for the whole sheet instead of one per row
+        self.assertEqual(sum('users.username IN' in statement for statement in statements), 1)
+        self.assertFalse(any('users.username = ' in statement for statement in statements))
+
+        leads = {lead.name: lead for lead in SalesLead.query.all()}
+        self.assertEqual(len(leads), 5)
+        self.assertEqual(leads['Bulk Lead 1'].owner_id, self.sales.id)
+        self.assertEqual(leads['Bulk Lead 4'].owner_id, self.admin.id)
+        self.assertEqual(leads['Bulk Lead 4'].leads_status, 'Waiting to be Contacted')
+        self.assertEqual(leads['Bulk Lead 4'].followup_count, 0)
+
+        pipelines = Pipeline.query.order_by(Pipeline.id).all()
+        self.assertEqual([pipeline.sales_lead_id for pipeline in pipelines], [leads['Bulk Lead 1'].id, leads['Bulk Lead 3'].id])
+        self.assertEqual({pipeline.stage for pipeline in pipelines}, {'2) Lead Qualified'})
+        self.assertEqual(
+            PipelineVisibility.query.filter_by(user_id=self.sales.id).one().pipeline_id,
+            leads['Bulk Lead 1'].pipeline.id,
+        )
+        self.assertEqual(SalesLead.query.filter(search_condition(SalesLead, 'Bulk Co 2')).count(), 1)
+
+        metrics = WeeklyMetrics.query.filter_by(owner_id=self.sales.id, week_start=get_week_start()).one()
+        self.assertEqual((metrics.leads_count, metrics.qualified_leads_count, metrics.pipeline_count), (2, 1, 1))
+
+    def test_pipelines_are_inserted_with_support_team_ledger_and_history(self):
+        statements = self._upload('/pipeline/import', [
+            'Name', 'Company', 'Owner', 'Support', 'Stage', 'MRC (USD)', 'Contract Term (Yrs)',
+            'Est. Act Date', 'Follow Up',
+        ], [
+            ['Bulk Deal 1', 'Bulk Pipe Co', 'Admin', 'Eric / Ghost', '4) Proposal Submitted', 1000, 1,
+             date(2020, 1, 1), 'Follow-up, 2026-01-10 09:30: Called\nTo-do, 2026-01-11: Send quote by 2026-01-20'],
+            ['Bulk Deal 2', 'Other Co', 'Eric', None, '1) Prospecting', 500, None, None, None],
+            [None, 'Third Co', None, 'Eric', '1) Prospecting', 200, 2, None, None],
+        ])
+
+        self.assertEqual(sum('users.username IN' in statement for statement in statements), 1)
+        # At most one executemany per batch of two rows for support, ledger and history rows
+        for table, count in (('pipeline_support', 2), ('pipeline_revenue_month', 1), ('followup_entries', 1)):
+            self.assertEqual(sum(statement.startswith(f'INSERT INTO {table} ') for statement in statements), count)
+        deal = Pipeline.query.filter_by(name='Bulk Deal 1').one()
+        third = Pipeline.query.filter_by(name='Third Co').one()
+        # Row 2 has no contract term, so its metrics cannot be calculated
+        self.assertIsNone(Pipeline.query.filter_by(name='Bulk Deal 2').first())
+        self.assertEqual(Pipeline.query.count(), 2)
+
+        self.assertEqual([user.username for user in deal.support_team], ['Eric'])
+        self.assertEqual((deal.tcv_usd, third.tcv_usd, third.owner_id), (12000.0, 4800.0, self.admin.id))
+        self.assertTrue(deal.revenue_months)
+        self.assertEqual(
+            {(month.owner_id, month.stage, month.is_deleted) for month in deal.revenue_months},
+            {(self.admin.id, '4) Proposal Submitted', False)},
+        )
+        self.assertEqual((deal.followup_count, deal.last_followup_at), (1, datetime(2026, 1, 10, 9, 30)))
+        entries = FollowupEntry.query.filter_by(entity_type='pipeline', entity_id=deal.id).order_by(FollowupEntry.id).all()
+        self.assertEqual([(entry.kind, entry.content, entry.due_date) for entry in entries], [
+            (FollowupEntry.KIND_FOLLOWUP, 'Called', None),
+            (FollowupEntry.KIND_TODO, 'Send quote', date(2026, 1, 20)),
+        ])
+
+        visible = {row.pipeline_id for row in PipelineVisibility.query.filter_by(user_id=self.sales.id)}
+        self.assertEqual(visible, {deal.id, third.id})
+        self.assertEqual(Pipeline.query.filter(search_condition(Pipeline, 'Bulk Pipe')).count(), 1)
+
+        metrics = WeeklyMetrics.query.filter_by(owner_id=self.admin.id, week_start=get_week_start()).one()
+        self.assertEqual((metrics.pipeline_count, metrics.tcv), (2, 16800))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import unittest
+from datetime import date, datetime
+from io import BytesIO
+
+import pandas as pd
+from openpyxl import Workbook
+
+from app import create_app
+from extensions import db
+from models import Pipeline, User
+from services.import_service import clean_leads_import, clean_pipeline_import, normalize_header
+
+
+class ImportCleaningTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.temp_dir.name, 'test_bitcrm.db')
+
+        class TestConfig:
+            TESTING = True
+            SECRET_KEY = 'test-secret'
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SQLALCHEMY_ENGINE_OPTIONS = {}
+            CACHE_TYPE = 'SimpleCache'
+            UPLOAD_FOLDER = os.path.join(self.temp_dir.name, 'uploads')
+            EXCEL_TEMPLATES_FOLDER = os.path.join(self.temp_dir.name, 'templates')
+            DASHBOARD_CACHE_ASYNC_REFRESH = False
+
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+
+    def tearDown(self):
+        db.session.remove()
+        self.ctx.pop()
+        self.temp_dir.cleanup()
+
+    def _sheet(self, columns):
+        df = pd.DataFrame(columns)
+        return df.where(pd.notnull(df), None)
+
+    def test_leads_columns_are_cleaned_and_errors_collected_per_row(self):
+        self.assertEqual(normalize_header(' Est. Sign  Date '), 'est_sign_date')
+        rows, errors = clean_leads_import(self._sheet({
+            'Name ': ['Ann', None, 'Cat', 'Dan'],
+            'Leads Status': ['qualified', 'bogus', None, 'WAITING FOR RESPONSE'],
+            'Source': ['event/trade show', 'BFSI', ' ', None],
+            'Date Added': [45000, '2024/02/03', datetime(2024, 1, 5), 'someday'],
+            'Email': ['ann@example.com', 'not-an-email', None, None],
+            'Mobile Number': [13800000000.0, None, None, None],
+        }))
+
+        self.assertEqual(rows, [
+            {'name': 'Ann', 'leads_status': 'Qualified', 'source': 'Event', 'date_added': date(2023, 3, 15),
+             'email': 'ann@example.com', 'mobile_number': '13800000000'},
+            {'name': 'Cat', 'leads_status': None, 'source': None, 'date_added': date(2024, 1, 5),
+             'email': None, 'mobile_number': None},
+        ])
+        self.assertEqual(len(errors), 2)
+        self.assertTrue(errors[0].startswith("Row 2: Name is required, Invalid status 'bogus'"))
+        self.assertIn("Invalid email format 'not-an-email'", errors[0])
+        self.assertTrue(errors[1].startswith("Row 4: Invalid date format 'someday'"))
+
+    def test_pipeline_amounts_dates_and_enums_are_coerced(self):
+        rows, errors = clean_pipeline_import(self._sheet({
+            'Stage': ['1) prospecting', '2) Lead Qualification', 'Closed'],
+            'Level': ['committed', None, 'Stretch'],
+            'MRC (USD)': ['1,234.56789', None, 'n/a'],
+            'Contract Term (Yrs)': [3.0, None, 2],
+            'Est. Sign Date': ['2025-03-28', 45500.0, None],
+        }))
+
+        self.assertEqual(rows, [
+            {'stage': '1) Prospecting', 'level': 'Committed', 'mrc_usd': 1234.5679,
+             'contract_term_yrs': 3, 'est_sign_date': date(2025, 3, 28)},
+            {'stage': '2) Lead Qualified', 'level': None, 'mrc_usd': 0.0,
+             'contract_term_yrs': None, 'est_sign_date': date(2024, 7, 27)},
+        ])
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(errors[0].startswith("Row 3: Invalid stage 'Closed'"))
+        self.assertTrue(errors[0].endswith('mrc_usd must be a valid number'))
+
+    def test_pipeline_import_route_uses_cleaned_rows(self):
+        admin = User(username='Admin', role='admin')
+        admin.set_password('bitcrm')
+        db.session.add(admin)
+        db.session.commit()
+        client = self.app.test_client()
+        client.post('/login', data={'username': 'Admin', 'password': 'bitcrm'})
+
+        workbook = Workbook()
+        worksheet = workbook.active
+        worksheet.append(['Company', 'Name', 'Stage', 'MRC (USD)', 'Contract Term (Yrs)', 'Est. Sign Date'])
+        worksheet.append(['Imported Co', 'Imported Deal', '5) NEGOTIATION', '2,000', 2, date(2026, 5, 1)])
+        stream = BytesIO()
+        workbook.save(stream)
+        stream.seek(0)
+
+        response = client.post(
+            '/pipeline/import',
+            data={'file': (stream, 'pipeline.xlsx')},
+            content_type='multipart/form-data',
+        )
+
+        self.assertEqual(response.status_code, 302)
+        pipeline = Pipeline.query.filter_by(company='Imported Co').one()
+        self.assertEqual(pipeline.stage, '5) Negotiation')
+        self.assertEqual((pipeline.mrc_usd, pipeline.contract_term_yrs), (2000.0, 2))
+        self.assertEqual(pipeline.est_sign_date, date(2026, 5, 1))
+        self.assertEqual(pipeline.tcv_usd, 48000.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+import os
+import tempfile
+import unittest
+
+from app import create_app
+from extensions import cache, db
+from models import Pipeline, User
+from services.followup_service import backfill_followup_summaries
+from services.kanban_service import build_kanban_board, get_kanban_cards
+
+
+class KanbanServiceTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.temp_dir.name, 'test_bitcrm.db')
+
+        class TestConfig:
+            TESTING = True
+            SECRET_KEY = 'test-secret'
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SQLALCHEMY_ENGINE_OPTIONS = {}
+            CACHE_TYPE = 'SimpleCache'
+            UPLOAD_FOLDER = os.path.join(self.temp_dir.name, 'uploads')
+            EXCEL_TEMPLATES_FOLDER = os.path.join(self.temp_dir.name, 'templates')
+            DASHBOARD_CACHE_ASYNC_REFRESH = False
+            KANBAN_PAGE_SIZE = 2
+
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        cache.clear()
+
+        admin = User(username='Admin', role='admin')
+        admin.set_password('bitcrm')
+        sales = User(username='Sales', role='sales')
+        sales.set_password('bitcrm')
+        db.session.add_all([admin, sales])
+        db.session.commit()
+        self.admin_id = admin.id
+        self.sales_id = sales.id
+
+        for index in range(5):
+            db.session.add(Pipeline(
+                name=f'Prospect {index}', company=f'Prospect Co {index}', owner_id=self.admin_id,
+                stage='1) Prospecting', tcv_usd=1000, mrc_usd=100,
+                follow_up=f'Follow-up, 2024-0{index + 1}-15 10:00: call',
+            ))
+        db.session.add(Pipeline(name='Won', company='Won Co', owner_id=self.sales_id,
+                                stage='6a) Deal Won', tcv_usd=5000, mrc_usd=250))
+        db.session.add(Pipeline(name='Lost', company='Lost Co', owner_id=self.sales_id,
+                                stage='6b) Deal Lost', tcv_usd=700, mrc_usd=70))
+        db.session.add(Pipeline(name='Deleted', company='Deleted Co', owner_id=self.admin_id,
+                                stage='1) Prospecting', tcv_usd=9999, is_deleted=True))
+        db.session.commit()
+        backfill_followup_summaries()
+
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        cache.clear()
+        db.session.remove()
+        self.ctx.pop()
+        self.temp_dir.cleanup()
+
+    def _login(self, username):
+        response = self.client.post('/login', data={'username': username, 'password': 'bitcrm'})
+        self.assertEqual(response.status_code, 302)
+
+    def _base_query(self):
+        return Pipeline.query.filter(Pipeline.is_deleted.is_(False))
+
+    def test_board_has_stage_aggregates_and_first_page_of_cards(self):
+        board = build_kanban_board(self._base_query())
+        stages = {stage['value']: stage for stage in board['stages']}
+
+        self.assertEqual([stage['value'] for stage in board['stages']][-1], '6b) Deal Lost')
+        prospecting = stages['1) Prospecting']
+        self.assertEqual(prospecting['count'], 5)
+        self.assertEqual(prospecting['tcv_usd'], 5000)
+        self.assertEqual(prospecting['mrc_usd'], 500)
+        self.assertEqual([card['name'] for card in prospecting['cards']], ['Prospect 4', 'Prospect 3'])
+        self.assertEqual(prospecting['cards'][0]['owner_name'], 'Admin')
+        self.assertEqual(prospecting['cards'][0]['latest_followup'], '2024-05-15')
+        self.assertIsNotNone(prospecting['next_cursor'])
+
+        self.assertEqual(stages['6a) Deal Won']['count'], 1)
+        self.assertIsNone(stages['6a) Deal Won']['next_cursor'])
+        self.assertTrue(stages['6b) Deal Lost']['is_lost'])
+        self.assertEqual(stages['3) Demo/Meeting']['count'], 0)
+        self.assertEqual(stages['3) Demo/Meeting']['cards'], [])
+
+    def test_cursor_pages_through_a_stage_without_duplicates(self):
+        board = build_kanban_board(self._base_query())
+        prospecting = board['stages'][0]
+        names = [card['name'] for card in prospecting['cards']]
+        cursor = prospecting['next_cursor']
+        while cursor:
+            page = get_kanban_cards(self._base_query(), '1) Prospecting', cursor=cursor)
+            names.extend(card['name'] for card in page['cards'])
+            cursor = page['next_cursor']
+
+        self.assertEqual(names, [f'Prospect {index}' for index in range(4, -1, -1)])
+
+    def test_api_scopes_board_to_user_and_pages_by_stage(self):
+        self._login('Sales')
+        response = self.client.get('/api/dashboard/pipeline-kanban?show_lost=true')
+        self.assertEqual(response.status_code, 200)
+        stages = {stage['value']: stage for stage in response.get_json()['stages']}
+        self.assertEqual(stages['1) Prospecting']['count'], 0)
+        self.assertEqual(stages['6a) Deal Won']['count'], 1)
+        self.assertEqual(stages['6b) Deal Lost']['count'], 1)
+
+        response = self.client.get('/api/dashboard/pipeline-kanban?stage=6a) Deal Won')
+        self.assertEqual([card['name'] for card in response.get_json()['cards']], ['Won'])
+
+        response = self.client.get('/api/dashboard/pipeline-kanban?stage=6a) Deal Won&cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+
+    def test_owner_filter_and_legacy_kanban_endpoint(self):
+        self._login('Admin')
+        response = self.client.get(f'/pipeline/api/kanban-data?owner={self.sales_id}&limit=10')
+        payload = response.get_json()
+        self.assertTrue(payload['success'])
+        self.assertNotIn('data', payload)
+        stages = {stage['value']: stage for stage in payload['stages']}
+        self.assertEqual(stages['1) Prospecting']['count'], 0)
+        self.assertEqual([card['company'] for card in stages['6a) Deal Won']['cards']], ['Won Co'])
+
+        payload = self.client.get(f'/pipeline/api/kanban-data?owner={self.sales_id}&legacy=1').get_json()
+        self.assertTrue(payload['success'])
+        self.assertNotIn('stages', payload)
+        self.assertEqual(payload['data']['1) Prospecting'], [])
+        self.assertEqual([card['company'] for card in payload['data']['6a) Deal Won']], ['Won Co'])
+
+    def test_legacy_kanban_data_keeps_original_cards(self):
+        db.session.add(Pipeline(name='No Company', company=None, owner_id=self.admin_id,
+                                stage='1) Prospecting', product='SD-WAN'))
+        db.session.commit()
+        self._login('Admin')
+        payload = self.client.get('/pipeline/api/kanban-data?legacy=1&limit=2').get_json()
+
+        # Legacy ``data`` is not capped by ``limit``
+        prospecting = payload['data']['1) Prospecting']
+        self.assertEqual(len(prospecting), 6)
+        self.assertEqual(set(prospecting[0]), {
+            'id', 'company', 'name', 'product', 'tcv_usd', 'owner', 'level', 'win_rate', 'est_sign_date', 'date_added',
+        })
+        no_company = next(card for card in prospecting if card['product'] == 'SD-WAN')
+        self.assertEqual((no_company['company'], no_company['owner'], no_company['win_rate']), ('', 'Admin', 0))
+        self.assertEqual(list(payload['data']), Pipeline.STAGE_OPTIONS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import os
+import re
+import tempfile
+import unittest
+from datetime import date
+from html import unescape
+
+from app import create_app
+from extensions import cache, db
+from models import Pipeline, SalesLead, User
+from routes import _get_leads_sort_keys, _get_pipeline_sort_keys
+from services.pagination_service import get_list_total, paginate_keyset
+
+
+class KeysetPaginationTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.temp_dir.name, 'test_bitcrm.db')
+
+        class TestConfig:
+            TESTING = True
+            SECRET_KEY = 'test-secret'
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SQLALCHEMY_ENGINE_OPTIONS = {}
+            CACHE_TYPE = 'SimpleCache'
+            UPLOAD_FOLDER = os.path.join(self.temp_dir.name, 'uploads')
+            EXCEL_TEMPLATES_FOLDER = os.path.join(self.temp_dir.name, 'templates')
+            DASHBOARD_CACHE_ASYNC_REFRESH = False
+
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        cache.clear()
+
+        admin = User(username='Admin', role='admin')
+        admin.set_password('bitcrm')
+        db.session.add(admin)
+        db.session.commit()
+        self.admin_id = admin.id
+
+        # Duplicate and missing sort values so the tiebreakers matter
+        sign_dates = [date(2026, 1, 5), None, date(2026, 1, 5), date(2026, 2, 1), None, date(2026, 1, 5), date(2025, 12, 1)]
+        companies = ['Beta', 'Alpha', 'Alpha', None, 'Alpha', 'Beta', 'Gamma']
+        for index, (sign_date, company) in enumerate(zip(sign_dates, companies)):
+            db.session.add(Pipeline(
+                name=f'Deal {index % 3}', company=company, owner_id=self.admin_id, stage='1) Prospecting',
+                est_sign_date=sign_date, tcv_usd=float(index % 2) * 100, date_added=date(2026, 3, 1 + index % 2),
+            ))
+            db.session.add(SalesLead(
+                name=f'Lead {index % 2}', company=f'Lead Co {index}', owner_id=self.admin_id,
+                leads_status='Qualified', date_added=sign_date,
+            ))
+        db.session.commit()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        cache.clear()
+        db.session.remove()
+        self.ctx.pop()
+        self.temp_dir.cleanup()
+
+    def _walk(self, query, sort_keys, per_page):
+        pages, cursor = [], None
+        while True:
+            page = paginate_keyset(query, sort_keys, cursor, per_page, 'test')
+            pages.append([item.id for item in page.items])
+            if not page.has_next:
+                return pages, page
+            cursor = page.next_cursor
+
+    def test_pages_match_offset_order_forwards_and_backwards(self):
+        cases = [
+            (Pipeline, _get_pipeline_sort_keys(sort_by, order))
+            for sort_by in ('date_added', 'est_sign_date', 'tcv_usd') for order in ('asc', 'desc')
+        ] + [(SalesLead, _get_leads_sort_keys('date_added', order)) for order in ('asc', 'desc')]
+
+        for model, sort_keys in cases:
+            query = model.query
+            expected = [item.id for item in query.order_by(*[key.order_by() for key in sort_keys]).all()]
+            pages, last_page = self._walk(query, sort_keys, 3)
+            self.assertEqual([item_id for page in pages for item_id in page], expected)
+
+            backwards, page = [], last_page
+            while page.has_prev:
+                page = paginate_keyset(query, sort_keys, page.prev_cursor, 3, 'test')
+                backwards.insert(0, [item.id for item in page.items])
+            self.assertEqual(backwards, pages[:-1])
+
+    def test_cursor_from_another_sort_is_rejected(self):
+        sort_keys = _get_pipeline_sort_keys('date_added', 'desc')
+        page = paginate_keyset(Pipeline.query, sort_keys, None, 2, 'date_added:desc')
+        with self.assertRaises(ValueError):
+            paginate_keyset(Pipeline.query, sort_keys, page.next_cursor, 2, 'tcv_usd:desc')
+        with self.assertRaises(ValueError):
+            paginate_keyset(Pipeline.query, sort_keys, 'not-a-cursor', 2, 'date_added:desc')
+
+    def test_list_total_is_cached_until_data_changes(self):
+        query = Pipeline.query.filter(Pipeline.company == 'Alpha')
+        self.assertEqual(get_list_total('test_list', query, {'company': 'Alpha'}), 3)
+
+        db.session.execute(Pipeline.__table__.delete().where(Pipeline.__table__.c.company == 'Alpha'))
+        db.session.commit()  # Core delete: no ORM flush, so the data version is unchanged
+        self.assertEqual(get_list_total('test_list', query, {'company': 'Alpha'}), 3)
+
+        db.session.add(Pipeline(name='New', company='Alpha', owner_id=self.admin_id, stage='1) Prospecting'))
+        db.session.commit()
+        self.assertEqual(get_list_total('test_list', query, {'company': 'Alpha'}), 1)
+
+        self.app.config['LIST_EXACT_TOTALS'] = False
+        self.assertIsNone(get_list_total('test_list', query, {'company': 'Alpha'}))
+
+    def test_pipeline_page_links_use_cursors(self):
+        self.client.post('/login', data={'username': 'Admin', 'password': 'bitcrm'})
+        response = self.client.get('/pipeline/?sort=date_added&order=desc&per_page=4')
+        html = response.get_data(as_text=True)
+        self.assertIn('Filtered 7 Opportunities', html)
+        next_links = re.findall(r'href="(/pipeline/\?cursor=[^"]+)"', html)
+        self.assertEqual(len(next_links), 1)
+
+        second = self.client.get(unescape(next_links[0]))
+        self.assertEqual(second.status_code, 200)
+        self.assertIn('Filtered 7 Opportunities', second.get_data(as_text=True))
+
+        fallback = self.client.get('/pipeline/?cursor=garbage&per_page=4')
+        self.assertEqual(fallback.status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
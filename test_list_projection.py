@@ -0,0 +1,133 @@
+import os
+import tempfile
+import unittest
+from io import BytesIO
+
+from openpyxl import load_workbook
+from sqlalchemy import event
+
+from app import create_app
+from extensions import cache, db
+from models import Pipeline, SalesLead, User
+from routes import LEADS_COLUMN_FIELDS, _get_leads_column_settings, _get_pipeline_column_settings
+from services.list_projection_service import get_projected_fields, project_list_columns
+
+
+class ListProjectionTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.temp_dir.name, 'test_bitcrm.db')
+
+        class TestConfig:
+            TESTING = True
+            SECRET_KEY = 'test-secret'
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SQLALCHEMY_ENGINE_OPTIONS = {}
+            CACHE_TYPE = 'SimpleCache'
+            UPLOAD_FOLDER = os.path.join(self.temp_dir.name, 'uploads')
+            EXCEL_TEMPLATES_FOLDER = os.path.join(self.temp_dir.name, 'templates')
+            DASHBOARD_CACHE_ASYNC_REFRESH = False
+
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        cache.clear()
+
+        self.admin = User(username='Admin', role='admin')
+        self.admin.set_password('bitcrm')
+        owners = [User(username=f'Owner {index}', role='sales') for index in range(3)]
+        for owner in owners:
+            owner.set_password('bitcrm')
+        db.session.add_all([self.admin, *owners])
+        db.session.commit()
+
+        for index in range(6):
+            owner = owners[index % 3]
+            db.session.add(SalesLead(
+                name=f'Lead {index}', company=f'Co {index}', source='Website',
+                leads_status='Waiting for Response', owner_id=owner.id, note='n' * 500,
+            ))
+            db.session.add(Pipeline(
+                name=f'Deal {index}', company=f'Co {index}', owner_id=owner.id,
+                stage='1) Prospecting', comments='c' * 500, follow_up='legacy note',
+            ))
+        db.session.commit()
+        self.client = self.app.test_client()
+        self.client.post('/login', data={'username': 'Admin', 'password': 'bitcrm'})
+
+    def tearDown(self):
+        cache.clear()
+        db.session.remove()
+        self.ctx.pop()
+        self.temp_dir.cleanup()
+
+    def _set_columns(self, page, columns):
+        user = db.session.get(User, self.admin.id)
+        user.set_column_preferences(page, columns)
+        db.session.commit()
+
+    def _entity_selects(self, url, table):
+        statements = []
+
+        def record(*args):
+            statement = args[2]
+            if statement.lstrip().upper().startswith('SELECT') and f'FROM {table}' in statement:
+                statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            response = self.client.get(url)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        return response, statements
+
+    def test_projection_loads_visible_fields_and_joined_owner(self):
+        fields = get_projected_fields(['name', 'owner', 'note'], LEADS_COLUMN_FIELDS)
+        self.assertEqual(fields, ['id', 'name', 'note', 'owner_id', 'position'])
+
+        query = project_list_columns(SalesLead.query, SalesLead, ['company', 'owner'], LEADS_COLUMN_FIELDS)
+        sql = str(query.statement)
+        self.assertIn('JOIN users', sql)
+        self.assertNotIn('sales_leads.note', sql)
+        self.assertNotIn('users.password_hash', sql)
+
+    def test_list_pages_render_every_column_without_per_row_loads(self):
+        with self.app.test_request_context('/'):
+            leads_columns = [column['key'] for column in _get_leads_column_settings()[0]]
+            pipeline_columns = [column['key'] for column in _get_pipeline_column_settings()[0]]
+        self._set_columns('leads', leads_columns)
+        self._set_columns('pipeline', pipeline_columns)
+        db.session.expire_all()
+
+        response, statements = self._entity_selects('/leads/?per_page=50', 'sales_leads')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Owner 2', response.get_data(as_text=True))
+        list_selects = [sql for sql in statements if 'LIMIT' in sql]
+        self.assertEqual(len(list_selects), 1)
+        self.assertIn('users_1.username', list_selects[0])
+
+        response, statements = self._entity_selects('/pipeline/?per_page=50', 'pipeline')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('legacy note', response.get_data(as_text=True))
+        # One page query; no lazy load per pipeline or per owner
+        self.assertEqual(len([sql for sql in statements if 'WHERE pipeline.id = ?' in sql]), 0)
+        self.assertEqual(len([sql for sql in statements if 'LIMIT' in sql]), 1)
+
+    def test_default_columns_skip_wide_text(self):
+        db.session.expire_all()
+        _, statements = self._entity_selects('/pipeline/?per_page=50', 'pipeline')
+        page_sql = [sql for sql in statements if 'LIMIT' in sql][0]
+        self.assertNotIn('pipeline.comments', page_sql)
+        self.assertNotIn('pipeline.m1', page_sql)
+
+        response = self.client.get('/leads/export')
+        sheet = load_workbook(BytesIO(response.data)).active
+        header = [cell.value for cell in sheet[1]]
+        rows = list(sheet.iter_rows(min_row=2, values_only=True))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual({row[header.index('Owner')] for row in rows}, {'Owner 0', 'Owner 1', 'Owner 2'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,11 +2,13 @@ import os
 import re
 import tempfile
 import unittest
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 
 from app import create_app
 from extensions import db
-from models import Pipeline, SalesActivity, Task, User
+from models import Pipeline, SalesActivity, SalesLead, Task, User
+from sales_activity_service import append_followup_history
+from services.followup_service import backfill_followup_summaries, get_followup_previews
 
 
 class PipelineFollowupTests(unittest.TestCase):
@@ -68,9 +70,9 @@ class PipelineFollowupTests(unittest.TestCase):
 
         self.assertEqual(response.status_code, 302)
         pipeline = Pipeline.query.filter_by(company='Followup Test Company').one()
-        self.assertIsNotNone(pipeline.follow_up)
+        self.assertIsNone(pipeline.follow_up)
         self.assertRegex(
-            pipeline.follow_up,
+            pipeline.followup_history,
             re.compile(
                 r'^Follow-up, \d{4}-\d{2}-\d{2} \d{2}:\d{2}: '
                 r'Initial discovery call completed$'
@@ -121,8 +123,8 @@ class PipelineFollowupTests(unittest.TestCase):
         task = Task.query.one()
         self.assertEqual(task.sales_activity_id, scheduled.id)
         self.assertEqual(task.due_date, date(2026, 8, 10))
-        self.assertIn('Follow-up [Remote Engagement]', pipeline.follow_up)
-        self.assertIn('To-do [Remote Engagement]', pipeline.follow_up)
+        self.assertIn('Follow-up [Remote Engagement]', pipeline.followup_history)
+        self.assertIn('To-do [Remote Engagement]', pipeline.followup_history)
 
     def test_no_followup_displays_inclusive_days_since_pipeline_creation(self):
         expectations = [
@@ -141,6 +143,67 @@ class PipelineFollowupTests(unittest.TestCase):
                 self.assertEqual(pipeline.get_followup_display(), display)
                 self.assertEqual(pipeline.get_followup_color_class(), color)
 
+    def test_legacy_history_is_migrated_to_entries_and_summary_tracks_appends(self):
+        legacy_text = '\n'.join([
+            'Follow-up, 2024-01-05 09:00: First call',
+            'continued on a second line',
+            'To-do, 2024-01-05: Send deck by 2024-03-01',
+            'Follow-up [Customer Visit], 2024-02-10 14:30 (2024-02-10 14:00 -> 2024-02-10 15:00): Site visit',
+        ])
+        pipeline = Pipeline(name='Legacy', company='Legacy Co', owner_id=self.admin_id,
+                            stage='1) Prospecting', follow_up=legacy_text)
+        lead = SalesLead(name='Legacy Lead', owner_id=self.admin_id, follow_up='To-do, 2024-01-05: Call back')
+        db.session.add_all([pipeline, lead])
+        db.session.commit()
+        self.assertIsNone(pipeline.get_latest_followup_date())
+
+        self.assertEqual(backfill_followup_summaries(), 2)
+        db.session.expire_all()
+        self.assertIsNone(pipeline.follow_up)
+        self.assertEqual(pipeline.followup_history, legacy_text)
+        self.assertEqual([entry.kind for entry in pipeline.followup_entries], ['followup', 'todo', 'followup'])
+        self.assertEqual(pipeline.followup_count, 2)
+        self.assertEqual(pipeline.last_followup_at, datetime(2024, 2, 10, 14, 30))
+        self.assertEqual(pipeline.get_latest_followup_date(), date(2024, 2, 10))
+        self.assertEqual(lead.followup_count, 0)
+        self.assertEqual(lead.followup_history, 'To-do, 2024-01-05: Call back')
+        self.assertEqual(backfill_followup_summaries(), 0)
+
+        pipeline.add_followup(followup_text='Pricing call')
+        append_followup_history(lead, followup_text='Intro call', timestamp=datetime(2024, 3, 1, 8, 15))
+        append_followup_history(lead, todo_text='Send quote', todo_due_date=date(2024, 3, 8),
+                                timestamp=datetime(2024, 3, 1, 8, 20))
+        db.session.commit()
+        self.assertEqual(pipeline.followup_count, 3)
+        self.assertEqual(pipeline.get_followup_display(), 'Today')
+        self.assertEqual(lead.followup_count, 1)
+        self.assertEqual(lead.last_followup_at, datetime(2024, 3, 1, 8, 15))
+        self.assertTrue(lead.followup_history.endswith(
+            'Follow-up, 2024-03-01 08:15: Intro call\nTo-do, 2024-03-01: Send quote by 2024-03-08'
+        ))
+
+    def test_followup_history_endpoint_pages_newest_first_and_list_shows_latest_entries(self):
+        pipeline = Pipeline(name='History', company='History Co', owner_id=self.admin_id, stage='1) Prospecting')
+        db.session.add(pipeline)
+        for day in range(1, 6):
+            append_followup_history(pipeline, followup_text=f'Call {day}', timestamp=datetime(2024, 4, day, 9, 0))
+        db.session.commit()
+
+        response = self.client.get(f'/api/followups/pipeline/{pipeline.id}?per_page=2')
+        payload = response.get_json()
+        self.assertEqual([entry['content'] for entry in payload['entries']], ['Call 5', 'Call 4'])
+        self.assertTrue(payload['has_more'])
+        payload = self.client.get(f'/api/followups/pipeline/{pipeline.id}?per_page=2&page=3').get_json()
+        self.assertEqual([entry['content'] for entry in payload['entries']], ['Call 1'])
+        self.assertFalse(payload['has_more'])
+        self.assertEqual(self.client.get(f'/api/followups/task/{pipeline.id}').status_code, 400)
+
+        self.app.config['FOLLOWUP_PREVIEW_ENTRIES'] = 2
+        previews = get_followup_previews([pipeline])
+        self.assertEqual(
+            previews[pipeline.id],
+            'Follow-up, 2024-04-05 09:00: Call 5\nFollow-up, 2024-04-04 09:00: Call 4',
+        )
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,115 @@
+import os
+import re
+import tempfile
+import unittest
+from io import BytesIO
+
+from openpyxl import load_workbook
+from sqlalchemy import event
+
+from app import create_app
+from extensions import cache, db
+from models import Pipeline, User
+from services.pipeline_summary_service import get_cached_pipeline_summary, get_pipeline_summary
+
+
+class PipelineSummaryTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.temp_dir.name, 'test_bitcrm.db')
+
+        class TestConfig:
+            TESTING = True
+            SECRET_KEY = 'test-secret'
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SQLALCHEMY_ENGINE_OPTIONS = {}
+            CACHE_TYPE = 'SimpleCache'
+            UPLOAD_FOLDER = os.path.join(self.temp_dir.name, 'uploads')
+            EXCEL_TEMPLATES_FOLDER = os.path.join(self.temp_dir.name, 'templates')
+            DASHBOARD_CACHE_ASYNC_REFRESH = False
+
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        cache.clear()
+
+        admin = User(username='Admin', role='admin')
+        admin.set_password('bitcrm')
+        db.session.add(admin)
+        db.session.commit()
+        self.admin_id = admin.id
+
+        specs = [('1) Prospecting', 100, 10)] * 4 + [('6a) Deal Won', 500, 50)] * 3 + [('6b) Deal Lost', 40, 4)]
+        for index, (stage, tcv, mrc) in enumerate(specs):
+            db.session.add(Pipeline(
+                name=f'Deal {index}', company=f'Co {index}', owner_id=self.admin_id,
+                stage=stage, tcv_usd=tcv, mrc_usd=mrc, gp=tcv / 10,
+            ))
+        db.session.commit()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        cache.clear()
+        db.session.remove()
+        self.ctx.pop()
+        self.temp_dir.cleanup()
+
+    def _base_query(self):
+        return Pipeline.query.filter(Pipeline.is_deleted.is_(False))
+
+    def test_summary_is_one_statement_over_the_whole_set(self):
+        statements = []
+
+        def count_statement(*args):
+            statements.append(args[2])
+
+        event.listen(db.engine, 'before_cursor_execute', count_statement)
+        try:
+            summary = get_pipeline_summary(self._base_query().order_by(Pipeline.id.desc()))
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count_statement)
+
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(summary['count'], 8)
+        self.assertAlmostEqual(summary['tcv_usd'], 1940)
+        self.assertAlmostEqual(summary['mrc_usd'], 194)
+        self.assertAlmostEqual(summary['gp'], 194)
+        self.assertEqual((summary['won_count'], summary['lost_count'], summary['active_count']), (3, 1, 7))
+        self.assertEqual(summary['stages']['1) Prospecting']['count'], 4)
+
+    def test_cached_summary_follows_data_version(self):
+        query = self._base_query()
+        self.assertEqual(get_cached_pipeline_summary('test_summary', query, {'scope': 'all'})['count'], 8)
+
+        db.session.add(Pipeline(name='New', company='New Co', owner_id=self.admin_id, stage='7) Activated'))
+        db.session.commit()
+        summary = get_cached_pipeline_summary('test_summary', query, {'scope': 'all'})
+        self.assertEqual((summary['count'], summary['won_count']), (9, 4))
+
+        self.app.config['LIST_EXACT_TOTALS'] = False
+        self.assertIsNone(get_cached_pipeline_summary('test_summary', query, {'scope': 'all'}))
+
+    def test_list_header_and_export_cover_all_pages(self):
+        self.client.post('/login', data={'username': 'Admin', 'password': 'bitcrm'})
+        html = self.client.get('/pipeline/?show_lost=true&sort=date_added&order=desc&per_page=2').get_data(as_text=True)
+        values = dict(re.findall(
+            r'<div class="pipeline-summary-label">([^<]+)</div>.*?<div class="pipeline-summary-value">([^<]+)</div>',
+            html, re.S,
+        ))
+        self.assertEqual(values['Won Deals'].strip(), '3')
+        self.assertEqual(values['Active Deals'].strip(), '7')
+        self.assertEqual(values['Total Pipelines'].strip(), '8')
+
+        response = self.client.get('/pipeline/export?show_lost=true')
+        sheet = load_workbook(BytesIO(response.data))['Summary']
+        rows = {row[0]: row[1:] for row in sheet.iter_rows(min_row=2, values_only=True)}
+        self.assertEqual(rows['Total'][0], 8)
+        # Export recalculates metrics for never-calculated rows first, so compare with the stored values
+        db.session.expire_all()
+        self.assertAlmostEqual(rows['Total'][1], sum(p.tcv_usd for p in Pipeline.query.all()), places=4)
+        self.assertEqual(rows['Won'][0], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+
+from flask import g
+from sqlalchemy import event
+
+from app import create_app
+from extensions import db
+from models import Pipeline, PipelineVisibility, User
+from routes import _get_pipeline_access_query
+from services.pipeline_visibility_service import get_visible_pipeline_ids, rebuild_pipeline_visibility
+
+
+class PipelineVisibilityTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.temp_dir.name, 'test_bitcrm.db')
+
+        class TestConfig:
+            TESTING = True
+            SECRET_KEY = 'test-secret'
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SQLALCHEMY_ENGINE_OPTIONS = {}
+            CACHE_TYPE = 'SimpleCache'
+            UPLOAD_FOLDER = os.path.join(self.temp_dir.name, 'uploads')
+            EXCEL_TEMPLATES_FOLDER = os.path.join(self.temp_dir.name, 'templates')
+
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+
+        self.alice = User(username='Alice', role='sales')
+        self.bob = User(username='Bob', role='sales')
+        self.carol = User(username='Carol', role='sales')
+        for user in (self.alice, self.bob, self.carol):
+            user.set_password('bitcrm')
+        db.session.add_all([self.alice, self.bob, self.carol])
+        db.session.commit()
+
+        self.owned = Pipeline(name='Owned', company='A', owner_id=self.alice.id, stage='1) Prospecting')
+        self.supported = Pipeline(name='Supported', company='B', owner_id=self.bob.id, stage='1) Prospecting')
+        self.other = Pipeline(name='Other', company='C', owner_id=self.carol.id, stage='1) Prospecting')
+        db.session.add_all([self.owned, self.supported, self.other])
+        self.supported.support_team.append(self.alice)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        self.ctx.pop()
+        self.temp_dir.cleanup()
+
+    def _mapping(self):
+        return sorted((row.user_id, row.pipeline_id) for row in PipelineVisibility.query.all())
+
+    def _visible_names(self, user):
+        return sorted(pipeline.name for pipeline in _get_pipeline_access_query(user).all())
+
+    def test_mapping_follows_owner_and_support_changes(self):
+        self.assertEqual(self._visible_names(self.alice), ['Owned', 'Supported'])
+        self.assertEqual(self._visible_names(self.carol), ['Other'])
+
+        self.other.support_team.append(self.alice)
+        self.supported.support_team = []
+        self.owned.owner_id = self.bob.id
+        db.session.commit()
+        self.assertEqual(self._visible_names(self.alice), ['Other'])
+        self.assertEqual(self._visible_names(self.bob), ['Owned', 'Supported'])
+
+        db.session.delete(self.other)
+        db.session.commit()
+        self.assertEqual(self._visible_names(self.alice), [])
+
+        incremental = self._mapping()
+        self.assertEqual(rebuild_pipeline_visibility(), len(incremental))
+        self.assertEqual(self._mapping(), incremental)
+
+    def test_access_query_is_a_single_join(self):
+        sql = str(_get_pipeline_access_query(self.alice).statement)
+        self.assertIn('JOIN pipeline_visibility', sql)
+        self.assertNotIn('pipeline_support', sql)
+
+    def test_visible_ids_are_memoized_until_the_mapping_changes(self):
+        statements = []
+        for obj in (self.alice, self.supported, self.other):
+            db.session.refresh(obj)  # load expired attributes before counting
+
+        def count_statement(*args):
+            statements.append(args[2])
+
+        event.listen(db.engine, 'before_cursor_execute', count_statement)
+        try:
+            with self.app.test_request_context('/'):
+                self.assertTrue(self.alice.can_access_pipeline(self.supported))
+                self.assertFalse(self.alice.can_access_pipeline(self.other))
+                self.assertEqual(len(statements), 1)
+
+                self.other.support_team.append(self.alice)
+                db.session.flush()
+                self.assertNotIn('visible_pipeline_ids', g)
+                self.assertIn(self.other.id, get_visible_pipeline_ids(self.alice.id))
+                db.session.rollback()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count_statement)
+
+
+if __name__ == '__main__':
+    unittest.main()
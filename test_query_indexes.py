@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import inspect, text
+
+from app import create_app
+from extensions import db
+from schema_updates import ensure_model_indexes, existing_index_names
+from verify_query_indexes import SQLITE_FULL_SCAN, explain_hot_queries
+
+
+class QueryIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.temp_dir.name, 'test_bitcrm.db')
+
+        class TestConfig:
+            TESTING = True
+            SECRET_KEY = 'test-secret'
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SQLALCHEMY_ENGINE_OPTIONS = {}
+            CACHE_TYPE = 'SimpleCache'
+            UPLOAD_FOLDER = os.path.join(self.temp_dir.name, 'uploads')
+            EXCEL_TEMPLATES_FOLDER = os.path.join(self.temp_dir.name, 'templates')
+
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+
+    def tearDown(self):
+        db.session.remove()
+        self.ctx.pop()
+        self.temp_dir.cleanup()
+
+    def _index_names(self, table_name):
+        return existing_index_names(inspect(db.engine), table_name)
+
+    def test_hot_queries_do_not_scan_tables(self):
+        results = explain_hot_queries(user_id=1)
+        self.assertGreaterEqual(len(results), 10)
+        self.assertEqual([(name, scans) for name, scans, _ in results if scans], [])
+
+    def test_full_scan_detection(self):
+        self.assertTrue(SQLITE_FULL_SCAN.match('SCAN activity_logs'))
+        self.assertFalse(SQLITE_FULL_SCAN.match('SCAN activity_logs USING INDEX ix_activity_logs_created_at'))
+
+        with db.engine.begin() as connection:
+            connection.execute(text('DROP INDEX ix_activity_logs_created_at'))
+        failed = {name for name, scans, _ in explain_hot_queries(user_id=1) if scans}
+        self.assertIn('activity logs', failed)
+
+    def test_list_pages_are_read_in_index_order(self):
+        plans = {name: plan for name, _, plan in explain_hot_queries(user_id=1)}
+        self.assertIn('USING INDEX ix_pipeline_active_list_order_sqlite', plans['pipeline list'])
+        self.assertIn('USING INDEX ix_sales_leads_active_list_order_sqlite', plans['leads list'])
+
+    def test_sort_detection(self):
+        with db.engine.begin() as connection:
+            connection.execute(text('DROP INDEX ix_pipeline_active_list_order_sqlite'))
+        problems = {name: problems for name, problems, _ in explain_hot_queries(user_id=1)}
+        self.assertIn('sort: USE TEMP B-TREE FOR ORDER BY', problems['pipeline list'])
+        # Per-owner queries may sort their few rows
+        self.assertEqual(problems['tasks (own)'], [])
+
+    def test_missing_indexes_are_created_on_existing_tables(self):
+        with db.engine.begin() as connection:
+            connection.execute(text('DROP INDEX ix_pipeline_active_owner_stage'))
+            connection.execute(text('DROP INDEX ix_tasks_active_owner_due'))
+        self.assertNotIn('ix_pipeline_active_owner_stage', self._index_names('pipeline'))
+
+        self.assertEqual(ensure_model_indexes(), ['ix_pipeline_active_owner_stage', 'ix_tasks_active_owner_due'])
+        self.assertIn('ix_pipeline_active_owner_stage', self._index_names('pipeline'))
+        self.assertEqual(ensure_model_indexes(), [])
+
+        # Expression indexes (SQLite list order) are not re-created, other dialects' are skipped
+        with db.engine.begin() as connection:
+            connection.execute(text('DROP INDEX ix_pipeline_active_list_order_sqlite'))
+        self.assertEqual(ensure_model_indexes(), ['ix_pipeline_active_list_order_sqlite'])
+        self.assertEqual(ensure_model_indexes(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -95,8 +95,8 @@ class SalesActivitiesTests(unittest.TestCase):
         task = Task.query.one()
         self.assertEqual(task.sales_activity_id, pending.id)
         self.assertEqual(task.due_date, date(2026, 8, 5))
-        self.assertIn('Customer confirmed the technical scope.', lead.follow_up)
-        self.assertIn('Send the revised quotation.', lead.follow_up)
+        self.assertIn('Customer confirmed the technical scope.', lead.followup_history)
+        self.assertIn('Send the revised quotation.', lead.followup_history)
 
     def test_lead_followup_rejects_new_visit_types(self):
         lead = self._lead(company='Mixed Lead Activity Co')
@@ -146,8 +146,8 @@ class SalesActivitiesTests(unittest.TestCase):
         self.assertEqual(task.sales_lead_id, lead.id)
         self.assertEqual(task.pipeline_id, pipeline.id)
         self.assertEqual(task.sales_activity_id, activity.id)
-        self.assertIn('To-do [Remote Engagement]', lead.follow_up)
-        self.assertIn('To-do [Remote Engagement]', pipeline.follow_up)
+        self.assertIn('To-do [Remote Engagement]', lead.followup_history)
+        self.assertIn('To-do [Remote Engagement]', pipeline.followup_history)
 
         completion = self.client.post(
             f'/tasks/{task.id}/complete',
@@ -159,8 +159,8 @@ class SalesActivitiesTests(unittest.TestCase):
         db.session.refresh(pipeline)
         self.assertEqual(SalesActivity.query.count(), 1)
         self.assertEqual(Task.query.count(), 1)
-        self.assertIn('Customer completed the tour and approved the facility.', lead.follow_up)
-        self.assertIn('Customer completed the tour and approved the facility.', pipeline.follow_up)
+        self.assertIn('Customer completed the tour and approved the facility.', lead.followup_history)
+        self.assertIn('Customer completed the tour and approved the facility.', pipeline.followup_history)
 
     def test_lead_followup_completes_existing_customer_visit_without_duplicate(self):
         lead = self._lead(company='Existing Lead Visit Co')
@@ -207,7 +207,7 @@ class SalesActivitiesTests(unittest.TestCase):
         self.assertEqual(activity.status, SalesActivity.STATUS_COMPLETED)
         self.assertEqual(task.status, 'Completed')
         self.assertEqual(activity.completion_notes, 'Customer confirmed the implementation schedule.')
-        self.assertIn('Customer Visit feedback: Customer confirmed the implementation schedule.', lead.follow_up)
+        self.assertIn('Customer Visit feedback: Customer confirmed the implementation schedule.', lead.followup_history)
 
     def test_pipeline_followup_completes_existing_dc_visit_and_syncs_linked_lead(self):
         lead = self._lead(company='Existing DC Visit Co')
@@ -259,8 +259,8 @@ class SalesActivitiesTests(unittest.TestCase):
         self.assertEqual(Task.query.count(), 1)
         self.assertEqual(activity.status, SalesActivity.STATUS_COMPLETED)
         self.assertEqual(task.status, 'Completed')
-        self.assertIn('DC Site Visit feedback: Customer completed the Data Center tour successfully.', lead.follow_up)
-        self.assertIn('DC Site Visit feedback: Customer completed the Data Center tour successfully.', pipeline.follow_up)
+        self.assertIn('DC Site Visit feedback: Customer completed the Data Center tour successfully.', lead.followup_history)
+        self.assertIn('DC Site Visit feedback: Customer completed the Data Center tour successfully.', pipeline.followup_history)
 
     def test_followup_types_are_limited_to_remote_engagement(self):
         lead = self._lead(company='Validation Co')
@@ -346,7 +346,7 @@ class SalesActivitiesTests(unittest.TestCase):
         self.assertEqual(activity.completion_notes, 'Remote solution review completed with customer.')
         self.assertEqual(task.status, 'Completed')
         self.assertEqual(task.completion_notes, 'Remote solution review completed with customer.')
-        self.assertIn('Remote Engagement feedback: Remote solution review completed with customer.', lead.follow_up)
+        self.assertIn('Remote Engagement feedback: Remote solution review completed with customer.', lead.followup_history)
 
     def test_legacy_task_without_sales_activity_link_still_completes(self):
         lead = self._lead(company='Legacy Task Co')
@@ -371,8 +371,8 @@ class SalesActivitiesTests(unittest.TestCase):
         self.assertEqual(task.status, 'Completed')
         self.assertIsNone(task.sales_activity_id)
         self.assertEqual(SalesActivity.query.count(), 0)
-        self.assertIn('Task completed: Legacy task created before typed activity rollout.', lead.follow_up)
-        self.assertIn('Legacy task completed without creating an activity.', lead.follow_up)
+        self.assertIn('Task completed: Legacy task created before typed activity rollout.', lead.followup_history)
+        self.assertIn('Legacy task completed without creating an activity.', lead.followup_history)
 
     def test_customer_visit_supports_cross_date_schedule_and_feedback_sync(self):
         lead = self._lead()
@@ -411,7 +411,7 @@ class SalesActivitiesTests(unittest.TestCase):
         self.assertIn('<small class="activity-schedule-end">→ 2026-07-31 01:00</small>', activity_html)
         self.assertEqual(len(activity.contacts), 2)
         self.assertEqual(task.sales_activity_id, activity.id)
-        self.assertIn('Customer Visit scheduled', lead.follow_up)
+        self.assertIn('Customer Visit scheduled', lead.followup_history)
 
         response = self.client.post(
             f'/sales-activities/{activity.id}/followup',
@@ -426,8 +426,8 @@ class SalesActivitiesTests(unittest.TestCase):
         db.session.refresh(task)
         self.assertEqual(activity.status, 'Completed')
         self.assertEqual(task.status, 'Completed')
-        self.assertIn('Customer Visit feedback: Customer approved', lead.follow_up)
-        self.assertIn('Send final migration plan.', lead.follow_up)
+        self.assertIn('Customer Visit feedback: Customer approved', lead.followup_history)
+        self.assertIn('Send final migration plan.', lead.followup_history)
         self.assertEqual(SalesActivity.query.count(), 2)
         next_step_activity = SalesActivity.query.filter_by(remote_engagement_subtype='Next Steps / To-do').one()
         self.assertEqual(next_step_activity.status, 'Scheduled')
@@ -472,7 +472,7 @@ class SalesActivitiesTests(unittest.TestCase):
         self.assertNotIn('2026-08-01 10:00', activity_html)
 
         self.assertIn('DC Site Visit follow-up', task.content)
-        self.assertIn('DC Site Visit scheduled', lead.follow_up)
+        self.assertIn('DC Site Visit scheduled', lead.followup_history)
 
         task_page = self.client.get('/tasks/')
         self.assertEqual(task_page.status_code, 200)
@@ -504,8 +504,8 @@ class SalesActivitiesTests(unittest.TestCase):
         self.assertEqual(activity.completed_by_id, self.admin_id)
         self.assertEqual(task.completed_by_id, self.admin_id)
         self.assertEqual(activity.completed_at, task.completed_at)
-        self.assertIn('Follow-up [DC Site Visit]', lead.follow_up)
-        self.assertIn('Customer approved the facility and security design.', lead.follow_up)
+        self.assertIn('Follow-up [DC Site Visit]', lead.followup_history)
+        self.assertIn('Customer approved the facility and security design.', lead.followup_history)
 
         reopen_response = self.client.post(f'/tasks/{task.id}/reopen', follow_redirects=True)
         self.assertEqual(reopen_response.status_code, 200)
@@ -1124,7 +1124,7 @@ class SalesActivitiesTests(unittest.TestCase):
         )
         db.session.add(task)
         db.session.commit()
-        original_history = lead.follow_up
+        original_history = lead.followup_history
 
         response = self.client.post(f'/sales-activities/{activity.id}/delete')
         self.assertEqual(response.status_code, 302)
@@ -1133,7 +1133,7 @@ class SalesActivitiesTests(unittest.TestCase):
         db.session.refresh(lead)
         self.assertTrue(activity.is_deleted)
         self.assertTrue(task.is_deleted)
-        self.assertEqual(lead.follow_up, original_history)
+        self.assertEqual(lead.followup_history, original_history)
         self.assertIsNotNone(DeletedRecord.query.filter_by(
             entity_type='sales_activity', entity_id=activity.id,
         ).one_or_none())
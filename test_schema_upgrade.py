@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import inspect, text
+
+from app import create_app
+from extensions import db
+from models import SchemaVersion, User
+from services.upgrade_service import DEFAULT_USERS, SCHEMA_VERSION, get_schema_version, run_upgrade
+
+
+class SchemaUpgradeTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, 'test_bitcrm.db')
+        self.ctx = None
+
+    def tearDown(self):
+        if self.ctx is not None:
+            db.session.remove()
+            self.ctx.pop()
+        self.temp_dir.cleanup()
+
+    def _create_app(self, auto_upgrade, seed_users=False):
+        db_path = self.db_path
+        temp_dir = self.temp_dir.name
+
+        class TestConfig:
+            TESTING = True
+            SECRET_KEY = 'test-secret'
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SQLALCHEMY_ENGINE_OPTIONS = {}
+            CACHE_TYPE = 'SimpleCache'
+            UPLOAD_FOLDER = os.path.join(temp_dir, 'uploads')
+            EXCEL_TEMPLATES_FOLDER = os.path.join(temp_dir, 'templates')
+            SCHEMA_AUTO_UPGRADE = auto_upgrade
+            SEED_DEFAULT_USERS = seed_users
+
+        app = create_app(TestConfig)
+        self.ctx = app.app_context()
+        self.ctx.push()
+        return app
+
+    def test_startup_auto_upgrade_records_version_without_seeding_users(self):
+        self._create_app(auto_upgrade=True)
+
+        self.assertEqual(get_schema_version(), SCHEMA_VERSION)
+        self.assertEqual(User.query.count(), 0)
+        self.assertEqual(run_upgrade(), 0)
+        self.assertEqual(SchemaVersion.query.count(), SCHEMA_VERSION)
+
+        self.assertEqual(run_upgrade(seed_users=True), 0)
+        self.assertEqual(User.query.count(), len(DEFAULT_USERS))
+        run_upgrade(seed_users=True)
+        self.assertEqual(User.query.count(), len(DEFAULT_USERS))
+
+    def test_startup_auto_upgrade_seeds_default_users_into_a_fresh_database(self):
+        self._create_app(auto_upgrade=True, seed_users=True)
+        self.assertEqual(get_schema_version(), SCHEMA_VERSION)
+        self.assertEqual(User.query.count(), len(DEFAULT_USERS))
+
+        # Later startups leave the existing accounts alone
+        db.session.delete(User.query.filter_by(username=DEFAULT_USERS[-1][0]).one())
+        db.session.commit()
+        db.session.remove()
+        self.ctx.pop()
+        self._create_app(auto_upgrade=True, seed_users=True)
+        self.assertEqual(User.query.count(), len(DEFAULT_USERS) - 1)
+
+    def test_startup_only_checks_version_and_command_upgrades_legacy_database(self):
+        with open(self.db_path, 'wb'):
+            pass
+        app = self._create_app(auto_upgrade=False)
+        self.assertNotIn('schema_versions', inspect(db.engine).get_table_names())
+        self.assertEqual(get_schema_version(), 0)
+
+        # A database created before the dashboard_filters column
+        db.session.execute(text(
+            'CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR(80) NOT NULL UNIQUE, '
+            'email VARCHAR(120), password_hash VARCHAR(256) NOT NULL, role VARCHAR(20) NOT NULL, '
+            'is_active BOOLEAN, created_at DATETIME, updated_at DATETIME, column_preferences TEXT)'
+        ))
+        db.session.execute(text(
+            "INSERT INTO users (id, username, password_hash, role) VALUES (1, 'Legacy', 'x', 'sales')"
+        ))
+        db.session.commit()
+
+        result = app.test_cli_runner().invoke(args=['bitcrm-upgrade'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn(f'schema version {SCHEMA_VERSION}', result.output)
+
+        self.assertEqual(get_schema_version(), SCHEMA_VERSION)
+        self.assertEqual(db.session.get(User, 1).dashboard_filters, '{}')
+        # Users already exist, so no default accounts are added
+        self.assertEqual([user.username for user in User.query.all()], ['Legacy'])
+
+        result = app.test_cli_runner().invoke(args=['bitcrm-upgrade'])
+        self.assertIn('(0 steps applied)', result.output)
+
+
+if __name__ == '__main__':
+    unittest.main()
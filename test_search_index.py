@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+
+from app import create_app
+from extensions import cache, db
+from models import Pipeline, SalesLead, User
+from services.search_index_service import (
+    apply_ranked_search,
+    index_records,
+    rebuild_search_index,
+    search_condition,
+)
+
+
+class SearchIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.temp_dir.name, 'test_bitcrm.db')
+
+        class TestConfig:
+            TESTING = True
+            SECRET_KEY = 'test-secret'
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SQLALCHEMY_ENGINE_OPTIONS = {}
+            CACHE_TYPE = 'SimpleCache'
+            UPLOAD_FOLDER = os.path.join(self.temp_dir.name, 'uploads')
+            EXCEL_TEMPLATES_FOLDER = os.path.join(self.temp_dir.name, 'templates')
+            DASHBOARD_CACHE_ASYNC_REFRESH = False
+
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        cache.clear()
+
+        admin = User(username='Admin', role='admin')
+        admin.set_password('bitcrm')
+        db.session.add(admin)
+        db.session.commit()
+        self.admin_id = admin.id
+
+        for company, name in [('Acme Korea', 'Kim'), ('Global ACME', 'Lee'), ('Beta Corp', 'Acme Contact'), ('XY', 'Short')]:
+            db.session.add(Pipeline(company=company, name=name, owner_id=self.admin_id, stage='1) Prospecting'))
+        db.session.add(SalesLead(company='Gamma Ltd', name='Park', owner_id=self.admin_id, event='Cloud Expo 2026'))
+        db.session.commit()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        cache.clear()
+        db.session.remove()
+        self.ctx.pop()
+        self.temp_dir.cleanup()
+
+    def _companies(self, model, term, fields=('company',)):
+        return sorted(row.company for row in model.query.filter(search_condition(model, term, fields)))
+
+    def test_fts_filter_matches_substrings_case_insensitively(self):
+        self.assertEqual(self._companies(Pipeline, 'acme'), ['Acme Korea', 'Global ACME'])
+        self.assertEqual(self._companies(Pipeline, 'acme', ('company', 'name')), ['Acme Korea', 'Beta Corp', 'Global ACME'])
+        self.assertEqual(self._companies(Pipeline, 'me Ko'), ['Acme Korea'])
+        self.assertEqual(self._companies(SalesLead, 'expo', ('event',)), ['Gamma Ltd'])
+        # Shorter than one trigram: falls back to ILIKE
+        self.assertEqual(self._companies(Pipeline, 'xy'), ['XY'])
+
+        statement = str(Pipeline.query.filter(search_condition(Pipeline, 'acme')).statement)
+        self.assertIn('pipeline_search', statement)
+
+    def test_orm_events_keep_index_in_sync(self):
+        pipeline = Pipeline.query.filter_by(company='Beta Corp').one()
+        pipeline.company = 'Acme Beta'
+        db.session.commit()
+        self.assertIn('Acme Beta', self._companies(Pipeline, 'acme'))
+
+        db.session.delete(Pipeline.query.filter_by(company='Acme Korea').one())
+        db.session.commit()
+        self.assertEqual(self._companies(Pipeline, 'acme'), ['Acme Beta', 'Global ACME'])
+
+        db.session.execute(Pipeline.__table__.insert().values(company='Acme Bulk', name='Core', owner_id=self.admin_id))
+        db.session.commit()
+        self.assertNotIn('Acme Bulk', self._companies(Pipeline, 'acme'))
+        bulk_id = db.session.query(Pipeline.id).filter_by(company='Acme Bulk').scalar()
+        index_records(Pipeline, [bulk_id])
+        db.session.commit()
+        self.assertIn('Acme Bulk', self._companies(Pipeline, 'acme'))
+        self.assertEqual(rebuild_search_index(), 5)
+
+    def test_typeahead_ranks_best_matches_first(self):
+        query = apply_ranked_search(Pipeline.query, Pipeline, 'acme korea', ('company', 'name'))
+        self.assertEqual([row.company for row in query], ['Acme Korea'])
+
+        ranked = apply_ranked_search(Pipeline.query, Pipeline, 'acme', ('company', 'name')).order_by(Pipeline.id).all()
+        self.assertEqual(len(ranked), 3)
+
+        self.client.post('/login', data={'username': 'Admin', 'password': 'bitcrm'})
+        response = self.client.get('/sales-activities/source-search?source_type=Pipeline&q=ACME')
+        self.assertEqual({item['company'] for item in response.get_json()['items']}, {'Acme Korea', 'Global ACME', 'Beta Corp'})
+        response = self.client.get('/sales-activities/source-search?source_type=Event&q=cloud')
+        self.assertEqual([item['status'] for item in response.get_json()['items']], ['Cloud Expo 2026'])
+
+
+if __name__ == '__main__':
+    unittest.main()
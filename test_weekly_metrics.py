@@ -0,0 +1,442 @@
+import os
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta
+from unittest import mock
+
+from sqlalchemy import event
+
+from app import create_app
+from extensions import db
+from models import MetricsJob, Pipeline, PipelineRevenueMonth, SalesLead, User, WeeklyMetrics
+from services import metrics_job_service, weekly_metrics_service
+from services.metrics_job_service import process_metrics_jobs
+from services.revenue_ledger_service import (
+    get_ledger_horizon,
+    get_period_revenue,
+    get_quarterly_revenue,
+    rebuild_revenue_ledger,
+)
+from services.weekly_metrics_service import (
+    apply_weekly_metrics_deltas,
+    compute_all_weekly_metrics,
+    compute_company_metrics,
+    compute_owner_metrics,
+    get_owner_dashboard_metrics,
+    get_week_start,
+    rebuild_weekly_metrics,
+    reconcile_weekly_metrics,
+)
+from utils import (
+    calculate_pipeline_metrics,
+    calculate_quarter_revenue,
+    get_quarter_dates,
+)
+
+
+class WeeklyMetricsDeltaTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.temp_dir.name, 'test_bitcrm.db')
+
+        class TestConfig:
+            TESTING = True
+            SECRET_KEY = 'test-secret'
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+            SQLALCHEMY_TRACK_MODIFICATIONS = False
+            SQLALCHEMY_ENGINE_OPTIONS = {}
+            CACHE_TYPE = 'SimpleCache'
+            UPLOAD_FOLDER = os.path.join(self.temp_dir.name, 'uploads')
+            EXCEL_TEMPLATES_FOLDER = os.path.join(self.temp_dir.name, 'templates')
+
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+
+        alice = User(username='Alice', role='sales')
+        alice.set_password('pw')
+        bob = User(username='Bob', role='sales')
+        bob.set_password('pw')
+        db.session.add_all([alice, bob])
+        db.session.commit()
+
+        self.alice_id = alice.id
+        self.bob_id = bob.id
+        weekly_metrics_service.refresh_weekly_metrics()
+
+    def tearDown(self):
+        db.session.remove()
+        self.ctx.pop()
+        self.temp_dir.cleanup()
+
+    def _snapshot(self, owner_id):
+        db.session.expire_all()
+        return WeeklyMetrics.query.filter_by(owner_id=owner_id, week_start=get_week_start(date.today())).first()
+
+    def test_lead_status_change_applies_delta_without_full_refresh(self):
+        lead = SalesLead(name='Delta Lead', owner_id=self.alice_id, leads_status='Waiting to be Contacted')
+        db.session.add(lead)
+        db.session.commit()
+
+        with mock.patch.object(weekly_metrics_service, 'refresh_weekly_metrics') as refresh:
+            lead.leads_status = 'Qualified'
+            db.session.commit()
+            refresh.assert_not_called()
+
+        owner_row = self._snapshot(self.alice_id)
+        company_row = self._snapshot(None)
+        self.assertEqual(owner_row.leads_count, 1)
+        self.assertEqual(owner_row.qualified_leads_count, 1)
+        self.assertEqual(company_row.qualified_leads_count, 1)
+
+        lead.leads_status = 'Unqualified'
+        db.session.commit()
+        owner_row = self._snapshot(self.alice_id)
+        self.assertEqual(owner_row.leads_count, 0)
+        self.assertEqual(owner_row.qualified_leads_count, 0)
+
+    def test_pipeline_value_change_soft_delete_and_reassignment(self):
+        pipeline = Pipeline(name='Deal', owner_id=self.alice_id, stage='1) Prospecting', tcv_usd=1000)
+        db.session.add(pipeline)
+        db.session.commit()
+        self.assertEqual(self._snapshot(self.alice_id).tcv, 1000)
+        self.assertEqual(self._snapshot(self.alice_id).pipeline_count, 1)
+
+        pipeline.tcv_usd = 1500
+        db.session.commit()
+        self.assertEqual(self._snapshot(self.alice_id).tcv, 1500)
+        self.assertEqual(self._snapshot(None).tcv, 1500)
+
+        pipeline.owner_id = self.bob_id
+        db.session.commit()
+        self.assertEqual(self._snapshot(self.alice_id).tcv, 0)
+        self.assertEqual(self._snapshot(self.bob_id).tcv, 1500)
+        self.assertEqual(self._snapshot(None).pipeline_count, 1)
+
+        pipeline.is_deleted = True
+        db.session.commit()
+        self.assertEqual(self._snapshot(self.bob_id).pipeline_count, 0)
+        self.assertEqual(self._snapshot(None).tcv, 0)
+
+    def test_reconcile_repairs_drift(self):
+        db.session.add(SalesLead(name='Drift Lead', owner_id=self.alice_id, leads_status='Qualified'))
+        db.session.commit()
+
+        owner_row = self._snapshot(self.alice_id)
+        owner_row.leads_count = 42
+        db.session.commit()
+
+        drift = reconcile_weekly_metrics()
+        self.assertIn(self.alice_id, drift)
+        self.assertEqual(drift[self.alice_id]['leads_count'], {'stored': 42, 'actual': 1})
+        self.assertEqual(self._snapshot(self.alice_id).leads_count, 1)
+        self.assertEqual(reconcile_weekly_metrics(), {})
+
+    def test_fractional_amounts_do_not_drift_between_deltas_and_rebuild(self):
+        pipelines = [
+            Pipeline(name=f'Fraction {n}', owner_id=self.alice_id, stage='1) Prospecting', tcv_usd=999.7)
+            for n in range(3)
+        ]
+        for pipeline in pipelines:
+            db.session.add(pipeline)
+            db.session.commit()
+
+        self.assertAlmostEqual(self._snapshot(self.alice_id).tcv, 2999.1)
+        owner_metrics = {row['user_id']: row for row in get_owner_dashboard_metrics()}
+        self.assertEqual(owner_metrics[self.alice_id]['tcv'], 2999)
+        self.assertEqual(reconcile_weekly_metrics(), {})
+
+    def test_revenue_deltas_follow_the_ledger_rows(self):
+        current_qtr = get_quarter_dates(date.today())
+        pipeline = Pipeline(
+            name='Ledger Delta', owner_id=self.alice_id, stage='3) Proposal',
+            mrc_usd=1000.5, otc_usd=250, contract_term_yrs=1, gp_margin=0.4,
+            est_act_date=current_qtr[0] + timedelta(days=9),
+        )
+        calculate_pipeline_metrics(pipeline)
+        db.session.add(pipeline)
+        db.session.commit()
+        ledger = get_period_revenue(*current_qtr)
+        self.assertGreater(ledger, 0)
+        self.assertAlmostEqual(self._snapshot(self.alice_id).current_qtr_revenue, ledger, places=6)
+
+        # Editing the amount without recalculating leaves the ledger, and so the snapshot, unchanged
+        pipeline.mrc_usd = 5000
+        db.session.commit()
+        self.assertAlmostEqual(self._snapshot(self.alice_id).current_qtr_revenue, ledger, places=6)
+
+        calculate_pipeline_metrics(pipeline)
+        db.session.commit()
+        ledger = get_period_revenue(*current_qtr)
+        self.assertAlmostEqual(self._snapshot(self.alice_id).current_qtr_revenue, ledger, places=6)
+
+        pipeline.owner_id = self.bob_id
+        db.session.commit()
+        self.assertAlmostEqual(self._snapshot(self.alice_id).current_qtr_revenue, 0, places=6)
+        self.assertAlmostEqual(self._snapshot(self.bob_id).current_qtr_revenue, ledger, places=6)
+        self.assertEqual(reconcile_weekly_metrics(), {})
+
+        # An edit that moves the deal and rewrites its ledger in the same commit
+        pipeline.owner_id = self.alice_id
+        pipeline.mrc_usd = 2000
+        pipeline.est_act_date = current_qtr[0] + timedelta(days=40)
+        calculate_pipeline_metrics(pipeline)
+        db.session.commit()
+        ledger = get_period_revenue(*current_qtr)
+        self.assertAlmostEqual(self._snapshot(self.bob_id).current_qtr_revenue, 0, places=6)
+        self.assertAlmostEqual(self._snapshot(self.alice_id).current_qtr_revenue, ledger, places=6)
+        self.assertEqual(reconcile_weekly_metrics(), {})
+
+        pipeline.is_deleted = True
+        db.session.commit()
+        self.assertAlmostEqual(self._snapshot(self.alice_id).next_qtr_revenue, 0, places=6)
+        pipeline.is_deleted = False
+        db.session.commit()
+
+        db.session.delete(pipeline)
+        db.session.commit()
+        self.assertAlmostEqual(self._snapshot(None).current_qtr_revenue, 0, places=6)
+        self.assertEqual(reconcile_weekly_metrics(), {})
+
+    def test_customer_count_is_recounted_and_read_from_snapshot(self):
+        first = Pipeline(name='First', owner_id=self.alice_id, company='Acme', stage='1) Prospecting')
+        second = Pipeline(name='Second', owner_id=self.alice_id, company='Acme', stage='1) Prospecting')
+        db.session.add_all([first, second])
+        db.session.commit()
+        self.assertEqual(self._snapshot(self.alice_id).customer_count, 1)
+
+        second.company = 'Beta'
+        db.session.commit()
+        self.assertEqual(self._snapshot(self.alice_id).customer_count, 2)
+        self.assertEqual(self._snapshot(None).customer_count, 2)
+
+        first.stage = '6b) Deal Lost'
+        db.session.commit()
+        self.assertEqual(self._snapshot(self.alice_id).customer_count, 1)
+
+        # A customer change without an owner still recounts the company row
+        company_row = self._snapshot(None)
+        company_row.customer_count = 99
+        db.session.commit()
+        apply_weekly_metrics_deltas({}, customer_owner_ids={None})
+        self.assertEqual(self._snapshot(None).customer_count, 1)
+
+        with mock.patch.object(weekly_metrics_service, 'compute_owner_metrics') as compute:
+            metrics = {item['user_id']: item for item in get_owner_dashboard_metrics()}
+            compute.assert_not_called()
+        self.assertEqual(metrics[self.alice_id]['customer_count'], 1)
+        self.assertEqual(metrics[self.bob_id]['customer_count'], 0)
+
+    def test_grouped_rebuild_matches_per_owner_metrics(self):
+        db.session.add_all([
+            SalesLead(name='L1', owner_id=self.alice_id, leads_status='Qualified'),
+            SalesLead(name='L2', owner_id=self.alice_id, leads_status='Unqualified'),
+            SalesLead(name='L3', owner_id=self.bob_id, leads_status='Waiting to be Contacted'),
+            SalesLead(name='L4', owner_id=None, leads_status='Qualified'),
+            Pipeline(name='P1', owner_id=self.alice_id, company='Acme', stage='1) Prospecting',
+                     tcv_usd=1200.5, mrc_usd=100.25, otc_usd=50, est_act_date=date.today()),
+            Pipeline(name='P2', owner_id=self.alice_id, company='Acme', stage='2) Qualification', tcv_usd=300),
+            Pipeline(name='P3', owner_id=self.bob_id, company='Beta', stage='6b) Deal Lost', tcv_usd=999),
+            Pipeline(name='P4', owner_id=self.bob_id, company='Gamma', stage='6a) Deal Won',
+                     tcv_usd=800, mrc_usd=33.3, est_act_date=date(date.today().year, 1, 15)),
+        ])
+        db.session.commit()
+
+        owner_metrics, company_metrics = compute_all_weekly_metrics(db.session)
+        for owner_id in (self.alice_id, self.bob_id):
+            self.assertEqual(owner_metrics[owner_id], compute_owner_metrics(owner_id, db.session))
+        expected_company = compute_company_metrics(db.session)
+        for key, value in expected_company.items():
+            self.assertEqual(company_metrics[key], value)
+        self.assertEqual(company_metrics['customer_count'], 2)
+
+        rebuild_weekly_metrics()
+        self.assertEqual(self._snapshot(self.alice_id).tcv, owner_metrics[self.alice_id]['tcv'])
+        self.assertEqual(self._snapshot(None).leads_count, 3)
+        self.assertEqual(
+            WeeklyMetrics.query.filter_by(owner_id=None, week_start=get_week_start(date.today())).count(), 1
+        )
+
+        restricted_owners, restricted_company = compute_all_weekly_metrics(db.session, owner_ids=[self.alice_id])
+        self.assertEqual(restricted_owners, {self.alice_id: owner_metrics[self.alice_id]})
+        self.assertEqual(restricted_company, company_metrics)
+
+
+    def test_deferred_mode_enqueues_jobs_for_the_worker(self):
+        self.app.config['WEEKLY_METRICS_MODE'] = 'deferred'
+        self.app.config['METRICS_JOB_COALESCE_SECONDS'] = 0
+
+        lead = SalesLead(name='Queued Lead', owner_id=self.alice_id, leads_status='Qualified')
+        db.session.add(lead)
+        db.session.commit()
+        lead.leads_status = 'Waiting to be Contacted'
+        db.session.commit()
+
+        self.assertEqual(MetricsJob.query.filter_by(owner_id=self.alice_id).count(), 2)
+        self.assertEqual(self._snapshot(self.alice_id).leads_count, 0)
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            result = process_metrics_jobs()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        self.assertEqual(result, {'jobs': 2, 'owners': 1, 'failed': 0})
+        # Only the claimed owner is grouped; other owners' leads are never read
+        grouped = [statement for statement in statements if 'GROUP BY sales_leads.owner_id' in statement]
+        self.assertEqual(len(grouped), 1)
+        self.assertIn('sales_leads.owner_id IN', grouped[0])
+        self.assertEqual(MetricsJob.query.count(), 0)
+        self.assertEqual(self._snapshot(self.alice_id).leads_count, 1)
+        self.assertEqual(self._snapshot(self.alice_id).qualified_leads_count, 0)
+
+    def test_failed_jobs_are_retried_then_marked_failed(self):
+        self.app.config['WEEKLY_METRICS_MODE'] = 'deferred'
+        self.app.config['METRICS_JOB_COALESCE_SECONDS'] = 0
+        self.app.config['METRICS_JOB_MAX_ATTEMPTS'] = 2
+
+        db.session.add(SalesLead(name='Retry Lead', owner_id=self.bob_id, leads_status='Qualified'))
+        db.session.commit()
+
+        with mock.patch.object(weekly_metrics_service, 'rebuild_weekly_metrics', side_effect=RuntimeError('boom')):
+            self.assertEqual(process_metrics_jobs()['failed'], 0)
+            job = MetricsJob.query.one()
+            self.assertEqual((job.status, job.attempts, job.last_error), ('pending', 1, 'boom'))
+
+            job.available_at = job.created_at
+            db.session.commit()
+            self.assertEqual(process_metrics_jobs()['failed'], 1)
+            self.assertEqual(MetricsJob.query.one().status, 'failed')
+
+    def test_claim_skips_jobs_taken_by_another_worker(self):
+        self.app.config['WEEKLY_METRICS_MODE'] = 'deferred'
+        self.app.config['METRICS_JOB_COALESCE_SECONDS'] = 0
+
+        for name in ('Claim A', 'Claim B'):
+            db.session.add(SalesLead(name=name, owner_id=self.alice_id, leads_status='Qualified'))
+            db.session.commit()
+        first_id, second_id = [job.id for job in MetricsJob.query.order_by(MetricsJob.id).all()]
+
+        for update_returning in (True, False):
+            with self.subTest(update_returning=update_returning):
+                MetricsJob.query.update({'status': 'pending', 'locked_at': None})
+                db.session.commit()
+                taken = []
+
+                def steal(conn, cursor, statement, parameters, context, executemany):
+                    # Another worker claims the second job between our SELECT and UPDATE
+                    if statement.startswith('UPDATE metrics_jobs') and not taken:
+                        taken.append(second_id)
+                        cursor.execute(
+                            "UPDATE metrics_jobs SET status = 'running', locked_at = ? WHERE id = ?",
+                            (datetime.utcnow().isoformat(' '), second_id),
+                        )
+
+                event.listen(db.engine, 'before_cursor_execute', steal)
+                try:
+                    with mock.patch.object(db.engine.dialect, 'update_returning', update_returning):
+                        jobs = metrics_job_service._claim_jobs(batch_size=10, coalesce_seconds=0)
+                finally:
+                    event.remove(db.engine, 'before_cursor_execute', steal)
+
+                self.assertEqual(taken, [second_id])
+                self.assertEqual([job.id for job in jobs], [first_id])
+
+    def test_disabled_mode_skips_snapshot_updates(self):
+        self.app.config['WEEKLY_METRICS_MODE'] = 'disabled'
+        db.session.add(SalesLead(name='Ignored Lead', owner_id=self.alice_id, leads_status='Qualified'))
+        db.session.commit()
+
+        self.assertEqual(self._snapshot(self.alice_id).leads_count, 0)
+        self.assertEqual(MetricsJob.query.count(), 0)
+
+    def test_revenue_ledger_follows_pipeline_changes(self):
+        ref_date = date(2024, 5, 10)
+        pipeline = Pipeline(
+            name='Ledger Deal', owner_id=self.alice_id, product='Fiber', stage='3) Proposal',
+            mrc_usd=3000, otc_usd=500, contract_term_yrs=1, gp_margin=0.4,
+            est_act_date=date(2024, 4, 11),
+        )
+        calculate_pipeline_metrics(pipeline, ref_date)
+        db.session.add(pipeline)
+        db.session.commit()
+
+        rows = PipelineRevenueMonth.query.filter_by(pipeline_id=pipeline.id).order_by(PipelineRevenueMonth.month_start).all()
+        self.assertEqual(rows[0].month_start, date(2024, 4, 1))
+        self.assertEqual(rows[-1].month_start, date(2027, 4, 1))
+        self.assertEqual({(row.owner_id, row.stage, row.product) for row in rows}, {(self.alice_id, '3) Proposal', 'Fiber')})
+
+        quarter = get_quarter_dates(ref_date)
+        revenue = get_period_revenue(*quarter, reference_date=ref_date)
+        self.assertEqual(int(revenue), calculate_quarter_revenue([pipeline], *quarter))
+        self.assertEqual(get_period_revenue(*quarter, group_by='owner_id', reference_date=ref_date), {self.alice_id: revenue})
+        self.assertEqual(len(get_quarterly_revenue(ref_date, quarters=8)), 8)
+
+        pipeline.owner_id = self.bob_id
+        pipeline.stage = '6b) Deal Lost'
+        db.session.commit()
+        self.assertEqual(get_period_revenue(*quarter, reference_date=ref_date), 0)
+        self.assertEqual(PipelineRevenueMonth.query.filter_by(owner_id=self.bob_id).count(), len(rows))
+
+        pipeline.stage = '3) Proposal'
+        pipeline.est_act_date = None
+        calculate_pipeline_metrics(pipeline, ref_date)
+        db.session.commit()
+        self.assertEqual(PipelineRevenueMonth.query.filter_by(pipeline_id=pipeline.id).count(), 0)
+
+    def test_revenue_ledger_is_bounded_to_its_horizon(self):
+        ref_date = date(2024, 5, 10)
+        pipeline = Pipeline(
+            name='Old Deal', owner_id=self.alice_id, stage='6a) Deal Won',
+            mrc_usd=100, otc_usd=50, contract_term_yrs=1, gp_margin=0.4,
+            est_act_date=date(2012, 3, 15),
+        )
+        calculate_pipeline_metrics(pipeline, ref_date)
+        db.session.add(pipeline)
+        db.session.commit()
+
+        horizon_start, horizon_end = get_ledger_horizon(ref_date)
+        self.assertEqual((horizon_start, horizon_end), (date(2023, 5, 1), date(2027, 4, 1)))
+        months = [row.month_start for row in pipeline.revenue_months]
+        self.assertEqual((months[0], months[-1], len(months)), (horizon_start, horizon_end, 48))
+        self.assertEqual(get_period_revenue(*get_quarter_dates(ref_date), reference_date=ref_date), 300)
+
+        with self.assertRaises(ValueError):
+            get_period_revenue(date(2023, 1, 1), date(2023, 6, 30), reference_date=ref_date)
+        with self.assertRaises(ValueError):
+            get_period_revenue(date(2027, 4, 1), date(2027, 6, 30), reference_date=ref_date)
+        with self.assertRaises(ValueError):
+            get_quarterly_revenue(ref_date, quarters=13)
+
+    def test_ledger_rebuild_loads_months_per_batch(self):
+        for index in range(5):
+            pipeline = Pipeline(
+                name=f'Batch Deal {index}', owner_id=self.alice_id, stage='3) Proposal',
+                mrc_usd=100, otc_usd=0, contract_term_yrs=1, gp_margin=0.4,
+                est_act_date=date.today(),
+            )
+            calculate_pipeline_metrics(pipeline)
+            db.session.add(pipeline)
+        db.session.commit()
+        db.session.expire_all()
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            self.assertEqual(rebuild_revenue_ledger(batch_size=2), 5)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        ledger_selects = [s for s in statements if s.startswith('SELECT') and 'FROM pipeline_revenue_month' in s]
+        self.assertEqual(len(ledger_selects), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
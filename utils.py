@@ -2,8 +2,6 @@
 BITCRM Utility Functions
 Helper functions for Excel import/export, calculations, and date utilities.
 """
-import pandas as pd
-import openpyxl
 from datetime import datetime, date
 from flask import flash
 from io import BytesIO
@@ -128,6 +126,8 @@ def validate_integer(value, field_name):
 
 def create_excel_template(columns, filename):
     """Create an Excel template file."""
+    import pandas as pd
+
     df = pd.DataFrame(columns=columns)
     
     output = BytesIO()
@@ -140,6 +140,8 @@ def create_excel_template(columns, filename):
 
 def export_to_excel(data, columns, filename):
     """Export data to Excel file."""
+    import pandas as pd
+
     if not data:
         df = pd.DataFrame(columns=columns)
     else:
@@ -155,6 +157,8 @@ def export_to_excel(data, columns, filename):
 
 def import_from_excel(file_stream):
     """Import data from Excel file."""
+    import pandas as pd
+
     try:
         # Read Excel, keeping dates as-is (they may be datetime objects or numbers)
         df = pd.read_excel(file_stream)
@@ -206,166 +210,6 @@ def excel_date_to_date(val):
     return None
 
 
-def validate_sales_lead_import(row):
-    """Validate a single sales lead import row."""
-    errors = []
-    
-    # Required fields (key is already normalized to lowercase with underscores)
-    if not row.get('name'):
-        errors.append("Name is required")
-    
-    # Validate status - 支持大小写不敏感匹配
-    valid_statuses_lower = {
-        'qualified': 'Qualified',
-        'waiting for response': 'Waiting for Response',
-        'unqualified': 'Unqualified',
-        'waiting to be contacted': 'Waiting to be Contacted'
-    }
-    status = row.get('leads_status', '')
-    # Ensure status is a string for comparison
-    if status and not isinstance(status, str):
-        status = str(status)
-    if status:
-        status_lower = status.strip().lower()
-        if status_lower in valid_statuses_lower:
-            # 自动转换为正确的格式
-            row['leads_status'] = valid_statuses_lower[status_lower]
-        else:
-            errors.append(f"Invalid status '{status}'. Must be one of: {', '.join(valid_statuses_lower.values())}")
-    
-    # Validate source - 支持大小写不敏感匹配，处理多值情况
-    valid_sources_lower = {
-        'website': 'Website',
-        'referral': 'Referral',
-        'email campaign': 'Email Campaign',
-        'social media': 'Social Media',
-        'event': 'Event',
-        'trade show': 'Trade Show',
-        'advertisement': 'Advertisement',
-        'partner': 'Partner',
-        'direct inquiry': 'Direct Inquiry'
-    }
-    source = row.get('source', '')
-    if source and not isinstance(source, str):
-        source = str(source)
-    if source:
-        source_clean = source.strip()
-        source_lower = source_clean.lower()
-        
-        # 检查是否包含斜杠的多值情况（如 'Event/Trade Show'）
-        if '/' in source_clean:
-            # 取第一个值
-            first_source = source_clean.split('/')[0].strip()
-            first_source_lower = first_source.lower()
-            if first_source_lower in valid_sources_lower:
-                row['source'] = valid_sources_lower[first_source_lower]
-            else:
-                errors.append(f"Invalid source '{source}'. Must be one of: {', '.join(valid_sources_lower.values())}")
-        elif source_lower in valid_sources_lower:
-            # 自动转换为正确的格式
-            row['source'] = valid_sources_lower[source_lower]
-        else:
-            errors.append(f"Invalid source '{source}'. Must be one of: {', '.join(valid_sources_lower.values())}")
-    
-    # Validate date
-    if row.get('date_added'):
-        date_val = validate_date(row.get('date_added'))
-        if not date_val:
-            errors.append(f"Invalid date format '{row.get('date_added')}'. Supported formats: YYYY-MM-DD (2025-03-28), YYYY/MM/DD, Jan 1, 2024, etc.")
-        else:
-            row['date_added'] = date_val
-    
-    # Validate email
-    if row.get('email') and not validate_email(row.get('email')):
-        errors.append(f"Invalid email format '{row.get('email')}'")
-
-    requirements = row.get('requirements')
-    if requirements and len(str(requirements).strip()) > 200:
-        errors.append('Requirements must be 200 characters or fewer')
-    
-    return errors
-
-
-def validate_pipeline_import(row):
-    """Validate a single pipeline import row."""
-    errors = []
-    
-    # Name is optional
-    # if not row.get('Name'):
-    #     errors.append("Name is required")
-    
-    # Validate stage
-    valid_stages = ['1) Prospecting', '2) Lead Qualified', '3) Demo/Meeting',
-                    '4) Proposal Submitted', '5) Negotiation', '6a) Deal Won',
-                    '6b) Deal Lost', '7) Activated']
-    stage = row.get('Stage', '')
-    # Ensure stage is a string for comparison
-    if stage and not isinstance(stage, str):
-        stage = str(stage)
-    if stage and stage not in valid_stages:
-        errors.append(f"Invalid stage '{stage}'. Must be one of: {', '.join(valid_stages)}")
-    
-    # Validate level
-    valid_levels = ['Committed', 'Stretch']
-    level = row.get('Level', '')
-    # Ensure level is a string for comparison
-    if level and not isinstance(level, str):
-        level = str(level)
-    if level and level not in valid_levels:
-        errors.append(f"Invalid level '{level}'. Must be one of: {', '.join(valid_levels)}")
-    
-    # Validate dates
-    for date_field in ['Est. Sign Date', 'Est. Act. Date', 'Award Date', 'Proposal Sent Date']:
-        if row.get(date_field):
-            date_val = validate_date(row.get(date_field))
-            if not date_val:
-                errors.append(f"Invalid date format '{row.get(date_field)}' for {date_field}")
-            else:
-                row[date_field] = date_val
-    
-    # Validate numeric fields
-    numeric_fields = ['TCV USD', 'MRC USD', 'OTC USD']
-    for field in numeric_fields:
-        if row.get(field):
-            try:
-                val = validate_numeric(row.get(field), field)
-                row[field] = val
-            except ValueError as e:
-                errors.append(str(e))
-
-    if row.get('Contract Term (Yrs)'):
-        try:
-            row['Contract Term (Yrs)'] = validate_integer(row.get('Contract Term (Yrs)'), 'Contract Term (Yrs)')
-        except ValueError as e:
-            errors.append(str(e))
-    
-    # Validate GP Margin (percentage)
-    if row.get('GP Margin'):
-        try:
-            margin = float(str(row.get('GP Margin')).replace('%', '').replace(',', ''))
-            if margin < 0 or margin > 1:
-                errors.append("GP Margin must be between 0 and 1 (or 0% to 100%)")
-            else:
-                row['GP Margin'] = margin
-        except ValueError:
-            errors.append("GP Margin must be a valid number")
-    
-    # Validate Win Rate (percentage, 5% multiples)
-    if row.get('Win Rate'):
-        try:
-            win_rate = float(str(row.get('Win Rate')).replace('%', '').replace(',', ''))
-            if win_rate < 0 or win_rate > 100:
-                errors.append("Win Rate must be between 0 and 100")
-            elif win_rate % 5 != 0:
-                errors.append("Win Rate must be in 5% multiples (0, 5, 10, ..., 100)")
-            else:
-                row['Win Rate'] = win_rate / 100
-        except ValueError:
-            errors.append("Win Rate must be a valid number")
-    
-    return errors
-
-
 def get_forecast_base_month(reference_date=None):
     """Get the first day of the rolling forecast month."""
     if reference_date is None:
@@ -451,6 +295,10 @@ def calculate_pipeline_metrics(pipeline, reference_date=None):
         pipeline.mg = 'D'
 
     calculate_pipeline_forecast(pipeline, reference_date)
+
+    # 同步月度收入台账（pipeline_revenue_month）
+    from services.revenue_ledger_service import sync_pipeline_revenue_ledger
+    sync_pipeline_revenue_ledger(pipeline, reference_date)
     
     return pipeline
 
@@ -600,6 +448,62 @@ def get_months_between(start_date, end_date):
     return months
 
 
+def calculate_pipeline_quarter_revenue(pipeline, quarter_start, quarter_end):
+    """
+    计算单个 Pipeline 在指定季度的收入（不取整）
+
+    Args:
+        pipeline: Pipeline 对象（或具有 stage/est_act_date/mrc_usd/otc_usd 属性的对象）
+        quarter_start: 季度开始日期
+        quarter_end: 季度结束日期
+
+    Returns:
+        tuple: (otc, mrc) 两部分收入
+    """
+    otc = 0
+    mrc_total = 0
+
+    # 跳过 Deal Lost
+    if pipeline.stage == '6b) Deal Lost':
+        return otc, mrc_total
+
+    # OTC 计算：activation_date 落在季度内才累加
+    if pipeline.est_act_date and quarter_start <= pipeline.est_act_date <= quarter_end:
+        otc += pipeline.otc_usd or 0
+
+    # MRC 计算：按月分摊
+    if not pipeline.est_act_date:
+        return otc, mrc_total
+
+    mrc = pipeline.mrc_usd or 0
+    if mrc == 0:
+        return otc, mrc_total
+
+    # 遍历季度的3个月
+    current_month = quarter_start
+    while current_month <= quarter_end:
+        month_start = date(current_month.year, current_month.month, 1)
+        month_end = date(
+            current_month.year,
+            current_month.month,
+            calendar.monthrange(current_month.year, current_month.month)[1]
+        )
+
+        if pipeline.est_act_date < month_start:
+            # 激活日期在月初之前：当月全额确认
+            mrc_total += mrc
+        elif month_start <= pipeline.est_act_date <= month_end:
+            # 激活日期在该月内：按比例确认
+            days_in_month = (month_end - month_start).days + 1
+            activated_days = month_end.day - pipeline.est_act_date.day + 1
+            mrc_total += mrc * (activated_days / days_in_month)
+        # 激活日期在月之后：当月确认 0（不处理）
+
+        current_month = month_end + timedelta(days=1)
+
+    return otc, mrc_total
+
+
 def calculate_quarter_revenue(pipelines, quarter_start, quarter_end):
     """
     计算指定季度的收入
@@ -617,48 +521,12 @@ def calculate_quarter_revenue(pipelines, quarter_start, quarter_end):
     Returns:
         int: 季度总收入（整数）
     """
-    import calendar
-    
     total_otc = 0
     total_mrc = 0
     
     for p in pipelines:
-        # 跳过 Deal Lost
-        if p.stage == '6b) Deal Lost':
-            continue
-        
-        # OTC 计算：activation_date 落在季度内才累加
-        if p.est_act_date and quarter_start <= p.est_act_date <= quarter_end:
-            total_otc += p.otc_usd or 0
-        
-        # MRC 计算：按月分摊
-        if not p.est_act_date:
-            continue
-        
-        mrc = p.mrc_usd or 0
-        if mrc == 0:
-            continue
-        
-        # 遍历季度的3个月
-        current_month = quarter_start
-        while current_month <= quarter_end:
-            month_start = date(current_month.year, current_month.month, 1)
-            month_end = date(
-                current_month.year,
-                current_month.month,
-                calendar.monthrange(current_month.year, current_month.month)[1]
-            )
-            
-            if p.est_act_date < month_start:
-                # 激活日期在月初之前：当月全额确认
-                total_mrc += mrc
-            elif month_start <= p.est_act_date <= month_end:
-                # 激活日期在该月内：按比例确认
-                days_in_month = (month_end - month_start).days + 1
-                activated_days = month_end.day - p.est_act_date.day + 1
-                total_mrc += mrc * (activated_days / days_in_month)
-            # 激活日期在月之后：当月确认 0（不处理）
-            
-            current_month = month_end + timedelta(days=1)
+        otc, mrc = calculate_pipeline_quarter_revenue(p, quarter_start, quarter_end)
+        total_otc += otc
+        total_mrc += mrc
     
     return int(total_otc + total_mrc)
@@ -0,0 +1,171 @@
+"""
+EXPLAIN the hot list/log queries and fail if any still scans a whole table,
+or sorts rows that an index should already return in order.
+
+Each query is built with the same helpers and filters as the page in
+routes.py, compiled with literal values and EXPLAINed against the configured
+database (DATABASE_URL / FLASK_CONFIG_CLASS, like the app itself):
+
+- PostgreSQL: ``EXPLAIN (FORMAT JSON)`` with ``enable_seqscan = off``, so a
+  ``Seq Scan`` node means no usable index exists, not that the table is small;
+  a ``Sort`` / ``Incremental Sort`` node is a sort
+- SQLite: ``EXPLAIN QUERY PLAN``; a bare ``SCAN <table>`` (no index) fails, and
+  ``USE TEMP B-TREE`` is a sort
+
+Sorts fail only for the queries marked index-ordered (the unfiltered list
+pages, kanban columns and activity logs, which read the first rows of a large
+ordered set). Per-owner lists, tasks and activities sort one owner's rows.
+
+Run after `flask bitcrm-upgrade`:
+    python verify_query_indexes.py            # exit status 1 if any query seq-scans or sorts
+    python verify_query_indexes.py --verbose  # also print every plan
+"""
+import argparse
+import json
+import re
+import sys
+from datetime import date, timedelta
+
+
+HOT_TABLES = ('sales_leads', 'pipeline', 'pipeline_support', 'pipeline_visibility', 'tasks', 'sales_activities', 'activity_logs')
+
+
+def _hot_queries(user_id):
+    """(name, query, index_ordered) triples mirroring the filters and sort order of the busiest pages."""
+    import routes
+    from models import ActivityLog, Pipeline, SalesActivity, SalesLead, Task, User
+
+    user = User(id=user_id, role='sales')
+    leads_filters = {'show_unqualified': False, 'company_filter': '', 'status_filters': [],
+                     'source_filters': [], 'owner_filter_ids': []}
+    pipeline_filters = {'show_lost': False, 'company_filter': '', 'stage_filters': [], 'level_filter': None,
+                        'owner_filter_ids': [], 'est_sign_quarters': [], 'est_activate_quarters': []}
+    leads_order = [key.order_by() for key in routes._get_leads_sort_keys('date_added', 'desc')]
+    pipeline_order = [key.order_by() for key in routes._get_pipeline_sort_keys('date_added', 'desc')]
+    today = date.today()
+
+    leads = routes._apply_leads_filters(SalesLead.query.filter(SalesLead.is_deleted.is_(False)), leads_filters)
+    pipelines = routes._apply_pipeline_filters(Pipeline.query.filter(Pipeline.is_deleted.is_(False)), pipeline_filters)
+    own_pipelines = routes._apply_pipeline_filters(routes._get_pipeline_access_query(user), pipeline_filters)
+    tasks = Task.query.filter(Task.is_deleted.is_(False))
+    activities = SalesActivity.query.filter(SalesActivity.is_deleted.is_(False))
+    return [
+        ('leads list', leads.order_by(*leads_order).limit(100), True),
+        ('leads list (own)', leads.filter(SalesLead.owner_id == user_id).order_by(*leads_order).limit(100), False),
+        ('leads status counts (own)', leads.filter(SalesLead.owner_id == user_id)
+            .with_entities(SalesLead.leads_status, routes.func.count(SalesLead.id)).group_by(SalesLead.leads_status),
+            False),
+        ('pipeline list', pipelines.order_by(*pipeline_order).limit(100), True),
+        ('pipeline list (own and supported)', own_pipelines.order_by(*pipeline_order).limit(100), False),
+        ('pipeline kanban column (own)', Pipeline.query.filter(
+            Pipeline.is_deleted.is_(False), Pipeline.owner_id.in_([user_id]), Pipeline.stage == '1) Prospecting',
+        ).order_by(Pipeline.id.desc()).limit(21), True),
+        ('tasks (own)', tasks.filter(Task.owner_id == user_id).order_by(Task.due_date.asc().nullsfirst(), Task.status),
+            False),
+        ('tasks due soon', tasks.filter(Task.due_date <= today + timedelta(days=7)).order_by(Task.due_date), False),
+        ('sales activities (own, month)', activities.filter(
+            SalesActivity.owner_id == user_id,
+            SalesActivity.activity_date >= today.replace(day=1),
+            SalesActivity.activity_date <= today,
+        ).order_by(SalesActivity.activity_date.desc(), SalesActivity.created_at.desc(), SalesActivity.id.desc()),
+            False),
+        ('activity logs', ActivityLog.query.order_by(ActivityLog.created_at.desc()).limit(1000), True),
+        ('activity logs (date range)', ActivityLog.query.filter(
+            ActivityLog.created_at >= today - timedelta(days=30),
+        ).order_by(ActivityLog.created_at.desc()).limit(1000), True),
+        ('activity logs (user)', ActivityLog.query.filter(ActivityLog.user_id == user_id)
+            .order_by(ActivityLog.created_at.desc()).limit(1000), True),
+    ]
+
+
+def _plan_nodes(node):
+    yield node
+    for child in node.get('Plans', []):
+        yield from _plan_nodes(child)
+
+
+def _explain_postgresql(connection, sql):
+    connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+    plan = connection.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {sql}').scalar()
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    root = plan[0]['Plan']
+    nodes = list(_plan_nodes(root))
+    scans = sorted({
+        node['Relation Name'] for node in nodes
+        if node.get('Node Type') == 'Seq Scan' and node.get('Relation Name') in HOT_TABLES
+    })
+    sorts = [
+        f"{node['Node Type']} ({', '.join(node.get('Sort Key', []))})" for node in nodes
+        if node.get('Node Type') in ('Sort', 'Incremental Sort')
+    ]
+    return scans, sorts, json.dumps(root, indent=2)
+
+
+SQLITE_FULL_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+SQLITE_SORT = re.compile(r'^USE TEMP B-TREE FOR ')
+
+
+def _explain_sqlite(connection, sql):
+    rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}').all()
+    details = [row[-1] for row in rows]
+    scans = sorted({
+        match.group(1) for match in map(SQLITE_FULL_SCAN.match, details)
+        if match and match.group(1) in HOT_TABLES
+    })
+    sorts = [detail for detail in details if SQLITE_SORT.match(detail)]
+    return scans, sorts, '\n'.join(details)
+
+
+def explain_hot_queries(user_id=1):
+    """Return ``[(name, problems, plan_text)]`` for every hot query (needs an app context).
+
+    ``problems`` lists the sequentially scanned tables and, for index-ordered
+    queries, the sorts; it is empty when the query is served by indexes alone.
+    """
+    from extensions import db
+
+    dialect = db.engine.dialect
+    explain = _explain_postgresql if dialect.name == 'postgresql' else _explain_sqlite
+    results = []
+    with db.engine.connect() as connection:
+        for name, query, index_ordered in _hot_queries(user_id):
+            sql = str(query.statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+            transaction = connection.begin()
+            try:
+                scans, sorts, plan = explain(connection, sql)
+            finally:
+                transaction.rollback()
+            problems = [f'sequential scan on {table}' for table in scans]
+            if index_ordered:
+                problems.extend(f'sort: {sort}' for sort in sorts)
+            results.append((name, problems, plan))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--user-id', type=int, default=1, help='Owner id used for the per-user queries')
+    parser.add_argument('--verbose', action='store_true', help='Print every query plan')
+    args = parser.parse_args()
+
+    from app import create_app
+
+    app = create_app()
+    with app.app_context():
+        results = explain_hot_queries(args.user_id)
+
+    failures = 0
+    for name, problems, plan in results:
+        if problems:
+            failures += 1
+            print(f"[FAIL] {name}: {'; '.join(problems)}")
+        else:
+            print(f"[OK] {name}")
+        if args.verbose or problems:
+            print('    ' + plan.replace('\n', '\n    '))
+    print(f"{len(results) - failures}/{len(results)} hot queries use indexes")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())